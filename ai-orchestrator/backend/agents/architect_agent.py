@@ -5,6 +5,8 @@ import os
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
+from ha_registry import RegistryCache
+
 # We'll use the same LLM interface logic or a simplified one
 # Since we don't need the full "Tool" loop of BaseAgent, we'll keep this focused on generation.
 
@@ -210,7 +212,21 @@ class ArchitectAgent:
                 
                 if matches > 0:
                     matched_entities.add(eid)
-                    
+
+            # Rooms named in the instruction pull in their registry members,
+            # including entities whose ids never mention the room.
+            registry = getattr(self.ha_client, "registry", None)
+            if isinstance(registry, RegistryCache):
+                if hasattr(self.ha_client, "ensure_registries"):
+                    await self.ha_client.ensure_registries()
+                areas = set(registry.areas_mentioned(instruction))
+                if areas:
+                    known = set(all_ids)
+                    matched_entities.update(
+                        eid for eid, area_id in registry.entity_areas().items()
+                        if area_id in areas and eid in known
+                    )
+
             # 3. Refine / Filter
             # If we matched too many (e.g. "light" matches all lights), we might need to be stricter?
             # But the user might WANT "turn off all lights".
@@ -164,8 +164,7 @@ class BaseAgent(ABC):
                     "github": os.getenv("GITHUB_MODEL", "gpt-4o-mini"),
                     "foundry": os.getenv("FOUNDRY_MODEL", ""),
                 }.get(provider_name, self.model_name) or self.model_name
-            content = await asyncio.to_thread(
-                self.llm_provider.chat,
+            content = await self.llm_provider.achat(
                 selected_model,
                 [{"role": "user", "content": prompt}],
                 temperature=temperature,
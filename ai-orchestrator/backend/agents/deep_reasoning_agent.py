@@ -20,12 +20,15 @@ import asyncio
 import json
 import logging
 import os
+import time
 import uuid
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, AsyncIterator, Dict, List, Optional
 
 from external_mcp import ExternalMCPClient
+from fast_path import FastPathMatch, FastPathResolver
+from llm_cassette import wrap_backend
 from llm_providers import (
     PROVIDER_OLLAMA,
     make_tool_backend,
@@ -45,6 +48,7 @@ from plan_executor import (
 from reasoning_harness import (
     AnthropicBackend,
     HarnessResult,
+    HarnessStep,
     LLMBackend,
     OllamaToolBackend,
     REASONING_PROFILES,
@@ -52,11 +56,19 @@ from reasoning_harness import (
     ToolExecutionContext,
     ToolRegistry,
     ToolSemantics,
+    _result_ok,
     resolve_reasoning_profile,
 )
+from run_scheduler import RunScheduler
+from tool_cache import SharedReadCache
+from tool_selector import ToolSelector
 
 logger = logging.getLogger(__name__)
 
+# Discovery and the one safety-checked mutation route stay in every run's
+# tool block, whatever the goal's wording.
+CORE_TOOLS = ("ha_search_entities", "ha_get_state", "call_ha_service")
+
 
 SYSTEM_PROMPT = """You are the deep reasoning agent for a Home Assistant
 orchestrator. You coordinate observation and action across the entire
@@ -79,9 +91,13 @@ How you work
    inspect areas/devices, read history, then propose changes.
 4. When you need to combine dissimilar capabilities, call multiple
    tools in parallel in a single turn.
-5. Stop and return a final answer as soon as the goal is satisfied or
+5. Lists of similar records in tool results may arrive as
+   ``{"_table": "col|col\\nval|val"}``: the first line names the columns,
+   each further line is one record, ``\\|`` is a literal pipe and an
+   empty cell means no value.
+6. Stop and return a final answer as soon as the goal is satisfied or
    you need clarification. Do not call tools unnecessarily.
-6. Your final answer must summarise what you observed, what you
+7. Your final answer must summarise what you observed, what you
    changed (if anything), and any follow-up recommendations.
 
 Safety
@@ -156,6 +172,14 @@ class DeepReasoningAgent:
         tool_classifier: Optional[ToolClassifier] = None,
         default_mode: str = "auto",
         default_profile: str = "balanced",
+        read_cache_ttl_seconds: float = 30.0,
+        read_cache_max_entries: int = 512,
+        tool_top_k: int = 12,
+        run_queue_limits: Optional[Dict[str, int]] = None,
+        preempt_background_runs: bool = True,
+        llm_cassette: Optional[str] = None,
+        llm_cassette_mode: str = "record",
+        fast_path: bool = True,
     ) -> None:
         self.agent_id = agent_id
         self.name = name
@@ -176,7 +200,11 @@ class DeepReasoningAgent:
         self.tool_timeout_seconds = max(1.0, float(tool_timeout_seconds))
         self.reasoning_effort = reasoning_effort
         self.allow_direct_execute = allow_direct_execute
-        self._run_semaphore = asyncio.Semaphore(max(1, int(max_concurrent_runs)))
+        self.scheduler = RunScheduler(
+            max_concurrent=max_concurrent_runs,
+            queue_limits=run_queue_limits,
+            preempt_background=preempt_background_runs,
+        )
         self._active_runs = 0
         if default_mode not in ("auto", "plan", "execute"):
             raise ValueError("default_mode must be one of auto|plan|execute")
@@ -242,8 +270,40 @@ class DeepReasoningAgent:
                 model_for_provider,
             )
 
+        # A cassette records every model exchange, or replays a recording in
+        # place of the model, for deterministic benchmarks and regressions.
+        self.llm_cassette_mode: Optional[str] = None
+        if llm_cassette:
+            self.llm = wrap_backend(self.llm, llm_cassette, llm_cassette_mode)
+            self.llm_cassette_mode = llm_cassette_mode
+            logger.info("DeepReasoningAgent %s LLM cassette %s", llm_cassette_mode, llm_cassette)
+
+        # Native HA reads are cached across runs and evicted by the
+        # ``state_changed`` feed; without a client there is nothing to follow.
+        self.read_cache: Optional[SharedReadCache] = (
+            SharedReadCache(
+                max_entries=read_cache_max_entries,
+                ttl_seconds=read_cache_ttl_seconds,
+            )
+            if ha_client is not None and read_cache_ttl_seconds > 0
+            else None
+        )
+
+        # Each run sees the always-on core plus the ``tool_top_k`` tools that
+        # best match its goal; 0 sends the full tool block every time.
+        self.tool_selector: Optional[ToolSelector] = (
+            ToolSelector(top_k=tool_top_k, core=CORE_TOOLS) if tool_top_k > 0 else None
+        )
+
         self.registry = ToolRegistry()
         self._register_tools()
+        # Simple state queries and commands skip the model when the entity
+        # index resolves them unambiguously; see :mod:`fast_path`.
+        self.fast_path: Optional[FastPathResolver] = (
+            FastPathResolver(self.native_tools._entity_index, self.registry.names)
+            if fast_path and self.native_tools is not None
+            else None
+        )
         self.harness = ReasoningHarness(
             llm=self.llm,
             tools=self.registry,
@@ -253,6 +313,8 @@ class DeepReasoningAgent:
             max_total_tool_calls=max_total_tool_calls,
             max_run_seconds=max_run_seconds,
             llm_timeout_seconds=llm_timeout_seconds,
+            shared_cache=self.read_cache,
+            tool_selector=self.tool_selector,
         )
 
     # ------------------------------------------------------------------
@@ -293,6 +355,7 @@ class DeepReasoningAgent:
                     impact_level="read",
                     timeout_seconds=self.tool_timeout_seconds,
                     max_retries=2,
+                    shared_cache=True,
                 ),
                 close_schema=True,
             )
@@ -370,7 +433,11 @@ class DeepReasoningAgent:
             read_only=not cls.is_mutating,
             destructive=cls.impact_level == "high",
             idempotent=(not cls.is_mutating) or idempotent_mutation,
-            parallel_safe=not cls.is_mutating,
+            # Idempotent low/medium-impact mutations may run side by side when
+            # they name disjoint entities (see ``_plan_batch_stages``).
+            parallel_safe=(not cls.is_mutating) or (
+                idempotent_mutation and cls.impact_level != "high"
+            ),
             impact_level=cls.impact_level,
             timeout_seconds=self.tool_timeout_seconds,
             max_retries=2 if not cls.is_mutating else 0,
@@ -414,6 +481,9 @@ class DeepReasoningAgent:
         profile: Optional[str] = None,
         run_id: Optional[str] = None,
         event_callback: Optional[Any] = None,
+        stream_tokens: bool = False,
+        priority: str = "interactive",
+        fast_path: bool = False,
     ) -> HarnessResult:
         """Run a reasoning goal.
 
@@ -423,6 +493,18 @@ class DeepReasoningAgent:
             :class:`PlanProposal` stamped on the result.
           * ``"auto"``     — plan first; auto-execute if no high-impact
             actions, else queue plan for approval.
+
+        ``stream_tokens`` forwards model text deltas to ``event_callback``
+        as ``token`` events. They are not broadcast to other listeners.
+
+        ``priority`` is the :mod:`run_scheduler` class the run queues in
+        (``interactive`` | ``prompt`` | ``trigger`` | ``background``).
+        Raises :class:`RunRejected` when that class's queue is full.
+
+        ``fast_path`` lets :mod:`fast_path` answer a simple state query or
+        command without the model (``stopped_reason="fast_path"``). The
+        calls still pass through the registry and the mode's approval
+        policy; anything the resolver is unsure of runs the harness.
         """
         effective_mode = (mode or self.default_mode).lower()
         if effective_mode not in ("auto", "plan", "execute"):
@@ -441,24 +523,21 @@ class DeepReasoningAgent:
             enriched = {"run_id": run_id, **event}
             if event_callback is not None:
                 await event_callback(enriched)
-            await self._on_event(enriched)
+            if event.get("type") != "token":
+                await self._on_event(enriched)
 
-        async with self._run_semaphore:
+        async with self.scheduler.slot(priority) as lease:
             self._active_runs += 1
             self.status = "thinking"
             self.last_run_at = datetime.now()
             try:
-                # ---- D2: pre-flight memory recall ------------------------
-                recalled = await self._recall(goal)
-                recalled_payload = [_recall_to_dict(r) for r in recalled]
-                await emit({"type": "recall", "recalled": recalled_payload})
-                recall_block = _format_recall(recalled)
-                base_prompt = SYSTEM_PROMPT
-                if effective_mode in ("plan", "auto"):
-                    base_prompt = base_prompt + "\n\n" + _PLAN_MODE_NOTE
-                effective_prompt = (
-                    base_prompt + "\n\n" + recall_block if recall_block else base_prompt
-                )
+                await emit({
+                    "type": "scheduled",
+                    "priority": priority,
+                    "queue_wait_ms": lease.wait_ms,
+                })
+                if self.read_cache is not None and not self.read_cache.live:
+                    await self.read_cache.attach(self.ha_client)
 
                 # ---- E1+E2: per-run dry-run interceptor -----------------
                 interceptor: Optional[DryRunInterceptor] = None
@@ -470,20 +549,48 @@ class DeepReasoningAgent:
                         semantics_resolver=self.registry.semantics,
                     )
 
-                result = await self.harness.run(
-                    goal=goal,
-                    context=context,
-                    run_id=run_id,
-                    mode=effective_mode,
-                    profile=effective_profile,
-                    system_prompt=effective_prompt,
-                    on_event=emit,
-                    tool_call_interceptor=interceptor,
-                )
+                fast: Optional[FastPathMatch] = None
+                result: Optional[HarnessResult] = None
+                if fast_path and self.fast_path is not None and not context:
+                    fast = await self.fast_path.match(goal)
+                    if fast is not None:
+                        result = await self._run_fast_path(
+                            fast, run_id, effective_mode, interceptor, emit,
+                        )
+                        if result is None:
+                            fast = None
+
+                recalled_payload: List[Dict[str, Any]] = []
+                if result is None:
+                    # ---- D2: pre-flight memory recall --------------------
+                    recalled = await self._recall(goal)
+                    recalled_payload = [_recall_to_dict(r) for r in recalled]
+                    await emit({"type": "recall", "recalled": recalled_payload})
+                    recall_block = _format_recall(recalled)
+                    base_prompt = SYSTEM_PROMPT
+                    if effective_mode in ("plan", "auto"):
+                        base_prompt = base_prompt + "\n\n" + _PLAN_MODE_NOTE
+                    # The recall block changes per goal; it goes in its own
+                    # system message after the fixed prompt so provider prompt
+                    # caches can reuse the fixed prefix across runs.
+                    result = await self.harness.run(
+                        goal=goal,
+                        context=context,
+                        run_id=run_id,
+                        mode=effective_mode,
+                        profile=effective_profile,
+                        system_prompt=base_prompt,
+                        system_context=recall_block or None,
+                        on_event=emit,
+                        tool_call_interceptor=interceptor,
+                        stream_tokens=stream_tokens,
+                        checkpoint=lease.checkpoint,
+                    )
                 setattr(result, "profile", effective_profile)
                 self.last_result = result
                 self._persist(goal, result, run_id=run_id)
-                episode_id = await self._remember_episode(goal, result)
+                # A templated answer carries no reasoning worth recalling.
+                episode_id = None if fast else await self._remember_episode(goal, result)
                 if episode_id:
                     self._run_to_episode[run_id] = episode_id
                     if len(self._run_to_episode) > 1000:
@@ -542,6 +649,12 @@ class DeepReasoningAgent:
                     elif self.plan_store is not None:
                         self.plan_store.save(plan)
 
+                if fast is not None and self.fast_path is not None:
+                    if fast.mutating and interceptor is not None:
+                        result.answer = self.fast_path.command_answer(
+                            fast, plan.to_dict() if plan else None, execution_results,
+                        )
+                    result.duration_ms = int(self.fast_path.record_hit(fast))
                 result.run_id = run_id
                 setattr(result, "episode_id", self._run_to_episode.get(run_id))
                 setattr(result, "recalled", recalled_payload)
@@ -550,6 +663,9 @@ class DeepReasoningAgent:
                 setattr(result, "plan", plan.to_dict() if plan else None)
                 setattr(result, "executed_inline", executed_inline)
                 setattr(result, "execution_results", execution_results)
+                setattr(result, "priority", priority)
+                setattr(result, "queue_wait_ms", lease.wait_ms)
+                setattr(result, "paused_ms", lease.paused_ms)
                 await emit({"type": "plan", "plan": plan.to_dict() if plan else None})
                 return result
             finally:
@@ -564,6 +680,7 @@ class DeepReasoningAgent:
         *,
         mode: Optional[str] = None,
         profile: Optional[str] = None,
+        priority: str = "interactive",
     ) -> AsyncIterator[Dict[str, Any]]:
         """Run a reasoning goal and yield incremental events.
 
@@ -571,9 +688,19 @@ class DeepReasoningAgent:
         types are:
 
         * ``start`` — once, with ``{"goal", "mode", "run_id"}``
+        * ``scheduled`` — once the run holds a scheduler slot, with
+          ``{"priority", "queue_wait_ms"}``
         * ``recall`` — once after memory recall, with ``{"recalled": [...]}``
+        * ``tool_selection`` — when the tool block was pruned for the goal,
+          and again (``widened``) if the model asked for a pruned tool
+        * ``token`` — model text deltas as they are generated, with
+          ``{"iteration", "delta"}``; tool calls are never streamed
         * ``thought`` — per harness iteration, with operator-facing model output
         * ``tool_call`` — for each executed tool call
+        * ``compaction`` — when old tool results were digested to keep the
+          run inside its context budget
+        * ``paused`` — a background run yielded its slot to higher-priority
+          work, with ``{"iteration", "paused_ms"}``
         * ``plan`` — once after the run, with the proposed plan dict
           (``None`` in execute mode)
         * ``final`` — once at the end, with the full result payload
@@ -606,6 +733,8 @@ class DeepReasoningAgent:
                     profile=effective_profile,
                     run_id=run_id,
                     event_callback=_push,
+                    stream_tokens=True,
+                    priority=priority,
                 )
                 plan = getattr(result, "plan", None)
                 await _push({
@@ -626,6 +755,7 @@ class DeepReasoningAgent:
                         "usage": result.usage,
                         "stopped_reason": result.stopped_reason,
                         "duration_ms": result.duration_ms,
+                        "queue_wait_ms": getattr(result, "queue_wait_ms", 0),
                         "executed_inline": getattr(result, "executed_inline", False),
                         "execution_results": getattr(result, "execution_results", None),
                         "plan": plan,
@@ -656,6 +786,67 @@ class DeepReasoningAgent:
                     pass
 
     # ------------------------------------------------------------------
+    async def _run_fast_path(
+        self,
+        fast: FastPathMatch,
+        run_id: str,
+        mode: str,
+        interceptor: Optional[DryRunInterceptor],
+        emit: Any,
+    ) -> Optional[HarnessResult]:
+        """Make a fast-path match's tool calls without the model.
+
+        Returns None, handing the goal to the harness, when a read fails.
+        """
+        assert self.fast_path is not None
+        call = interceptor.call if interceptor is not None else self.registry.call
+        execution_context = ToolExecutionContext(run_id=run_id, mode=mode)
+        await emit({
+            "type": "fast_path",
+            "intent": fast.intent.kind,
+            "entities": [e.entity_id for e in fast.entities],
+        })
+        step = HarnessStep(iteration=1, thought=fast.describe())
+        rows: List[Dict[str, Any]] = []
+        for sequence, (name, arguments) in enumerate(fast.calls, 1):
+            t0 = time.monotonic()
+            result = await call(name, arguments, execution_context)
+            call_id = f"fast-{sequence}"
+            step.tool_calls.append({"id": call_id, "name": name, "arguments": arguments})
+            step.tool_results.append({"id": call_id, "name": name, "result": result})
+            rows.append({
+                "sequence": sequence, "tool_name": name, "arguments": arguments,
+                "result": result, "ok": _result_ok(result),
+                "duration_ms": int((time.monotonic() - t0) * 1000),
+            })
+            await emit({
+                "type": "tool_call", "iteration": 1, "name": name,
+                "arguments": arguments, "result": result,
+            })
+        if not fast.mutating and not rows[0]["ok"]:
+            self.fast_path.decline("tool_error")
+            return None
+
+        if not fast.mutating:
+            answer = self.fast_path.read_answer(fast, rows[0]["result"])
+        elif interceptor is None:
+            # Execute mode fired the calls directly.
+            answer = self.fast_path.command_answer(fast, None, rows)
+        else:
+            # Replaced once the plan has been executed or queued.
+            answer = fast.describe()
+        successful = sum(1 for row in rows if row["ok"])
+        return HarnessResult(
+            answer=answer,
+            trace=[step],
+            iterations=0,
+            tool_calls=len(rows),
+            stopped_reason="fast_path",
+            requested_tool_calls=len(rows),
+            successful_tool_calls=successful,
+            failed_tool_calls=len(rows) - successful,
+        )
+
     async def _recall(self, goal: str) -> List[RecalledEpisode]:
         if not self.memory_store or not self.memory_store.enabled or self.recall_k <= 0:
             return []
@@ -912,9 +1103,14 @@ class DeepReasoningAgent:
             "profiles": profiles,
             "allow_direct_execute": self.allow_direct_execute,
             "active_runs": self._active_runs,
+            "scheduler": self.scheduler.info(),
             "max_iterations": self.harness.max_iterations,
             "max_total_tool_calls": self.harness.max_total_tool_calls,
             "max_run_seconds": self.harness.max_run_seconds,
+            "read_cache": self.read_cache.info() if self.read_cache is not None else None,
+            "tool_top_k": self.tool_selector.top_k if self.tool_selector is not None else 0,
+            "llm_cassette": self.llm_cassette_mode,
+            "fast_path": self.fast_path.info() if self.fast_path is not None else None,
         }
 
 
@@ -0,0 +1,6 @@
+"""Local Home Assistant simulator and throughput benchmarks.
+
+``ha_simulator`` speaks enough of the HA WebSocket API to drive
+:class:`HAWebSocketClient` without a real Home Assistant. ``suite`` runs
+the load-generation benchmarks on top of it.
+"""
@@ -0,0 +1,546 @@
+"""Stand-in Home Assistant WebSocket server for benchmarks and tests.
+
+Implements the slice of the HA WebSocket API that the add-on uses:
+auth, ``supported_features`` (message coalescing), ``get_states``,
+``get_services``, ``call_service``, ``subscribe_events`` /
+``unsubscribe_events``, ``subscribe_entities`` (compressed diffs) and the
+area/device/entity registry commands. You can configure the entity
+count, the attribute payload size, a background event rate and a
+per-command latency.
+
+Run standalone with::
+
+    python -m benchmarks.ha_simulator --entities 5000 --event-rate 20 --port 8123
+
+then point the add-on at ``http://127.0.0.1:8123`` with token ``sim-token``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import random
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set
+
+from websockets.asyncio.server import ServerConnection, serve
+from websockets.exceptions import ConnectionClosed
+
+logger = logging.getLogger(__name__)
+
+HA_VERSION = "2026.10.0"
+DEFAULT_TOKEN = "sim-token"
+
+ROOMS = (
+    "kitchen", "living_room", "bedroom", "office",
+    "hallway", "bathroom", "garage", "garden",
+)
+# (domain, kind, device_class, unit, initial state)
+_KINDS = (
+    ("light", "ceiling", None, None, "off"),
+    ("switch", "plug", None, None, "off"),
+    ("sensor", "temperature", "temperature", "°C", "21.0"),
+    ("sensor", "humidity", "humidity", "%", "45"),
+    ("binary_sensor", "motion", "motion", None, "off"),
+    ("binary_sensor", "door", "door", None, "off"),
+    ("climate", "thermostat", None, None, "heat"),
+    ("lock", "front", None, None, "locked"),
+)
+SERVICES = {
+    "light": ("turn_on", "turn_off", "toggle"),
+    "switch": ("turn_on", "turn_off", "toggle"),
+    "climate": ("set_temperature", "set_hvac_mode", "turn_on", "turn_off"),
+    "lock": ("lock", "unlock"),
+    "homeassistant": ("turn_on", "turn_off", "toggle"),
+}
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def _ts(iso: str) -> float:
+    return datetime.fromisoformat(iso).timestamp()
+
+
+def _room(index: int) -> str:
+    return ROOMS[(index // len(_KINDS)) % len(ROOMS)]
+
+
+def generate_states(
+    count: int,
+    *,
+    attribute_bytes: int = 0,
+    seed: int = 0,
+) -> List[Dict[str, Any]]:
+    """Deterministic mix of lights, switches, sensors, climate and locks."""
+    rng = random.Random(seed)
+    now = _iso(time.time())
+    padding = "x" * attribute_bytes
+    states = []
+    for i in range(count):
+        domain, kind, device_class, unit, state = _KINDS[i % len(_KINDS)]
+        room = _room(i)
+        attributes: Dict[str, Any] = {
+            "friendly_name": f"{room.replace('_', ' ').title()} {kind.title()} {i}",
+        }
+        if device_class:
+            attributes["device_class"] = device_class
+        if unit:
+            attributes["unit_of_measurement"] = unit
+        if kind == "temperature":
+            state = f"{rng.uniform(16.0, 24.0):.1f}"
+        elif kind == "humidity":
+            state = str(rng.randint(30, 60))
+        elif domain == "climate":
+            attributes.update(current_temperature=20.0, temperature=21.0, hvac_modes=["off", "heat"])
+        if padding:
+            attributes["sim_payload"] = padding
+        states.append({
+            "entity_id": f"{domain}.{room}_{kind}_{i}",
+            "state": state,
+            "attributes": attributes,
+            "last_changed": now,
+            "last_updated": now,
+            "context": {"id": uuid.uuid4().hex, "parent_id": None, "user_id": None},
+        })
+    return states
+
+
+def _compressed_state(state: Dict[str, Any]) -> Dict[str, Any]:
+    out = {
+        "s": state["state"],
+        "a": state["attributes"],
+        "c": state["context"]["id"],
+        "lc": _ts(state["last_changed"]),
+    }
+    if state["last_updated"] != state["last_changed"]:
+        out["lu"] = _ts(state["last_updated"])
+    return out
+
+
+def _compressed_diff(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    plus: Dict[str, Any] = {"c": new["context"]["id"]}
+    if old["state"] != new["state"]:
+        plus["s"] = new["state"]
+        plus["lc"] = _ts(new["last_changed"])
+    else:
+        plus["lu"] = _ts(new["last_updated"])
+    old_attrs, new_attrs = old["attributes"], new["attributes"]
+    changed = {k: v for k, v in new_attrs.items() if old_attrs.get(k, object()) != v}
+    if changed:
+        plus["a"] = changed
+    diff: Dict[str, Any] = {"+": plus}
+    removed = [k for k in old_attrs if k not in new_attrs]
+    if removed:
+        diff["-"] = {"a": removed}
+    return diff
+
+
+def _result(msg_id: Any, result: Any = None) -> Dict[str, Any]:
+    return {"id": msg_id, "type": "result", "success": True, "result": result}
+
+
+def _error(msg_id: Any, code: str, message: str) -> Dict[str, Any]:
+    return {
+        "id": msg_id,
+        "type": "result",
+        "success": False,
+        "error": {"code": code, "message": message},
+    }
+
+
+class _Connection:
+    """One authenticated client: its subscriptions and outbound queue."""
+
+    def __init__(self, ws: ServerConnection) -> None:
+        self.ws = ws
+        self.coalesce = False
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        self.event_subs: Dict[int, Optional[str]] = {}
+        self.entity_subs: Dict[int, Optional[Set[str]]] = {}
+
+    def send(self, message: Dict[str, Any]) -> None:
+        self.outbox.put_nowait(message)
+
+    async def writer(self) -> None:
+        # Like HA, flush whatever queued up together as one JSON array
+        # frame once the client opted in to coalescing.
+        while True:
+            batch = [await self.outbox.get()]
+            while not self.outbox.empty():
+                batch.append(self.outbox.get_nowait())
+            if self.coalesce and len(batch) > 1:
+                await self.ws.send(json.dumps(batch))
+            else:
+                for message in batch:
+                    await self.ws.send(json.dumps(message))
+
+
+class HASimulator:
+    """In-process HA WebSocket server with synthetic entities."""
+
+    def __init__(
+        self,
+        entities: int = 1000,
+        *,
+        attribute_bytes: int = 0,
+        event_rate: float = 0.0,
+        latency_ms: float = 0.0,
+        token: str = DEFAULT_TOKEN,
+        seed: int = 0,
+    ) -> None:
+        self.token = token
+        self.event_rate = event_rate
+        self.latency = latency_ms / 1000.0
+        generated = generate_states(entities, attribute_bytes=attribute_bytes, seed=seed)
+        self.states: Dict[str, Dict[str, Any]] = {s["entity_id"]: s for s in generated}
+        self.areas: Dict[str, str] = {s["entity_id"]: _room(i) for i, s in enumerate(generated)}
+        self.stats = {"connections": 0, "commands": 0, "events_sent": 0, "state_changes": 0}
+        self.host = "127.0.0.1"
+        self.port: Optional[int] = None
+        self._rng = random.Random(seed)
+        self._connections: Set[_Connection] = set()
+        self._server: Any = None
+        self._event_task: Optional[asyncio.Task] = None
+        self._commands: Dict[str, Callable[[_Connection, Dict[str, Any]], None]] = {
+            "supported_features": self._cmd_supported_features,
+            "ping": self._cmd_ping,
+            "get_states": self._cmd_get_states,
+            "get_services": self._cmd_get_services,
+            "call_service": self._cmd_call_service,
+            "subscribe_events": self._cmd_subscribe_events,
+            "unsubscribe_events": self._cmd_unsubscribe_events,
+            "subscribe_entities": self._cmd_subscribe_entities,
+            "config/area_registry/list": self._cmd_area_registry,
+            "config/device_registry/list": self._cmd_device_registry,
+            "config/entity_registry/list": self._cmd_entity_registry,
+            "config/entity_registry/get": self._cmd_entity_registry_get,
+        }
+
+    @property
+    def url(self) -> str:
+        """Base URL in the form ``HAWebSocketClient`` expects."""
+        return f"http://{self.host}:{self.port}"
+
+    # ---- lifecycle --------------------------------------------------------
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        self._server = await serve(self._handle, host, port, max_size=None)
+        self.host = host
+        self.port = self._server.sockets[0].getsockname()[1]
+        if self.event_rate > 0:
+            self._event_task = asyncio.create_task(self._event_loop())
+        logger.info("HA simulator listening on %s (%d entities)", self.url, len(self.states))
+        return self.url
+
+    async def stop(self) -> None:
+        if self._event_task is not None:
+            self._event_task.cancel()
+            try:
+                await self._event_task
+            except asyncio.CancelledError:
+                pass
+            self._event_task = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> "HASimulator":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        await self.stop()
+
+    # ---- state changes ----------------------------------------------------
+    def set_state(
+        self,
+        entity_id: str,
+        state: Any,
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Dict[str, Any]:
+        """Change (or create) an entity and notify subscribers."""
+        old = self.states.get(entity_id)
+        now = _iso(time.time())
+        merged = dict(old["attributes"]) if old else {}
+        merged.update(attributes or {})
+        state = str(state)
+        new = {
+            "entity_id": entity_id,
+            "state": state,
+            "attributes": merged,
+            "last_changed": old["last_changed"] if old and old["state"] == state else now,
+            "last_updated": now,
+            "context": {"id": uuid.uuid4().hex, "parent_id": None, "user_id": None},
+        }
+        self.states[entity_id] = new
+        self.stats["state_changes"] += 1
+        self._broadcast(entity_id, old, new)
+        return new
+
+    def remove_entity(self, entity_id: str) -> None:
+        old = self.states.pop(entity_id, None)
+        if old is not None:
+            self._broadcast(entity_id, old, None)
+
+    def emit_changes(self, count: int, entity_ids: Optional[Iterable[str]] = None) -> List[str]:
+        """Flip ``count`` entities (sensors nudge, everything else toggles)."""
+        pool = list(entity_ids) if entity_ids is not None else list(self.states)
+        changed = []
+        for _ in range(count):
+            entity_id = self._rng.choice(pool)
+            current = self.states[entity_id]["state"]
+            try:
+                value = f"{float(current) + self._rng.choice((-0.1, 0.1)):.1f}"
+            except ValueError:
+                value = "off" if current == "on" else "on"
+            self.set_state(entity_id, value)
+            changed.append(entity_id)
+        return changed
+
+    def _broadcast(
+        self,
+        entity_id: str,
+        old: Optional[Dict[str, Any]],
+        new: Optional[Dict[str, Any]],
+    ) -> None:
+        event = {
+            "event_type": "state_changed",
+            "data": {"entity_id": entity_id, "old_state": old, "new_state": new},
+            "origin": "LOCAL",
+            "time_fired": _iso(time.time()),
+            "context": (new or old)["context"],
+        }
+        compressed: Optional[Dict[str, Any]] = None
+        for conn in list(self._connections):
+            for sub_id, event_type in conn.event_subs.items():
+                if event_type in (None, "state_changed"):
+                    conn.send({"id": sub_id, "type": "event", "event": event})
+                    self.stats["events_sent"] += 1
+            for sub_id, wanted in conn.entity_subs.items():
+                if wanted is not None and entity_id not in wanted:
+                    continue
+                if compressed is None:
+                    if new is None:
+                        compressed = {"r": [entity_id]}
+                    elif old is None:
+                        compressed = {"a": {entity_id: _compressed_state(new)}}
+                    else:
+                        compressed = {"c": {entity_id: _compressed_diff(old, new)}}
+                conn.send({"id": sub_id, "type": "event", "event": compressed})
+                self.stats["events_sent"] += 1
+
+    async def _event_loop(self) -> None:
+        sensors = [e for e in self.states if e.startswith("sensor.")] or list(self.states)
+        tick = 0.05
+        carry = 0.0
+        while True:
+            await asyncio.sleep(tick)
+            carry += self.event_rate * tick
+            burst = int(carry)
+            carry -= burst
+            if burst:
+                self.emit_changes(burst, sensors)
+
+    # ---- connection handling ----------------------------------------------
+    async def _handle(self, ws: ServerConnection) -> None:
+        await ws.send(json.dumps({"type": "auth_required", "ha_version": HA_VERSION}))
+        try:
+            auth = json.loads(await ws.recv())
+        except ConnectionClosed:
+            return
+        if auth.get("type") != "auth" or auth.get("access_token") != self.token:
+            await ws.send(json.dumps({
+                "type": "auth_invalid",
+                "message": "Invalid access token or password",
+            }))
+            return
+        await ws.send(json.dumps({"type": "auth_ok", "ha_version": HA_VERSION}))
+
+        conn = _Connection(ws)
+        self._connections.add(conn)
+        self.stats["connections"] += 1
+        writer = asyncio.create_task(conn.writer())
+        delayed: Set[asyncio.Task] = set()
+        try:
+            async for raw in ws:
+                message = json.loads(raw)
+                self.stats["commands"] += 1
+                if self.latency:
+                    task = asyncio.create_task(self._delayed(conn, message))
+                    delayed.add(task)
+                    task.add_done_callback(delayed.discard)
+                else:
+                    self._command(conn, message)
+        except ConnectionClosed:
+            pass
+        finally:
+            self._connections.discard(conn)
+            writer.cancel()
+            for task in delayed:
+                task.cancel()
+
+    async def _delayed(self, conn: _Connection, message: Dict[str, Any]) -> None:
+        await asyncio.sleep(self.latency)
+        self._command(conn, message)
+
+    def _command(self, conn: _Connection, message: Dict[str, Any]) -> None:
+        msg_id = message.get("id")
+        handler = self._commands.get(message.get("type"))
+        if handler is None:
+            conn.send(_error(msg_id, "unknown_command", "Unknown command."))
+            return
+        try:
+            handler(conn, message)
+        except Exception as exc:
+            conn.send(_error(msg_id, "unknown_error", str(exc)))
+
+    # ---- commands ---------------------------------------------------------
+    def _cmd_supported_features(self, conn: _Connection, msg: Dict[str, Any]) -> None:
+        conn.coalesce = bool((msg.get("features") or {}).get("coalesce_messages"))
+        conn.send(_result(msg["id"]))
+
+    def _cmd_ping(self, conn: _Connection, msg: Dict[str, Any]) -> None:
+        conn.send({"id": msg["id"], "type": "pong"})
+
+    def _cmd_get_states(self, conn: _Connection, msg: Dict[str, Any]) -> None:
+        conn.send(_result(msg["id"], list(self.states.values())))
+
+    def _cmd_get_services(self, conn: _Connection, msg: Dict[str, Any]) -> None:
+        conn.send(_result(msg["id"], {
+            domain: {
+                service: {"name": service.replace("_", " ").title(), "description": "", "fields": {}}
+                for service in services
+            }
+            for domain, services in SERVICES.items()
+        }))
+
+    def _cmd_call_service(self, conn: _Connection, msg: Dict[str, Any]) -> None:
+        domain, service = msg.get("domain"), msg.get("service")
+        if service not in SERVICES.get(domain, ()):
+            conn.send(_error(msg["id"], "not_found", f"Service {domain}.{service} not found."))
+            return
+        data = dict(msg.get("service_data") or {})
+        targets = data.pop("entity_id", None) or (msg.get("target") or {}).get("entity_id") or []
+        if isinstance(targets, str):
+            targets = [targets]
+        for entity_id in targets:
+            current = self.states.get(entity_id)
+            if current is None:
+                continue
+            value, attributes = _service_effect(service, current, data)
+            self.set_state(entity_id, value, attributes)
+        conn.send(_result(msg["id"], {"context": {"id": uuid.uuid4().hex}, "response": None}))
+
+    def _cmd_subscribe_events(self, conn: _Connection, msg: Dict[str, Any]) -> None:
+        conn.event_subs[msg["id"]] = msg.get("event_type")
+        conn.send(_result(msg["id"]))
+
+    def _cmd_unsubscribe_events(self, conn: _Connection, msg: Dict[str, Any]) -> None:
+        sub_id = msg.get("subscription")
+        if sub_id in conn.event_subs:
+            del conn.event_subs[sub_id]
+        elif sub_id in conn.entity_subs:
+            del conn.entity_subs[sub_id]
+        else:
+            conn.send(_error(msg["id"], "not_found", "Subscription not found."))
+            return
+        conn.send(_result(msg["id"]))
+
+    def _cmd_subscribe_entities(self, conn: _Connection, msg: Dict[str, Any]) -> None:
+        wanted = set(msg["entity_ids"]) if msg.get("entity_ids") else None
+        conn.entity_subs[msg["id"]] = wanted
+        conn.send(_result(msg["id"]))
+        conn.send({"id": msg["id"], "type": "event", "event": {"a": {
+            entity_id: _compressed_state(state)
+            for entity_id, state in self.states.items()
+            if wanted is None or entity_id in wanted
+        }}})
+
+    def _cmd_area_registry(self, conn: _Connection, msg: Dict[str, Any]) -> None:
+        conn.send(_result(msg["id"], [
+            {"area_id": room, "name": room.replace("_", " ").title(), "aliases": [], "floor_id": None}
+            for room in ROOMS
+        ]))
+
+    def _cmd_device_registry(self, conn: _Connection, msg: Dict[str, Any]) -> None:
+        conn.send(_result(msg["id"], []))
+
+    def _entity_entry(self, entity_id: str) -> Dict[str, Any]:
+        return {"entity_id": entity_id, "area_id": self.areas.get(entity_id), "device_id": None}
+
+    def _cmd_entity_registry(self, conn: _Connection, msg: Dict[str, Any]) -> None:
+        conn.send(_result(msg["id"], [self._entity_entry(e) for e in self.states]))
+
+    def _cmd_entity_registry_get(self, conn: _Connection, msg: Dict[str, Any]) -> None:
+        entity_id = msg.get("entity_id")
+        if entity_id not in self.states:
+            conn.send(_error(msg["id"], "not_found", "Entity not found."))
+            return
+        conn.send(_result(msg["id"], self._entity_entry(entity_id)))
+
+
+def _service_effect(service: str, state: Dict[str, Any], data: Dict[str, Any]) -> tuple:
+    """New state value and attribute updates for a simulated service call."""
+    current = state["state"]
+    if service == "turn_on":
+        if "hvac_modes" in state["attributes"]:
+            return "heat", None
+        return "on", ({"brightness": data["brightness"]} if "brightness" in data else None)
+    if service == "turn_off":
+        return "off", None
+    if service == "toggle":
+        return ("off" if current == "on" else "on"), None
+    if service in ("lock", "unlock"):
+        return f"{service}ed", None
+    if service == "set_temperature":
+        return current, {"temperature": data.get("temperature")}
+    if service == "set_hvac_mode":
+        return data.get("hvac_mode", current), None
+    return current, None
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    sim = HASimulator(
+        args.entities,
+        attribute_bytes=args.attribute_bytes,
+        event_rate=args.event_rate,
+        latency_ms=args.latency_ms,
+        token=args.token,
+        seed=args.seed,
+    )
+    await sim.start(args.host, args.port)
+    print(f"HA simulator on {sim.url} (token {args.token!r}, {len(sim.states)} entities)")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await sim.stop()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Local Home Assistant WebSocket simulator")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8123)
+    parser.add_argument("--entities", type=int, default=1000)
+    parser.add_argument("--attribute-bytes", type=int, default=0,
+                        help="extra attribute payload per entity")
+    parser.add_argument("--event-rate", type=float, default=0.0,
+                        help="background state changes per second")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="delay before answering each command")
+    parser.add_argument("--token", default=DEFAULT_TOKEN)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
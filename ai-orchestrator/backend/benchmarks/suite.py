@@ -0,0 +1,558 @@
+"""Load-generation benchmarks against the local HA simulator.
+
+Each benchmark times one operation and reports ops/s, p50/p99 latency
+and process RSS. It covers :class:`HAWebSocketClient` reads, service
+calls and event fan-out, the :class:`NativeHATools` discovery tools,
+:class:`TriggerRegistry` state triggers, a :class:`DeepReasoningAgent`
+run driven by a scripted LLM, and the :class:`ReasoningHarness` loop
+and per-tool-call dispatch overhead::
+
+    python -m benchmarks.suite --entities 100,5000 --json bench.json
+    python -m benchmarks.suite --baseline bench.json --max-regression 0.25
+
+With ``--baseline``, the run exits non-zero when a benchmark's ops/s
+falls by more than ``--max-regression`` relative to the baseline. CI
+can use that exit code to catch regressions.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.ha_simulator import DEFAULT_TOKEN, HASimulator
+from ha_client import HAWebSocketClient
+from native_ha_tools import NativeHATools
+from reasoning_harness import (
+    LLMResponse,
+    ReasoningHarness,
+    ToolCall,
+    ToolExecutionContext,
+    ToolRegistry,
+    ToolSemantics,
+    expand_tables,
+)
+from triggers import TriggerRegistry, TriggerSpec, TriggerStore
+
+logger = logging.getLogger(__name__)
+
+
+# ---- measurement ----------------------------------------------------------
+@dataclass
+class BenchResult:
+    name: str
+    entities: int
+    ops: int
+    seconds: float
+    p50_ms: float
+    p99_ms: float
+    rss_mb: float
+    extra: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def ops_per_s(self) -> float:
+        return self.ops / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.entities}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "ops_per_s": round(self.ops_per_s, 2)}
+
+
+def rss_mb() -> float:
+    """Current resident set size (peak RSS where /proc is unavailable)."""
+    try:
+        with open("/proc/self/status", encoding="ascii") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    try:
+        import resource
+    except ImportError:  # Windows
+        return 0.0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024.0 * 1024.0) if sys.platform == "darwin" else peak / 1024.0
+
+
+def percentile(samples: Sequence[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+async def measure(
+    name: str,
+    entities: int,
+    op: Callable[[], Awaitable[Any]],
+    *,
+    iterations: int,
+    warmup: int = 3,
+    concurrency: int = 1,
+) -> BenchResult:
+    """Run ``op`` ``iterations`` times across ``concurrency`` workers."""
+    for _ in range(warmup):
+        await op()
+    latencies: List[float] = []
+    remaining = iterations
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            t0 = time.perf_counter()
+            await op()
+            latencies.append(time.perf_counter() - t0)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+    elapsed = time.perf_counter() - started
+    return BenchResult(
+        name=name,
+        entities=entities,
+        ops=len(latencies),
+        seconds=elapsed,
+        p50_ms=percentile(latencies, 0.50) * 1000.0,
+        p99_ms=percentile(latencies, 0.99) * 1000.0,
+        rss_mb=rss_mb(),
+        extra={"concurrency": concurrency} if concurrency > 1 else {},
+    )
+
+
+# ---- scripted agent -------------------------------------------------------
+class ScriptedLLM:
+    """Deterministic tool-calling LLM: search, read one state, answer."""
+
+    name = "scripted"
+    model = "scripted"
+
+    def __init__(self, query: str = "kitchen") -> None:
+        self.query = query
+        self.calls = 0
+
+    async def chat(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> LLMResponse:
+        self.calls += 1
+        results = [m for m in messages if m.get("role") == "tool"]
+        if not results:
+            return LLMResponse(content="", tool_calls=[ToolCall(
+                id="call_search", name="ha_search_entities",
+                arguments={"query": self.query, "limit": 5},
+            )])
+        if len(results) == 1:
+            try:
+                found = expand_tables(json.loads(results[0]["content"]))
+                entity_id = found["matches"][0]["entity_id"]
+            except (KeyError, IndexError, TypeError, ValueError):
+                return LLMResponse(content="Nothing matched.")
+            return LLMResponse(content="", tool_calls=[ToolCall(
+                id="call_state", name="ha_get_state", arguments={"entity_id": entity_id},
+            )])
+        return LLMResponse(content=f"{self.query} looks fine.")
+
+
+class LongRunLLM:
+    """Reads one bulky page per turn for ``turns`` turns, then answers."""
+
+    name = "long-run"
+
+    def __init__(self, turns: int) -> None:
+        self.turns = turns
+
+    async def chat(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> LLMResponse:
+        done = sum(1 for m in messages if m.get("role") == "tool")
+        if done >= self.turns:
+            return LLMResponse(content="Paged through everything.")
+        return LLMResponse(content="", tool_calls=[ToolCall(
+            id=f"call_{done}", name="bulk_read", arguments={"page": done},
+        )])
+
+
+class _NoLocalTools:
+    """Local MCP stand-in; the agent benchmark exercises the native tools."""
+
+    tools: Dict[str, Any] = {}
+
+    async def execute_tool(self, **kwargs: Any) -> Dict[str, Any]:
+        return {"ok": True}
+
+
+# ---- benchmarks -----------------------------------------------------------
+async def _connect(url: str, **kwargs: Any) -> HAWebSocketClient:
+    client = HAWebSocketClient(url, DEFAULT_TOKEN, **kwargs)
+    await client.connect()
+    return client
+
+
+async def bench_client(
+    sim: HASimulator, iterations: int, heavy_iterations: int
+) -> List[BenchResult]:
+    n = len(sim.states)
+    rng = random.Random(1)
+    lights = [e for e in sim.states if e.startswith("light.")]
+    all_ids = list(sim.states)
+    raw = await _connect(sim.url)
+    mirrored = await _connect(sim.url, mirror_states=True)
+    await mirrored.get_states()
+    try:
+        results = [
+            await measure(
+                "client.get_states", n,
+                lambda: raw.get_states(fresh=True),
+                iterations=heavy_iterations,
+            ),
+            await measure(
+                "client.get_state.mirror", n,
+                lambda: mirrored.get_states(rng.choice(all_ids)),
+                iterations=iterations * 10,
+            ),
+            await measure(
+                "client.call_service", n,
+                lambda: raw.call_service("light", "toggle", rng.choice(lights)),
+                iterations=iterations,
+            ),
+            await measure(
+                "client.call_service.x8", n,
+                lambda: raw.call_service("light", "toggle", rng.choice(lights)),
+                iterations=iterations,
+                concurrency=8,
+            ),
+            await measure(
+                "client.call_services_batch[20]", n,
+                lambda: raw.call_services_batch([
+                    {"domain": "light", "service": "toggle", "entity_id": e}
+                    for e in rng.sample(lights, min(20, len(lights)))
+                ]),
+                iterations=max(5, iterations // 5),
+            ),
+        ]
+
+        # Fan-out: bursts of state changes routed to a wildcard subscriber.
+        # Distinct entities, since a subscriber coalesces repeats per entity.
+        burst = min(50, n)
+        received: List[float] = []
+        done = asyncio.Event()
+
+        async def on_event(event: Dict[str, Any]) -> None:
+            received.append(time.perf_counter())
+            if len(received) >= burst:
+                done.set()
+
+        sub_id = await mirrored.subscribe_state_changes(on_event)
+        latencies: List[float] = []
+        started = time.perf_counter()
+        for _ in range(max(3, iterations // 10)):
+            received.clear()
+            done.clear()
+            t0 = time.perf_counter()
+            for entity_id in rng.sample(all_ids, burst):
+                sim.emit_changes(1, [entity_id])
+            await asyncio.wait_for(done.wait(), timeout=30)
+            latencies.extend(t - t0 for t in received)
+        elapsed = time.perf_counter() - started
+        mirrored.unsubscribe(sub_id)
+        results.append(BenchResult(
+            name="client.state_event_fanout", entities=n, ops=len(latencies), seconds=elapsed,
+            p50_ms=percentile(latencies, 0.5) * 1000.0, p99_ms=percentile(latencies, 0.99) * 1000.0,
+            rss_mb=rss_mb(), extra={"burst": burst},
+        ))
+        return results
+    finally:
+        await raw.disconnect()
+        await mirrored.disconnect()
+
+
+async def bench_tools(sim: HASimulator, iterations: int) -> List[BenchResult]:
+    n = len(sim.states)
+    client = await _connect(sim.url, mirror_states=True)
+    tools = NativeHATools(client)
+    try:
+        await tools.call("ha_list_domains", {})  # seeds mirror and registries
+        return [
+            await measure(
+                "tools.ha_search_entities", n,
+                lambda: tools.call("ha_search_entities", {"query": "kitchen temperature", "limit": 20}),
+                iterations=iterations,
+            ),
+            await measure(
+                "tools.ha_list_entities", n,
+                lambda: tools.call("ha_list_entities", {"domain": "light", "limit": 50}),
+                iterations=iterations,
+            ),
+            await measure(
+                "tools.ha_summarise_area", n,
+                lambda: tools.call("ha_summarise_area", {"area": "Living Room"}),
+                iterations=iterations,
+            ),
+        ]
+    finally:
+        await client.disconnect()
+
+
+async def bench_triggers(sim: HASimulator, iterations: int, workdir: str) -> List[BenchResult]:
+    n = len(sim.states)
+    watched = [e for e in sim.states if e.startswith("light.")][:20]
+    client = await _connect(sim.url, mirror_states=True)
+    fired: Dict[str, asyncio.Future] = {}
+
+    async def reasoner(goal: str, context: Dict[str, Any]) -> Dict[str, Any]:
+        future = fired.get(context["trigger_name"])
+        if future is not None and not future.done():
+            future.set_result(time.perf_counter())
+        return {"run_id": None}
+
+    store = TriggerStore(os.path.join(workdir, "triggers.db"))
+    for entity_id in watched:
+        store.save(TriggerSpec(
+            id=entity_id, name=entity_id, type="state", goal_template="{entity_id} changed",
+            entity_id=entity_id, state_pattern="~.*", cooldown_seconds=0,
+        ))
+    registry = TriggerRegistry(store, reasoner, ha_client=client, cron_tick_seconds=3600)
+    await registry.start()
+    rng = random.Random(2)
+
+    async def fire_one() -> None:
+        entity_id = rng.choice(watched)
+        future = fired[entity_id] = asyncio.get_running_loop().create_future()
+        sim.emit_changes(1, [entity_id])
+        await asyncio.wait_for(future, timeout=30)
+
+    try:
+        return [await measure("triggers.state_fire", n, fire_one, iterations=iterations)]
+    finally:
+        await registry.stop()
+        await client.disconnect()
+
+
+async def bench_agent(sim: HASimulator, iterations: int, workdir: str) -> List[BenchResult]:
+    from agents.deep_reasoning_agent import DeepReasoningAgent
+
+    n = len(sim.states)
+    client = await _connect(sim.url, mirror_states=True)
+    agent = DeepReasoningAgent(
+        local_mcp=_NoLocalTools(),
+        ha_client=client,
+        ollama_model="scripted",
+        default_mode="plan",
+    )
+    agent.log_dir = Path(workdir)
+    agent.llm = agent.harness.llm = ScriptedLLM()
+    try:
+        result = await measure(
+            "agent.run.scripted", n,
+            lambda: agent.run("Is anything odd in the kitchen?"),
+            iterations=max(3, iterations // 5),
+            warmup=1,
+        )
+        result.extra["tool_calls"] = agent.last_result.tool_calls
+        return [result]
+    finally:
+        await client.disconnect()
+
+
+async def bench_harness(iterations: int, turns: int = 40) -> List[BenchResult]:
+    """Loop overhead of a deep-profile-length run with 12 KB tool results.
+
+    The LLM and tool are free, so the time is the harness's own
+    bookkeeping: budget checks, validation, serialisation and events.
+    """
+    payload = "x" * 12000
+    registry = ToolRegistry()
+
+    async def executor(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        return {"ok": True, "page": args.get("page"), "data": payload}
+
+    registry.register(
+        provider="local",
+        schemas=[{"type": "function", "function": {
+            "name": "bulk_read",
+            "parameters": {"type": "object", "properties": {"page": {"type": "integer"}}},
+        }}],
+        executor=executor,
+        semantics=ToolSemantics(read_only=True, destructive=False, idempotent=True,
+                                parallel_safe=True, impact_level="low"),
+    )
+    harness = ReasoningHarness(
+        LongRunLLM(turns), registry, "benchmark",
+        max_iterations=turns + 1,
+        max_total_tool_calls=turns,
+        max_run_seconds=600,
+        max_context_chars=10 ** 9,
+    )
+    result = await measure(
+        "harness.run.long", 0,
+        lambda: harness.run("Page through the archive."),
+        iterations=max(3, iterations // 20),
+        warmup=1,
+    )
+    result.extra.update(
+        turns=turns,
+        per_iteration_ms=round(result.p50_ms / (turns + 1), 4),
+    )
+    return [result, await bench_tool_dispatch(iterations)]
+
+
+async def bench_tool_dispatch(iterations: int) -> BenchResult:
+    """Per-call registry overhead: validate, then dispatch, as the harness does."""
+    registry = ToolRegistry()
+
+    async def executor(name: str, args: Dict[str, Any], context: Any = None) -> Dict[str, Any]:
+        return {"ok": True}
+
+    def validator(name: str, args: Dict[str, Any], context: Any) -> None:
+        return None
+
+    registry.register(
+        provider="local",
+        schemas=[{"type": "function", "function": {
+            "name": "ha_get_state",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "entity_id": {"type": "string"},
+                    "attributes": {"type": "boolean", "default": False},
+                },
+                "required": ["entity_id"],
+            },
+        }}],
+        executor=executor,
+        validator=validator,
+        close_schema=True,
+    )
+    context = ToolExecutionContext(run_id="bench", mode="execute")
+    args = {"entity_id": "light.kitchen", "attributes": True}
+
+    async def dispatch() -> None:
+        if await registry.validate_call("ha_get_state", args, context) is None:
+            await registry.call("ha_get_state", args, context)
+
+    return await measure(
+        "harness.tool_dispatch", 0, dispatch, iterations=iterations * 10,
+    )
+
+
+SUITES = ("client", "tools", "triggers", "agent", "harness")
+
+
+async def run_suite(
+    entity_counts: Sequence[int] = (1000,),
+    *,
+    iterations: int = 200,
+    suites: Sequence[str] = SUITES,
+    attribute_bytes: int = 0,
+    latency_ms: float = 0.0,
+) -> List[BenchResult]:
+    results: List[BenchResult] = []
+    with tempfile.TemporaryDirectory(prefix="ha-bench-") as workdir:
+        for count in entity_counts:
+            sim = HASimulator(count, attribute_bytes=attribute_bytes, latency_ms=latency_ms)
+            await sim.start()
+            # Full snapshots scale with the entity count; keep each case bounded.
+            heavy = max(5, min(iterations, 200_000 // max(1, count)))
+            try:
+                if "client" in suites:
+                    results += await bench_client(sim, iterations, heavy)
+                if "tools" in suites:
+                    results += await bench_tools(sim, iterations)
+                if "triggers" in suites:
+                    results += await bench_triggers(sim, iterations, workdir)
+                if "agent" in suites:
+                    results += await bench_agent(sim, iterations, workdir)
+            finally:
+                await sim.stop()
+    if "harness" in suites:
+        # Independent of the entity count; run once.
+        results += await bench_harness(iterations)
+    return results
+
+
+# ---- reporting ------------------------------------------------------------
+def format_table(results: Sequence[BenchResult]) -> str:
+    lines = [f"{'benchmark':<34}{'entities':>9}{'ops/s':>12}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>9}"]
+    for r in results:
+        lines.append(
+            f"{r.name:<34}{r.entities:>9}{r.ops_per_s:>12.1f}"
+            f"{r.p50_ms:>10.3f}{r.p99_ms:>10.3f}{r.rss_mb:>9.1f}"
+        )
+    return "\n".join(lines)
+
+
+def compare(
+    results: Sequence[BenchResult],
+    baseline: Dict[str, Any],
+    max_regression: float,
+) -> List[str]:
+    """Human-readable regressions of ``results`` against a saved run."""
+    previous = {f"{b['name']}@{b['entities']}": b for b in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        old = previous.get(r.key)
+        if not old or not old.get("ops_per_s"):
+            continue
+        change = r.ops_per_s / old["ops_per_s"] - 1.0
+        if change < -max_regression:
+            regressions.append(
+                f"{r.key}: {old['ops_per_s']:.1f} -> {r.ops_per_s:.1f} ops/s ({change:+.0%})"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="HA orchestrator throughput benchmarks")
+    parser.add_argument("--entities", default="1000",
+                        help="comma-separated entity counts, e.g. 100,5000,20000")
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--suite", action="append", choices=SUITES,
+                        help="limit to one or more suites (default: all)")
+    parser.add_argument("--attribute-bytes", type=int, default=0)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--json", dest="json_path", help="write results to this file")
+    parser.add_argument("--baseline", help="compare against a previous --json file")
+    parser.add_argument("--max-regression", type=float, default=0.25,
+                        help="allowed ops/s drop vs the baseline (fraction)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    counts = [int(c) for c in args.entities.split(",") if c.strip()]
+    results = asyncio.run(run_suite(
+        counts,
+        iterations=args.iterations,
+        suites=args.suite or SUITES,
+        attribute_bytes=args.attribute_bytes,
+        latency_ms=args.latency_ms,
+    ))
+    print(format_table(results))
+    print(f"peak RSS {max((r.rss_mb for r in results), default=0.0):.1f} MB")
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps({
+            "python": sys.version.split()[0],
+            "results": [r.to_dict() for r in results],
+        }, indent=2), encoding="utf-8")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(results, baseline, args.max_regression)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
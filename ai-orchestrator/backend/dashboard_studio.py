@@ -48,7 +48,7 @@ import time
 from dataclasses import asdict, dataclass, field
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Awaitable, Callable, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
 
 from llm_providers import ChatProvider, make_chat_provider, resolve_provider_name
 
@@ -287,6 +287,11 @@ class DashboardStudio:
             "ollama": local_dashboard_model,
         }.get(provider_name, "gemma4:e4b")
 
+    def default_model(self) -> Tuple[str, str]:
+        """``(provider, model)`` used when a request names neither."""
+        provider_name = resolve_provider_name(self._default_provider)
+        return provider_name, self._resolve_model(provider_name, None)
+
     # ------------------------------------------------------------------
     # Home Assistant context
     # ------------------------------------------------------------------
@@ -445,13 +450,9 @@ class DashboardStudio:
 
         messages = self._build_messages(prompt, context, instruction, base_html)
 
-        loop = asyncio.get_running_loop()
         try:
             raw = await asyncio.wait_for(
-                loop.run_in_executor(
-                    None,
-                    lambda: chat.chat(model_name, messages, temperature=0.4, max_tokens=4096),
-                ),
+                chat.achat(model_name, messages, temperature=0.4, max_tokens=4096),
                 timeout=self._generation_timeout_seconds,
             )
         except TimeoutError as exc:
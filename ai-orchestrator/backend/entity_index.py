@@ -0,0 +1,269 @@
+"""Incremental secondary indexes over Home Assistant entity states.
+
+The native discovery tools used to fetch every state and substring-scan
+it on each call. :class:`EntityIndex` is maintained alongside the
+:class:`HAWebSocketClient` state mirror instead. It keeps domain,
+device_class, unit and area buckets plus a token/trigram index over
+``entity_id`` and ``friendly_name``, so discovery becomes a handful of
+set lookups and the results can be ranked.
+
+Only the indexed fields (name, device_class, unit) trigger re-indexing
+of an entity. A plain state change just updates the stored value.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+_TOKEN_SPLIT = re.compile(r"[^a-z0-9]+")
+
+
+def _tokens(text: str) -> Set[str]:
+    return {t for t in _TOKEN_SPLIT.split(text.lower()) if t}
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _domain(entity_id: str) -> str:
+    return entity_id.split(".", 1)[0] if "." in entity_id else ""
+
+
+def _area_key(area: str) -> str:
+    return " ".join(_TOKEN_SPLIT.split(area.lower())).strip()
+
+
+@dataclass
+class IndexedEntity:
+    entity_id: str
+    domain: str
+    name: str
+    device_class: Optional[str]
+    unit: Optional[str]
+    state: Any
+    seq: int = 0
+    haystack: str = ""
+    tokens: Set[str] = field(default_factory=set)
+
+    def slim(self) -> Dict[str, Any]:
+        return {
+            "entity_id": self.entity_id,
+            "state": self.state,
+            "friendly_name": self.name or None,
+            "domain": self.domain,
+        }
+
+
+def _add(bucket: Dict[str, Set[str]], key: Optional[str], entity_id: str) -> None:
+    if key:
+        bucket.setdefault(key, set()).add(entity_id)
+
+
+def _discard(bucket: Dict[str, Set[str]], key: Optional[str], entity_id: str) -> None:
+    if not key:
+        return
+    members = bucket.get(key)
+    if members is not None:
+        members.discard(entity_id)
+        if not members:
+            del bucket[key]
+
+
+class EntityIndex:
+    """Domain / device_class / unit / area / text index over entity states."""
+
+    def __init__(self) -> None:
+        self._reset()
+
+    def _reset(self) -> None:
+        self._seq = 0
+        self.entities: Dict[str, IndexedEntity] = {}
+        self.by_domain: Dict[str, Set[str]] = {}
+        self.by_device_class: Dict[str, Set[str]] = {}
+        self.by_unit: Dict[str, Set[str]] = {}
+        self.by_token: Dict[str, Set[str]] = {}
+        self.by_trigram: Dict[str, Set[str]] = {}
+        self.by_area: Dict[str, Set[str]] = {}
+        self.area_names: Dict[str, str] = {}
+        self.entity_area: Dict[str, str] = {}
+
+    @classmethod
+    def from_states(cls, states: Iterable[Dict[str, Any]]) -> "EntityIndex":
+        index = cls()
+        index.rebuild(states)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.entities)
+
+    # ---- maintenance ------------------------------------------------------
+    def rebuild(self, states: Iterable[Dict[str, Any]]) -> None:
+        areas = dict(self.entity_area)
+        area_names = dict(self.area_names)
+        self._reset()
+        for state in states:
+            self.upsert(state)
+        self.set_areas(areas, area_names)
+
+    def upsert(self, state: Dict[str, Any]) -> None:
+        entity_id = state.get("entity_id")
+        if not entity_id:
+            return
+        attrs = state.get("attributes") or {}
+        name = str(attrs.get("friendly_name") or "")
+        device_class = attrs.get("device_class")
+        unit = attrs.get("unit_of_measurement")
+        current = self.entities.get(entity_id)
+        if current is not None:
+            if (current.name, current.device_class, current.unit) == (name, device_class, unit):
+                current.state = state.get("state")
+                return
+            self.remove(entity_id, keep_area=True)
+        haystack = f"{entity_id.lower()} {name.lower()}"
+        self._seq += 1
+        entry = IndexedEntity(
+            entity_id=entity_id,
+            domain=_domain(entity_id),
+            name=name,
+            device_class=device_class,
+            unit=unit,
+            state=state.get("state"),
+            seq=self._seq,
+            haystack=haystack,
+            tokens=_tokens(haystack),
+        )
+        self.entities[entity_id] = entry
+        _add(self.by_domain, entry.domain, entity_id)
+        _add(self.by_device_class, device_class, entity_id)
+        _add(self.by_unit, unit, entity_id)
+        for token in entry.tokens:
+            _add(self.by_token, token, entity_id)
+        for gram in _trigrams(haystack):
+            _add(self.by_trigram, gram, entity_id)
+
+    def remove(self, entity_id: str, *, keep_area: bool = False) -> None:
+        entry = self.entities.pop(entity_id, None)
+        if entry is None:
+            return
+        _discard(self.by_domain, entry.domain, entity_id)
+        _discard(self.by_device_class, entry.device_class, entity_id)
+        _discard(self.by_unit, entry.unit, entity_id)
+        for token in entry.tokens:
+            _discard(self.by_token, token, entity_id)
+        for gram in _trigrams(entry.haystack):
+            _discard(self.by_trigram, gram, entity_id)
+        if not keep_area:
+            _discard(self.by_area, self.entity_area.pop(entity_id, None), entity_id)
+
+    def set_areas(
+        self,
+        entity_areas: Dict[str, Optional[str]],
+        area_names: Optional[Dict[str, str]] = None,
+    ) -> None:
+        """Replace area membership.
+
+        ``entity_areas`` maps entity_id to an area id, ``area_names`` maps
+        area id to its display name. Lookups accept either form.
+        """
+        self.by_area = {}
+        self.entity_area = {}
+        self.area_names = dict(area_names or {})
+        for entity_id, area_id in entity_areas.items():
+            if area_id:
+                self.entity_area[entity_id] = area_id
+                _add(self.by_area, area_id, entity_id)
+
+    # ---- queries ----------------------------------------------------------
+    def domains(self) -> List[Dict[str, Any]]:
+        return sorted(
+            ({"domain": d, "count": len(ids)} for d, ids in self.by_domain.items()),
+            key=lambda x: (-x["count"], x["domain"]),
+        )
+
+    def area_members(self, area: str) -> Optional[Set[str]]:
+        """Entity ids in a registry area, or None when no area matches.
+
+        A registry area with no entities yet is known, so it is empty
+        rather than None.
+        """
+        wanted = _area_key(area)
+        for area_id in self.area_names.keys() | self.by_area.keys():
+            if wanted in (_area_key(area_id), _area_key(self.area_names.get(area_id, ""))):
+                return self.by_area.get(area_id, set())
+        return None
+
+    def _substring_candidates(self, query: str) -> Set[str]:
+        grams = _trigrams(query)
+        if not grams:
+            # Too short for trigrams: the token index still narrows it down.
+            ids: Set[str] = set()
+            for token, members in self.by_token.items():
+                if query in token:
+                    ids |= members
+            return {i for i in ids if query in self.entities[i].haystack}
+        postings = sorted((self.by_trigram.get(g, set()) for g in grams), key=len)
+        if not postings[0]:
+            return set()
+        ids = set(postings[0])
+        for members in postings[1:]:
+            ids &= members
+            if not ids:
+                return ids
+        return {i for i in ids if query in self.entities[i].haystack}
+
+    def search(
+        self,
+        query: str,
+        *,
+        domains: Optional[Iterable[str]] = None,
+        device_class: Optional[str] = None,
+        unit: Optional[str] = None,
+        candidates: Optional[Set[str]] = None,
+        limit: Optional[int] = None,
+    ) -> List[IndexedEntity]:
+        """Ranked lookup.
+
+        An entity matches when the query is a substring of its entity_id
+        or friendly name, or when it shares every query token. Exact ids
+        and names rank first, then whole-token matches, then prefixes;
+        ties keep Home Assistant's own ordering.
+        """
+        query = query.strip().lower()
+        ids = set(candidates) if candidates is not None else set(self.entities)
+        for bucket, key in (
+            (self.by_device_class, device_class),
+            (self.by_unit, unit),
+        ):
+            if key:
+                ids &= bucket.get(key, set())
+        if domains:
+            in_domains: Set[str] = set()
+            for d in domains:
+                in_domains |= self.by_domain.get(d.lower(), set())
+            ids &= in_domains
+        if query:
+            hits = self._substring_candidates(query)
+            words = _tokens(query)
+            if len(words) > 1:
+                postings = [self.by_token.get(w, set()) for w in words]
+                hits |= set.intersection(*postings)
+            ids &= hits
+        else:
+            words = set()
+
+        def score(entry: IndexedEntity) -> tuple:
+            rank = 0
+            if query:
+                name = entry.name.lower()
+                object_id = entry.entity_id.split(".", 1)[-1]
+                if query in (entry.entity_id, name, object_id):
+                    rank += 100
+                rank += 10 * len(words & entry.tokens)
+                if object_id.startswith(query) or name.startswith(query):
+                    rank += 5
+            return (-rank, entry.seq)
+
+        ranked = sorted((self.entities[i] for i in ids), key=score)
+        return ranked[:limit] if limit is not None else ranked
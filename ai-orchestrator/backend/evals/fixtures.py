@@ -0,0 +1,110 @@
+"""Home Assistant fixtures named by ``home_agent_scenarios.yaml``.
+
+Each fixture is a small, hand-written home served by the benchmark
+:class:`benchmarks.ha_simulator.HASimulator`, so evaluations exercise the
+real websocket client, registry and native tools without a live instance.
+"""
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from benchmarks.ha_simulator import HASimulator
+
+# (entity_id, state, attributes, area)
+Entity = Tuple[str, str, Dict[str, Any], str]
+
+
+def _light(entity_id: str, name: str, state: str, area: str, **attrs: Any) -> Entity:
+    return entity_id, state, {"friendly_name": name, **attrs}, area
+
+
+def _sensor(entity_id: str, name: str, state: str, area: str, device_class: str,
+            unit: Optional[str] = None) -> Entity:
+    attributes: Dict[str, Any] = {"friendly_name": name, "device_class": device_class}
+    if unit:
+        attributes["unit_of_measurement"] = unit
+    return entity_id, state, attributes, area
+
+
+def _climate(entity_id: str, name: str, mode: str, area: str, current: float,
+             target: float) -> Entity:
+    return entity_id, mode, {
+        "friendly_name": name,
+        "current_temperature": current,
+        "temperature": target,
+        "hvac_modes": ["off", "heat", "cool", "heat_cool"],
+    }, area
+
+
+_EVENING: List[Entity] = [
+    _light("light.kitchen_ceiling", "Kitchen Ceiling", "on", "kitchen", brightness=200),
+    _light("light.kitchen_pendant", "Kitchen Pendant", "off", "kitchen"),
+    _light("light.living_room_lamp", "Living Room Lamp", "on", "living_room", brightness=120),
+    _sensor("sensor.living_room_temperature", "Living Room Temperature", "21.5",
+            "living_room", "temperature", "°C"),
+    _sensor("binary_sensor.hallway_motion", "Hallway Motion", "on", "hallway", "motion"),
+    ("lock.front_door", "locked", {"friendly_name": "Front Door"}, "hallway"),
+    ("media_player.living_room_tv", "playing", {"friendly_name": "Living Room TV"}, "living_room"),
+]
+
+FIXTURES: Dict[str, List[Entity]] = {
+    "occupied_evening": _EVENING,
+    "away_locked": [
+        ("lock.front_door", "locked", {"friendly_name": "Front Door"}, "hallway"),
+        ("lock.back_door", "locked", {"friendly_name": "Back Door"}, "kitchen"),
+        ("alarm_control_panel.home", "armed_away", {"friendly_name": "Home Alarm"}, "hallway"),
+        _sensor("binary_sensor.front_door_contact", "Front Door Contact", "off", "hallway", "door"),
+        _light("light.hallway", "Hallway Light", "off", "hallway"),
+    ],
+    "lounge_22c": [
+        _climate("climate.lounge", "Lounge Thermostat", "heat", "living_room", 22.0, 22.0),
+        _sensor("sensor.lounge_temperature", "Lounge Temperature", "22.0", "living_room",
+                "temperature", "°C"),
+        _light("light.lounge", "Lounge Light", "on", "living_room"),
+    ],
+    "porch_off": [
+        _light("light.porch", "Porch Light", "off", "garden"),
+        _light("light.garden_path", "Garden Path", "off", "garden"),
+    ],
+    "multiple_active_devices": [
+        _light("light.kitchen_ceiling", "Kitchen Ceiling", "on", "kitchen"),
+        ("media_player.living_room_tv", "playing", {"friendly_name": "Living Room TV"}, "living_room"),
+        ("fan.bedroom", "on", {"friendly_name": "Bedroom Fan"}, "bedroom"),
+        ("switch.office_heater", "on", {"friendly_name": "Office Heater"}, "office"),
+    ],
+    "mixed_anomalies": [
+        ("lock.back_door", "unlocked", {"friendly_name": "Back Door"}, "kitchen"),
+        _sensor("binary_sensor.garage_door", "Garage Door", "on", "garage", "garage_door"),
+        _sensor("binary_sensor.kitchen_window", "Kitchen Window", "on", "kitchen", "window"),
+        _climate("climate.bedroom", "Bedroom Thermostat", "heat", "bedroom", 27.5, 24.0),
+        _sensor("sensor.bedroom_temperature", "Bedroom Temperature", "27.5", "bedroom",
+                "temperature", "°C"),
+        _sensor("sensor.freezer_temperature", "Freezer Temperature", "-8.0", "kitchen",
+                "temperature", "°C"),
+        _light("light.garden_floodlight", "Garden Floodlight", "on", "garden"),
+        ("switch.office_heater", "on", {"friendly_name": "Office Heater"}, "office"),
+    ],
+    "study_lamp_unavailable": [
+        _light("light.study_lamp", "Study Lamp", "unavailable", "office"),
+        _light("light.study_ceiling", "Study Ceiling", "off", "office"),
+    ],
+}
+# Generated homes: fixture name -> entity count.
+GENERATED: Dict[str, int] = {"large_home": 1500}
+
+
+def fixture_names() -> List[str]:
+    return sorted([*FIXTURES, *GENERATED])
+
+
+def build_simulator(name: str, *, latency_ms: float = 0.0) -> HASimulator:
+    """An unstarted simulator populated with fixture ``name``."""
+    if name in GENERATED:
+        return HASimulator(GENERATED[name], latency_ms=latency_ms)
+    if name not in FIXTURES:
+        raise ValueError(f"unknown fixture {name!r}; known: {', '.join(fixture_names())}")
+    sim = HASimulator(0, latency_ms=latency_ms)
+    for entity_id, state, attributes, area in FIXTURES[name]:
+        sim.set_state(entity_id, state, attributes)
+        sim.areas[entity_id] = area
+    return sim
@@ -0,0 +1,446 @@
+"""Concurrent scenario evaluation with latency and tool-budget scorecards.
+
+Runs every scenario in ``home_agent_scenarios.yaml`` in plan mode against a
+:class:`DeepReasoningAgent`, once per reasoning profile (and ``--repeat``
+times). Each scenario runs against its simulated Home Assistant fixture
+(:mod:`evals.fixtures`). The model is either a recorded cassette or a live
+provider, which can itself be recorded::
+
+    python -m evals.runner --backend live --provider ollama --model gemma4:e4b \\
+        --cassette evals/gemma4.jsonl.gz
+    python -m evals.runner --cassette evals/gemma4.jsonl.gz --json card.json --markdown card.md
+    python -m evals.runner --cassette evals/gemma4.jsonl.gz --baseline card.json
+
+Every run is scored with :func:`evals.scenario_contract.score_result`. The
+scorecard aggregates pass rate, wall time, LLM time, tool time, tokens and
+cached tool calls per scenario and per profile. ``tool_result_tokens`` is
+the estimated prompt tokens spent on tool results across a run's model
+calls; ``--json-tool-results`` turns off tabular results to measure what
+the tables save. With ``--baseline``, the
+run exits non-zero when a profile's pass rate or p50 wall time regresses
+past the thresholds.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+if __package__ in (None, ""):
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.ha_simulator import DEFAULT_TOKEN
+from benchmarks.suite import percentile
+from evals.fixtures import build_simulator
+from evals.scenario_contract import DEFAULT_DATASET, load_scenarios, score_result
+from ha_client import HAWebSocketClient
+from llm_cassette import Cassette, RecordingBackend, ReplayBackend, call_backend
+from reasoning_harness import (
+    REASONING_PROFILES,
+    HarnessResult,
+    LLMResponse,
+    TokenCallback,
+    approx_token_count,
+)
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("replay", "live")
+
+
+class _TimedBackend:
+    """Per-run LLM wall time, call count and tool-result tokens around a
+    shared backend."""
+
+    def __init__(self, inner: Any) -> None:
+        self.inner = inner
+        self.name = getattr(inner, "name", "timed")
+        self.llm_ms = 0.0
+        self.calls = 0
+        self.tool_tokens = 0
+        self._estimate = getattr(inner, "estimate_tokens", None) or approx_token_count
+
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self.inner, item)
+
+    async def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]],
+        *,
+        continuation: Any = None,
+        profile: Optional[str] = None,
+        on_token: Optional[TokenCallback] = None,
+    ) -> LLMResponse:
+        self.tool_tokens += sum(
+            self._estimate(str(m.get("content") or ""))
+            for m in messages if m.get("role") == "tool"
+        )
+        started = time.perf_counter()
+        try:
+            return await call_backend(
+                self.inner, messages, tools,
+                continuation=continuation, profile=profile, on_token=on_token,
+            )
+        finally:
+            self.llm_ms += (time.perf_counter() - started) * 1000
+            self.calls += 1
+
+
+@dataclass
+class RunRecord:
+    scenario_id: str
+    profile: str
+    passed: bool
+    failures: List[str] = field(default_factory=list)
+    wall_ms: float = 0.0
+    llm_ms: float = 0.0
+    tool_ms: float = 0.0
+    llm_calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    tool_result_tokens: int = 0
+    tool_calls: int = 0
+    cached_tool_calls: int = 0
+    stopped_reason: str = ""
+    error: Optional[str] = None
+
+
+def _result_payload(result: HarnessResult) -> Dict[str, Any]:
+    """The API-shaped result that :func:`score_result` reads."""
+    return {
+        "answer": result.answer,
+        "tool_calls": result.tool_calls,
+        "plan": getattr(result, "plan", None),
+        "trace": [{"tool_calls": step.tool_calls} for step in result.trace],
+    }
+
+
+def _tool_ms(result: HarnessResult) -> float:
+    return float(sum(
+        (item.get("result") or {}).get("_harness", {}).get("duration_ms", 0)
+        for step in result.trace
+        for item in step.tool_results
+    ))
+
+
+class EvalRunner:
+    """Runs scenario x profile x repeat jobs concurrently.
+
+    ``backend="replay"`` serves every run from ``cassette``. ``"live"``
+    lets each agent build its configured provider backend (``agent_options``
+    carries ``provider`` / model names); with a ``cassette`` the live
+    exchanges are recorded to it.
+    """
+
+    def __init__(
+        self,
+        scenarios: Sequence[Dict[str, Any]],
+        *,
+        profiles: Sequence[str] = tuple(REASONING_PROFILES),
+        backend: str = "replay",
+        cassette: Optional[Path] = None,
+        latency_ms: Optional[float] = 0.0,
+        repeat: int = 1,
+        concurrency: int = 4,
+        agent_options: Optional[Dict[str, Any]] = None,
+        tabular_results: bool = True,
+    ) -> None:
+        if backend not in BACKENDS:
+            raise ValueError(f"backend must be one of {'|'.join(BACKENDS)}")
+        if backend == "replay" and cassette is None:
+            raise ValueError("replay needs a cassette")
+        unknown = [p for p in profiles if p not in REASONING_PROFILES]
+        if unknown:
+            raise ValueError(f"unknown profiles: {unknown}")
+        self.scenarios = list(scenarios)
+        self.profiles = list(profiles)
+        self.backend = backend
+        self.repeat = max(1, int(repeat))
+        self.concurrency = max(1, int(concurrency))
+        self.agent_options = dict(agent_options or {})
+        self.tabular_results = tabular_results
+        self._cassette = Cassette.load(cassette) if cassette is not None else None
+        self._replay = (
+            ReplayBackend(self._cassette, latency_ms=latency_ms)
+            if backend == "replay" and self._cassette is not None else None
+        )
+        if backend == "replay":
+            # The constructed provider backend is replaced before any call.
+            self.agent_options.setdefault("provider", "ollama")
+        self.wall_seconds = 0.0
+
+    async def run(self) -> List[RunRecord]:
+        started = time.perf_counter()
+        fixtures = sorted({str(s.get("fixture") or "occupied_evening") for s in self.scenarios})
+        sims: Dict[str, Any] = {}
+        clients: Dict[str, HAWebSocketClient] = {}
+        try:
+            for name in fixtures:
+                sims[name] = build_simulator(name)
+                await sims[name].start()
+                clients[name] = HAWebSocketClient(sims[name].url, DEFAULT_TOKEN, mirror_states=True)
+                await clients[name].connect()
+            gate = asyncio.Semaphore(self.concurrency)
+            with tempfile.TemporaryDirectory(prefix="ha-eval-") as workdir:
+                async def job(scenario: Dict[str, Any], profile: str) -> RunRecord:
+                    async with gate:
+                        client = clients[str(scenario.get("fixture") or "occupied_evening")]
+                        return await self._run_one(scenario, profile, client, Path(workdir))
+
+                records = await asyncio.gather(*(
+                    job(scenario, profile)
+                    for scenario in self.scenarios
+                    for profile in self.profiles
+                    for _ in range(self.repeat)
+                ))
+        finally:
+            for client in clients.values():
+                await client.disconnect()
+            for sim in sims.values():
+                await sim.stop()
+        self.wall_seconds = time.perf_counter() - started
+        return list(records)
+
+    async def _run_one(
+        self,
+        scenario: Dict[str, Any],
+        profile: str,
+        client: HAWebSocketClient,
+        workdir: Path,
+    ) -> RunRecord:
+        from agents.deep_reasoning_agent import DeepReasoningAgent
+        from mcp_server import MCPServer
+
+        record = RunRecord(scenario_id=scenario["id"], profile=profile, passed=False)
+        agent = DeepReasoningAgent(
+            local_mcp=MCPServer(client, dry_run=True),
+            ha_client=client,
+            default_mode="plan",
+            **self.agent_options,
+        )
+        agent.log_dir = workdir
+        agent.harness.tabular_results = self.tabular_results
+        if self._replay is not None:
+            inner: Any = self._replay
+        elif self._cassette is not None:
+            inner = RecordingBackend(agent.llm, self._cassette)
+        else:
+            inner = agent.llm
+        timed = _TimedBackend(inner)
+        agent.llm = agent.harness.llm = timed
+        started = time.perf_counter()
+        try:
+            result = await agent.run(scenario["goal"], mode="plan", profile=profile)
+        except Exception as exc:
+            record.error = f"{type(exc).__name__}: {exc}"
+            record.failures = [record.error]
+            record.wall_ms = (time.perf_counter() - started) * 1000
+            return record
+        finally:
+            if agent.read_cache is not None:
+                agent.read_cache.detach()
+        record.wall_ms = (time.perf_counter() - started) * 1000
+        score = score_result(scenario, _result_payload(result))
+        record.passed = score["passed"]
+        record.failures = score["failures"]
+        if result.stopped_reason == "llm_error":
+            # Cassette misses and provider failures are not model mistakes.
+            record.passed = False
+            record.error = result.answer
+            record.failures = [result.answer, *record.failures]
+        record.llm_ms = timed.llm_ms
+        record.llm_calls = timed.calls
+        record.tool_ms = _tool_ms(result)
+        record.input_tokens = int(result.usage.get("input_tokens", 0))
+        record.output_tokens = int(result.usage.get("output_tokens", 0))
+        record.tool_result_tokens = timed.tool_tokens
+        record.tool_calls = result.tool_calls
+        record.cached_tool_calls = result.cached_tool_calls
+        record.stopped_reason = result.stopped_reason
+        return record
+
+
+# ---- scorecard ------------------------------------------------------------
+def _aggregate(records: Sequence[RunRecord]) -> Dict[str, Any]:
+    n = len(records)
+    walls = [r.wall_ms for r in records]
+
+    def mean(attr: str) -> float:
+        return round(sum(getattr(r, attr) for r in records) / n, 2) if n else 0.0
+
+    return {
+        "runs": n,
+        "passed": sum(r.passed for r in records),
+        "pass_rate": round(sum(r.passed for r in records) / n, 4) if n else 0.0,
+        "wall_ms_p50": round(percentile(walls, 0.50), 2),
+        "wall_ms_p95": round(percentile(walls, 0.95), 2),
+        "llm_ms_mean": mean("llm_ms"),
+        "tool_ms_mean": mean("tool_ms"),
+        "llm_calls_mean": mean("llm_calls"),
+        "input_tokens_mean": mean("input_tokens"),
+        "output_tokens_mean": mean("output_tokens"),
+        "tool_result_tokens_mean": mean("tool_result_tokens"),
+        "tool_calls_mean": mean("tool_calls"),
+        "cached_tool_calls": sum(r.cached_tool_calls for r in records),
+        "errors": sum(1 for r in records if r.error),
+    }
+
+
+def scorecard(records: Sequence[RunRecord], *, wall_seconds: float = 0.0) -> Dict[str, Any]:
+    """Per-scenario, per-profile and overall aggregates of ``records``."""
+    profiles = sorted({r.profile for r in records})
+    scenarios: Dict[str, Dict[str, Any]] = {}
+    for r in records:
+        scenarios.setdefault(r.scenario_id, {})
+    for scenario_id in scenarios:
+        for profile in profiles:
+            cell = [r for r in records if r.scenario_id == scenario_id and r.profile == profile]
+            if not cell:
+                continue
+            scenarios[scenario_id][profile] = {
+                **_aggregate(cell),
+                "failures": sorted({f for r in cell for f in r.failures}),
+            }
+    return {
+        "overall": {**_aggregate(records), "wall_seconds": round(wall_seconds, 3)},
+        "profiles": {p: _aggregate([r for r in records if r.profile == p]) for p in profiles},
+        "scenarios": scenarios,
+        "runs": [asdict(r) for r in records],
+    }
+
+
+def format_markdown(card: Dict[str, Any]) -> str:
+    lines = [
+        "| profile | runs | pass rate | p50 wall ms | p95 wall ms | LLM ms | tool ms "
+        "| LLM calls | in tokens | out tokens | tool-result tokens | tool calls | cached |",
+        "|---|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|",
+    ]
+    for profile, agg in card["profiles"].items():
+        lines.append(
+            f"| {profile} | {agg['runs']} | {agg['pass_rate']:.0%} | {agg['wall_ms_p50']:.1f} "
+            f"| {agg['wall_ms_p95']:.1f} | {agg['llm_ms_mean']:.1f} | {agg['tool_ms_mean']:.1f} "
+            f"| {agg['llm_calls_mean']:.1f} | {agg['input_tokens_mean']:.0f} "
+            f"| {agg['output_tokens_mean']:.0f} | {agg['tool_result_tokens_mean']:.0f} "
+            f"| {agg['tool_calls_mean']:.1f} "
+            f"| {agg['cached_tool_calls']} |"
+        )
+    lines += ["", "| scenario | profile | pass rate | p50 wall ms | tool calls | failures |",
+              "|---|---|---:|---:|---:|---|"]
+    for scenario_id, by_profile in card["scenarios"].items():
+        for profile, agg in by_profile.items():
+            failures = "; ".join(agg["failures"]) or "-"
+            lines.append(
+                f"| {scenario_id} | {profile} | {agg['pass_rate']:.0%} "
+                f"| {agg['wall_ms_p50']:.1f} | {agg['tool_calls_mean']:.1f} | {failures} |"
+            )
+    return "\n".join(lines)
+
+
+def compare(
+    card: Dict[str, Any],
+    baseline: Dict[str, Any],
+    *,
+    max_pass_rate_drop: float = 0.0,
+    max_latency_regression: float = 0.25,
+) -> List[str]:
+    """Human-readable per-profile regressions of ``card`` against ``baseline``."""
+    regressions = []
+    for profile, agg in card["profiles"].items():
+        old = (baseline.get("profiles") or {}).get(profile)
+        if not old:
+            continue
+        drop = old["pass_rate"] - agg["pass_rate"]
+        if drop > max_pass_rate_drop:
+            regressions.append(
+                f"{profile}: pass rate {old['pass_rate']:.0%} -> {agg['pass_rate']:.0%}"
+            )
+        if old.get("wall_ms_p50"):
+            change = agg["wall_ms_p50"] / old["wall_ms_p50"] - 1.0
+            if change > max_latency_regression:
+                regressions.append(
+                    f"{profile}: p50 wall {old['wall_ms_p50']:.1f} -> "
+                    f"{agg['wall_ms_p50']:.1f} ms ({change:+.0%})"
+                )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run home-agent scenarios and score them")
+    parser.add_argument("--dataset", type=Path, default=DEFAULT_DATASET)
+    parser.add_argument("--scenario", action="append", help="limit to these scenario ids")
+    parser.add_argument("--profile", action="append", choices=list(REASONING_PROFILES),
+                        help="limit to these profiles (default: all)")
+    parser.add_argument("--backend", choices=BACKENDS, default="replay")
+    parser.add_argument("--cassette", type=Path,
+                        help="replay source, or where live exchanges are recorded")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="synthetic replay latency per LLM call; -1 replays recorded latency")
+    parser.add_argument("--provider", help="live provider (default: LLM_PROVIDER)")
+    parser.add_argument("--model", help="live model name")
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--json-tool-results", dest="tabular_results", action="store_false",
+                        help="send tool results as plain JSON instead of tables")
+    parser.add_argument("--json", dest="json_path", help="write the scorecard to this file")
+    parser.add_argument("--markdown", dest="markdown_path", help="write a Markdown scorecard")
+    parser.add_argument("--baseline", help="compare against a previous --json scorecard")
+    parser.add_argument("--max-pass-rate-drop", type=float, default=0.0)
+    parser.add_argument("--max-latency-regression", type=float, default=0.25,
+                        help="allowed p50 wall-time increase vs the baseline (fraction)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    scenarios = load_scenarios(args.dataset)
+    if args.scenario:
+        scenarios = [s for s in scenarios if s["id"] in set(args.scenario)]
+    agent_options: Dict[str, Any] = {}
+    if args.provider:
+        agent_options["provider"] = args.provider
+    if args.model:
+        for key in ("ollama_model", "anthropic_model", "openai_model", "github_model",
+                    "foundry_model"):
+            agent_options[key] = args.model
+    runner = EvalRunner(
+        scenarios,
+        profiles=args.profile or tuple(REASONING_PROFILES),
+        backend=args.backend,
+        cassette=args.cassette,
+        latency_ms=None if args.latency_ms < 0 else args.latency_ms,
+        repeat=args.repeat,
+        concurrency=args.concurrency,
+        agent_options=agent_options,
+        tabular_results=args.tabular_results,
+    )
+    records = asyncio.run(runner.run())
+    card = scorecard(records, wall_seconds=runner.wall_seconds)
+    print(format_markdown(card))
+    print(f"{len(records)} runs in {runner.wall_seconds:.1f}s")
+
+    if args.json_path:
+        Path(args.json_path).write_text(json.dumps(card, indent=2), encoding="utf-8")
+    if args.markdown_path:
+        Path(args.markdown_path).write_text(format_markdown(card) + "\n", encoding="utf-8")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text(encoding="utf-8"))
+        regressions = compare(
+            card, baseline,
+            max_pass_rate_drop=args.max_pass_rate_drop,
+            max_latency_regression=args.max_latency_regression,
+        )
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
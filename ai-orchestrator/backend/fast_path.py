@@ -0,0 +1,431 @@
+"""Deterministic fast path for simple state queries and commands.
+
+"Is the front door locked?" and "turn off the kitchen lights" used to
+pay for memory recall, a full tool block and at least two model calls.
+:class:`FastPathResolver` recognises a small, closed set of phrasings,
+resolves the target against the :class:`entity_index.EntityIndex` and
+turns the request into one native tool call per entity, answered from a
+template. It never guesses: a target must match an entity's name or
+object_id exactly, or contain only whole words of it ("door" never finds
+"outdoor", "time" never finds "uptime"). Anything it does not recognise,
+an unknown or ambiguous target, an unavailable device or a read that
+fails falls back to the reasoning harness.
+
+The resolver only decides *what* to call. :meth:`DeepReasoningAgent.run`
+executes the calls through the same :class:`ToolRegistry` validation and
+dry-run interceptor as the harness, so commands follow the normal
+approval policy (high-impact actions are queued, not fired).
+"""
+from __future__ import annotations
+
+import logging
+import re
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+from entity_index import EntityIndex, IndexedEntity, _tokens
+
+logger = logging.getLogger(__name__)
+
+IndexProvider = Callable[[], Awaitable[EntityIndex]]
+
+_FILLER = re.compile(r"^(?:please |hey |ok |okay |can you |could you )+|(?: please| for me| now| right now)+$")
+_ARTICLE = r"(?:the |my |our )?"
+_COMMAND = re.compile(rf"^(?:turn|switch) (?P<verb>on|off) {_ARTICLE}(?P<target>.+)$")
+_COMMAND_SUFFIX = re.compile(rf"^(?:turn|switch) {_ARTICLE}(?P<target>.+?) (?P<verb>on|off)$")
+_LOCK = re.compile(rf"^(?P<verb>lock|unlock) {_ARTICLE}(?P<target>.+)$")
+_COVER = re.compile(rf"^(?P<verb>open|close) {_ARTICLE}(?P<target>.+)$")
+_QUESTION = re.compile(
+    rf"^(?:is|are) {_ARTICLE}(?P<target>.+?) (?:currently |still )?"
+    r"(?P<predicate>on|off|locked|unlocked|open|closed|playing|home|away)$"
+)
+# Value lookups name what is measured; "what's the time" is not one.
+_MEASUREMENTS: Dict[str, str] = {
+    "temperature": "temperature", "humidity": "humidity", "pressure": "pressure",
+    "power": "power", "energy": "energy", "battery": "battery",
+    "moisture": "moisture", "illuminance": "illuminance",
+}
+_MEASURE = "|".join(_MEASUREMENTS)
+_VALUE_IN_AREA = re.compile(
+    rf"^what(?:'s| is) the (?P<measure>{_MEASURE}) (?:in|of) (?:the )?(?P<area>.+)$"
+)
+_VALUE = re.compile(
+    rf"^what(?:'s| is) the (?:(?P<target>.+?) )?(?P<measure>{_MEASURE})(?: reading| level)?$"
+)
+_AREA_SPLIT = re.compile(r"^(?P<target>.+?) in (?:the )?(?P<area>.+)$")
+# Anything beyond "verb + target" (levels, conjunctions, timing) is left to
+# the harness.
+_MODIFIERS = re.compile(r"\d|%|\b(?:and|or|to|at|for|after|before|until|when|if|then|but|except|all)\b")
+
+_NOUNS: Dict[str, str] = {
+    "light": "light", "lights": "light", "lamp": "light", "lamps": "light",
+    "switch": "switch", "switches": "switch", "plug": "switch", "plugs": "switch",
+    "fan": "fan", "fans": "fan",
+    "lock": "lock", "locks": "lock",
+    "blind": "cover", "blinds": "cover", "shade": "cover", "shades": "cover",
+    "curtain": "cover", "curtains": "cover",
+}
+_PLURALS: Set[str] = {
+    "lights", "lamps", "switches", "plugs", "fans", "locks", "blinds", "shades", "curtains",
+}
+
+# verb -> (domains it applies to, HA service)
+_VERBS: Dict[str, Tuple[Tuple[str, ...], str]] = {
+    "turn_on": (("light", "switch", "fan", "input_boolean"), "turn_on"),
+    "turn_off": (("light", "switch", "fan", "input_boolean"), "turn_off"),
+    "lock": (("lock",), "lock"),
+    "unlock": (("lock",), "unlock"),
+    "open": (("cover",), "open_cover"),
+    "close": (("cover",), "close_cover"),
+}
+_PAST_TENSE = {
+    "turn_on": "Turned on", "turn_off": "Turned off", "lock": "Locked",
+    "unlock": "Unlocked", "open": "Opened", "close": "Closed",
+}
+_PRESENT = {
+    "turn_on": "Turn on", "turn_off": "Turn off", "lock": "Lock",
+    "unlock": "Unlock", "open": "Open", "close": "Close",
+}
+# Dedicated local tools; every other command uses ``call_ha_service``.
+_LOCAL_TOOLS: Dict[Tuple[str, str], str] = {
+    ("turn_on", "light"): "turn_on_light",
+    ("turn_off", "light"): "turn_off_light",
+    ("lock", "lock"): "lock_door",
+    ("unlock", "lock"): "unlock_door",
+}
+
+# predicate -> (states that mean "yes", domains the predicate narrows to)
+_PREDICATES: Dict[str, Tuple[Set[str], Optional[Tuple[str, ...]]]] = {
+    "on": ({"on"}, None),
+    "off": ({"off"}, None),
+    "locked": ({"locked"}, ("lock",)),
+    "unlocked": ({"unlocked"}, ("lock",)),
+    "open": ({"open", "on"}, ("cover", "binary_sensor")),
+    "closed": ({"closed", "off"}, ("cover", "binary_sensor")),
+    "playing": ({"playing"}, ("media_player",)),
+    "home": ({"home"}, ("person", "device_tracker")),
+    "away": ({"not_home"}, ("person", "device_tracker")),
+}
+# How binary sensors read aloud, by device_class.
+_BINARY_LABELS: Dict[str, Tuple[str, str]] = {
+    "door": ("open", "closed"), "window": ("open", "closed"),
+    "garage_door": ("open", "closed"), "opening": ("open", "closed"),
+    "motion": ("detecting motion", "clear"), "occupancy": ("occupied", "clear"),
+}
+_UNAVAILABLE = {"unavailable", "unknown"}
+# Verbs that move or unsecure something: a partial name never selects the
+# target, even when only one entity of the verb's domain matches it.
+_GUARDED_VERBS = {"lock", "unlock", "open", "close"}
+
+
+@dataclass
+class FastPathIntent:
+    """A recognised request, before its target is resolved."""
+
+    kind: str  # "query" | "value" | "command"
+    target: str = ""
+    area: Optional[str] = None
+    verb: Optional[str] = None
+    predicate: Optional[str] = None
+    device_class: Optional[str] = None
+
+
+@dataclass
+class FastPathMatch:
+    """A resolved request: the tool calls to make and who they touch."""
+
+    intent: FastPathIntent
+    entities: List[IndexedEntity]
+    calls: List[Tuple[str, Dict[str, Any]]] = field(default_factory=list)
+    started: float = 0.0
+
+    @property
+    def mutating(self) -> bool:
+        return self.intent.kind == "command"
+
+    def describe(self) -> str:
+        """The plan in plain English, as a harness run would phrase it."""
+        if not self.mutating:
+            return f"Read {_names(self.entities)}."
+        return f"{_PRESENT[self.intent.verb or '']} {_names(self.entities)}."
+
+
+def _names(entities: List[IndexedEntity]) -> str:
+    names = [e.name or e.entity_id for e in entities]
+    if len(names) <= 1:
+        return "".join(names)
+    return ", ".join(names[:-1]) + " and " + names[-1]
+
+
+def _normalise(message: str) -> str:
+    text = " ".join(message.lower().replace("’", "'").split())
+    text = text.strip(" ?!.")
+    previous = None
+    while previous != text:
+        previous, text = text, _FILLER.sub("", text).strip(" ,?!.")
+    return text
+
+
+def parse_intent(message: str) -> Optional[FastPathIntent]:
+    """The :class:`FastPathIntent` for ``message``, or None."""
+    text = _normalise(message)
+    if not text:
+        return None
+    for pattern in (_COMMAND, _COMMAND_SUFFIX):
+        m = pattern.match(text)
+        if m:
+            return FastPathIntent("command", m["target"], verb=f"turn_{m['verb']}")
+    for pattern in (_LOCK, _COVER):
+        m = pattern.match(text)
+        if m:
+            return FastPathIntent("command", m["target"], verb=m["verb"])
+    m = _QUESTION.match(text)
+    if m:
+        return FastPathIntent("query", m["target"], predicate=m["predicate"])
+    m = _VALUE_IN_AREA.match(text)
+    if m:
+        return FastPathIntent("value", "", area=m["area"], device_class=_MEASUREMENTS[m["measure"]])
+    m = _VALUE.match(text)
+    if m:
+        return FastPathIntent("value", m["target"] or "", device_class=_MEASUREMENTS[m["measure"]])
+    return None
+
+
+def _percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return round(ordered[index], 2)
+
+
+class FastPathResolver:
+    """Matches simple requests to native tool calls, or declines.
+
+    ``index_provider`` returns the live :class:`EntityIndex`;
+    ``tool_names`` returns the tools currently registered, so a match is
+    only offered when its tool exists. ``max_targets`` caps how many
+    entities one plural command ("turn off the kitchen lights") may touch.
+    """
+
+    def __init__(
+        self,
+        index_provider: IndexProvider,
+        tool_names: Callable[[], Iterable[str]],
+        *,
+        max_targets: int = 8,
+        latency_window: int = 512,
+    ) -> None:
+        self._index = index_provider
+        self._tool_names = tool_names
+        self.max_targets = max(1, int(max_targets))
+        self.attempts = 0
+        self.hits = 0
+        self.fallbacks: Counter = Counter()
+        self._latencies: Deque[float] = deque(maxlen=max(1, latency_window))
+
+    # ---- matching ---------------------------------------------------------
+    async def match(self, message: str) -> Optional[FastPathMatch]:
+        """A :class:`FastPathMatch` when ``message`` is unambiguous."""
+        started = time.perf_counter()
+        self.attempts += 1
+        intent = parse_intent(message)
+        if intent is None:
+            return self.decline("no_intent")
+        if _MODIFIERS.search(intent.target) or (intent.area and _MODIFIERS.search(intent.area)):
+            return self.decline("modifiers")
+        try:
+            index = await self._index()
+        except Exception as exc:
+            logger.warning("Fast path: entity index unavailable: %s", exc)
+            return self.decline("no_index")
+
+        entities, reason = self._resolve(index, intent)
+        if not entities:
+            return self.decline(reason)
+        if any(str(e.state).lower() in _UNAVAILABLE for e in entities) and intent.kind == "command":
+            return self.decline("unavailable")
+
+        calls = self._calls(intent, entities)
+        available = set(self._tool_names())
+        if not calls or any(name not in available for name, _ in calls):
+            return self.decline("tool_missing")
+        return FastPathMatch(intent, entities, calls, started)
+
+    def _resolve(
+        self,
+        index: EntityIndex,
+        intent: FastPathIntent,
+    ) -> Tuple[List[IndexedEntity], str]:
+        if intent.kind == "value":
+            target, area = intent.target, intent.area
+            if area is None and target and index.area_members(target) is not None:
+                area, target = target, ""  # "the living room temperature"
+            members = None
+            if area is not None:
+                members = index.area_members(area)
+                if members is None:
+                    return [], "no_match"
+            hits = _whole_word_hits(index.search(
+                target, domains=("sensor",), device_class=intent.device_class, candidates=members,
+            ), target)
+            return (hits, "") if len(hits) == 1 else ([], "ambiguous" if hits else "no_match")
+
+        target, area = intent.target, intent.area
+        split = _AREA_SPLIT.match(target)
+        if split:
+            target, area = split["target"], split["area"]
+        words = target.split()
+        noun = words[-1] if words else ""
+        noun_domain = _NOUNS.get(noun)
+        domains = self._domains(intent, noun_domain)
+        if domains == ():
+            return [], "no_match"
+        if noun_domain is not None:
+            # The device noun becomes the domain filter; what is left names
+            # the device ("porch") or its area ("kitchen").
+            words = words[:-1]
+            if area is None and words and index.area_members(" ".join(words)) is not None:
+                area, words = " ".join(words), []
+        members = None
+        if area is not None:
+            members = index.area_members(area)
+            if members is None:
+                return [], "no_match"
+        query = " ".join(words)
+        if not query and members is None:
+            return [], "ambiguous"  # "the lights", with no name or area
+
+        hits = _whole_word_hits(index.search(query, domains=domains, candidates=members), query)
+        if not hits:
+            return [], "no_match"
+        if intent.kind == "command" and noun in _PLURALS:
+            if len(hits) > self.max_targets:
+                return [], "too_many"
+            return hits, ""
+        exact = [h for h in hits if _names_exactly(h, query, target)]
+        if len(exact) == 1:
+            return exact, ""
+        if len(hits) != 1:
+            return [], "ambiguous"
+        # A domain inferred from the verb ("open the door") or a guarded
+        # verb needs the words to pick out one entity in the whole home,
+        # not just one cover: the front door lock is a "door" too.
+        if noun_domain is None or intent.verb in _GUARDED_VERBS:
+            anywhere = _whole_word_hits(index.search(query, candidates=members), query)
+            if len(anywhere) > 1:
+                return [], "ambiguous"
+        return hits, ""
+
+    @staticmethod
+    def _domains(intent: FastPathIntent, noun_domain: Optional[str]) -> Optional[Tuple[str, ...]]:
+        if intent.kind == "command":
+            allowed = _VERBS[intent.verb or ""][0]
+            if noun_domain is None:
+                return allowed
+            return (noun_domain,) if noun_domain in allowed else ()
+        if intent.kind == "query":
+            narrowed = _PREDICATES[intent.predicate or ""][1]
+            if noun_domain is None:
+                return narrowed
+            return (noun_domain,) if narrowed is None or noun_domain in narrowed else ()
+        return (noun_domain,) if noun_domain else None
+
+    @staticmethod
+    def _calls(intent: FastPathIntent, entities: List[IndexedEntity]) -> List[Tuple[str, Dict[str, Any]]]:
+        if intent.kind != "command":
+            return [("ha_get_state", {"entity_id": entities[0].entity_id})] if len(entities) == 1 else []
+        service = _VERBS[intent.verb or ""][1]
+        calls: List[Tuple[str, Dict[str, Any]]] = []
+        for entity in entities:
+            local = _LOCAL_TOOLS.get((intent.verb or "", entity.domain))
+            if local:
+                calls.append((local, {"entity_id": entity.entity_id}))
+            else:
+                calls.append(("call_ha_service", {
+                    "domain": entity.domain, "service": service, "entity_id": entity.entity_id,
+                }))
+        return calls
+
+    # ---- answers ----------------------------------------------------------
+    def read_answer(self, match: FastPathMatch, result: Dict[str, Any]) -> str:
+        """Template answer for a state query or value lookup."""
+        entity = match.entities[0]
+        state = result.get("state") if isinstance(result.get("state"), dict) else {}
+        attrs = state.get("attributes") or {}
+        value = str(state.get("state", entity.state))
+        name = attrs.get("friendly_name") or entity.name or entity.entity_id
+        spoken = _spoken_state(entity, value)
+        if value.lower() in _UNAVAILABLE:
+            return f"{name} is {value} right now, so I can't tell."
+        predicate = match.intent.predicate
+        if predicate is None:
+            unit = attrs.get("unit_of_measurement") or entity.unit
+            return f"{name} is {value}{' ' + unit if unit else ''}."
+        yes = value.lower() in _PREDICATES[predicate][0]
+        return f"{'Yes' if yes else 'No'}, {name} is {spoken}."
+
+    def command_answer(
+        self,
+        match: FastPathMatch,
+        plan: Optional[Dict[str, Any]],
+        execution_results: Optional[List[Dict[str, Any]]],
+    ) -> str:
+        """Template answer once the command has run or been queued."""
+        names = _names(match.entities)
+        verb = match.intent.verb or ""
+        if execution_results is not None:
+            failed = [row for row in execution_results if not row.get("ok")]
+            if not failed:
+                return f"{_PAST_TENSE[verb]} {names}."
+            error = (failed[0].get("result") or {}).get("error") or "the action failed"
+            return f"I couldn't {_PRESENT[verb].lower()} {names}: {error}."
+        if plan is not None and plan.get("intents"):
+            return (f"I've queued a plan to {_PRESENT[verb].lower()} {names}; "
+                    "it needs approval before it runs.")
+        return f"{_PAST_TENSE[verb]} {names}."
+
+    # ---- metrics ----------------------------------------------------------
+    def decline(self, reason: str) -> None:
+        """Count a fallback to the harness; always returns None."""
+        self.fallbacks[reason] += 1
+        return None
+
+    def record_hit(self, match: FastPathMatch) -> float:
+        latency_ms = (time.perf_counter() - match.started) * 1000
+        self.hits += 1
+        self._latencies.append(latency_ms)
+        return latency_ms
+
+    def info(self) -> Dict[str, Any]:
+        latencies = list(self._latencies)
+        return {
+            "attempts": self.attempts,
+            "hits": self.hits,
+            "hit_ratio": round(self.hits / self.attempts, 4) if self.attempts else 0.0,
+            "fallbacks": dict(self.fallbacks),
+            "latency_ms_avg": round(sum(latencies) / len(latencies), 2) if latencies else None,
+            "latency_ms_p50": _percentile(latencies, 50),
+            "latency_ms_p95": _percentile(latencies, 95),
+        }
+
+
+def _whole_word_hits(hits: List[IndexedEntity], query: str) -> List[IndexedEntity]:
+    """``hits`` that contain every word of ``query`` as a whole token."""
+    words = _tokens(query)
+    return [h for h in hits if words <= h.tokens]
+
+
+def _names_exactly(entity: IndexedEntity, *phrases: str) -> bool:
+    object_id = entity.entity_id.split(".", 1)[-1]
+    name = entity.name.lower()
+    return any(p and (p == name or p.replace(" ", "_") == object_id) for p in phrases)
+
+
+def _spoken_state(entity: IndexedEntity, value: str) -> str:
+    if entity.domain == "binary_sensor" and entity.device_class in _BINARY_LABELS:
+        on, off = _BINARY_LABELS[entity.device_class]
+        return on if value == "on" else off if value == "off" else value
+    return value.replace("_", " ")
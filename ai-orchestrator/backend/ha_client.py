@@ -3,13 +3,272 @@ Home Assistant WebSocket client for real-time state subscriptions and service ca
 """
 import asyncio
 import json
+import time
+from collections import OrderedDict
 from datetime import datetime, timezone
-from typing import Dict, Callable, Optional, Any
+from typing import Dict, Callable, List, Optional, Any, Tuple
 from urllib.parse import urlparse
 
 import websockets
 import httpx
 
+from entity_index import EntityIndex
+from ha_registry import RegistryCache
+
+try:  # optional: several times faster than json on large state frames
+    import orjson
+
+    _json_loads = orjson.loads
+except ImportError:  # pragma: no cover - depends on the environment
+    _json_loads = json.loads
+
+
+def _ts_to_iso(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).isoformat()
+
+
+def _expand_compressed_state(entity_id: str, compressed: Dict) -> Dict[str, Any]:
+    """Turn a ``subscribe_entities`` compressed state into a ``get_states`` row."""
+    context = compressed.get("c")
+    last_changed = _ts_to_iso(compressed.get("lc"))
+    return {
+        "entity_id": entity_id,
+        "state": compressed.get("s"),
+        "attributes": dict(compressed.get("a") or {}),
+        "last_changed": last_changed,
+        "last_updated": _ts_to_iso(compressed["lu"]) if "lu" in compressed else last_changed,
+        "context": {"id": context} if isinstance(context, str) else (context or {}),
+    }
+
+
+def _apply_compressed_diff(state: Dict[str, Any], diff: Dict) -> Dict[str, Any]:
+    """Return a new state dict with a compressed ``+``/``-`` diff applied."""
+    new_state = dict(state)
+    attributes = dict(state.get("attributes") or {})
+    additions = diff.get("+") or {}
+    if "s" in additions:
+        new_state["state"] = additions["s"]
+    if "a" in additions:
+        attributes.update(additions["a"])
+    if "c" in additions:
+        context = additions["c"]
+        new_state["context"] = (
+            {**(state.get("context") or {}), "id": context}
+            if isinstance(context, str)
+            else {**(state.get("context") or {}), **context}
+        )
+    if "lc" in additions:
+        new_state["last_changed"] = new_state["last_updated"] = _ts_to_iso(additions["lc"])
+    elif "lu" in additions:
+        new_state["last_updated"] = _ts_to_iso(additions["lu"])
+    for key in (diff.get("-") or {}).get("a") or ():
+        attributes.pop(key, None)
+    new_state["attributes"] = attributes
+    return new_state
+
+
+def _batch_call_targets(call: Dict[str, Any], data: Dict[str, Any]) -> Optional[list]:
+    """Entity ids a service call touches, or None when it cannot be known."""
+    target = call.get("target") or {}
+    if any(data.get(k) or target.get(k) for k in ("area_id", "device_id", "floor_id", "label_id")):
+        return None
+    raw = call.get("entity_id") or data.get("entity_id") or target.get("entity_id")
+    if not raw or raw == "all":
+        return None
+    return [raw] if isinstance(raw, str) else list(raw)
+
+
+def _plan_service_batch(calls: list, *, merge: bool) -> list:
+    """Group batch calls into send units with ordering dependencies."""
+    units: list = []
+    last_touch: Dict[str, int] = {}
+    last_barrier = -1
+    open_groups: Dict[str, int] = {}
+    for index, call in enumerate(calls):
+        data = dict(call.get("service_data") or call.get("data") or {})
+        targets = _batch_call_targets(call, data)
+        if call.get("entity_id"):
+            data["entity_id"] = call["entity_id"]
+        signature = None
+        if merge and targets is not None and not call.get("target"):
+            extra = {k: v for k, v in data.items() if k != "entity_id"}
+            signature = json.dumps(
+                [call["domain"], call["service"], extra], sort_keys=True, default=str,
+            )
+            unit_index = open_groups.get(signature)
+            # Joining an earlier unit moves this call up in time, which is
+            # only safe if nothing after that unit touched its entities.
+            if (
+                unit_index is not None
+                and unit_index > last_barrier
+                and all(last_touch.get(e, -1) <= unit_index for e in targets)
+            ):
+                unit = units[unit_index]
+                unit["members"].append(index)
+                unit["deps"] |= {
+                    last_touch[e] for e in targets
+                    if e in last_touch and last_touch[e] != unit_index
+                }
+                for entity_id in targets:
+                    if entity_id not in unit["entities"]:
+                        unit["entities"].append(entity_id)
+                    last_touch[entity_id] = unit_index
+                unit["service_data"]["entity_id"] = list(unit["entities"])
+                continue
+
+        unit_index = len(units)
+        if targets is None:
+            deps = set(range(unit_index))
+            last_barrier = unit_index
+            open_groups.clear()
+        else:
+            deps = {last_touch[e] for e in targets if e in last_touch}
+            if last_barrier >= 0:
+                deps.add(last_barrier)
+            for entity_id in targets:
+                last_touch[entity_id] = unit_index
+            if signature is not None:
+                open_groups[signature] = unit_index
+        if call.get("target"):
+            data.update(call["target"])
+        units.append({
+            "domain": call["domain"],
+            "service": call["service"],
+            "service_data": data,
+            "entities": list(targets or ()),
+            "deps": deps,
+            "members": [index],
+        })
+    return units
+
+
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "inline")
+
+
+class _LeaderCancelled(Exception):
+    """The caller performing a coalesced read was cancelled; retry."""
+
+
+class _Subscriber:
+    """Bounded event queue plus worker task for one subscription callback.
+
+    The receive loop only enqueues, so a slow callback can never delay
+    command responses. Every event is queued while there is room, so a
+    quick on→off→on burst reaches the callback as three transitions. When
+    the queue is full the oldest event is dropped; with ``coalesce`` a
+    newer event for an entity that is still queued first replaces its
+    latest queued event in place (keeping that event's ``old_state``).
+    ``inline`` has no queue: a plain (non-async) callback runs on the
+    receive path for every event, so nothing is ever dropped. It must be
+    cheap, e.g. cache invalidation.
+    """
+
+    def __init__(
+        self,
+        callback: Callable[[Dict], Any],
+        *,
+        maxsize: int,
+        overflow: str,
+        name: str,
+    ) -> None:
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
+        self.callback = callback
+        # Routing keys, owned by HAWebSocketClient's routing table.
+        self.entity_ids: set = set()
+        self.domains: set = set()
+        self.wildcard = False
+        self.maxsize = max(1, maxsize)
+        self.overflow = overflow
+        self.name = name
+        self._pending: "OrderedDict[int, Dict]" = OrderedDict()
+        # entity_id -> key of its latest queued event, for coalescing.
+        self._latest: Dict[str, int] = {}
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.errors = 0
+        self.max_depth = 0
+
+    def start(self) -> None:
+        if self.overflow == "inline":
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=self.name)
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def offer(self, event: Dict) -> None:
+        if self.overflow == "inline":
+            try:
+                self.callback(event)
+                self.delivered += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ HA subscriber {self.name} callback failed: {e}")
+            return
+        entity_id = (event.get("data") or {}).get("entity_id")
+        if len(self._pending) >= self.maxsize:
+            key = self._latest.get(entity_id) if self.overflow == "coalesce" else None
+            queued = self._pending.get(key) if key is not None else None
+            if queued is not None:
+                old_state = (queued.get("data") or {}).get("old_state")
+                self._pending[key] = {
+                    **event, "data": {**event["data"], "old_state": old_state},
+                }
+                self.coalesced += 1
+                return
+            self._forget(*self._pending.popitem(last=False))
+            self.dropped += 1
+        self._seq += 1
+        self._pending[self._seq] = event
+        if entity_id:
+            self._latest[entity_id] = self._seq
+        self.max_depth = max(self.max_depth, len(self._pending))
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            event = self._forget(*self._pending.popitem(last=False))
+            try:
+                await self.callback(event)
+                self.delivered += 1
+            except Exception as e:
+                self.errors += 1
+                print(f"⚠️ HA subscriber {self.name} callback failed: {e}")
+
+    def _forget(self, key: int, event: Dict) -> Dict:
+        entity_id = (event.get("data") or {}).get("entity_id")
+        if self._latest.get(entity_id) == key:
+            del self._latest[entity_id]
+        return event
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entities": len(self.entity_ids),
+            "domains": sorted(self.domains),
+            "wildcard": self.wildcard,
+            "overflow": self.overflow,
+            "depth": len(self._pending),
+            "max_depth": self.max_depth,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+        }
+
 
 class HAWebSocketClient:
     """
@@ -17,7 +276,17 @@ class HAWebSocketClient:
     Handles authentication, state subscriptions, and service calls.
     """
     
-    def __init__(self, ha_url: str, token: str, supervisor_token: Optional[str] = None):
+    def __init__(
+        self,
+        ha_url: str,
+        token: str,
+        supervisor_token: Optional[str] = None,
+        mirror_states: bool = False,
+        subscriber_queue_size: int = 1000,
+        subscriber_overflow: str = "coalesce",
+        read_cache_ttl: float = 0.0,
+        registry_cache: Optional[RegistryCache] = None,
+    ):
         """
         Initialize HA WebSocket client.
         
@@ -25,6 +294,15 @@ class HAWebSocketClient:
             ha_url: Home Assistant URL
             token: Token for WebSocket 'auth' packet (LLAT or Supervisor Token)
             supervisor_token: Token for Supervisor Proxy Headers (if different)
+            mirror_states: Keep an event-fed in-memory copy of every entity
+                state so reads do not download the whole house each time
+            subscriber_queue_size: Default per-subscriber event queue bound
+            subscriber_overflow: Default overflow policy, ``coalesce`` or
+                ``drop_oldest``
+            read_cache_ttl: Seconds to reuse a ``get_states``/``get_services``
+                result for identical reads (0 disables the micro-cache)
+            registry_cache: Area/device/entity registry cache, e.g. one
+                backed by a file so areas are known before HA connects
         """
         self.ha_url = ha_url.rstrip("/")
         self.token = token
@@ -43,6 +321,74 @@ class HAWebSocketClient:
         self.ha_version: Optional[str] = None
         self._receive_task: Optional[asyncio.Task] = None
         self._connect_lock = asyncio.Lock()
+
+        self.rx_frames = 0
+        self.rx_bytes = 0
+        # ``inline`` needs a plain callback, so it is never a default.
+        if subscriber_overflow not in OVERFLOW_POLICIES or subscriber_overflow == "inline":
+            raise ValueError(f"Unknown overflow policy: {subscriber_overflow}")
+        self.subscriber_queue_size = subscriber_queue_size
+        self.subscriber_overflow = subscriber_overflow
+
+        # Identical concurrent reads share one in-flight command and one
+        # decoded result; ``read_cache_ttl`` optionally reuses it briefly.
+        self.read_cache_ttl = read_cache_ttl
+        self._inflight_reads: Dict[str, asyncio.Future] = {}
+        self._read_cache: Dict[str, tuple] = {}
+        self.read_stats = {"sent": 0, "coalesced": 0, "cache_hits": 0}
+
+        # Local state_changed routing. Every subscriber shares one upstream
+        # feed: the state mirror when enabled, otherwise a single HA
+        # ``subscribe_events``. Ids are local so they survive reconnects.
+        self._subscribers: Dict[int, _Subscriber] = {}
+        self._next_subscriber_id = 0
+        self._entity_routes: Dict[str, set] = {}
+        self._domain_routes: Dict[str, set] = {}
+        self._wildcard_routes: set = set()
+        self._router_sub_id: Optional[int] = None
+        self._router_lock = asyncio.Lock()
+        self._restore_task: Optional[asyncio.Task] = None
+
+        # State mirror: seeded once per connection and kept current from
+        # HA's compressed ``subscribe_entities`` diffs (or ``get_states`` plus
+        # raw ``state_changed`` events on cores that predate that command).
+        # Stored state dicts are replaced wholesale, never mutated in place.
+        self.mirror_states = mirror_states
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._mirror_ready = False
+        self._mirror_sub_id: Optional[int] = None
+        self._mirror_lock = asyncio.Lock()
+        self._mirror_synced_at: Optional[str] = None
+        self._mirror_events = 0
+        self._mirror_compressed: Optional[bool] = None
+        self._mirror_seeded: Optional[asyncio.Event] = None
+        self._mirror_resync_changed = 0
+        # Warm start: a persisted snapshot may pre-fill the mirror as stale
+        # state until the live subscription has reconciled it.
+        self._mirror_restored_at: Optional[str] = None
+        # Entities changed since the last saved checkpoint (entity_id ->
+        # change sequence), so a checkpoint writes only those rows. The
+        # first checkpoint rewrites the snapshot unless one was restored.
+        self._mirror_dirty: Dict[str, int] = {}
+        self._mirror_change_seq = 0
+        self._checkpoint_full = True
+        self._started = time.monotonic()
+        self._first_answer: Optional[Dict[str, Any]] = None
+        # Secondary indexes for the discovery tools, kept in step with the
+        # mirror so lookups never scan every state.
+        self.entity_index = EntityIndex()
+
+        # Area/device/entity registries: fetched once per connection, kept
+        # current from ``*_registry_updated`` events.
+        self.registry = registry_cache if registry_cache is not None else RegistryCache()
+        self._registry_ready = False
+        self._registry_wanted = False
+        self._registry_sub_ids: list[int] = []
+        self._registry_lock = asyncio.Lock()
+        self._registry_tasks: set = set()
+        self._registry_events = 0
+        if self.registry:
+            self._apply_registry_areas()
         
         # Convert HTTP URL to WebSocket URL
         parsed = urlparse(self.ha_url)
@@ -61,6 +407,42 @@ class HAWebSocketClient:
             "last_connected_at": self.last_connected_at,
             "last_error": self.last_error,
             "last_error_at": self.last_error_at,
+            "rx_frames": self.rx_frames,
+            "rx_bytes": self.rx_bytes,
+            "reads": {**self.read_stats, "cache_ttl": self.read_cache_ttl},
+            "subscribers": {
+                str(sub_id): subscriber.stats()
+                for sub_id, subscriber in self._subscribers.items()
+            },
+            "state_routes": {
+                "upstream": (
+                    "state_mirror" if self.mirror_states
+                    else "state_changed" if self._router_sub_id is not None
+                    else None
+                ),
+                "entities": len(self._entity_routes),
+                "domains": len(self._domain_routes),
+                "wildcard": len(self._wildcard_routes),
+            },
+            "state_mirror": {
+                "enabled": self.mirror_states,
+                "ready": self._mirror_ready,
+                "protocol": {
+                    True: "subscribe_entities", False: "state_changed",
+                }.get(self._mirror_compressed),
+                "entities": len(self._states),
+                "events_applied": self._mirror_events,
+                "synced_at": self._mirror_synced_at,
+                "resync_changed": self._mirror_resync_changed,
+                "restored_from": self._mirror_restored_at,
+                "stale": bool(self._mirror_restored_at) and not self._mirror_ready,
+            },
+            "first_answer": self._first_answer,
+            "registry": {
+                **self.registry.info(),
+                "ready": self._registry_ready,
+                "events_applied": self._registry_events,
+            },
         }
 
     def _record_error(self, exc: BaseException) -> None:
@@ -72,6 +454,54 @@ class HAWebSocketClient:
             if not future.done():
                 future.set_exception(ConnectionError(message))
         self.pending_responses.clear()
+
+    @property
+    def mirror_ready(self) -> bool:
+        return self.mirror_states and self._mirror_ready
+
+    def _mark_dirty(self, entity_id: str) -> None:
+        self._mirror_change_seq += 1
+        self._mirror_dirty[entity_id] = self._mirror_change_seq
+
+    def _mirror_put(self, state: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        entity_id = state["entity_id"]
+        old_state = self._states.get(entity_id)
+        self._states[entity_id] = state
+        self.entity_index.upsert(state)
+        self._mark_dirty(entity_id)
+        return old_state
+
+    def _mirror_pop(self, entity_id: str) -> Optional[Dict[str, Any]]:
+        self.entity_index.remove(entity_id)
+        old_state = self._states.pop(entity_id, None)
+        if old_state is not None:
+            self._mark_dirty(entity_id)
+        return old_state
+
+    def _mirror_replace(self, states: Dict[str, Dict[str, Any]]) -> None:
+        previous = self._states
+        for entity_id in previous.keys() | states.keys():
+            if previous.get(entity_id) != states.get(entity_id):
+                self._mark_dirty(entity_id)
+        self._states = states
+        self.entity_index.rebuild(states.values())
+
+    def _invalidate_mirror(self) -> None:
+        """Mark the mirror stale; HA subscriptions die with the socket."""
+        self._mirror_ready = False
+        if self._mirror_sub_id is not None:
+            self.subscriptions.pop(self._mirror_sub_id, None)
+            self._mirror_sub_id = None
+
+    def _invalidate_upstream(self) -> None:
+        self._invalidate_mirror()
+        if self._router_sub_id is not None:
+            self.subscriptions.pop(self._router_sub_id, None)
+            self._router_sub_id = None
+        self._registry_ready = False
+        for sub_id in self._registry_sub_ids:
+            self.subscriptions.pop(sub_id, None)
+        self._registry_sub_ids = []
     
     async def disconnect(self):
         """Disconnect from Home Assistant"""
@@ -90,7 +520,12 @@ class HAWebSocketClient:
             except (asyncio.CancelledError, Exception):
                 pass
         self._receive_task = None
+        if self._restore_task and self._restore_task is not asyncio.current_task():
+            self._restore_task.cancel()
+        for sub_id in list(self._subscribers):
+            self.unsubscribe(sub_id)
         self._fail_pending("Home Assistant disconnected")
+        self._invalidate_upstream()
         print("📡 HA Client disconnected")
     
     async def connect(self):
@@ -143,6 +578,16 @@ class HAWebSocketClient:
                     message = auth_result_data.get("message") or auth_result_data.get("type")
                     raise ValueError(f"Authentication failed: {message}")
 
+                # Ask HA to batch bursts of messages into one JSON array
+                # frame. Cores that do not know the command just reply with
+                # an error result, which the receive loop ignores.
+                self.message_id += 1
+                await self.ws.send(json.dumps({
+                    "id": self.message_id,
+                    "type": "supported_features",
+                    "features": {"coalesce_messages": 1},
+                }))
+
                 self.connected = True
                 self.last_error = None
                 self.last_error_at = None
@@ -193,6 +638,9 @@ class HAWebSocketClient:
             )
             await self.ws.send(json.dumps(message))
             return self.message_id
+        except asyncio.CancelledError:
+            self.pending_responses.pop(message["id"], None)
+            raise
         except Exception as e:
             self.pending_responses.pop(self.message_id, None)
             print(f"❌ Error sending WebSocket message: {e}")
@@ -206,20 +654,14 @@ class HAWebSocketClient:
         """Continuously receive and process messages from HA"""
         try:
             async for message in self.ws:
-                data = json.loads(message)
-                
-                # Handle subscription events
-                if data["type"] == "event" and data.get("id") in self.subscriptions:
-                    callback = self.subscriptions[data["id"]]
-                    await callback(data["event"])
-                
-                # Handle command responses
-                elif data.get("id") in self.pending_responses:
-                    # The requesting coroutine owns cleanup. Keeping a
-                    # completed future here closes the send/receive race.
-                    future = self.pending_responses[data["id"]]
-                    if not future.done():
-                        future.set_result(data)
+                self.rx_frames += 1
+                self.rx_bytes += len(message)
+                data = _json_loads(message)
+                if isinstance(data, list):  # coalesced frame
+                    for item in data:
+                        await self._dispatch(item)
+                else:
+                    await self._dispatch(data)
         
         except websockets.exceptions.ConnectionClosed:
             self.connected = False
@@ -234,6 +676,41 @@ class HAWebSocketClient:
                 print(f"❌ Error receiving HA messages: {e}")
         finally:
             self.connected = False
+            self._invalidate_upstream()
+    
+    async def _dispatch(self, data: Dict) -> None:
+        msg_id = data.get("id")
+        
+        # Handle subscription events. These handlers are internal, cheap
+        # and order-sensitive; user callbacks sit behind ``_route``.
+        if data.get("type") == "event" and msg_id in self.subscriptions:
+            await self.subscriptions[msg_id](data["event"])
+        
+        # Handle command responses
+        elif msg_id in self.pending_responses:
+            # The requesting coroutine owns cleanup. Keeping a
+            # completed future here closes the send/receive race.
+            future = self.pending_responses[msg_id]
+            if not future.done():
+                future.set_result(data)
+
+    def _restore_in_background(self) -> None:
+        """Re-open the mirror and routing feeds after a reconnect."""
+        if self._restore_task and not self._restore_task.done():
+            return
+
+        async def restore():
+            try:
+                if self.mirror_states:
+                    await self._sync_mirror(60.0)
+                if self._subscribers:
+                    await self._ensure_router_upstream()
+                if self._registry_wanted:
+                    await self.ensure_registries()
+            except Exception as e:
+                print(f"⚠️ HA subscription restore failed: {e}")
+
+        self._restore_task = asyncio.create_task(restore(), name="ha-subscription-restore")
     
     async def run_reconnect_loop(self):
         """Infinite loop to maintain connection to Home Assistant"""
@@ -246,41 +723,302 @@ class HAWebSocketClient:
                     await self.connect()
                     print("✅ HA Reconnected successfully")
                     retry_delay = 2.0
+                    if self._subscribers or self._registry_wanted or (
+                        self.mirror_states
+                        and (self._mirror_synced_at or self._mirror_restored_at)
+                    ):
+                        self._restore_in_background()
                 except Exception:
                     await asyncio.sleep(retry_delay)
                     retry_delay = min(30.0, retry_delay * 2)
                     continue
             await asyncio.sleep(5)
     
-    async def get_states(self, entity_id: Optional[str] = None, timeout: float = 60.0) -> Dict | list:
-        """
-        Get current state of entities.
-        
-        Args:
-            entity_id: Specific entity ID, or None for all entities
-            timeout: Timeout in seconds (default: 60.0)
-        
-        Returns:
-            Entity state dict or list of states
-        """
-        msg_id = await self._send_message({"type": "get_states"})
-        
-        # Wait for response
+    async def _await_response(self, msg_id: int, timeout: float, what: str) -> Dict:
+        """Wait for the result frame of ``msg_id`` and release its slot."""
         future = self.pending_responses.get(msg_id)
         if future is None:  # compatibility for custom/test send overrides
             future = asyncio.get_running_loop().create_future()
             self.pending_responses[msg_id] = future
         try:
-            result = await asyncio.wait_for(future, timeout=timeout)
+            return await asyncio.wait_for(future, timeout=timeout)
         except asyncio.TimeoutError:
-            raise TimeoutError("Timeout waiting for HA states")
+            raise TimeoutError(f"Timeout waiting for HA {what}")
         finally:
             self.pending_responses.pop(msg_id, None)
+
+    async def _coalesced_read(
+        self,
+        key: str,
+        fetch: Callable[[], Any],
+        timeout: float,
+        use_cache: bool = True,
+    ) -> Any:
+        """Run ``fetch`` once for all concurrent callers asking for ``key``.
+
+        The first caller (the leader) performs the command inline; callers
+        arriving while it is in flight await the same result. Results are
+        shared objects and must be treated as read-only.
+        """
+        while True:
+            if use_cache and self.read_cache_ttl > 0:
+                cached = self._read_cache.get(key)
+                if cached and cached[0] > time.monotonic():
+                    self.read_stats["cache_hits"] += 1
+                    return cached[1]
+            inflight = self._inflight_reads.get(key)
+            if inflight is not None:
+                self.read_stats["coalesced"] += 1
+                try:
+                    return await asyncio.wait_for(asyncio.shield(inflight), timeout=timeout)
+                except _LeaderCancelled:
+                    continue
+                except asyncio.TimeoutError:
+                    raise TimeoutError(f"Timeout waiting for HA {key}")
+
+            future = asyncio.get_running_loop().create_future()
+            # Joiners consume the outcome; never warn about an unread one.
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            self._inflight_reads[key] = future
+            self.read_stats["sent"] += 1
+            try:
+                result = await fetch()
+            except asyncio.CancelledError:
+                future.set_exception(_LeaderCancelled())
+                raise
+            except BaseException as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(result)
+                if self.read_cache_ttl > 0:
+                    self._read_cache[key] = (time.monotonic() + self.read_cache_ttl, result)
+                return result
+            finally:
+                if self._inflight_reads.get(key) is future:
+                    del self._inflight_reads[key]
+
+    async def _fetch_states(self, timeout: float, use_cache: bool = True) -> list:
+        async def fetch():
+            msg_id = await self._send_message({"type": "get_states"})
+            result = await self._await_response(msg_id, timeout, "states")
+            if not result.get("success"):
+                raise ValueError(f"Failed to get states: {result}")
+            return result["result"]
+
+        return await self._coalesced_read("get_states", fetch, timeout, use_cache)
+
+    async def _apply_state_event(self, event: Dict) -> None:
+        data = event.get("data") or {}
+        entity_id = data.get("entity_id")
+        if not entity_id:
+            return
+        new_state = data.get("new_state")
+        if new_state is None:
+            self._mirror_pop(entity_id)
+        else:
+            self._mirror_put(new_state)
+        self._mirror_events += 1
+        if self._subscribers:
+            self._route(entity_id, event)
+
+    async def _apply_entity_diff(self, event: Dict) -> None:
+        """Apply one compressed ``subscribe_entities`` event.
+
+        The first event of a subscription carries every entity under
+        ``"a"``. After a reconnect it is reconciled against the retained
+        mirror, so only entities that really moved count as changes (and
+        are routed to subscribers as ``state_changed`` events). Against a
+        snapshot restored from disk the mirror is updated silently.
+        """
+        seeded = self._mirror_seeded
+        first = seeded is not None and not seeded.is_set()
+        # Reconciling a snapshot restored from disk: whatever moved did so
+        # while the add-on was down. Those are history, not events, and
+        # replaying them would fire state triggers for stale transitions.
+        restored = first and self._mirror_restored_at is not None
+        added = event.get("a")
+        if added:
+            expanded = {
+                eid: _expand_compressed_state(eid, compressed)
+                for eid, compressed in added.items()
+            }
+            if first:
+                previous = self._states
+                moved = [
+                    eid for eid in previous.keys() | expanded.keys()
+                    if previous.get(eid, {}).get("state") != expanded.get(eid, {}).get("state")
+                    or previous.get(eid, {}).get("last_updated")
+                    != expanded.get(eid, {}).get("last_updated")
+                ]
+                self._mirror_resync_changed = len(moved)
+                self._mirror_replace(expanded)
+                if previous and self._subscribers and not restored:
+                    for eid in moved:
+                        self._emit_state_changed(eid, previous.get(eid), expanded.get(eid))
+            else:
+                for eid, state in expanded.items():
+                    self._emit_state_changed(eid, self._mirror_put(state), state)
+            self._mirror_events += len(expanded)
+        for eid, diff in (event.get("c") or {}).items():
+            current = self._states.get(eid)
+            if current is not None:
+                new_state = _apply_compressed_diff(current, diff)
+                self._mirror_put(new_state)
+                self._emit_state_changed(eid, current, new_state)
+                self._mirror_events += 1
+        for eid in event.get("r") or ():
+            self._emit_state_changed(eid, self._mirror_pop(eid), None)
+            self._mirror_events += 1
+        if first:
+            seeded.set()
+
+    async def _subscribe_compressed(self, timeout: float) -> None:
+        self._mirror_seeded = asyncio.Event()
+        msg_id = await self._send_message({"type": "subscribe_entities"})
+        self.subscriptions[msg_id] = self._apply_entity_diff
+        self._mirror_sub_id = msg_id
+        try:
+            result = await self._await_response(msg_id, 10.0, "entity subscription")
+            if not result.get("success"):
+                raise ValueError(f"Subscription failed: {result}")
+            await asyncio.wait_for(self._mirror_seeded.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._invalidate_mirror()
+            raise TimeoutError("Timeout waiting for HA entity snapshot")
+        except Exception:
+            self._invalidate_mirror()
+            raise
+
+    async def _sync_mirror(self, timeout: float) -> None:
+        """Seed the mirror once per connection.
+
+        ``subscribe_entities`` delivers the snapshot as its first event and
+        compressed diffs afterwards. On the legacy path the ``state_changed``
+        subscription is opened *before* the snapshot is requested: HA
+        answers on one ordered socket, so events applied ahead of the
+        snapshot are overwritten by it and every later event is newer.
+        """
+        async with self._mirror_lock:
+            if self._mirror_ready:
+                return
+            if self._mirror_compressed is not False:
+                try:
+                    await self._subscribe_compressed(timeout)
+                except ValueError:
+                    # HA cores before 2022.4 reject ``subscribe_entities``.
+                    self._mirror_compressed = False
+                else:
+                    self._mirror_compressed = True
+            if not self._mirror_compressed:
+                if self._mirror_sub_id is None:
+                    self._mirror_sub_id = await self._subscribe_state_changed(
+                        self._apply_state_event
+                    )
+                states = await self._fetch_states(timeout)
+                self._mirror_replace({
+                    s["entity_id"]: s for s in states if s.get("entity_id")
+                })
+            self._mirror_ready = True
+            self._mirror_synced_at = datetime.now(timezone.utc).isoformat()
+            self._mirror_restored_at = None
+
+    def restore_snapshot(self, states: Dict[str, Dict[str, Any]], saved_at: Optional[str]) -> None:
+        """Pre-fill the mirror from a persisted snapshot.
+
+        Reads are served from it (stale) until the first live sync, which
+        reconciles it with a diff against Home Assistant.
+        """
+        if not self.mirror_states or self._mirror_ready or not states:
+            return
+        self._mirror_replace(dict(states))
+        self._mirror_restored_at = saved_at or "unknown"
+        # The snapshot on disk is exactly what was just loaded.
+        self._mirror_dirty.clear()
+        self._checkpoint_full = False
+
+    def mirror_checkpoint(
+        self,
+    ) -> Optional[Tuple[tuple, Dict[str, Dict[str, Any]], Optional[List[str]]]]:
+        """What to persist since the last save confirmed through
+        :meth:`mark_checkpointed`, or None if nothing changed.
+
+        Returns ``(marker, states, removed)``: the changed states and the
+        removed entity ids, or every state and ``removed=None`` when the
+        whole snapshot must be rewritten.
+        """
+        if not self._mirror_ready:
+            return None
+        if not self._checkpoint_full and not self._mirror_dirty:
+            return None
+        dirty = dict(self._mirror_dirty)
+        marker = (self._checkpoint_full, dirty)
+        # State dicts are replaced, never mutated, so shallow copies are a
+        # consistent view that can be serialised off the event loop.
+        if self._checkpoint_full:
+            return marker, dict(self._states), None
+        changed = {eid: self._states[eid] for eid in dirty if eid in self._states}
+        removed = [eid for eid in dirty if eid not in self._states]
+        return marker, changed, removed
+
+    def mark_checkpointed(self, marker: tuple) -> None:
+        """Record that the changes returned with ``marker`` were saved.
+
+        Entities that changed again since then stay pending.
+        """
+        full, dirty = marker
+        if full:
+            self._checkpoint_full = False
+        for entity_id, seq in dirty.items():
+            if self._mirror_dirty.get(entity_id) == seq:
+                del self._mirror_dirty[entity_id]
+
+    def _note_answer(self, source: str) -> None:
+        if self._first_answer is None:
+            self._first_answer = {
+                "seconds": round(time.monotonic() - self._started, 3),
+                "source": source,
+            }
+
+    async def get_states(
+        self,
+        entity_id: Optional[str] = None,
+        timeout: float = 60.0,
+        fresh: bool = False,
+    ) -> Dict | list:
+        """
+        Get current state of entities.
         
-        if not result.get("success"):
-            raise ValueError(f"Failed to get states: {result}")
+        With ``mirror_states`` enabled, reads are served from the in-memory
+        mirror once it has been seeded. Returned dicts are shared with the
+        mirror and must be treated as read-only.
         
-        states = result["result"]
+        Args:
+            entity_id: Specific entity ID, or None for all entities
+            timeout: Timeout in seconds (default: 60.0)
+            fresh: Bypass the mirror and round-trip to Home Assistant
+        
+        Returns:
+            Entity state dict or list of states
+        """
+        if self.mirror_states and not fresh:
+            if not self._mirror_ready:
+                if self._mirror_restored_at:
+                    # Serve the persisted snapshot now; sync in background.
+                    if self.connected:
+                        self._restore_in_background()
+                else:
+                    await self._sync_mirror(timeout)
+            self._note_answer("live" if self._mirror_ready else "snapshot")
+            if entity_id:
+                state = self._states.get(entity_id)
+                if state is None:
+                    raise ValueError(f"Entity {entity_id} not found")
+                return state
+            return list(self._states.values())
+
+        states = await self._fetch_states(timeout, use_cache=not fresh)
+        self._note_answer("live")
         
         if entity_id:
             # Return specific entity state
@@ -298,24 +1036,14 @@ class HAWebSocketClient:
         Returns:
             Dictionary of domains and their services.
         """
-        msg_id = await self._send_message({"type": "get_services"})
-        
-        # Wait for response
-        future = self.pending_responses.get(msg_id)
-        if future is None:
-            future = asyncio.get_running_loop().create_future()
-            self.pending_responses[msg_id] = future
-        try:
-            result = await asyncio.wait_for(future, timeout=10.0)
-        except asyncio.TimeoutError:
-            raise TimeoutError("Timeout waiting for HA services")
-        finally:
-            self.pending_responses.pop(msg_id, None)
-        
-        if not result.get("success"):
-            raise ValueError(f"Failed to get services: {result}")
-        
-        return result["result"]
+        async def fetch():
+            msg_id = await self._send_message({"type": "get_services"})
+            result = await self._await_response(msg_id, 10.0, "services")
+            if not result.get("success"):
+                raise ValueError(f"Failed to get services: {result}")
+            return result["result"]
+
+        return await self._coalesced_read("get_services", fetch, 10.0)
     
     async def call_service(
         self,
@@ -339,71 +1067,391 @@ class HAWebSocketClient:
         service_data = kwargs.copy()
         if entity_id:
             service_data["entity_id"] = entity_id
-        
+        return await self._call_service_message(domain, service, service_data, 10.0)
+
+    async def _call_service_message(
+        self,
+        domain: str,
+        service: str,
+        service_data: Dict[str, Any],
+        timeout: float,
+    ) -> Any:
         msg_id = await self._send_message({
             "type": "call_service",
             "domain": domain,
             "service": service,
             "service_data": service_data
         })
-        
-        # Wait for response
-        future = self.pending_responses.get(msg_id)
-        if future is None:
-            future = asyncio.get_running_loop().create_future()
-            self.pending_responses[msg_id] = future
-        try:
-            result = await asyncio.wait_for(future, timeout=10.0)
-        finally:
-            self.pending_responses.pop(msg_id, None)
+        result = await self._await_response(msg_id, timeout, "service call")
         
         if not result.get("success"):
             raise ValueError(f"Service call failed: {result}")
+        # A service call may change any state; drop micro-cached snapshots.
+        self._read_cache.pop("get_states", None)
         
         return result["result"]
-    
-    async def subscribe_entities(
+
+    async def call_services_batch(
         self,
-        entity_ids: list[str],
-        callback: Callable[[Dict], Any]
-    ) -> int:
+        calls: list[Dict[str, Any]],
+        *,
+        merge: bool = False,
+        continue_on_error: bool = False,
+        timeout: float = 10.0,
+    ) -> list[Dict[str, Any]]:
         """
-        Subscribe to state changes for specific entities.
+        Pipeline several service calls over the socket.
+        
+        Independent calls are written back-to-back and awaited together,
+        so a batch costs roughly one round-trip. HA runs service calls
+        concurrently, so a call waits for every earlier call that targets
+        one of its entities. A call with no explicit ``entity_id`` (for
+        example an area or device target) waits for everything before it
+        and everything after it waits for it.
         
         Args:
-            entity_ids: List of entity IDs to monitor
-            callback: Async function called with event data
+            calls: Dicts with ``domain``, ``service`` and optional
+                ``entity_id`` (str or list) and ``service_data``/``data``
+            merge: Combine calls with the same domain, service and data
+                into one call with an ``entity_id`` list, where doing so
+                cannot reorder anything
+            continue_on_error: Still run calls whose predecessor failed
+            timeout: Per-call response timeout in seconds
         
         Returns:
-            Subscription ID
+            One ``{"ok": bool, "result"|"error": ..., "merged": int}`` per
+            input call, in input order
         """
+        units = _plan_service_batch(calls, merge=merge)
+        tasks: list[asyncio.Task] = []
+
+        async def run(unit: Dict[str, Any]) -> Dict[str, Any]:
+            if unit["deps"]:
+                before = await asyncio.gather(*(tasks[i] for i in sorted(unit["deps"])))
+                if not continue_on_error and not all(r["ok"] for r in before):
+                    return {"ok": False, "skipped": True, "error": "skipped: an earlier call on the same target failed"}
+            try:
+                result = await self._call_service_message(
+                    unit["domain"], unit["service"], unit["service_data"], timeout,
+                )
+            except Exception as e:
+                return {"ok": False, "skipped": False, "error": str(e)}
+            return {"ok": True, "result": result}
+
+        for unit in units:
+            tasks.append(asyncio.create_task(run(unit)))
+        try:
+            outcomes = await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        results: list[Dict[str, Any]] = [{} for _ in calls]
+        for unit, outcome in zip(units, outcomes):
+            for index in unit["members"]:
+                results[index] = {**outcome, "merged": len(unit["members"])}
+        return results
+    
+    async def _subscribe_state_changed(self, callback: Any) -> int:
+        return await self._subscribe_event("state_changed", callback)
+
+    async def _subscribe_event(self, event_type: str, callback: Any) -> int:
         msg_id = await self._send_message({
             "type": "subscribe_events",
-            "event_type": "state_changed"
+            "event_type": event_type
         })
-        
-        # Wrap callback to filter by entity IDs
-        async def filtered_callback(event):
-            entity_id = event["data"]["entity_id"]
-            if entity_id in entity_ids:
-                await callback(event)
-        
-        self.subscriptions[msg_id] = filtered_callback
+        self.subscriptions[msg_id] = callback
         
         # Wait for success confirmation
-        future = self.pending_responses.get(msg_id)
-        if future is None:
-            future = asyncio.get_running_loop().create_future()
-            self.pending_responses[msg_id] = future
         try:
-            result = await asyncio.wait_for(future, timeout=10.0)
-        finally:
-            self.pending_responses.pop(msg_id, None)
+            result = await self._await_response(msg_id, 10.0, "subscription")
+        except Exception:
+            self.subscriptions.pop(msg_id, None)
+            raise
         
         if not result.get("success"):
+            self.subscriptions.pop(msg_id, None)
             raise ValueError(f"Subscription failed: {result}")
         
         return msg_id
+
+    # ------------------------------------------------------------------
+    # Area / device / entity registries
+    # ------------------------------------------------------------------
+    async def _registry_command(self, message: Dict[str, Any], timeout: float = 30.0) -> Any:
+        async def fetch():
+            msg_id = await self._send_message(dict(message))
+            result = await self._await_response(msg_id, timeout, message["type"])
+            if not result.get("success"):
+                raise ValueError(f"{message['type']} failed: {result}")
+            return result["result"]
+
+        key = json.dumps(message, sort_keys=True)
+        return await self._coalesced_read(key, fetch, timeout, use_cache=False)
+
+    def _apply_registry_areas(self) -> None:
+        self.entity_index.set_areas(self.registry.entity_areas(), self.registry.area_names())
+
+    async def _persist_registry(self) -> None:
+        try:
+            await asyncio.to_thread(self.registry.persist)
+        except Exception as e:
+            print(f"⚠️ HA registry cache write failed: {e}")
+
+    async def ensure_registries(self, timeout: float = 30.0) -> RegistryCache:
+        """
+        Load the area, device and entity registries once per connection.
+        
+        While disconnected this returns whatever is cached (possibly read
+        from disk); the registries are then loaded after the next connect.
+        """
+        self._registry_wanted = True
+        if self._registry_ready or not self.connected:
+            return self.registry
+        async with self._registry_lock:
+            if self._registry_ready:
+                return self.registry
+            # Subscribe first so no update slips between list and listen.
+            if not self._registry_sub_ids:
+                for event_type in (
+                    "area_registry_updated",
+                    "device_registry_updated",
+                    "entity_registry_updated",
+                ):
+                    self._registry_sub_ids.append(
+                        await self._subscribe_event(event_type, self._on_registry_event)
+                    )
+            areas, devices, entities = await asyncio.gather(
+                self._registry_command({"type": "config/area_registry/list"}, timeout),
+                self._registry_command({"type": "config/device_registry/list"}, timeout),
+                self._registry_command({"type": "config/entity_registry/list"}, timeout),
+            )
+            self.registry.set_areas(areas)
+            self.registry.set_devices(devices)
+            self.registry.set_entities(entities)
+            self.registry.mark_live()
+            self._registry_ready = True
+            self._apply_registry_areas()
+        await self._persist_registry()
+        return self.registry
+
+    async def _on_registry_event(self, event: Dict) -> None:
+        # Refreshing needs command round-trips, which the receive loop
+        # itself must deliver, so never await them here.
+        if not self._registry_ready:
+            return
+        task = asyncio.create_task(self._refresh_registry(event))
+        self._registry_tasks.add(task)
+        task.add_done_callback(self._registry_tasks.discard)
+
+    async def _refresh_registry(self, event: Dict) -> None:
+        event_type = event.get("event_type")
+        data = event.get("data") or {}
+        try:
+            if event_type == "entity_registry_updated":
+                entity_id = data.get("entity_id")
+                if data.get("action") == "remove":
+                    self.registry.remove_entity(entity_id)
+                else:
+                    entry = await self._registry_command(
+                        {"type": "config/entity_registry/get", "entity_id": entity_id}
+                    )
+                    self.registry.upsert_entity(entry, old_entity_id=data.get("old_entity_id"))
+            elif event_type == "device_registry_updated":
+                self.registry.set_devices(
+                    await self._registry_command({"type": "config/device_registry/list"})
+                )
+            elif event_type == "area_registry_updated":
+                self.registry.set_areas(
+                    await self._registry_command({"type": "config/area_registry/list"})
+                )
+            else:
+                return
+        except Exception as e:
+            print(f"⚠️ HA registry refresh after {event_type} failed: {e}")
+            return
+        self._registry_events += 1
+        self.registry.mark_live()
+        self._apply_registry_areas()
+        await self._persist_registry()
+
+    # ------------------------------------------------------------------
+    # state_changed routing
+    # ------------------------------------------------------------------
+    def _route(self, entity_id: str, event: Dict) -> None:
+        targets = set(self._wildcard_routes)
+        targets |= self._entity_routes.get(entity_id, set())
+        targets |= self._domain_routes.get(entity_id.split(".", 1)[0], set())
+        for sub_id in targets:
+            # A subscriber can leave while its id is still being routed
+            # (an unsubscribe racing a retarget, or an inline callback
+            # unsubscribing); skip it rather than kill the event feed.
+            subscriber = self._subscribers.get(sub_id)
+            if subscriber is not None:
+                subscriber.offer(event)
+
+    def _emit_state_changed(
+        self,
+        entity_id: str,
+        old_state: Optional[Dict],
+        new_state: Optional[Dict],
+    ) -> None:
+        if self._subscribers:
+            self._route(entity_id, {
+                "event_type": "state_changed",
+                "data": {
+                    "entity_id": entity_id,
+                    "old_state": old_state,
+                    "new_state": new_state,
+                },
+            })
+
+    async def _route_state_event(self, event: Dict) -> None:
+        entity_id = (event.get("data") or {}).get("entity_id")
+        if entity_id:
+            self._route(entity_id, event)
+
+    async def _ensure_router_upstream(self) -> None:
+        """Open the one shared feed behind every subscriber, if needed."""
+        if self.mirror_states:
+            if not self._mirror_ready:
+                await self._sync_mirror(60.0)
+            return
+        async with self._router_lock:
+            if self._router_sub_id is None:
+                self._router_sub_id = await self._subscribe_state_changed(
+                    self._route_state_event
+                )
+
+    def _set_routes(
+        self,
+        sub_id: int,
+        entity_ids: Optional[set] = None,
+        domains: Optional[set] = None,
+    ) -> None:
+        subscriber = self._subscribers.get(sub_id)
+        if subscriber is None:
+            return
+        if entity_ids is not None:
+            for entity_id in subscriber.entity_ids - entity_ids:
+                routes = self._entity_routes.get(entity_id, set())
+                routes.discard(sub_id)
+                if not routes:
+                    self._entity_routes.pop(entity_id, None)
+            for entity_id in entity_ids - subscriber.entity_ids:
+                self._entity_routes.setdefault(entity_id, set()).add(sub_id)
+            subscriber.entity_ids = set(entity_ids)
+        if domains is not None:
+            for domain in subscriber.domains - domains:
+                routes = self._domain_routes.get(domain, set())
+                routes.discard(sub_id)
+                if not routes:
+                    self._domain_routes.pop(domain, None)
+            for domain in domains - subscriber.domains:
+                self._domain_routes.setdefault(domain, set()).add(sub_id)
+            subscriber.domains = set(domains)
+
+    async def subscribe_state_changes(
+        self,
+        callback: Callable[[Dict], Any],
+        *,
+        entity_ids: Optional[list[str]] = None,
+        domains: Optional[list[str]] = None,
+        queue_size: Optional[int] = None,
+        overflow: Optional[str] = None,
+    ) -> int:
+        """
+        Subscribe to ``state_changed`` events for entities and/or domains.
+        
+        With neither ``entity_ids`` nor ``domains`` the subscriber receives
+        every change. The callback runs on its own worker task behind a
+        bounded queue, so it may be slow without holding up other HA
+        traffic. All subscribers share one upstream feed, which is
+        re-established automatically after a reconnect.
+        
+        Args:
+            callback: Async function called with event data
+            entity_ids: Entity IDs to watch
+            domains: Entity domains to watch (e.g. ``["light"]``)
+            queue_size: Queue bound (default: ``subscriber_queue_size``)
+            overflow: ``coalesce``, ``drop_oldest`` or ``inline`` (default:
+                ``subscriber_overflow``); ``inline`` takes a plain callback
+        
+        Returns:
+            Subscription ID, valid across reconnects
+        """
+        subscriber = _Subscriber(
+            callback,
+            maxsize=queue_size or self.subscriber_queue_size,
+            overflow=overflow or self.subscriber_overflow,
+            name=f"ha-subscriber-{getattr(callback, '__qualname__', 'callback')}",
+        )
+        self._next_subscriber_id += 1
+        sub_id = self._next_subscriber_id
+        self._subscribers[sub_id] = subscriber
+        self._set_routes(sub_id, set(entity_ids or ()), set(domains or ()))
+        if entity_ids is None and domains is None:
+            subscriber.wildcard = True
+            self._wildcard_routes.add(sub_id)
+        subscriber.start()
+        try:
+            await self._ensure_router_upstream()
+        except Exception:
+            self.unsubscribe(sub_id)
+            raise
+        return sub_id
+
+    async def subscribe_entities(
+        self,
+        entity_ids: list[str],
+        callback: Callable[[Dict], Any],
+        *,
+        queue_size: Optional[int] = None,
+        overflow: Optional[str] = None,
+    ) -> int:
+        """
+        Subscribe to state changes for specific entities.
+        
+        Args:
+            entity_ids: List of entity IDs to monitor
+            callback: Async function called with event data
+            queue_size: Queue bound (default: ``subscriber_queue_size``)
+            overflow: ``coalesce`` or ``drop_oldest``
+        
+        Returns:
+            Subscription ID
+        """
+        return await self.subscribe_state_changes(
+            callback,
+            entity_ids=list(entity_ids),
+            queue_size=queue_size,
+            overflow=overflow,
+        )
+
+    def set_watched_entities(self, sub_id: int, entity_ids: list[str]) -> None:
+        """Replace the entities a subscription watches; no HA round-trip."""
+        if sub_id not in self._subscribers:
+            raise KeyError(f"Unknown subscription {sub_id}")
+        self._set_routes(sub_id, entity_ids=set(entity_ids))
+
+    def set_watched_domains(self, sub_id: int, domains: list[str]) -> None:
+        """Replace the domains a subscription watches; no HA round-trip."""
+        if sub_id not in self._subscribers:
+            raise KeyError(f"Unknown subscription {sub_id}")
+        self._set_routes(sub_id, domains=set(domains))
+
+    def subscriber_stats(self, sub_id: int) -> Optional[Dict[str, Any]]:
+        """Delivery counters of one subscriber, or None if unknown."""
+        subscriber = self._subscribers.get(sub_id)
+        return subscriber.stats() if subscriber is not None else None
+
+    def unsubscribe(self, sub_id: int) -> None:
+        """Drop a subscriber. The shared upstream feed stays open."""
+        if sub_id not in self._subscribers:
+            return
+        self._set_routes(sub_id, set(), set())
+        self._wildcard_routes.discard(sub_id)
+        self._subscribers.pop(sub_id).stop()
     
     async def get_climate_state(self, entity_id: str) -> Dict:
         """
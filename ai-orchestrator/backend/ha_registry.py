@@ -0,0 +1,160 @@
+"""Cached Home Assistant area / device / entity registries.
+
+Rooms used to be guessed by substring-matching entity ids. The
+registries carry the real answer: an entity's ``area_id`` or, failing
+that, the area of the device it belongs to. :class:`RegistryCache` holds
+slimmed copies of the three registries. It joins them into an
+entity -> area map for :class:`EntityIndex` and can persist itself to
+``/data`` so a restart has areas before HA is reachable.
+:class:`HAWebSocketClient` fills it and keeps it current from
+``*_registry_updated`` events.
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_AREA_FIELDS = ("area_id", "name", "aliases", "floor_id")
+_DEVICE_FIELDS = ("id", "area_id", "name", "name_by_user")
+_ENTITY_FIELDS = (
+    "entity_id", "device_id", "area_id", "name", "original_name",
+    "disabled_by", "hidden_by",
+)
+
+
+def _slim(entry: Dict[str, Any], fields: tuple) -> Dict[str, Any]:
+    return {k: entry.get(k) for k in fields if entry.get(k) is not None}
+
+
+def _norm(text: str) -> str:
+    return " ".join(re.split(r"[^a-z0-9]+", text.lower())).strip()
+
+
+def default_registry_path() -> str:
+    base = Path("/data") if Path("/data").exists() else Path(__file__).parent.parent / "data"
+    base.mkdir(parents=True, exist_ok=True)
+    return str(base / "ha_registry.json")
+
+
+class RegistryCache:
+    """In-memory (optionally on-disk) copy of the HA registries."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = path
+        self.areas: Dict[str, Dict[str, Any]] = {}
+        self.devices: Dict[str, Dict[str, Any]] = {}
+        self.entities: Dict[str, Dict[str, Any]] = {}
+        self.loaded_at: Optional[str] = None
+        self.source: Optional[str] = None  # "disk" | "live"
+        if path and os.path.exists(path):
+            try:
+                self._load()
+            except Exception as exc:
+                logger.warning("Ignoring unreadable registry cache %s: %s", path, exc)
+
+    def __bool__(self) -> bool:
+        return bool(self.areas or self.entities)
+
+    # ---- updates ----------------------------------------------------------
+    def set_areas(self, entries: List[Dict[str, Any]]) -> None:
+        self.areas = {e["area_id"]: _slim(e, _AREA_FIELDS) for e in entries if e.get("area_id")}
+
+    def set_devices(self, entries: List[Dict[str, Any]]) -> None:
+        self.devices = {e["id"]: _slim(e, _DEVICE_FIELDS) for e in entries if e.get("id")}
+
+    def set_entities(self, entries: List[Dict[str, Any]]) -> None:
+        self.entities = {
+            e["entity_id"]: _slim(e, _ENTITY_FIELDS) for e in entries if e.get("entity_id")
+        }
+
+    def upsert_entity(self, entry: Dict[str, Any], old_entity_id: Optional[str] = None) -> None:
+        if old_entity_id:
+            self.entities.pop(old_entity_id, None)
+        if entry.get("entity_id"):
+            self.entities[entry["entity_id"]] = _slim(entry, _ENTITY_FIELDS)
+
+    def remove_entity(self, entity_id: str) -> None:
+        self.entities.pop(entity_id, None)
+
+    def mark_live(self) -> None:
+        self.loaded_at = datetime.now(timezone.utc).isoformat()
+        self.source = "live"
+
+    # ---- joins ------------------------------------------------------------
+    def entity_area(self, entity_id: str) -> Optional[str]:
+        entry = self.entities.get(entity_id)
+        if entry is None:
+            return None
+        if entry.get("area_id"):
+            return entry["area_id"]
+        device = self.devices.get(entry.get("device_id") or "")
+        return device.get("area_id") if device else None
+
+    def entity_areas(self) -> Dict[str, str]:
+        out: Dict[str, str] = {}
+        for entity_id in self.entities:
+            area_id = self.entity_area(entity_id)
+            if area_id:
+                out[entity_id] = area_id
+        return out
+
+    def area_names(self) -> Dict[str, str]:
+        return {area_id: a.get("name") or area_id for area_id, a in self.areas.items()}
+
+    def find_area(self, text: str) -> Optional[str]:
+        """Area id whose id, name or alias equals ``text`` (normalised)."""
+        wanted = _norm(text)
+        for area_id, area in self.areas.items():
+            names = [area_id, area.get("name") or ""] + list(area.get("aliases") or [])
+            if wanted in {_norm(n) for n in names}:
+                return area_id
+        return None
+
+    def areas_mentioned(self, text: str) -> List[str]:
+        """Area ids whose name or alias appears as whole words in ``text``."""
+        padded = f" {_norm(text)} "
+        found = []
+        for area_id, area in self.areas.items():
+            names = [area.get("name") or area_id] + list(area.get("aliases") or [])
+            if any(_norm(n) and f" {_norm(n)} " in padded for n in names):
+                found.append(area_id)
+        return found
+
+    # ---- persistence ------------------------------------------------------
+    def _load(self) -> None:
+        with open(self.path, encoding="utf-8") as fh:
+            data = json.load(fh)
+        self.areas = data.get("areas") or {}
+        self.devices = data.get("devices") or {}
+        self.entities = data.get("entities") or {}
+        self.loaded_at = data.get("saved_at")
+        self.source = "disk"
+
+    def persist(self) -> None:
+        if not self.path:
+            return
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({
+                "saved_at": self.loaded_at,
+                "areas": self.areas,
+                "devices": self.devices,
+                "entities": self.entities,
+            }, fh, separators=(",", ":"))
+        os.replace(tmp, self.path)
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "loaded_at": self.loaded_at,
+            "areas": len(self.areas),
+            "devices": len(self.devices),
+            "entities": len(self.entities),
+        }
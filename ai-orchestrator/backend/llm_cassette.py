@@ -0,0 +1,366 @@
+"""Record/replay wrappers around :class:`reasoning_harness.LLMBackend`.
+
+Every experiment on the reasoning path used to need a live model, and
+two runs of the same goal rarely took the same path. That makes harness
+optimisations hard to measure.
+
+:class:`RecordingBackend` wraps a real backend and appends every exchange
+to a :class:`Cassette`: a compact JSON-lines file (gzip when the path ends
+in ``.gz``). The file maps ``(messages hash, tools hash)`` to the normalised
+:class:`LLMResponse` and the latency observed. :class:`ReplayBackend`
+serves those responses back with configurable synthetic latency, so
+:class:`ReasoningHarness`, :meth:`DeepReasoningAgent.run` and plan mode run
+deterministically with no GPU or network.
+
+The request hash ignores what legitimately differs between a recording and
+a replay: generated tool-call ids, and volatile fields such as
+``last_changed`` inside tool results. A request recorded several times
+with different answers replays those answers in turn.
+"""
+from __future__ import annotations
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple, Union
+
+from reasoning_harness import LLMBackend, LLMResponse, ToolCall, TokenCallback, _accepts_keyword
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_MODES = ("record", "replay")
+# Fields that change between a recording and its replay without changing
+# what the model should answer.
+VOLATILE_KEYS: FrozenSet[str] = frozenset({
+    "last_changed", "last_updated", "last_reported", "context",
+    "timestamp", "duration_ms", "elapsed_ms", "age_seconds", "fetched_at",
+})
+
+
+class CassetteMiss(KeyError):
+    """Raised on replay when a request was never recorded."""
+
+
+def _strip_volatile(value: Any, volatile: FrozenSet[str]) -> Any:
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v, volatile) for k, v in value.items() if k not in volatile}
+    if isinstance(value, list):
+        return [_strip_volatile(v, volatile) for v in value]
+    return value
+
+
+def _canonical_content(content: Any, volatile: FrozenSet[str]) -> Any:
+    if isinstance(content, str):
+        stripped = content.lstrip()
+        if stripped[:1] in ("{", "["):
+            try:
+                return _strip_volatile(json.loads(content), volatile)
+            except ValueError:
+                pass
+        return content
+    return _strip_volatile(content, volatile)
+
+
+def _digest(value: Any) -> str:
+    blob = json.dumps(value, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:24]
+
+
+def request_key(
+    messages: List[Dict[str, Any]],
+    tools: List[Dict[str, Any]],
+    *,
+    volatile: FrozenSet[str] = VOLATILE_KEYS,
+) -> Tuple[str, str]:
+    """``(messages hash, tools hash)`` for one chat request."""
+    canonical = []
+    for message in messages:
+        entry: Dict[str, Any] = {
+            "role": message.get("role"),
+            "content": _canonical_content(message.get("content"), volatile),
+        }
+        calls = message.get("tool_calls")
+        if calls:
+            entry["tool_calls"] = [
+                _call_signature(call) for call in calls
+            ]
+        canonical.append(entry)
+    return _digest(canonical), _digest(tools)
+
+
+def _call_signature(call: Any) -> List[Any]:
+    if isinstance(call, ToolCall):
+        return [call.name, call.arguments]
+    fn = call.get("function") or call
+    arguments = fn.get("arguments")
+    if isinstance(arguments, str):
+        try:
+            arguments = json.loads(arguments)
+        except ValueError:
+            pass
+    return [fn.get("name"), arguments]
+
+
+def _jsonable(value: Any) -> Any:
+    if value is None:
+        return None
+    try:
+        json.dumps(value)
+    except (TypeError, ValueError):
+        return None
+    return value
+
+
+def _encode_response(response: LLMResponse) -> Dict[str, Any]:
+    encoded: Dict[str, Any] = {"content": response.content}
+    if response.tool_calls:
+        encoded["tool_calls"] = [
+            {"id": c.id, "name": c.name, "arguments": c.arguments} for c in response.tool_calls
+        ]
+    if response.usage:
+        encoded["usage"] = dict(response.usage)
+    if response.stop_reason:
+        encoded["stop_reason"] = response.stop_reason
+    # Round-trip state is kept only when it survives JSON; opaque SDK
+    # objects are dropped (replay never calls the provider again).
+    for name in ("provider_payload", "continuation"):
+        value = _jsonable(getattr(response, name))
+        if value is not None:
+            encoded[name] = value
+    return encoded
+
+
+def _decode_response(data: Dict[str, Any]) -> LLMResponse:
+    return LLMResponse(
+        content=data.get("content") or "",
+        tool_calls=[
+            ToolCall(id=c["id"], name=c["name"], arguments=c.get("arguments") or {})
+            for c in data.get("tool_calls") or ()
+        ],
+        provider_payload=data.get("provider_payload"),
+        continuation=data.get("continuation"),
+        usage=dict(data.get("usage") or {}),
+        stop_reason=data.get("stop_reason"),
+    )
+
+
+@dataclass
+class _Entry:
+    messages: str
+    tools: str
+    response: Dict[str, Any]
+    latency_ms: float = 0.0
+
+
+@dataclass
+class Cassette:
+    """Recorded exchanges, keyed by request hash."""
+
+    path: Optional[Path] = None
+    volatile: FrozenSet[str] = VOLATILE_KEYS
+    entries: List[_Entry] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        if self.path is not None:
+            self.path = Path(self.path)
+        self._exact: Dict[Tuple[str, str], List[_Entry]] = defaultdict(list)
+        self._by_messages: Dict[str, List[_Entry]] = defaultdict(list)
+        for entry in list(self.entries):
+            self._index(entry)
+
+    # ---- persistence -----------------------------------------------------
+    @classmethod
+    def load(cls, path: Union[str, Path], **kwargs: Any) -> "Cassette":
+        cassette = cls(path=Path(path), **kwargs)
+        if not cassette.path.exists():
+            return cassette
+        with cassette._open("rt") as fh:
+            for line_no, line in enumerate(fh, 1):
+                if not line.strip():
+                    continue
+                try:
+                    data = json.loads(line)
+                    entry = _Entry(data["m"], data["t"], data["r"], float(data.get("ms", 0.0)))
+                except (ValueError, KeyError, TypeError) as exc:
+                    logger.warning("Skipping bad cassette line %s:%d: %s", path, line_no, exc)
+                    continue
+                cassette.entries.append(entry)
+                cassette._index(entry)
+        return cassette
+
+    def _open(self, mode: str) -> Any:
+        assert self.path is not None
+        if self.path.suffix == ".gz":
+            return gzip.open(self.path, mode, encoding="utf-8")
+        return open(self.path, mode, encoding="utf-8")
+
+    def _index(self, entry: _Entry) -> None:
+        self._exact[(entry.messages, entry.tools)].append(entry)
+        self._by_messages[entry.messages].append(entry)
+
+    def add(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]],
+        response: LLMResponse,
+        latency_ms: float = 0.0,
+    ) -> None:
+        m, t = request_key(messages, tools, volatile=self.volatile)
+        entry = _Entry(m, t, _encode_response(response), round(latency_ms, 1))
+        self.entries.append(entry)
+        self._index(entry)
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        line = json.dumps(
+            {"m": m, "t": t, "r": entry.response, "ms": entry.latency_ms},
+            separators=(",", ":"),
+        )
+        with self._open("at") as fh:
+            fh.write(line + "\n")
+
+    # ---- lookup ----------------------------------------------------------
+    def candidates(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]],
+    ) -> Tuple[Tuple[str, str], List[_Entry]]:
+        """Entries for this request; a differing tool block is tolerated."""
+        key = request_key(messages, tools, volatile=self.volatile)
+        found = self._exact.get(key)
+        if found:
+            return key, found
+        return (key[0], "*"), self._by_messages.get(key[0], [])
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+async def call_backend(
+    backend: LLMBackend,
+    messages: List[Dict[str, Any]],
+    tools: List[Dict[str, Any]],
+    *,
+    continuation: Any = None,
+    profile: Optional[str] = None,
+    on_token: Optional[TokenCallback] = None,
+) -> LLMResponse:
+    """``backend.chat`` with only the optional keywords it accepts."""
+    kwargs: Dict[str, Any] = {}
+    for keyword, value in (
+        ("continuation", continuation), ("profile", profile), ("on_token", on_token),
+    ):
+        if value is not None and _accepts_keyword(backend.chat, keyword):
+            kwargs[keyword] = value
+    return await backend.chat(messages, tools, **kwargs)
+
+
+class RecordingBackend:
+    """Forwards to ``inner`` and appends every exchange to ``cassette``."""
+
+    def __init__(self, inner: LLMBackend, cassette: Cassette) -> None:
+        self.inner = inner
+        self.cassette = cassette
+        self.name = getattr(inner, "name", "recording")
+        self.recorded = 0
+
+    def __getattr__(self, item: str) -> Any:
+        # ``model``, ``estimate_tokens`` and other optional backend attributes.
+        return getattr(self.inner, item)
+
+    async def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]],
+        *,
+        continuation: Any = None,
+        profile: Optional[str] = None,
+        on_token: Optional[TokenCallback] = None,
+    ) -> LLMResponse:
+        started = time.perf_counter()
+        response = await call_backend(
+            self.inner, messages, tools,
+            continuation=continuation, profile=profile, on_token=on_token,
+        )
+        self.cassette.add(messages, tools, response, (time.perf_counter() - started) * 1000)
+        self.recorded += 1
+        return response
+
+
+class ReplayBackend:
+    """Serves responses from a :class:`Cassette` without calling a model.
+
+    ``latency_ms`` fixes the synthetic delay per call; ``None`` replays the
+    recorded latency. Either is multiplied by ``latency_scale``. A request
+    that was never recorded raises :class:`CassetteMiss`.
+    """
+
+    def __init__(
+        self,
+        cassette: Cassette,
+        *,
+        latency_ms: Optional[float] = 0.0,
+        latency_scale: float = 1.0,
+        name: str = "replay",
+        model: str = "replay",
+    ) -> None:
+        self.cassette = cassette
+        self.latency_ms = latency_ms
+        self.latency_scale = max(0.0, float(latency_scale))
+        self.name = name
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+        self._served: Dict[Tuple[str, str], int] = defaultdict(int)
+
+    async def chat(
+        self,
+        messages: List[Dict[str, Any]],
+        tools: List[Dict[str, Any]],
+        *,
+        continuation: Any = None,
+        profile: Optional[str] = None,
+        on_token: Optional[TokenCallback] = None,
+    ) -> LLMResponse:
+        key, entries = self.cassette.candidates(messages, tools)
+        if not entries:
+            self.misses += 1
+            raise CassetteMiss(f"no recorded response for request {key[0]}/{key[1]}")
+        # Repeated recordings of one request replay in order, then wrap.
+        entry = entries[self._served[key] % len(entries)]
+        self._served[key] += 1
+        self.hits += 1
+        delay_ms = entry.latency_ms if self.latency_ms is None else self.latency_ms
+        if delay_ms and self.latency_scale:
+            await asyncio.sleep(delay_ms * self.latency_scale / 1000.0)
+        response = _decode_response(entry.response)
+        if on_token is not None and response.content:
+            await on_token(response.content)
+        return response
+
+    def info(self) -> Dict[str, Any]:
+        return {"entries": len(self.cassette), "hits": self.hits, "misses": self.misses}
+
+
+def wrap_backend(
+    backend: LLMBackend,
+    path: Union[str, Path],
+    mode: str = "record",
+    **replay_options: Any,
+) -> Any:
+    """``backend`` recording to, or replaced by a replay of, ``path``."""
+    if mode not in CASSETTE_MODES:
+        raise ValueError(f"cassette mode must be one of {'|'.join(CASSETTE_MODES)}")
+    cassette = Cassette.load(path)
+    if mode == "record":
+        return RecordingBackend(backend, cassette)
+    replay_options.setdefault("name", getattr(backend, "name", "replay"))
+    replay_options.setdefault("model", getattr(backend, "model", "replay"))
+    return ReplayBackend(cassette, **replay_options)
+
@@ -31,14 +31,24 @@ Selection precedence (per call site, but typically global):
 All providers degrade gracefully: if their SDK is missing or their
 credentials are not configured, ``make_chat_provider`` falls back to
 Ollama and logs a warning rather than raising at import time.
+
+Async callers use :meth:`ChatProvider.achat`, which talks to the endpoint
+natively instead of parking a default-executor thread per in-flight call.
+Every provider and agent pointed at the same endpoint shares one pooled,
+keep-alive client (:func:`shared_async_http_client`); connection counts are
+bounded by ``LLM_HTTP_MAX_CONNECTIONS`` / ``LLM_HTTP_MAX_KEEPALIVE``.
 """
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
 import os
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from model_manager import keep_alive_for, observe_model_timing, response_timings
 
 logger = logging.getLogger(__name__)
 
@@ -75,15 +85,134 @@ def resolve_provider_name(explicit: Optional[str] = None) -> str:
     return candidate
 
 
+# ---------------------------------------------------------------------------
+# Shared async connection pools
+# ---------------------------------------------------------------------------
+# One pooled client per endpoint and event loop, shared by every provider
+# and agent talking to that endpoint. httpx connections are bound to the
+# loop that opened them, so a new loop (tests, restarts) gets new pools.
+_SHARED_CLIENTS: Dict[Tuple[str, str], Tuple[Any, Any]] = {}
+# Clients replaced while their own loop was open but idle, keyed by that
+# loop; ``aclose_shared_clients`` run there closes them.
+_RETIRED_CLIENTS: Dict[Any, List[Tuple[Tuple[str, str], Any]]] = {}
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return max(1, int(os.getenv(name, str(default))))
+    except ValueError:
+        return default
+
+
+def _origin(url: str) -> str:
+    parts = urlsplit(url if "://" in url else f"http://{url}")
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # type: ignore  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+async def _aclose_quietly(key: Tuple[str, str], client: Any) -> None:
+    inner = getattr(client, "_client", client)  # ollama wraps httpx
+    try:
+        await inner.aclose()
+    except Exception as exc:  # pragma: no cover - best effort
+        logger.debug("Closing shared LLM client %s failed: %s", key, exc)
+
+
+def _retire(key: Tuple[str, str], owner: Any, client: Any) -> None:
+    """Close ``client`` on the loop that owns its connections."""
+    for stale in [loop for loop in _RETIRED_CLIENTS if loop.is_closed()]:
+        del _RETIRED_CLIENTS[stale]
+    if owner.is_closed():
+        # Nothing can run on a closed loop; its sockets go with the client.
+        logger.debug("Dropping shared LLM client %s of a closed event loop", key)
+    elif owner.is_running():
+        asyncio.run_coroutine_threadsafe(_aclose_quietly(key, client), owner)
+    else:
+        _RETIRED_CLIENTS.setdefault(owner, []).append((key, client))
+
+
+def _shared_for_loop(kind: str, key: str, factory: Callable[[], Any]) -> Any:
+    loop = asyncio.get_running_loop()
+    entry = _SHARED_CLIENTS.get((kind, key))
+    if entry is not None and entry[0] is loop:
+        return entry[1]
+    if entry is not None:
+        _retire((kind, key), *entry)
+    client = factory()
+    _SHARED_CLIENTS[(kind, key)] = (loop, client)
+    return client
+
+
+def _pool_limits(httpx: Any) -> Any:
+    return httpx.Limits(
+        max_connections=_env_int("LLM_HTTP_MAX_CONNECTIONS", 16),
+        max_keepalive_connections=_env_int("LLM_HTTP_MAX_KEEPALIVE", 8),
+        keepalive_expiry=60.0,
+    )
+
+
+def shared_async_http_client(base_url: str) -> Any:
+    """Pooled ``httpx.AsyncClient`` for ``base_url``'s origin.
+
+    Keep-alive and bounded connections always; HTTP/2 when ``h2`` is
+    installed. Must be called from inside the event loop that will use it.
+    """
+    import httpx  # type: ignore
+
+    return _shared_for_loop("http", _origin(base_url), lambda: httpx.AsyncClient(
+        http2=_http2_available(),
+        limits=_pool_limits(httpx),
+        timeout=httpx.Timeout(float(_env_int("LLM_HTTP_TIMEOUT_SECONDS", 180)), connect=10.0),
+        follow_redirects=True,
+    ))
+
+
+def shared_ollama_async_client(host: str, timeout: float) -> Any:
+    """Pooled ``ollama.AsyncClient`` for ``host``.
+
+    The ollama SDK owns its httpx client, so the pool is shared one level
+    up: every caller of the same host and timeout gets the same client.
+    """
+    import httpx  # type: ignore
+    import ollama
+
+    return _shared_for_loop(
+        "ollama",
+        f"{_origin(host)}|{timeout:g}",
+        lambda: ollama.AsyncClient(host=host, timeout=timeout, limits=_pool_limits(httpx)),
+    )
+
+
+async def aclose_shared_clients() -> None:
+    """Close every pool owned by the running loop (application shutdown)."""
+    loop = asyncio.get_running_loop()
+    for key, (owner, client) in list(_SHARED_CLIENTS.items()):
+        if owner is not loop:
+            continue
+        del _SHARED_CLIENTS[key]
+        await _aclose_quietly(key, client)
+    for key, client in _RETIRED_CLIENTS.pop(loop, ()):
+        await _aclose_quietly(key, client)
+
+
 # ---------------------------------------------------------------------------
 # ChatProvider — simple text-in/text-out surface
 # ---------------------------------------------------------------------------
 class ChatProvider(ABC):
-    """Minimal sync chat surface.
+    """Minimal chat surface, sync (:meth:`chat`) and async (:meth:`achat`).
 
     Returns the assistant's text content; tool-calling, streaming and
     structured outputs are out of scope here (the deep-reasoning agent
-    has its own richer harness).
+    has its own richer harness). The built-in providers implement
+    :meth:`achat` natively on the shared connection pools; subclasses
+    that only implement :meth:`chat` fall back to a worker thread.
     """
 
     name: str = "abstract"
@@ -100,6 +229,24 @@ class ChatProvider(ABC):
     ) -> str:
         ...
 
+    async def achat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        *,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        extra_options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        return await asyncio.to_thread(
+            self.chat,
+            model,
+            messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            extra_options=extra_options,
+        )
+
 
 class _OllamaChatProvider(ChatProvider):
     name = PROVIDER_OLLAMA
@@ -115,17 +262,17 @@ class _OllamaChatProvider(ChatProvider):
             ))
         except ValueError:
             timeout = 180.0
-        self._client = ollama.Client(host=self._host, timeout=max(5.0, timeout))
+        self._timeout = max(5.0, timeout)
+        self._client = ollama.Client(host=self._host, timeout=self._timeout)
 
-    def chat(
+    def _request(
         self,
         model: str,
         messages: List[Dict[str, Any]],
-        *,
-        temperature: float = 0.7,
-        max_tokens: int = 1000,
-        extra_options: Optional[Dict[str, Any]] = None,
-    ) -> str:
+        temperature: float,
+        max_tokens: int,
+        extra_options: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
         opts: Dict[str, Any] = {
             "temperature": temperature,
             "num_predict": max_tokens,
@@ -134,17 +281,53 @@ class _OllamaChatProvider(ChatProvider):
             opts.update({"temperature": 1.0, "top_p": 0.95, "top_k": 64})
         if extra_options:
             opts.update(extra_options)
-        resp = self._client.chat(
-            model=model,
-            messages=messages,
-            options=opts,
-            think=False,
-            stream=False,
-        )
+        request: Dict[str, Any] = {
+            "model": model,
+            "messages": messages,
+            "options": opts,
+            "think": False,
+            "stream": False,
+        }
+        keep_alive = keep_alive_for(model, os.getenv("OLLAMA_KEEP_ALIVE"))
+        if keep_alive:
+            request["keep_alive"] = keep_alive
+        return request
+
+    @staticmethod
+    def _content(resp: Any) -> str:
         msg = resp["message"] if isinstance(resp, dict) else getattr(resp, "message", {})
         content = msg.get("content") if isinstance(msg, dict) else getattr(msg, "content", "")
         return (content or "").strip()
 
+    def chat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        *,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        extra_options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        request = self._request(model, messages, temperature, max_tokens, extra_options)
+        resp = self._client.chat(**request)
+        observe_model_timing(model, **response_timings(resp))
+        return self._content(resp)
+
+    async def achat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        *,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        extra_options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        request = self._request(model, messages, temperature, max_tokens, extra_options)
+        client = shared_ollama_async_client(self._host, self._timeout)
+        resp = await client.chat(**request)
+        observe_model_timing(model, **response_timings(resp))
+        return self._content(resp)
+
 
 class _OpenAICompatibleChatProvider(ChatProvider):
     """Shared implementation for OpenAI and GitHub Models (both speak the
@@ -168,17 +351,36 @@ class _OpenAICompatibleChatProvider(ChatProvider):
                 f"{name}: the 'openai' package is required (pip install openai)"
             ) from exc
         self.name = name
-        self._client = OpenAI(api_key=api_key, base_url=base_url, default_headers=default_headers or None)
+        self._api_key = api_key
+        self._base_url = base_url
+        self._default_headers = default_headers or None
+        self._client = OpenAI(api_key=api_key, base_url=base_url, default_headers=self._default_headers)
+        self._async_client: Any = None
+        self._async_http: Any = None
+
+    def _async(self) -> Any:
+        http_client = shared_async_http_client(self._base_url)
+        if self._async_client is None or self._async_http is not http_client:
+            from openai import AsyncOpenAI  # type: ignore
+
+            self._async_client = AsyncOpenAI(
+                api_key=self._api_key,
+                base_url=self._base_url,
+                default_headers=self._default_headers,
+                http_client=http_client,
+            )
+            self._async_http = http_client
+        return self._async_client
 
-    def chat(
+    def _request(
         self,
         model: str,
         messages: List[Dict[str, Any]],
-        *,
-        temperature: float = 0.7,
-        max_tokens: int = 1000,
-        extra_options: Optional[Dict[str, Any]] = None,
-    ) -> str:
+        temperature: float,
+        max_tokens: int,
+        extra_options: Optional[Dict[str, Any]],
+    ) -> Tuple[bool, Dict[str, Any]]:
+        """``(use_responses_api, kwargs)`` for one call."""
         if self.name == PROVIDER_OPENAI and model.startswith("gpt-5.6"):
             system = "\n\n".join(
                 str(message.get("content") or "")
@@ -199,8 +401,7 @@ class _OpenAICompatibleChatProvider(ChatProvider):
                 response_kwargs["instructions"] = system
             if extra_options:
                 response_kwargs.update(extra_options)
-            response = self._client.responses.create(**response_kwargs)
-            return (getattr(response, "output_text", "") or "").strip()
+            return True, response_kwargs
 
         kwargs: Dict[str, Any] = {
             "model": model,
@@ -210,16 +411,51 @@ class _OpenAICompatibleChatProvider(ChatProvider):
         }
         if extra_options:
             kwargs.update(extra_options)
-        resp = self._client.chat.completions.create(**kwargs)
+        return False, kwargs
+
+    @staticmethod
+    def _content(responses_api: bool, resp: Any) -> str:
+        if responses_api:
+            return (getattr(resp, "output_text", "") or "").strip()
         if not resp.choices:
             return ""
         return (resp.choices[0].message.content or "").strip()
 
+    def chat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        *,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        extra_options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        responses_api, kwargs = self._request(model, messages, temperature, max_tokens, extra_options)
+        if responses_api:
+            return self._content(True, self._client.responses.create(**kwargs))
+        return self._content(False, self._client.chat.completions.create(**kwargs))
+
+    async def achat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        *,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        extra_options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        responses_api, kwargs = self._request(model, messages, temperature, max_tokens, extra_options)
+        client = self._async()
+        if responses_api:
+            return self._content(True, await client.responses.create(**kwargs))
+        return self._content(False, await client.chat.completions.create(**kwargs))
+
 
 class _AnthropicChatProvider(ChatProvider):
     """Simple text surface for current Claude models."""
 
     name = PROVIDER_ANTHROPIC
+    _BASE_URL = "https://api.anthropic.com"
 
     def __init__(
         self,
@@ -234,19 +470,32 @@ class _AnthropicChatProvider(ChatProvider):
             import anthropic  # type: ignore
         except ImportError as exc:  # pragma: no cover
             raise RuntimeError("anthropic: the 'anthropic' package is required") from exc
+        self._api_key = api_key
         self._client = anthropic.Anthropic(api_key=api_key)
+        self._async_client: Any = None
+        self._async_http: Any = None
         self.default_model = default_model
         self.effort = effort
 
-    def chat(
+    def _async(self) -> Any:
+        http_client = shared_async_http_client(self._BASE_URL)
+        if self._async_client is None or self._async_http is not http_client:
+            import anthropic  # type: ignore
+
+            self._async_client = anthropic.AsyncAnthropic(
+                api_key=self._api_key, http_client=http_client,
+            )
+            self._async_http = http_client
+        return self._async_client
+
+    def _request(
         self,
         model: str,
         messages: List[Dict[str, Any]],
-        *,
-        temperature: float = 0.7,
-        max_tokens: int = 1000,
-        extra_options: Optional[Dict[str, Any]] = None,
-    ) -> str:
+        temperature: float,
+        max_tokens: int,
+        extra_options: Optional[Dict[str, Any]],
+    ) -> Dict[str, Any]:
         selected_model = model or self.default_model
         system = "\n\n".join(
             str(message.get("content") or "")
@@ -271,13 +520,40 @@ class _AnthropicChatProvider(ChatProvider):
             kwargs["temperature"] = temperature
         if extra_options:
             kwargs.update(extra_options)
-        response = self._client.messages.create(**kwargs)
+        return kwargs
+
+    @staticmethod
+    def _content(response: Any) -> str:
         return "\n".join(
             block.text
             for block in response.content
             if getattr(block, "type", None) == "text"
         ).strip()
 
+    def chat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        *,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        extra_options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        kwargs = self._request(model, messages, temperature, max_tokens, extra_options)
+        return self._content(self._client.messages.create(**kwargs))
+
+    async def achat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        *,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        extra_options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        kwargs = self._request(model, messages, temperature, max_tokens, extra_options)
+        return self._content(await self._async().messages.create(**kwargs))
+
 
 class _FoundryChatProvider(ChatProvider):
     """Microsoft Foundry / Azure AI Inference chat provider.
@@ -313,16 +589,18 @@ class _FoundryChatProvider(ChatProvider):
         if bearer_token:
             self._headers["Authorization"] = f"Bearer {bearer_token}"
         self._httpx = httpx
+        # One keep-alive client for the sync path instead of a new TCP/TLS
+        # handshake per request.
+        self._sync_client: Any = None
 
-    def chat(
+    def _request(
         self,
         model: str,
         messages: List[Dict[str, Any]],
-        *,
-        temperature: float = 0.7,
-        max_tokens: int = 1000,
-        extra_options: Optional[Dict[str, Any]] = None,
-    ) -> str:
+        temperature: float,
+        max_tokens: int,
+        extra_options: Optional[Dict[str, Any]],
+    ) -> Tuple[str, Dict[str, Any]]:
         # Foundry "model deployments" embed the deployment name in the
         # path (Azure-OpenAI style); generic Foundry/Inference endpoints
         # accept ``model`` in the body. Support both: if the endpoint
@@ -344,18 +622,47 @@ class _FoundryChatProvider(ChatProvider):
             body["model"] = model
         if extra_options:
             body.update(extra_options)
+        return url, body
 
-        with self._httpx.Client(timeout=60.0) as client:
-            resp = client.post(url, headers=self._headers, json=body)
-            resp.raise_for_status()
-            data = resp.json()
-
+    @staticmethod
+    def _content(data: Dict[str, Any]) -> str:
         choices = data.get("choices") or []
         if not choices:
             return ""
         message = choices[0].get("message") or {}
         return (message.get("content") or "").strip()
 
+    def chat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        *,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        extra_options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        url, body = self._request(model, messages, temperature, max_tokens, extra_options)
+        if self._sync_client is None:
+            self._sync_client = self._httpx.Client(timeout=60.0)
+        resp = self._sync_client.post(url, headers=self._headers, json=body)
+        resp.raise_for_status()
+        return self._content(resp.json())
+
+    async def achat(
+        self,
+        model: str,
+        messages: List[Dict[str, Any]],
+        *,
+        temperature: float = 0.7,
+        max_tokens: int = 1000,
+        extra_options: Optional[Dict[str, Any]] = None,
+    ) -> str:
+        url, body = self._request(model, messages, temperature, max_tokens, extra_options)
+        client = shared_async_http_client(self._endpoint)
+        resp = await client.post(url, headers=self._headers, json=body, timeout=60.0)
+        resp.raise_for_status()
+        return self._content(resp.json())
+
 
 # ---------------------------------------------------------------------------
 # Factory
@@ -89,6 +89,8 @@ async def check_ollama_connectivity(host: str):
     return False
 
 from ha_client import HAWebSocketClient
+from ha_registry import RegistryCache, default_registry_path
+from state_snapshot import StateSnapshotStore, checkpoint as checkpoint_state_snapshot, run_checkpoint_loop
 from mcp_server import MCPServer
 from approval_queue import ApprovalQueue
 from orchestrator import (
@@ -112,11 +114,14 @@ from ingress_middleware import IngressMiddleware
 from external_mcp import ExternalMCPClient
 from agents.deep_reasoning_agent import DeepReasoningAgent
 from reasoning_harness import REASONING_PROFILES
+from llm_providers import aclose_shared_clients
 from memory_store import MemoryStore
 from native_prompts import NativePromptLibrary
 from plan_executor import PlanStore
+from run_scheduler import RunRejected
 from triggers import TriggerRegistry, TriggerSpec, TriggerStore, CronExpr
 from dashboard_studio import DashboardStudio, DashboardMeta
+from model_manager import ModelLifecycleManager, install as install_model_manager
 import yaml
 
 import logging
@@ -173,8 +178,10 @@ knowledge_base: Optional[KnowledgeBase] = None
 external_mcp: Optional[ExternalMCPClient] = None
 deep_reasoner: Optional[DeepReasoningAgent] = None
 trigger_registry: Optional[TriggerRegistry] = None
+state_snapshot_store: Optional[StateSnapshotStore] = None
 native_prompts: Optional[NativePromptLibrary] = None
 dashboard_studio: Optional[DashboardStudio] = None
+model_manager: Optional[ModelLifecycleManager] = None
 agents: Dict[str, object] = {}
 dashboard_clients: List[WebSocket] = []
 background_tasks: set[asyncio.Task] = set()
@@ -303,6 +310,7 @@ async def lifespan(app: FastAPI):
     global ha_client, mcp_server, approval_queue, orchestrator, agents
     global rag_manager, knowledge_base, external_mcp, deep_reasoner
     global trigger_registry, native_prompts, dashboard_studio, _api_token
+    global state_snapshot_store, model_manager
     _api_token = None
     
     print("🚀 Starting AI Orchestrator backend (Phase 2 Multi-Agent)...")
@@ -480,8 +488,25 @@ async def lifespan(app: FastAPI):
     ha_client = HAWebSocketClient(
         ha_url=ha_url,
         token=ha_token,
-        supervisor_token=header_token
+        supervisor_token=header_token,
+        mirror_states=True,
+        registry_cache=RegistryCache(default_registry_path()),
     )
+
+    # Warm start: serve the last persisted states until HA has synced.
+    try:
+        state_snapshot_store = StateSnapshotStore()
+        snapshot, saved_at = await asyncio.to_thread(state_snapshot_store.load)
+        ha_client.restore_snapshot(snapshot, saved_at)
+        if snapshot:
+            print(f"💾 Restored {len(snapshot)} entity states from snapshot ({saved_at})")
+        spawn_background(
+            run_checkpoint_loop(ha_client, state_snapshot_store),
+            "ha-state-snapshot",
+        )
+    except Exception as e:
+        state_snapshot_store = None
+        print(f"⚠️ State snapshot unavailable: {e}")
     
     # 3. Start HA Client with Reconnection Loop
     try:
@@ -494,6 +519,8 @@ async def lifespan(app: FastAPI):
             print("⚠️ HA Client did not connect within initial 5s burst. Reconnection loop will continue in background...")
         else:
             print("✅ HA Client connected successfully")
+        # Area/device/entity registries; the reconnect loop loads them if HA is not up yet.
+        spawn_background(ha_client.ensure_registries(), "ha-registry-sync")
     except Exception as e:
         print(f"❌ Error during HA client background startup initialization: {e}")
 
@@ -508,6 +535,10 @@ async def lifespan(app: FastAPI):
             knowledge_base = KnowledgeBase(rag_manager, lambda: ha_client)
             print("✓ RAG Manager & Knowledge Base initialized")
             
+            # Vectors stored before the switch to /api/embed are re-embedded
+            # from their text; until then the old endpoint stays in use.
+            if rag_manager.legacy_embeddings:
+                spawn_background(asyncio.to_thread(rag_manager.reembed), "rag-reembed")
             # Start background ingestion
             spawn_background(knowledge_base.ingest_ha_registry(), "rag-ingest-registry")
             spawn_background(knowledge_base.ingest_manuals(), "rag-ingest-manuals")
@@ -737,6 +768,11 @@ async def lifespan(app: FastAPI):
             plan_store=plan_store,
             default_mode=os.getenv("REASONING_DEFAULT_MODE", "auto"),
             default_profile=reasoning_default_profile_opt,
+            read_cache_ttl_seconds=float(os.getenv("REASONING_READ_CACHE_TTL", "30")),
+            tool_top_k=int(os.getenv("REASONING_TOOL_TOP_K", "12")),
+            llm_cassette=os.getenv("REASONING_LLM_CASSETTE") or None,
+            llm_cassette_mode=os.getenv("REASONING_LLM_CASSETTE_MODE", "record"),
+            fast_path=os.getenv("REASONING_FAST_PATH", "true").lower() == "true",
         )
         app.state.deep_reasoner = deep_reasoner
         orchestrator.deep_reasoner = deep_reasoner
@@ -768,6 +804,32 @@ async def lifespan(app: FastAPI):
         print(f"⚠️ Failed to initialise Dashboard Studio: {e}")
         dashboard_studio = None
 
+    # ----------------------------------------------------------------
+    # Model lifecycle — preload and pin the Ollama models in use so the
+    # first request after a quiet spell does not pay the load.
+    # ----------------------------------------------------------------
+    try:
+        reasoning_local = deep_reasoner is not None and deep_reasoner.llm.name == "ollama"
+        dashboard_provider, dashboard_model = (
+            dashboard_studio.default_model() if dashboard_studio else ("", "")
+        )
+        model_manager = ModelLifecycleManager.from_env(
+            os.getenv("OLLAMA_HOST", "http://localhost:11434"),
+            reasoning=deep_model if reasoning_local else None,
+            dashboard=dashboard_model if dashboard_provider == "ollama" else None,
+            embedding=rag_manager.embedding_model if rag_manager else None,
+        )
+        if model_manager.specs:
+            install_model_manager(model_manager)
+            if os.getenv("MODEL_WARMUP", "true").lower() == "true":
+                spawn_background(model_manager.run_loop(), "model-lifecycle")
+            print(f"✓ Model lifecycle manager tracking {', '.join(s.model for s in model_manager.specs.values())}")
+        else:
+            model_manager = None
+    except Exception as e:
+        print(f"⚠️ Failed to initialise model lifecycle manager: {e}")
+        model_manager = None
+
     # ----------------------------------------------------------------
     # Phase 8.5 — native prompt library (always-available workflows)
     # ----------------------------------------------------------------
@@ -792,7 +854,10 @@ async def lifespan(app: FastAPI):
             async def _trigger_reasoner_call(goal: str, context: dict):
                 # Triggers always go through plan/auto so the PAE
                 # safety net (Milestone E) gates anything dangerous.
-                return await deep_reasoner.run(goal, context, mode="auto")
+                # Scheduled (cron) runs are background work and yield to
+                # chat; state triggers react to the house and rank higher.
+                priority = "background" if context.get("trigger_type") == "cron" else "trigger"
+                return await deep_reasoner.run(goal, context, mode="auto", priority=priority)
 
             trigger_registry = TriggerRegistry(
                 store=trigger_store,
@@ -829,8 +894,12 @@ async def lifespan(app: FastAPI):
     if pending_tasks:
         await asyncio.gather(*pending_tasks, return_exceptions=True)
     background_tasks.clear()
+    if ha_client and state_snapshot_store:
+        await checkpoint_state_snapshot(ha_client, state_snapshot_store)
     if ha_client:
         await ha_client.disconnect()
+    install_model_manager(None)
+    await aclose_shared_clients()
     print("✅ Shutdown complete")
 
 
@@ -866,15 +935,35 @@ async def health_check():
         "status": "online" if ha_info.get("connected") else "degraded",
         "version": VERSION,
         "home_assistant": ha_info,
+        # Seconds from client start to the first state read served, and
+        # whether it came from the persisted snapshot or live HA.
+        "first_answer": ha_info.get("first_answer"),
         "orchestrator_model": orchestrator.model_name if orchestrator else "unknown",
         "agent_count": len(orchestrator.agents) if orchestrator else 0,
         "reasoning_kernel": deep_reasoner.info() if deep_reasoner else None,
+        "models": model_manager.info() if model_manager else None,
         "legacy_autonomous_loops": bool(
             any(task.get_name().startswith("legacy-agent-") for task in background_tasks)
         ),
     }
 
 
+@app.get("/api/models")
+async def get_models():
+    """Residency, keep-alive pins and cold-start metrics per Ollama model."""
+    if model_manager is None:
+        raise HTTPException(status_code=503, detail="No Ollama models are managed")
+    return model_manager.info()
+
+
+@app.post("/api/models/warm")
+async def warm_models():
+    """Re-check residency now and warm every managed model."""
+    if model_manager is None:
+        raise HTTPException(status_code=503, detail="No Ollama models are managed")
+    return await model_manager.refresh(force=True)
+
+
 @app.get("/api/health/home-assistant")
 async def home_assistant_health_check():
     """Execute a read-only HA state probe without returning entity data."""
@@ -888,7 +977,7 @@ async def home_assistant_health_check():
 
     started = time.monotonic()
     try:
-        states = await ha_client.get_states(timeout=20.0)
+        states = await ha_client.get_states(timeout=20.0, fresh=True)
     except Exception as exc:
         logger.warning("Home Assistant state-read health probe failed: %s", exc)
         raise HTTPException(status_code=503, detail={
@@ -971,12 +1060,15 @@ async def reasoning_run(req: ReasoningRequest):
         raise HTTPException(status_code=400, detail="goal must not be empty")
     validate_reasoning_mode(req.mode)
     validate_reasoning_profile(req.profile)
-    result = await deep_reasoner.run(
-        req.goal,
-        req.context,
-        mode=req.mode,
-        profile=req.profile,
-    )
+    try:
+        result = await deep_reasoner.run(
+            req.goal,
+            req.context,
+            mode=req.mode,
+            profile=req.profile,
+        )
+    except RunRejected as exc:
+        raise HTTPException(status_code=429, detail=str(exc))
     return {
         "run_id": getattr(result, "run_id", None),
         "episode_id": getattr(result, "episode_id", None),
@@ -996,6 +1088,7 @@ async def reasoning_run(req: ReasoningRequest):
         "usage": result.usage,
         "stopped_reason": result.stopped_reason,
         "duration_ms": result.duration_ms,
+        "queue_wait_ms": getattr(result, "queue_wait_ms", 0),
         "recalled": getattr(result, "recalled", []),
         "trace": [
             {
@@ -1016,8 +1109,11 @@ async def reasoning_stream(req: ReasoningRequest):
 
     The response is ``text/event-stream``; each event has a ``data:``
     line with a JSON-encoded payload. Event types include
-    ``start``, ``thought``, ``tool_call``, ``recall``, ``plan``,
-    ``final``, ``error``, plus periodic ``ping`` keep-alives.
+    ``start``, ``scheduled``, ``token``, ``thought``, ``tool_call``,
+    ``compaction``, ``tool_selection``, ``paused``, ``recall``, ``plan``,
+    ``final``, ``error``, plus periodic ``ping`` keep-alives. ``token``
+    events carry model text deltas for the current iteration and are
+    followed by the complete ``thought``.
     """
     if not deep_reasoner:
         raise HTTPException(status_code=503, detail="Deep reasoning agent not ready")
@@ -1185,6 +1281,7 @@ async def reasoning_prompt_run(name: str, req: PromptRunRequest):
                     context,
                     mode=req.mode,
                     profile=req.profile,
+                    priority="prompt",
                 ):
                     payload = json.dumps(event, default=str)
                     yield f"event: {event.get('type', 'message')}\ndata: {payload}\n\n"
@@ -1199,12 +1296,16 @@ async def reasoning_prompt_run(name: str, req: PromptRunRequest):
             headers={"Cache-Control": "no-cache, no-transform", "X-Accel-Buffering": "no"},
         )
 
-    result = await deep_reasoner.run(
-        goal,
-        context,
-        mode=req.mode,
-        profile=req.profile,
-    )
+    try:
+        result = await deep_reasoner.run(
+            goal,
+            context,
+            mode=req.mode,
+            profile=req.profile,
+            priority="prompt",
+        )
+    except RunRejected as exc:
+        raise HTTPException(status_code=429, detail=str(exc))
     return {
         "run_id": getattr(result, "run_id", None),
         "prompt": name,
@@ -1221,6 +1322,7 @@ async def reasoning_prompt_run(name: str, req: PromptRunRequest):
         "usage": result.usage,
         "stopped_reason": result.stopped_reason,
         "duration_ms": result.duration_ms,
+        "queue_wait_ms": getattr(result, "queue_wait_ms", 0),
         "plan": getattr(result, "plan", None),
         "executed_inline": getattr(result, "executed_inline", False),
         "execution_results": getattr(result, "execution_results", None),
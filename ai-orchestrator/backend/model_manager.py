@@ -0,0 +1,394 @@
+"""Ollama model lifecycle: warm-up, keep-alive pinning and cold-start metrics.
+
+Ollama loads a model on its first request and unloads it once its
+``keep_alive`` lapses. For a home assistant that is idle most of the day,
+that makes the first chat after a quiet spell pay the full load time:
+seconds of weights moving onto the GPU before the first token.
+
+:class:`ModelLifecycleManager` owns the models the add-on is configured
+to use: the reasoning model, the dashboard model and the embedding model.
+It:
+
+* preloads each one at startup with a one-token probe, so the first
+  request finds it resident;
+* pins each one with a per-role ``keep_alive`` that every Ollama request
+  path applies through :func:`keep_alive_for`;
+* polls ``/api/ps`` on a schedule and re-warms models that were evicted
+  or would expire before the next check;
+* records load time and time-to-first-token per model, split into cold
+  (the request paid a load) and warm, from both the probes and the
+  request paths that report through :func:`observe_model_timing`.
+
+The request paths only talk to the module-level hooks. With no manager
+installed (tests, cloud providers) the hooks return the caller's default
+and record nothing.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, Iterable, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+MODEL_ROLES = ("reasoning", "dashboard", "embedding")
+DEFAULT_KEEP_ALIVE = "30m"
+# A request whose server-side load took longer than this counts as cold.
+DEFAULT_COLD_THRESHOLD_MS = 500.0
+_WARMUP_PROMPT = "ok"
+_FRACTION = re.compile(r"(\.\d{6})\d+")
+
+
+def _env_keep_alive(role: str) -> str:
+    return (
+        os.getenv(f"MODEL_KEEP_ALIVE_{role.upper()}")
+        or os.getenv("OLLAMA_KEEP_ALIVE")
+        or DEFAULT_KEEP_ALIVE
+    )
+
+
+def _canonical(model: str) -> str:
+    """``name:tag`` as ``/api/ps`` reports it (untagged means ``latest``)."""
+    model = model.strip()
+    return model if ":" in model.rsplit("/", 1)[-1] else f"{model}:latest"
+
+
+def _parse_expiry(value: Any) -> Optional[float]:
+    if not value or not isinstance(value, str):
+        return None
+    # Ollama sends nanosecond fractions; ``fromisoformat`` takes six digits.
+    text = _FRACTION.sub(r"\1", value.strip()).replace("Z", "+00:00")
+    try:
+        parsed = datetime.fromisoformat(text)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _ns_to_ms(value: Any) -> Optional[float]:
+    try:
+        return round(float(value) / 1e6, 1) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _percentile(values: Iterable[float], pct: float) -> Optional[float]:
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    index = min(len(ordered) - 1, max(0, round(pct / 100.0 * (len(ordered) - 1))))
+    return round(ordered[index], 1)
+
+
+@dataclass
+class ModelSpec:
+    """One configured Ollama model and the roles it serves."""
+
+    model: str
+    roles: List[str] = field(default_factory=list)
+    keep_alive: str = DEFAULT_KEEP_ALIVE
+    embedding: bool = False
+
+
+@dataclass
+class _ModelStats:
+    window: int = 256
+    warmups: int = 0
+    warmup_failures: int = 0
+    cold_loads: int = 0
+    requests: int = 0
+    cold_requests: int = 0
+    resident: bool = False
+    expires_at: Optional[float] = None
+    size_vram: Optional[int] = None
+    last_load_ms: Optional[float] = None
+    last_warmup_at: Optional[float] = None
+    last_error: Optional[str] = None
+
+    def __post_init__(self) -> None:
+        self.load_ms: Deque[float] = deque(maxlen=self.window)
+        self.warm_ttft_ms: Deque[float] = deque(maxlen=self.window)
+        self.cold_ttft_ms: Deque[float] = deque(maxlen=self.window)
+
+
+class ModelLifecycleManager:
+    """Keeps the configured Ollama models resident and measures cold starts.
+
+    ``client`` is an ``httpx.AsyncClient``-compatible object; by default
+    the shared pool for ``host`` is used.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        specs: Sequence[ModelSpec],
+        *,
+        refresh_seconds: float = 600.0,
+        cold_threshold_ms: float = DEFAULT_COLD_THRESHOLD_MS,
+        timeout_seconds: float = 300.0,
+        client: Any = None,
+        window: int = 256,
+    ) -> None:
+        self.host = host.rstrip("/")
+        self.refresh_seconds = max(30.0, float(refresh_seconds))
+        self.cold_threshold_ms = float(cold_threshold_ms)
+        self.timeout_seconds = float(timeout_seconds)
+        self._client = client
+        self.specs: Dict[str, ModelSpec] = {}
+        for spec in specs:
+            key = _canonical(spec.model)
+            existing = self.specs.get(key)
+            if existing is None:
+                self.specs[key] = ModelSpec(spec.model, list(spec.roles), spec.keep_alive, spec.embedding)
+                continue
+            # One model serving several roles keeps the first role's pin.
+            existing.roles.extend(r for r in spec.roles if r not in existing.roles)
+            existing.embedding = existing.embedding and spec.embedding
+        self._stats: Dict[str, _ModelStats] = {key: _ModelStats(window) for key in self.specs}
+        self.refreshes = 0
+        self.last_refresh_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    @classmethod
+    def from_env(
+        cls,
+        host: str,
+        *,
+        reasoning: Optional[str] = None,
+        dashboard: Optional[str] = None,
+        embedding: Optional[str] = None,
+        **kwargs: Any,
+    ) -> "ModelLifecycleManager":
+        """Manager for the given role models, pinned per ``MODEL_KEEP_ALIVE_<ROLE>``."""
+        specs = [
+            ModelSpec(model, [role], _env_keep_alive(role), embedding=role == "embedding")
+            for role, model in zip(MODEL_ROLES, (reasoning, dashboard, embedding))
+            if model
+        ]
+        try:
+            kwargs.setdefault("refresh_seconds", float(os.getenv("MODEL_REFRESH_SECONDS", "600")))
+        except ValueError:
+            pass
+        return cls(host, specs, **kwargs)
+
+    # ---- request-path hooks ----------------------------------------------
+    def keep_alive_for(self, model: str) -> Optional[str]:
+        spec = self.specs.get(_canonical(model))
+        return spec.keep_alive if spec else None
+
+    def observe(
+        self,
+        model: str,
+        *,
+        load_ms: Optional[float] = None,
+        ttft_ms: Optional[float] = None,
+    ) -> None:
+        """Record one request's load and time to first token."""
+        stats = self._stats.get(_canonical(model))
+        if stats is None or ttft_ms is None:
+            return
+        stats.requests += 1
+        if self._record(stats, load_ms, ttft_ms):
+            stats.cold_requests += 1
+
+    def _record(self, stats: _ModelStats, load_ms: Optional[float], ttft_ms: float) -> bool:
+        cold = load_ms is not None and load_ms >= self.cold_threshold_ms
+        if cold:
+            stats.cold_loads += 1
+            stats.load_ms.append(load_ms)
+            stats.last_load_ms = load_ms
+            stats.cold_ttft_ms.append(ttft_ms)
+        else:
+            stats.warm_ttft_ms.append(ttft_ms)
+        stats.resident = True
+        return cold
+
+    # ---- Ollama calls ------------------------------------------------------
+    def _http(self) -> Any:
+        if self._client is None:
+            from llm_providers import shared_async_http_client
+
+            return shared_async_http_client(self.host)
+        return self._client
+
+    async def warm(self, model: str) -> Dict[str, Any]:
+        """Load ``model`` with a one-token probe and record its timings."""
+        key = _canonical(model)
+        spec = self.specs[key]
+        stats = self._stats[key]
+        if spec.embedding:
+            path = "/api/embed"
+            body: Dict[str, Any] = {"model": spec.model, "input": _WARMUP_PROMPT}
+        else:
+            path = "/api/generate"
+            body = {
+                "model": spec.model, "prompt": _WARMUP_PROMPT, "stream": False,
+                "options": {"num_predict": 1},
+            }
+        body["keep_alive"] = spec.keep_alive
+        started = time.perf_counter()
+        try:
+            response = await self._http().post(
+                f"{self.host}{path}", json=body, timeout=self.timeout_seconds,
+            )
+            response.raise_for_status()
+            data = response.json()
+        except Exception as exc:
+            stats.warmup_failures += 1
+            stats.last_error = str(exc) or type(exc).__name__
+            logger.warning("Warm-up of %s failed: %s", spec.model, stats.last_error)
+            return {"model": spec.model, "ok": False, "error": stats.last_error}
+        wall_ms = round((time.perf_counter() - started) * 1000, 1)
+        load_ms = _ns_to_ms(data.get("load_duration"))
+        if spec.embedding:
+            ttft_ms = _ns_to_ms(data.get("total_duration")) or wall_ms
+        else:
+            ttft_ms = round((load_ms or 0.0) + (_ns_to_ms(data.get("prompt_eval_duration")) or 0.0), 1) or wall_ms
+        stats.warmups += 1
+        stats.last_error = None
+        stats.last_warmup_at = time.time()
+        cold = self._record(stats, load_ms, ttft_ms)
+        logger.info("Warmed %s (%s, load %.0f ms)", spec.model, "cold" if cold else "warm", load_ms or 0.0)
+        return {"model": spec.model, "ok": True, "cold": cold, "load_ms": load_ms, "ttft_ms": ttft_ms}
+
+    async def resident_models(self) -> Dict[str, Dict[str, Any]]:
+        """``/api/ps`` keyed by canonical model name."""
+        response = await self._http().get(f"{self.host}/api/ps", timeout=10.0)
+        response.raise_for_status()
+        loaded = {}
+        for entry in response.json().get("models") or ():
+            name = entry.get("name") or entry.get("model")
+            if name:
+                loaded[_canonical(name)] = entry
+        return loaded
+
+    async def refresh(self, *, force: bool = False) -> Dict[str, Any]:
+        """Sync residency from ``/api/ps`` and warm what is missing.
+
+        A model counts as missing when it is not loaded, or when it would
+        expire before the next refresh. ``force`` warms every model.
+        """
+        async with self._lock:
+            try:
+                loaded = await self.resident_models()
+            except Exception as exc:
+                logger.warning("Could not list resident Ollama models: %s", exc)
+                loaded = {}
+            horizon = time.time() + self.refresh_seconds
+            stale: List[str] = []
+            for key, spec in self.specs.items():
+                stats = self._stats[key]
+                entry = loaded.get(key)
+                stats.resident = entry is not None
+                stats.expires_at = _parse_expiry(entry.get("expires_at")) if entry else None
+                stats.size_vram = entry.get("size_vram") if entry else None
+                expiring = stats.expires_at is not None and stats.expires_at < horizon
+                if force or not stats.resident or expiring:
+                    stale.append(key)
+            warmed = [await self.warm(self.specs[key].model) for key in stale]
+            self.refreshes += 1
+            self.last_refresh_at = time.time()
+            return {
+                "resident": sorted(self.specs[k].model for k in self.specs if self._stats[k].resident),
+                "warmed": warmed,
+            }
+
+    async def run_loop(self) -> None:
+        """Warm everything at startup, then refresh on a schedule."""
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:  # pragma: no cover - keep the loop alive
+                logger.warning("Model refresh failed: %s", exc)
+            await asyncio.sleep(self.refresh_seconds)
+
+    # ---- reporting -----------------------------------------------------------
+    def info(self) -> Dict[str, Any]:
+        models = {}
+        for key, spec in self.specs.items():
+            stats = self._stats[key]
+            models[spec.model] = {
+                "roles": list(spec.roles),
+                "keep_alive": spec.keep_alive,
+                "resident": stats.resident,
+                "expires_at": stats.expires_at,
+                "size_vram": stats.size_vram,
+                "warmups": stats.warmups,
+                "warmup_failures": stats.warmup_failures,
+                "last_error": stats.last_error,
+                "cold_loads": stats.cold_loads,
+                "last_load_ms": stats.last_load_ms,
+                "load_ms_p50": _percentile(stats.load_ms, 50),
+                "requests": stats.requests,
+                "cold_requests": stats.cold_requests,
+                "ttft_ms_warm_p50": _percentile(stats.warm_ttft_ms, 50),
+                "ttft_ms_warm_p95": _percentile(stats.warm_ttft_ms, 95),
+                "ttft_ms_cold_p50": _percentile(stats.cold_ttft_ms, 50),
+                "ttft_ms_cold_p95": _percentile(stats.cold_ttft_ms, 95),
+            }
+        return {
+            "host": self.host,
+            "refresh_seconds": self.refresh_seconds,
+            "cold_threshold_ms": self.cold_threshold_ms,
+            "refreshes": self.refreshes,
+            "last_refresh_at": self.last_refresh_at,
+            "models": models,
+        }
+
+
+# ---------------------------------------------------------------------------
+# Process-wide hooks for the request paths
+# ---------------------------------------------------------------------------
+_ACTIVE: Optional[ModelLifecycleManager] = None
+
+
+def install(manager: Optional[ModelLifecycleManager]) -> None:
+    """Make ``manager`` the one the request paths consult (``None`` clears)."""
+    global _ACTIVE
+    _ACTIVE = manager
+
+
+def active_manager() -> Optional[ModelLifecycleManager]:
+    return _ACTIVE
+
+
+def keep_alive_for(model: str, default: Optional[str] = None) -> Optional[str]:
+    """The pinned ``keep_alive`` for ``model``, else ``default``."""
+    if _ACTIVE is None:
+        return default
+    return _ACTIVE.keep_alive_for(model) or default
+
+
+def observe_model_timing(
+    model: str,
+    *,
+    load_ms: Optional[float] = None,
+    ttft_ms: Optional[float] = None,
+) -> None:
+    """Report one request's timings to the installed manager, if any."""
+    if _ACTIVE is not None:
+        _ACTIVE.observe(model, load_ms=load_ms, ttft_ms=ttft_ms)
+
+
+def response_timings(resp: Any) -> Dict[str, Optional[float]]:
+    """``load_ms``/``ttft_ms`` from an Ollama chat or generate response."""
+    def value(name: str) -> Any:
+        if isinstance(resp, dict):
+            return resp.get(name)
+        return getattr(resp, name, None)
+
+    load_ms = _ns_to_ms(value("load_duration"))
+    prompt_ms = _ns_to_ms(value("prompt_eval_duration"))
+    if load_ms is None and prompt_ms is None:
+        return {"load_ms": None, "ttft_ms": None}
+    return {"load_ms": load_ms, "ttft_ms": round((load_ms or 0.0) + (prompt_ms or 0.0), 1)}
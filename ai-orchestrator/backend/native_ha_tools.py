@@ -13,7 +13,9 @@ reasoning harness sees a uniform tool result shape.
 from __future__ import annotations
 
 import logging
-from typing import Any, Awaitable, Callable, Dict, List, Optional
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from entity_index import EntityIndex
 
 logger = logging.getLogger(__name__)
 
@@ -28,14 +30,23 @@ TOOL_SCHEMAS: List[Dict[str, Any]] = [
             "name": "ha_list_entities",
             "description": (
                 "List Home Assistant entities. Optional filter by domain "
-                "(e.g. 'light', 'climate', 'binary_sensor') and/or by a "
-                "case-insensitive substring of the entity_id or friendly "
-                "name. Returns entity_id, state, friendly_name, domain."
+                "(e.g. 'light', 'climate', 'binary_sensor'), device_class "
+                "(e.g. 'temperature', 'door'), area and/or by a case-insensitive "
+                "substring of the entity_id or friendly name. Returns "
+                "entity_id, state, friendly_name, domain, best matches first."
             ),
             "parameters": {
                 "type": "object",
                 "properties": {
                     "domain": {"type": "string", "description": "Domain filter, optional."},
+                    "device_class": {"type": "string", "description": "Device class filter, optional."},
+                    "area": {
+                        "type": "string",
+                        "description": (
+                            "Home Assistant area name or id, optional. Matched "
+                            "against entity names when no area registry is available."
+                        ),
+                    },
                     "query": {"type": "string", "description": "Substring filter, optional."},
                     "limit": {"type": "integer", "description": "Max results (default 100)."},
                 },
@@ -64,8 +75,9 @@ TOOL_SCHEMAS: List[Dict[str, Any]] = [
         "function": {
             "name": "ha_search_entities",
             "description": (
-                "Free-text search across entity_ids and friendly names. "
-                "Use this when you don't know the exact entity_id."
+                "Free-text search across entity_ids and friendly names, "
+                "ranked best match first. Use this when you don't know "
+                "the exact entity_id."
             ),
             "parameters": {
                 "type": "object",
@@ -128,9 +140,9 @@ TOOL_SCHEMAS: List[Dict[str, Any]] = [
         "function": {
             "name": "ha_summarise_area",
             "description": (
-                "Summarise the state of a logical room/area by matching "
-                "entity_ids whose names contain the area substring. "
-                "Useful when there's no first-class area registry call."
+                "Summarise the state of a room/area. Uses Home Assistant "
+                "area membership; when no area registry is available it "
+                "matches entity_ids whose names contain the area substring."
             ),
             "parameters": {
                 "type": "object",
@@ -195,6 +207,20 @@ class NativeHATools:
             return [states]
         return list(states or [])
 
+    async def _entity_index(self) -> EntityIndex:
+        """The client's live index, or a throwaway one built from states."""
+        client = self.ha_client
+        index = getattr(client, "entity_index", None)
+        if isinstance(index, EntityIndex) and getattr(client, "mirror_states", False) is True:
+            if not client.mirror_ready:
+                await client.get_states()  # seeds the mirror and its index
+            try:
+                await client.ensure_registries()  # area membership
+            except Exception as exc:
+                logger.warning("HA registries unavailable, areas by name only: %s", exc)
+            return index
+        return EntityIndex.from_states(await self._all_states())
+
     @staticmethod
     def _domain(entity_id: str) -> str:
         return entity_id.split(".", 1)[0] if "." in entity_id else ""
@@ -209,24 +235,45 @@ class NativeHATools:
             "domain": NativeHATools._domain(state.get("entity_id", "")),
         }
 
+    @staticmethod
+    def _area_scope(index: EntityIndex, area: str) -> Optional[Tuple[Set[str], str]]:
+        """Entity ids in ``area`` and how they were found, or None if unknown.
+
+        Registry membership wins. Without an area registry the area is
+        matched against entity names instead; with one, an area it does not
+        list is unknown rather than guessed at.
+        """
+        members = index.area_members(area)
+        if members is not None:
+            return members, "area_registry"
+        if index.by_area or index.area_names:
+            return None
+        return {e.entity_id for e in index.search(area)}, "name"
+
     # ---- tools ------------------------------------------------------------
     async def _t_ha_list_entities(self, args: Dict[str, Any]) -> Dict[str, Any]:
         domain = (args.get("domain") or "").strip().lower() or None
-        query = (args.get("query") or "").strip().lower() or None
+        device_class = (args.get("device_class") or "").strip().lower() or None
+        query = (args.get("query") or "").strip().lower()
+        area = (args.get("area") or "").strip()
         limit = int(args.get("limit") or 100)
-        states = await self._all_states()
-        out: List[Dict[str, Any]] = []
-        for s in states:
-            eid = s.get("entity_id") or ""
-            if domain and self._domain(eid) != domain:
-                continue
-            if query:
-                fn = ((s.get("attributes") or {}).get("friendly_name") or "").lower()
-                if query not in eid.lower() and query not in fn:
-                    continue
-            out.append(self._slim(s))
-            if len(out) >= limit:
-                break
+        index = await self._entity_index()
+        members = None
+        if area:
+            scope = self._area_scope(index, area)
+            if scope is None:
+                return {"ok": False, "error": f"unknown_area:{area}"}
+            members, _ = scope
+        out = [
+            e.slim()
+            for e in index.search(
+                query,
+                domains=[domain] if domain else None,
+                device_class=device_class,
+                candidates=members,
+                limit=limit,
+            )
+        ]
         return {"ok": True, "count": len(out), "entities": out}
 
     async def _t_ha_get_state(self, args: Dict[str, Any]) -> Dict[str, Any]:
@@ -244,31 +291,13 @@ class NativeHATools:
         if not query:
             return {"ok": False, "error": "query required"}
         limit = int(args.get("limit") or 25)
-        states = await self._all_states()
-        hits: List[Dict[str, Any]] = []
-        for s in states:
-            eid = s.get("entity_id") or ""
-            fn = ((s.get("attributes") or {}).get("friendly_name") or "").lower()
-            if query in eid.lower() or query in fn:
-                hits.append(self._slim(s))
-                if len(hits) >= limit:
-                    break
+        index = await self._entity_index()
+        hits = [e.slim() for e in index.search(query, limit=limit)]
         return {"ok": True, "count": len(hits), "matches": hits}
 
     async def _t_ha_list_domains(self, args: Dict[str, Any]) -> Dict[str, Any]:
-        states = await self._all_states()
-        counts: Dict[str, int] = {}
-        for s in states:
-            d = self._domain(s.get("entity_id") or "")
-            if d:
-                counts[d] = counts.get(d, 0) + 1
-        return {
-            "ok": True,
-            "domains": sorted(
-                ({"domain": k, "count": v} for k, v in counts.items()),
-                key=lambda x: (-x["count"], x["domain"]),
-            ),
-        }
+        index = await self._entity_index()
+        return {"ok": True, "domains": index.domains()}
 
     async def _t_ha_list_services(self, args: Dict[str, Any]) -> Dict[str, Any]:
         domain = (args.get("domain") or "").strip().lower() or None
@@ -312,24 +341,21 @@ class NativeHATools:
         area = (args.get("area") or "").strip().lower()
         if not area:
             return {"ok": False, "error": "area required"}
-        domains = {d.lower() for d in (args.get("domains") or [])}
-        states = await self._all_states()
-        matches: List[Dict[str, Any]] = []
-        for s in states:
-            eid = (s.get("entity_id") or "").lower()
-            fn = ((s.get("attributes") or {}).get("friendly_name") or "").lower()
-            if area not in eid and area not in fn:
-                continue
-            if domains and self._domain(eid) not in domains:
-                continue
-            matches.append(self._slim(s))
+        domains = [d.lower() for d in (args.get("domains") or [])]
+        index = await self._entity_index()
+        scope = self._area_scope(index, area)
+        if scope is None:
+            return {"ok": False, "error": f"unknown_area:{area}"}
+        members, match = scope
+        found = index.search("", domains=domains, candidates=members)
         # Group by domain for a quick mental picture.
         by_domain: Dict[str, List[Dict[str, Any]]] = {}
-        for m in matches:
-            by_domain.setdefault(m["domain"], []).append(m)
+        for entry in found:
+            by_domain.setdefault(entry.domain, []).append(entry.slim())
         return {
             "ok": True,
             "area": area,
-            "count": len(matches),
+            "match": match,
+            "count": len(found),
             "by_domain": by_domain,
         }
@@ -12,7 +12,6 @@ from datetime import datetime
 from typing import List, Dict, Optional, Any, Literal, TypedDict
 from pathlib import Path
 
-import ollama
 import os
 try:
     from google import genai as _genai_module
@@ -20,7 +19,7 @@ try:
 except ImportError:
     _genai_module = None
     _GENAI_AVAILABLE = False
-from llm_providers import make_chat_provider
+from llm_providers import make_chat_provider, shared_ollama_async_client
 
 
 class Task(TypedDict):
@@ -137,16 +136,14 @@ class Orchestrator:
         self.planning_interval = planning_interval
         self.deep_reasoner = None  # Set externally after init
 
-        # Ollama client for planning LLM (kept for back-compat; some
-        # planning paths still use Ollama-specific ``format="json"``).
+        # Planning and chat use Ollama-only options (``format="json"``), so
+        # they call Ollama directly on the async pool shared with the
+        # reasoning kernel (see ``_llm``). ``llm_client`` overrides it with
+        # any object exposing an async ``chat``.
         # The ``llm_provider`` façade routes through the configured
         # provider (Ollama / OpenAI / GitHub Models / Foundry) for
         # callers that don't need Ollama-only options.
-        self.ollama_client = ollama.Client(
-            host=ollama_host,
-            timeout=self.dashboard_generation_timeout,
-        )
-        self.llm_client = self.ollama_client # Reference for other methods
+        self.llm_client: Any = None
         self.ollama_host_used = ollama_host
         self.llm_provider = make_chat_provider(ollama_host=ollama_host)
 
@@ -202,6 +199,14 @@ class Orchestrator:
         logger.info(f"Orchestrator initialized with model: {model_name}")
         logger.info(f"Managing {len(agents)} specialist agents: {list(agents.keys())}")
     
+    def _llm(self) -> Any:
+        """Async Ollama client: ``llm_client`` if set, else the shared pool."""
+        if getattr(self, "llm_client", None) is not None:
+            return self.llm_client
+        return shared_ollama_async_client(
+            self.ollama_host_used, float(getattr(self, "dashboard_generation_timeout", 180.0)),
+        )
+
     def _load_conflict_rules(self) -> Dict:
         """Load conflict resolution rules"""
         return {
@@ -333,7 +338,7 @@ class Orchestrator:
         
         # Call LLM for high-level planning
         try:
-            response = self.llm_client.chat(
+            response = await self._llm().chat(
                 model=self.model_name,
                 messages=[
                     {"role": "system", "content": "You are an AI orchestrator for home automation. Analyze the current home state and create tasks for specialist agents (heating, cooling, lighting, security)."},
@@ -483,21 +488,55 @@ Only create tasks if action is needed. Return empty tasks array if everything is
         return state
     
     async def execute_approved_actions(self, state: OrchestratorState) -> OrchestratorState:
-        """Execute approved actions via MCP server"""
-        results = []
-        
-        for action in state["approved_actions"]:
+        """Execute approved actions via MCP server.
+
+        Each action still goes through ``execute_tool`` (validation, dry-run
+        and the decision log), but independent actions run concurrently so
+        their service calls share the socket instead of paying one HA
+        round-trip each. An action waits for every earlier action on one of
+        its entities; an action without an ``entity_id`` waits for all
+        earlier actions and all later ones wait for it.
+        """
+        tasks: List[asyncio.Task] = []
+        last_touch: Dict[str, int] = {}
+        last_barrier = -1
+
+        async def run(action: Dict, before: List[asyncio.Task]) -> Dict:
+            if before:
+                await asyncio.wait(before)
             try:
                 result = await self.mcp_server.execute_tool(
                     tool_name=action["tool"],
                     parameters=action["parameters"],
                     agent_id="orchestrator"
                 )
-                results.append(result)
                 logger.info(f"Executed {action['tool']}: {result}")
+                return result
             except Exception as e:
                 logger.error(f"Execution error: {e}")
-                results.append({"error": str(e)})
+                return {"error": str(e)}
+
+        for index, action in enumerate(state["approved_actions"]):
+            raw = (action.get("parameters") or {}).get("entity_id")
+            targets = [raw] if isinstance(raw, str) else list(raw or ())
+            if not targets or "all" in targets:
+                deps = set(range(index))
+                last_barrier = index
+            else:
+                deps = {last_touch[e] for e in targets if e in last_touch}
+                if last_barrier >= 0:
+                    deps.add(last_barrier)
+                for entity_id in targets:
+                    last_touch[entity_id] = index
+            tasks.append(asyncio.create_task(
+                run(action, [tasks[i] for i in sorted(deps)])
+            ))
+
+        try:
+            results = list(await asyncio.gather(*tasks))
+        finally:
+            for task in tasks:
+                task.cancel()
         
         state["execution_results"] = results
         return state
@@ -545,7 +584,13 @@ Only create tasks if action is needed. Return empty tasks array if everything is
         if self.deep_reasoner:
             logger.info("Routing chat request to deterministic reasoner: %s", user_message[:80])
             try:
-                result = await self.deep_reasoner.run(user_message, mode="auto")
+                # Simple lookups and commands may be answered without the
+                # model; multi-step requests always get the full harness.
+                result = await self.deep_reasoner.run(
+                    user_message,
+                    mode="auto",
+                    fast_path=not self._is_complex_query(user_message),
+                )
                 return {
                     "response": result.answer,
                     "actions_executed": getattr(result, "execution_results", None) or [],
@@ -611,7 +656,7 @@ INSTRUCTIONS:
 
         # 3. Call LLM
         try:
-            response = self.llm_client.chat(
+            response = await self._llm().chat(
                 model=self.model_name,
                 messages=[{"role": "user", "content": prompt}],
                 format="json"
@@ -750,8 +795,7 @@ OUTPUT REQUIREMENTS:
                 # Use Gemini for best design results
                 logger.info(f"Generating dashboard using Gemini model: {self.gemini_model_name}")
                 response = await asyncio.wait_for(
-                    asyncio.to_thread(
-                        self._genai_client.models.generate_content,
+                    self._genai_client.aio.models.generate_content(
                         model=self.gemini_model_name,
                         contents=[system_prompt, user_prompt],
                     ),
@@ -762,8 +806,7 @@ OUTPUT REQUIREMENTS:
                 # Fallback to local Ollama (might be less 'poppy' but functional)
                 dashboard_model = getattr(self, "dashboard_model_name", self.model_name)
                 response = await asyncio.wait_for(
-                    asyncio.to_thread(
-                        self.llm_client.chat,
+                    self._llm().chat(
                         model=dashboard_model,
                         messages=[
                             {"role": "system", "content": system_prompt},
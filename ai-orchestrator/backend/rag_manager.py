@@ -10,12 +10,22 @@ import chromadb
 from chromadb.config import Settings
 from typing import List, Dict, Optional, Any
 import ollama
+import time
 from datetime import datetime
 import json
 from pathlib import Path
 
+from model_manager import keep_alive_for, observe_model_timing, response_timings
+
 logger = logging.getLogger(__name__)
 
+#: Collection metadata marking vectors produced by ``/api/embed``. That
+#: endpoint returns unit-length vectors while the older ``/api/embeddings``
+#: does not, so the two must never be compared against each other.
+EMBEDDING_API_KEY = "embedding_api"
+EMBEDDING_API = "embed"
+REEMBED_BATCH = 64
+
 class RagManager:
     """
     Manages Retrieval-Augmented Generation (RAG) capabilities.
@@ -67,8 +77,101 @@ class RagManager:
             metadata={"description": "Past decisions, outcomes, and user feedback"}
         )
         
+        self._collections = {
+            "knowledge_base": self.knowledge_base,
+            "entity_registry": self.entity_registry,
+            "memory": self.memory,
+        }
+        # Collections still holding ``/api/embeddings`` vectors. While any
+        # remain, every embedding goes through the old endpoint so queries
+        # keep matching them; ``reembed`` migrates them.
+        self._legacy_collections = set()
+        for name, collection in self._collections.items():
+            if (collection.metadata or {}).get(EMBEDDING_API_KEY) == EMBEDDING_API:
+                continue
+            if collection.count():
+                self._legacy_collections.add(name)
+            else:
+                self._mark_embedding_api(collection)
+        if self._legacy_collections:
+            logger.warning(
+                "RAG collections %s hold /api/embeddings vectors; re-embed them "
+                "with reembed()", sorted(self._legacy_collections),
+            )
+
         logger.info(f"RAG Manager initialized at {persist_dir} using {embedding_model}")
 
+    @property
+    def legacy_embeddings(self) -> bool:
+        """True while stored vectors still come from ``/api/embeddings``."""
+        return bool(self._legacy_collections)
+
+    @staticmethod
+    def _mark_embedding_api(collection: Any) -> None:
+        collection.modify(metadata={
+            **(collection.metadata or {}), EMBEDDING_API_KEY: EMBEDDING_API,
+        })
+
+    def _embed(self, text: str) -> List[float]:
+        """Embed one text with the endpoint the stored vectors came from."""
+        if self._legacy_collections:
+            pin = keep_alive_for(self.embedding_model)
+            extra = {"keep_alive": pin} if pin else {}
+            started = time.perf_counter()
+            response = ollama.embeddings(model=self.embedding_model, prompt=text, **extra)
+            observe_model_timing(
+                self.embedding_model,
+                ttft_ms=round((time.perf_counter() - started) * 1000, 1),
+            )
+            return list(response["embedding"])
+        return self._embed_many([text])[0]
+
+    def _embed_many(self, texts: List[str]) -> List[List[float]]:
+        """One ``/api/embed`` call, reported to the model lifecycle metrics."""
+        pin = keep_alive_for(self.embedding_model)
+        extra = {"keep_alive": pin} if pin else {}
+        started = time.perf_counter()
+        response = ollama.embed(model=self.embedding_model, input=texts, **extra)
+        # ``/api/embed`` reports the server-side load, so cold loads of the
+        # embedding model are counted like the chat models'.
+        timings = response_timings(response)
+        observe_model_timing(
+            self.embedding_model,
+            load_ms=timings["load_ms"],
+            ttft_ms=round((time.perf_counter() - started) * 1000, 1),
+        )
+        return [list(e) for e in response["embeddings"]]
+
+    def reembed(self, batch_size: int = REEMBED_BATCH) -> Dict[str, int]:
+        """Re-embed collections stored with ``/api/embeddings`` (sync).
+
+        New writes and queries switch to ``/api/embed`` first, then every
+        stored document is re-embedded from its text and its collection is
+        marked, so nothing written during the migration is missed. Returns
+        the number of documents re-embedded per collection. A collection
+        that fails is left unmarked and is migrated again on the next start.
+        """
+        pending = sorted(self._legacy_collections)
+        self._legacy_collections.clear()
+        migrated: Dict[str, int] = {}
+        for name in pending:
+            collection = self._collections[name]
+            try:
+                ids = collection.get(include=[])["ids"]
+                for start in range(0, len(ids), batch_size):
+                    batch = collection.get(ids=ids[start:start + batch_size], include=["documents"])
+                    if not batch["ids"]:
+                        continue
+                    embeddings = self._embed_many([doc or "" for doc in batch["documents"]])
+                    collection.update(ids=batch["ids"], embeddings=embeddings)
+                self._mark_embedding_api(collection)
+            except Exception as e:
+                logger.error("Re-embedding RAG collection %s failed: %s", name, e)
+                continue
+            migrated[name] = len(ids)
+            logger.info("Re-embedded %d documents in RAG collection %s", len(ids), name)
+        return migrated
+
     def _generate_embedding(self, text: str) -> List[float]:
         """Generate embedding using Ollama (sync, safe for thread executor).
 
@@ -78,9 +181,9 @@ class RagManager:
         having to remember ``ollama pull nomic-embed-text`` (issue #2).
         """
         try:
-            response = ollama.embeddings(model=self.embedding_model, prompt=text)
+            embedding = self._embed(text)
             self._embedding_model_ready = True
-            return response["embedding"]
+            return embedding
         except Exception as e:
             msg = str(e).lower()
             missing = (
@@ -96,15 +199,13 @@ class RagManager:
                 )
                 try:
                     ollama.pull(self.embedding_model)
-                    response = ollama.embeddings(
-                        model=self.embedding_model, prompt=text
-                    )
+                    embedding = self._embed(text)
                     self._embedding_model_ready = True
                     logger.info(
                         "Embedding model %r pulled and ready.",
                         self.embedding_model,
                     )
-                    return response["embedding"]
+                    return embedding
                 except Exception as pull_err:
                     logger.error(
                         "Auto-pull of %r failed: %s. Run "
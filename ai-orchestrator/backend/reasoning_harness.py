@@ -40,21 +40,28 @@ from __future__ import annotations
 
 import asyncio
 import copy
+import functools
 import hashlib
 import inspect
 import json
 import logging
 import os
+import re
 import time
 import uuid
+import weakref
 from dataclasses import dataclass, field
-from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Protocol, Union
+from typing import (
+    Any, Awaitable, Callable, Dict, FrozenSet, List, Mapping, Optional, Protocol, Set, Tuple, Union,
+)
 
 try:
     from jsonschema import Draft202012Validator
 except ImportError:  # pragma: no cover - dependency is declared, guard keeps imports fail-soft
     Draft202012Validator = None  # type: ignore[assignment]
 
+from model_manager import keep_alive_for, observe_model_timing, response_timings
+
 logger = logging.getLogger(__name__)
 
 
@@ -274,10 +281,16 @@ class ToolSemantics:
     read_only: bool = False
     destructive: bool = True
     idempotent: bool = False
+    # Reads: may run concurrently with neighbouring reads. Mutations: may run
+    # concurrently with other mutations on disjoint, explicitly named entities.
     parallel_safe: bool = False
     impact_level: str = "high"
     timeout_seconds: float = 30.0
     max_retries: int = 0
+    # Read-only results may be served across runs by the harness's
+    # ``shared_cache`` (see :mod:`tool_cache`); only set this for tools
+    # whose results are invalidated by Home Assistant state changes.
+    shared_cache: bool = False
 
 
 @dataclass(frozen=True)
@@ -293,7 +306,80 @@ class ToolExecutionContext:
 # ---------------------------------------------------------------------------
 # LLM backends
 # ---------------------------------------------------------------------------
+TokenCallback = Callable[[str], Awaitable[None]]
+TokenEstimator = Callable[[str], int]
+
+
+def approx_token_count(text: str) -> int:
+    """Rough token count: about four characters per token."""
+    return (len(text) + 3) // 4
+
+
+@functools.lru_cache(maxsize=8)
+def _tiktoken_encoding(model: str) -> Any:
+    try:
+        import tiktoken  # type: ignore
+    except ImportError:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        pass
+    except Exception:  # encoding files unavailable offline
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def tiktoken_token_count(model: str, text: str) -> int:
+    """Token count with tiktoken, or :func:`approx_token_count` without it."""
+    encoding = _tiktoken_encoding(model)
+    if encoding is None:
+        return approx_token_count(text)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+class ContextMeter:
+    """Running size of a message history.
+
+    Each message is measured once, when it is added, so the harness
+    budget check costs O(1) per iteration instead of re-serialising the
+    whole history. ``chars`` equals ``len(json.dumps(messages))``;
+    ``tokens`` sums ``estimate_tokens`` over the serialised messages.
+    """
+
+    def __init__(self, estimate_tokens: Optional[TokenEstimator] = None) -> None:
+        self.estimate_tokens = estimate_tokens or approx_token_count
+        self.count = 0
+        self.chars = 2  # "[]"
+        self.tokens = 0
+
+    def add(self, message: Dict[str, Any]) -> None:
+        try:
+            text = json.dumps(message, default=str, ensure_ascii=False)
+        except (TypeError, ValueError):
+            text = str(message)
+        self.chars += len(text) + (2 if self.count else 0)  # ", " separator
+        self.tokens += self.estimate_tokens(text)
+        self.count += 1
+
+    def extend(self, messages: List[Dict[str, Any]]) -> None:
+        for message in messages:
+            self.add(message)
+
+
 class LLMBackend(Protocol):
+    """Tool-calling chat model.
+
+    Backends that accept ``on_token`` stream text deltas through it while
+    the completion is generated. Tool calls are never streamed: they
+    arrive whole in the returned :class:`LLMResponse`. A backend may also
+    define ``estimate_tokens(text) -> int`` for its own tokenizer; the
+    harness uses it for context accounting.
+    """
+
     name: str
 
     async def chat(
@@ -303,6 +389,7 @@ class LLMBackend(Protocol):
         *,
         continuation: Any = None,
         profile: Optional[str] = None,
+        on_token: Optional[TokenCallback] = None,
     ) -> LLMResponse: ...
 
 
@@ -320,6 +407,8 @@ class OllamaToolBackend:
         top_k: int = 64,
         num_predict: int = 3072,
         default_profile: str = "balanced",
+        keep_alive: Optional[str] = None,
+        num_ctx: Optional[int] = None,
     ) -> None:
         import ollama  # local import keeps module importable without ollama
 
@@ -329,6 +418,12 @@ class OllamaToolBackend:
         self.top_k = top_k
         self.num_predict = num_predict
         self.default_profile = resolve_reasoning_profile(default_profile).name
+        # The KV cache for the shared prompt prefix only survives while the
+        # model stays loaded with the same context size. Keep it resident
+        # between turns and pin num_ctx so profile switches never reload it.
+        self.keep_alive = keep_alive or os.getenv("OLLAMA_KEEP_ALIVE", "30m")
+        env_num_ctx = os.getenv("OLLAMA_NUM_CTX")
+        self.num_ctx = num_ctx or (int(env_num_ctx) if env_num_ctx else None)
         self._client = ollama.AsyncClient(host=host or os.getenv("OLLAMA_HOST", "http://localhost:11434"))
 
     async def chat(
@@ -338,6 +433,7 @@ class OllamaToolBackend:
         *,
         continuation: Any = None,
         profile: Optional[str] = None,
+        on_token: Optional[TokenCallback] = None,
     ) -> LLMResponse:
         selected = resolve_reasoning_profile(profile or self.default_profile)
         temperature = selected.temperature if profile else self.temperature
@@ -356,14 +452,33 @@ class OllamaToolBackend:
             # Ollama exposes thinking as a top-level chat parameter. Keep it
             # out of ``options`` so the SDK sends the documented wire shape.
             "think": selected.think,
-            "stream": False,
+            "stream": on_token is not None,
+            "keep_alive": keep_alive_for(self.model, self.keep_alive),
         }
+        if self.num_ctx:
+            kwargs["options"]["num_ctx"] = self.num_ctx
         if tools:
             kwargs["tools"] = tools
-        resp = await self._client.chat(**kwargs)
-        msg = resp.get("message", {}) if isinstance(resp, dict) else getattr(resp, "message", {})
-        content = (msg.get("content") if isinstance(msg, dict) else getattr(msg, "content", "")) or ""
-        raw_calls = (msg.get("tool_calls") if isinstance(msg, dict) else getattr(msg, "tool_calls", None)) or []
+        if on_token is None:
+            resp = await self._client.chat(**kwargs)
+            msg = resp.get("message", {}) if isinstance(resp, dict) else getattr(resp, "message", {})
+            content = (msg.get("content") if isinstance(msg, dict) else getattr(msg, "content", "")) or ""
+            raw_calls = (msg.get("tool_calls") if isinstance(msg, dict) else getattr(msg, "tool_calls", None)) or []
+        else:
+            # Content arrives as deltas; tool calls come in whole chunks and
+            # the final ``done`` chunk carries the usage counters.
+            parts: List[str] = []
+            raw_calls = []
+            resp = None
+            async for chunk in await self._client.chat(**kwargs):
+                msg = _get_value(chunk, "message", None)
+                delta = _get_value(msg, "content", "") or ""
+                if delta:
+                    parts.append(delta)
+                    await on_token(delta)
+                raw_calls.extend(_get_value(msg, "tool_calls", None) or [])
+                resp = chunk
+            content = "".join(parts)
 
         calls: List[ToolCall] = []
         for rc in raw_calls:
@@ -379,6 +494,9 @@ class OllamaToolBackend:
                 continue
             calls.append(ToolCall(id=str(uuid.uuid4()), name=name, arguments=args or {}))
 
+        # The final response carries Ollama's load and prompt-eval timings;
+        # together they are the server-side time to first token.
+        observe_model_timing(self.model, **response_timings(resp))
         usage = _normalise_usage({
             "input_tokens": _get_value(resp, "prompt_eval_count", 0),
             "output_tokens": _get_value(resp, "eval_count", 0),
@@ -414,6 +532,7 @@ class AnthropicBackend:
         effort: str = "medium",
         adaptive_thinking: bool = True,
         strict_tools: bool = True,
+        prompt_cache: bool = True,
     ) -> None:
         import anthropic  # local import
 
@@ -426,6 +545,9 @@ class AnthropicBackend:
         self.effort = _validate_effort(effort)
         self.adaptive_thinking = adaptive_thinking
         self.strict_tools = strict_tools
+        self.prompt_cache = prompt_cache
+        # Tool names of the previous request; see _stable_tool_prefix.
+        self._last_tool_names: Optional[List[str]] = None
 
     async def chat(
         self,
@@ -434,6 +556,7 @@ class AnthropicBackend:
         *,
         continuation: Any = None,
         profile: Optional[str] = None,
+        on_token: Optional[TokenCallback] = None,
     ) -> LLMResponse:
         # Convert OpenAI-style tools → Anthropic tool schema.
         anthropic_tools = []
@@ -466,6 +589,11 @@ class AnthropicBackend:
             kwargs["system"] = "\n\n".join(system_msgs)
         if anthropic_tools:
             kwargs["tools"] = anthropic_tools
+        if self.prompt_cache:
+            names = [t["name"] for t in anthropic_tools]
+            stable = _stable_tool_prefix(self._last_tool_names, names)
+            self._last_tool_names = names
+            _add_anthropic_cache_breakpoints(kwargs, system_msgs, stable_tools=stable)
         if _supports_adaptive_thinking(self.model):
             kwargs["output_config"] = {"effort": self.effort}
             if self.adaptive_thinking:
@@ -473,9 +601,15 @@ class AnthropicBackend:
                 # are still round-tripped for interleaved tool reasoning.
                 kwargs["thinking"] = {"type": "adaptive", "display": "omitted"}
 
-        resp = await self._client.messages.create(
-            **kwargs,
-        )
+        if on_token is None:
+            resp = await self._client.messages.create(
+                **kwargs,
+            )
+        else:
+            async with self._client.messages.stream(**kwargs) as stream:
+                async for text in stream.text_stream:
+                    await on_token(text)
+                resp = await stream.get_final_message()
 
         text_chunks: List[str] = []
         calls: List[ToolCall] = []
@@ -549,6 +683,9 @@ class OpenAIToolBackend:
             default_headers=default_headers or None,
         )
 
+    def estimate_tokens(self, text: str) -> int:
+        return tiktoken_token_count(self.model, text)
+
     async def chat(
         self,
         messages: List[Dict[str, Any]],
@@ -556,6 +693,7 @@ class OpenAIToolBackend:
         *,
         continuation: Any = None,
         profile: Optional[str] = None,
+        on_token: Optional[TokenCallback] = None,
     ) -> LLMResponse:
         kwargs: Dict[str, Any] = {
             "model": self.model,
@@ -565,6 +703,8 @@ class OpenAIToolBackend:
         }
         if tools:
             kwargs["tools"] = tools
+        if on_token is not None:
+            return await self._chat_streaming(kwargs, on_token)
         resp = await self._client.chat.completions.create(**kwargs)
         if not resp.choices:
             return LLMResponse(content="", tool_calls=[], raw=resp)
@@ -575,16 +715,15 @@ class OpenAIToolBackend:
             fn = getattr(tc, "function", None)
             if fn is None:
                 continue
-            args_raw = getattr(fn, "arguments", "") or "{}"
-            try:
-                args = json.loads(args_raw) if isinstance(args_raw, str) else (args_raw or {})
-            except json.JSONDecodeError:
-                args = {"_raw": args_raw}
-            calls.append(ToolCall(id=tc.id, name=fn.name, arguments=args or {}))
+            args = _parse_tool_arguments(getattr(fn, "arguments", "") or "{}")
+            calls.append(ToolCall(id=tc.id, name=fn.name, arguments=args))
         usage_obj = getattr(resp, "usage", None)
         usage = _normalise_usage({
             "input_tokens": _get_value(usage_obj, "prompt_tokens", 0),
             "output_tokens": _get_value(usage_obj, "completion_tokens", 0),
+            "cached_input_tokens": _get_value(
+                _get_value(usage_obj, "prompt_tokens_details", None), "cached_tokens", 0
+            ),
         })
         return LLMResponse(
             content=content,
@@ -594,6 +733,59 @@ class OpenAIToolBackend:
             stop_reason=getattr(resp.choices[0], "finish_reason", None),
         )
 
+    async def _chat_streaming(
+        self,
+        kwargs: Dict[str, Any],
+        on_token: TokenCallback,
+    ) -> LLMResponse:
+        stream = await self._client.chat.completions.create(
+            **kwargs,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        parts: List[str] = []
+        # Tool-call fragments keyed by their index in the final message.
+        pending: Dict[int, Dict[str, str]] = {}
+        finish_reason = None
+        usage_obj = None
+        async for chunk in stream:
+            usage_obj = getattr(chunk, "usage", None) or usage_obj
+            for choice in getattr(chunk, "choices", None) or []:
+                delta = getattr(choice, "delta", None)
+                text = getattr(delta, "content", None)
+                if text:
+                    parts.append(text)
+                    await on_token(text)
+                for tc in getattr(delta, "tool_calls", None) or []:
+                    slot = pending.setdefault(tc.index, {"id": "", "name": "", "arguments": ""})
+                    slot["id"] = getattr(tc, "id", None) or slot["id"]
+                    fn = getattr(tc, "function", None)
+                    slot["name"] += getattr(fn, "name", None) or ""
+                    slot["arguments"] += getattr(fn, "arguments", None) or ""
+                finish_reason = getattr(choice, "finish_reason", None) or finish_reason
+        calls = [
+            ToolCall(
+                id=slot["id"] or str(uuid.uuid4()),
+                name=slot["name"],
+                arguments=_parse_tool_arguments(slot["arguments"] or "{}"),
+            )
+            for _, slot in sorted(pending.items())
+            if slot["name"]
+        ]
+        usage = _normalise_usage({
+            "input_tokens": _get_value(usage_obj, "prompt_tokens", 0),
+            "output_tokens": _get_value(usage_obj, "completion_tokens", 0),
+            "cached_input_tokens": _get_value(
+                _get_value(usage_obj, "prompt_tokens_details", None), "cached_tokens", 0
+            ),
+        })
+        return LLMResponse(
+            content="".join(parts).strip(),
+            tool_calls=calls,
+            usage=usage,
+            stop_reason=finish_reason,
+        )
+
 
 class GitHubModelsBackend(OpenAIToolBackend):
     """GitHub Models tool-calling backend.
@@ -660,6 +852,9 @@ class OpenAIResponsesBackend:
             base_url=base_url or os.getenv("OPENAI_BASE_URL") or None,
         )
 
+    def estimate_tokens(self, text: str) -> int:
+        return tiktoken_token_count(self.model, text)
+
     async def chat(
         self,
         messages: List[Dict[str, Any]],
@@ -667,6 +862,7 @@ class OpenAIResponsesBackend:
         *,
         continuation: Any = None,
         profile: Optional[str] = None,
+        on_token: Optional[TokenCallback] = None,
     ) -> LLMResponse:
         state = continuation if isinstance(continuation, Mapping) else {}
         consumed = int(state.get("consumed_messages", 0) or 0)
@@ -714,21 +910,33 @@ class OpenAIResponsesBackend:
         if not self.store:
             kwargs["include"] = ["reasoning.encrypted_content"]
 
-        resp = await self._client.responses.create(**kwargs)
+        if on_token is None:
+            resp = await self._client.responses.create(**kwargs)
+        else:
+            resp = None
+            stream = await self._client.responses.create(**kwargs, stream=True)
+            async for event in stream:
+                event_type = _get_value(event, "type", None)
+                if event_type == "response.output_text.delta":
+                    delta = _get_value(event, "delta", "") or ""
+                    if delta:
+                        await on_token(delta)
+                elif event_type in ("response.completed", "response.incomplete"):
+                    resp = _get_value(event, "response", None)
+                elif event_type in ("response.failed", "error"):
+                    raise RuntimeError(f"OpenAI response stream failed: {_model_dump(event)}")
+            if resp is None:
+                raise RuntimeError("OpenAI response stream ended without a final response")
         calls: List[ToolCall] = []
         text_chunks: List[str] = []
         for item in getattr(resp, "output", []) or []:
             item_type = _get_value(item, "type", None)
             if item_type == "function_call":
-                args_raw = _get_value(item, "arguments", "{}") or "{}"
-                try:
-                    args = json.loads(args_raw) if isinstance(args_raw, str) else dict(args_raw)
-                except (json.JSONDecodeError, TypeError, ValueError):
-                    args = {"_raw": args_raw}
+                args = _parse_tool_arguments(_get_value(item, "arguments", "{}") or "{}")
                 calls.append(ToolCall(
                     id=str(_get_value(item, "call_id", None) or _get_value(item, "id", None) or uuid.uuid4()),
                     name=str(_get_value(item, "name", "")),
-                    arguments=args or {},
+                    arguments=args,
                 ))
             elif item_type == "message":
                 for block in _get_value(item, "content", []) or []:
@@ -933,7 +1141,12 @@ SemanticsResolver = Callable[[Dict[str, Any]], ToolSemantics]
 
 @dataclass
 class ToolRoute:
-    """Maps a tool name to (provider_label, executor)."""
+    """Maps a tool name to (provider_label, executor).
+
+    Everything that depends only on the registration is compiled once:
+    the JSON-schema check for the arguments and how the custom validator
+    takes its execution context.
+    """
 
     provider: str
     base_name: str
@@ -941,6 +1154,8 @@ class ToolRoute:
     executor: ToolExecutor
     semantics_resolver: SemanticsResolver
     validator: Optional[ToolValidator] = None
+    argument_errors: Optional[Callable[[Dict[str, Any]], List[Dict[str, str]]]] = None
+    validator_convention: str = "none"
 
 
 class ToolRegistry:
@@ -997,21 +1212,30 @@ class ToolRegistry:
                 executor=self._wrap_executor(base, executor),
                 semantics_resolver=route_semantics,
                 validator=validator,
+                argument_errors=_compile_argument_check(name, parameters),
+                validator_convention=(
+                    _context_convention(validator) if validator is not None else "none"
+                ),
             )
 
     @staticmethod
     def _wrap_executor(base_name: str, executor: ToolExecutor) -> ToolExecutor:
+        convention = _context_convention(executor)
+
         async def _call(
             _name: str,
             args: Dict[str, Any],
             context: Optional[ToolExecutionContext] = None,
         ) -> Any:
-            result = _invoke_with_optional_context(executor, base_name, args, context)
+            result = _invoke_with_convention(executor, convention, base_name, args, context)
             return await result if inspect.isawaitable(result) else result
         return _call
 
     def schemas(self) -> List[Dict[str, Any]]:
-        return [r.schema for r in self._routes.values()]
+        # Sorted so the tool block of the prompt is byte-identical across
+        # runs regardless of registration or MCP discovery order; provider
+        # prompt caches key on that prefix.
+        return [self._routes[name].schema for name in sorted(self._routes)]
 
     def names(self) -> List[str]:
         return list(self._routes.keys())
@@ -1042,32 +1266,20 @@ class ToolRegistry:
                 retryable=False,
             )
 
-        parameters = (route.schema.get("function") or {}).get("parameters") or {}
-        if Draft202012Validator is not None and parameters:
-            try:
-                errors = sorted(
-                    Draft202012Validator(parameters).iter_errors(arguments),
-                    key=lambda e: list(e.absolute_path),
-                )
-            except Exception as exc:
-                logger.warning("Invalid JSON schema for tool %s: %s", name, exc)
-                errors = []
-            if errors:
-                details = []
-                for err in errors[:5]:
-                    path = ".".join(str(part) for part in err.absolute_path) or "$"
-                    details.append({"path": path, "message": err.message})
-                return _tool_error(
-                    "invalid_arguments",
-                    f"Tool arguments failed schema validation for {name}.",
-                    retryable=False,
-                    details=details,
-                )
+        details = route.argument_errors(arguments) if route.argument_errors else []
+        if details:
+            return _tool_error(
+                "invalid_arguments",
+                f"Tool arguments failed schema validation for {name}.",
+                retryable=False,
+                details=details,
+            )
 
         if route.validator is not None:
             try:
-                validation = _invoke_with_optional_context(
+                validation = _invoke_with_convention(
                     route.validator,
+                    route.validator_convention,
                     route.base_name,
                     arguments,
                     context,
@@ -1099,7 +1311,7 @@ class ToolRegistry:
         semantics = self.semantics(name, arguments)
         try:
             result = await asyncio.wait_for(
-                _invoke_executor(route.executor, name, arguments, context),
+                route.executor(name, arguments, context),
                 timeout=max(0.1, semantics.timeout_seconds),
             )
             return _normalise_tool_result(result)
@@ -1144,7 +1356,15 @@ class ReasoningHarness:
         max_repeated_tool_calls: int = 2,
         max_consecutive_tool_error_turns: int = 3,
         max_tool_result_chars: int = 12000,
+        tabular_results: bool = True,
         max_context_chars: int = 250000,
+        max_context_tokens: Optional[int] = None,
+        token_estimator: Optional[TokenEstimator] = None,
+        compact_context: bool = True,
+        compact_keep_turns: int = 2,
+        compact_result_chars: int = 600,
+        shared_cache: Optional[Any] = None,
+        tool_selector: Optional[Any] = None,
         on_event: Optional[EventCallback] = None,
         tool_call_interceptor: Optional[Any] = None,
     ) -> None:
@@ -1160,7 +1380,26 @@ class ReasoningHarness:
         self.max_repeated_tool_calls = max(1, int(max_repeated_tool_calls))
         self.max_consecutive_tool_error_turns = max(1, int(max_consecutive_tool_error_turns))
         self.max_tool_result_chars = max(1000, int(max_tool_result_chars))
+        # Lists of like records reach the model as ``{"_table": ...}``
+        # header-plus-rows text instead of repeating every key per record.
+        self.tabular_results = bool(tabular_results)
         self.max_context_chars = max(10000, int(max_context_chars))
+        self.max_context_tokens = (
+            max(2500, int(max_context_tokens)) if max_context_tokens else None
+        )
+        # Explicit estimator, else the backend's own tokenizer, else ~4 chars/token.
+        self.token_estimator = token_estimator
+        # Over budget, tool results older than the last ``compact_keep_turns``
+        # assistant turns are replaced by digests before the run gives up.
+        self.compact_context = bool(compact_context)
+        self.compact_keep_turns = max(1, int(compact_keep_turns))
+        self.compact_result_chars = max(200, int(compact_result_chars))
+        # Optional cross-run read cache (:class:`tool_cache.SharedReadCache`)
+        # consulted for tools whose semantics set ``shared_cache``.
+        self.shared_cache = shared_cache
+        # Optional ``select(goal, schemas)`` (:class:`tool_selector.ToolSelector`)
+        # that prunes the tool block per run; calls outside it widen to all.
+        self.tool_selector = tool_selector
         self.on_event = on_event
         # Optional dry-run interceptor with ``async call(name, args)``
         # and ``set_iteration(int)`` (see :mod:`plan_executor`).
@@ -1177,6 +1416,9 @@ class ReasoningHarness:
         system_prompt: Optional[str] = None,
         on_event: Optional[EventCallback] = None,
         tool_call_interceptor: Optional[Any] = None,
+        stream_tokens: bool = False,
+        system_context: Optional[str] = None,
+        checkpoint: Optional[Callable[[], Awaitable[float]]] = None,
     ) -> HarnessResult:
         started = time.monotonic()
         selected_profile = resolve_reasoning_profile(profile) if profile else None
@@ -1212,12 +1454,22 @@ class ReasoningHarness:
         )
         user_payload = goal.strip()
         if context:
-            user_payload += "\n\nContext:\n" + json.dumps(context, indent=2, default=str)
+            user_payload += "\n\nContext:\n" + json.dumps(
+                context, indent=2, default=str, sort_keys=True
+            )
 
+        # The fixed prompt leads and per-run material (``system_context``)
+        # follows in its own message, so the cacheable prefix is shared
+        # across runs.
         messages: List[Dict[str, Any]] = [
             {"role": "system", "content": system_prompt or self.system_prompt},
-            {"role": "user", "content": user_payload},
         ]
+        if system_context:
+            messages.append({"role": "system", "content": system_context})
+        messages.append({"role": "user", "content": user_payload})
+        context_meter = ContextMeter(self._token_estimator())
+        context_meter.extend(messages)
+        compaction_levels: Dict[int, int] = {}
         trace: List[HarnessStep] = []
         total_tool_calls = 0
         requested_tool_calls = 0
@@ -1231,12 +1483,43 @@ class ReasoningHarness:
         successful_results: Dict[str, Dict[str, Any]] = {}
         read_cache: Dict[str, Dict[str, Any]] = {}
         consecutive_tool_error_turns = 0
-        schemas = self.tools.schemas()
+        all_schemas = self.tools.schemas()
+        schemas = all_schemas
+        if self.tool_selector is not None:
+            schemas = self.tool_selector.select(goal, all_schemas)
+        offered_tools = {s["function"]["name"] for s in schemas}
+        schema_tokens_saved = 0
+        if len(schemas) < len(all_schemas):
+            estimate = self._token_estimator()
+            schema_tokens_saved = max(0, (
+                estimate(json.dumps(all_schemas, ensure_ascii=False))
+                - estimate(json.dumps(schemas, ensure_ascii=False))
+            ))
+            await self._emit({
+                "type": "tool_selection",
+                "run_id": run_id,
+                "offered": sorted(offered_tools),
+                "total": len(all_schemas),
+                "tokens_saved_per_call": schema_tokens_saved,
+            }, event_callback)
         execution_context = ToolExecutionContext(run_id=run_id, mode=mode)
 
+        # Time spent parked by ``checkpoint`` (a scheduler yielding this
+        # run's slot) does not count against the wall-clock budget.
+        paused_seconds = 0.0
         for iteration in range(1, effective_max_iterations + 1):
+            if checkpoint is not None and iteration > 1:
+                paused = await checkpoint()
+                if paused:
+                    paused_seconds += paused
+                    await self._emit({
+                        "type": "paused",
+                        "run_id": run_id,
+                        "iteration": iteration,
+                        "paused_ms": int(paused * 1000),
+                    }, event_callback)
             step_started = time.monotonic()
-            elapsed = time.monotonic() - started
+            elapsed = time.monotonic() - started - paused_seconds
             if elapsed >= effective_max_run_seconds:
                 return self._build_result(
                     answer="The reasoning run reached its wall-clock budget before completion.",
@@ -1254,7 +1537,35 @@ class ReasoningHarness:
                     profile=selected_profile.name if selected_profile else None,
                     usage=usage,
                 )
-            if _estimate_messages_chars(messages) > self.max_context_chars:
+            if self._context_exhausted(context_meter) and self.compact_context and continuation is None:
+                # Backends with a continuation hold their own copy of the
+                # history, so only stateless transcripts are compacted.
+                # Digest old results first; strip digests to their status
+                # only if that is still not enough.
+                compacted = 0
+                for level, max_chars in ((1, self.compact_result_chars), (2, 0)):
+                    if not self._context_exhausted(context_meter):
+                        break
+                    changed = _compact_history(
+                        messages,
+                        compaction_levels,
+                        keep_turns=self.compact_keep_turns,
+                        max_chars=max_chars,
+                        level=level,
+                    )
+                    if changed:
+                        compacted += changed
+                        context_meter = ContextMeter(context_meter.estimate_tokens)
+                        context_meter.extend(messages)
+                if compacted:
+                    await self._emit({
+                        "type": "compaction",
+                        "run_id": run_id,
+                        "iteration": iteration,
+                        "messages": compacted,
+                        "context": {"chars": context_meter.chars, "tokens": context_meter.tokens},
+                    }, event_callback)
+            if self._context_exhausted(context_meter):
                 return self._build_result(
                     answer=(
                         "The reasoning run reached its context budget. Narrow the goal "
@@ -1280,6 +1591,15 @@ class ReasoningHarness:
                     interceptor.set_iteration(iteration)
                 except Exception:
                     pass
+            on_token: Optional[TokenCallback] = None
+            if stream_tokens and event_callback is not None:
+                async def on_token(delta: str, _iteration: int = iteration) -> None:
+                    await self._emit({
+                        "type": "token",
+                        "run_id": run_id,
+                        "iteration": _iteration,
+                        "delta": delta,
+                    }, event_callback)
             try:
                 remaining = max(0.1, effective_max_run_seconds - elapsed)
                 response = await asyncio.wait_for(
@@ -1288,6 +1608,7 @@ class ReasoningHarness:
                         schemas,
                         continuation,
                         selected_profile.name if selected_profile else None,
+                        on_token=on_token,
                     ),
                     timeout=min(effective_llm_timeout_seconds, remaining),
                 )
@@ -1336,6 +1657,8 @@ class ReasoningHarness:
 
             continuation = response.continuation
             _merge_usage(usage, response.usage)
+            if schema_tokens_saved:
+                _merge_usage(usage, {"tool_schema_tokens_saved": schema_tokens_saved})
             await self._emit({
                 "type": "thought",
                 "run_id": run_id,
@@ -1343,6 +1666,7 @@ class ReasoningHarness:
                 "profile": selected_profile.name if selected_profile else None,
                 "content": response.content,
                 "usage": response.usage,
+                "context": {"chars": context_meter.chars, "tokens": context_meter.tokens},
             }, event_callback)
 
             if response.is_final:
@@ -1370,6 +1694,21 @@ class ReasoningHarness:
 
             all_calls = response.tool_calls
             requested_tool_calls += len(all_calls)
+            unoffered = sorted({c.name for c in all_calls} - offered_tools)
+            if unoffered and len(schemas) < len(all_schemas):
+                # The model reached for a tool outside the pruned set: offer
+                # everything from the next turn on.
+                schemas = self.tool_selector.order(all_schemas)
+                offered_tools = {s["function"]["name"] for s in schemas}
+                schema_tokens_saved = 0
+                await self._emit({
+                    "type": "tool_selection",
+                    "run_id": run_id,
+                    "iteration": iteration,
+                    "widened": True,
+                    "requested": unoffered,
+                    "total": len(all_schemas),
+                }, event_callback)
             remaining_tool_budget = max(0, effective_max_total_tool_calls - total_tool_calls)
             accepted_count = min(
                 len(all_calls),
@@ -1399,6 +1738,7 @@ class ReasoningHarness:
             if response.provider_payload is not None:
                 assistant_message["provider_payload"] = response.provider_payload
             messages.append(assistant_message)
+            context_meter.add(assistant_message)
 
             results = await self._execute_batch(
                 calls,
@@ -1433,12 +1773,16 @@ class ReasoningHarness:
                 if bool((result.get("_harness") or {}).get("cached")):
                     cached_tool_calls += 1
                 # Tool result message back to the model.
-                messages.append({
+                tool_message = {
                     "role": "tool",
                     "tool_call_id": call.id,
                     "name": call.name,
-                    "content": _serialise_result(result, self.max_tool_result_chars),
-                })
+                    "content": _serialise_result(
+                        result, self.max_tool_result_chars, tabular=self.tabular_results,
+                    ),
+                }
+                messages.append(tool_message)
+                context_meter.add(tool_message)
                 await self._emit({
                     "type": "tool_call",
                     "run_id": run_id,
@@ -1499,18 +1843,33 @@ class ReasoningHarness:
             usage=usage,
         )
 
+    def _token_estimator(self) -> TokenEstimator:
+        if self.token_estimator is not None:
+            return self.token_estimator
+        estimate = getattr(self.llm, "estimate_tokens", None)
+        return estimate if callable(estimate) else approx_token_count
+
+    def _context_exhausted(self, meter: ContextMeter) -> bool:
+        if meter.chars > self.max_context_chars:
+            return True
+        return self.max_context_tokens is not None and meter.tokens > self.max_context_tokens
+
     async def _call_llm(
         self,
         messages: List[Dict[str, Any]],
         schemas: List[Dict[str, Any]],
         continuation: Any,
         profile: Optional[str],
+        *,
+        on_token: Optional[TokenCallback] = None,
     ) -> LLMResponse:
         kwargs: Dict[str, Any] = {}
         if _accepts_keyword(self.llm.chat, "continuation"):
             kwargs["continuation"] = continuation
         if profile and _accepts_keyword(self.llm.chat, "profile"):
             kwargs["profile"] = profile
+        if on_token is not None and _accepts_keyword(self.llm.chat, "on_token"):
+            kwargs["on_token"] = on_token
         if kwargs:
             return await self.llm.chat(messages, schemas, **kwargs)
         # Compatibility for small scripted test/custom backends written against
@@ -1530,7 +1889,11 @@ class ReasoningHarness:
         if not calls:
             return []
         semantics = [self.tools.semantics(c.name, c.arguments) for c in calls]
-        can_parallelise = all(s.read_only and s.parallel_safe for s in semantics)
+        # Simulated mutations are instant and the dry-run interceptor numbers
+        # intents in arrival order, so they are never grouped.
+        stages = _plan_batch_stages(
+            calls, semantics, group_mutations=interceptor is None,
+        )
 
         async def execute(call: ToolCall) -> Dict[str, Any]:
             return await self._execute_one(
@@ -1542,34 +1905,33 @@ class ReasoningHarness:
                 read_cache=read_cache,
             )
 
-        if not can_parallelise:
-            # Any mutation makes the entire batch ordered. This preserves model
-            # call order and prevents read/write races against Home Assistant.
-            return [await execute(call) for call in calls]
-
         semaphore = asyncio.Semaphore(self.max_parallel_tools)
 
         async def limited(call: ToolCall) -> Dict[str, Any]:
             async with semaphore:
                 return await execute(call)
 
-        gathered = await asyncio.gather(
-            *(limited(call) for call in calls),
-            return_exceptions=True,
-        )
-        out: List[Dict[str, Any]] = []
-        for call, result in zip(calls, gathered):
-            if isinstance(result, asyncio.CancelledError):
-                raise result
-            if isinstance(result, BaseException):
-                out.append(_tool_error(
-                    "execution_error",
-                    f"{type(result).__name__}: {result}",
-                    retryable=False,
-                ))
-            else:
-                out.append(_normalise_tool_result(result))
-        return out
+        out: List[Optional[Dict[str, Any]]] = [None] * len(calls)
+        for stage in stages:
+            if len(stage) == 1:
+                out[stage[0]] = await execute(calls[stage[0]])
+                continue
+            gathered = await asyncio.gather(
+                *(limited(calls[index]) for index in stage),
+                return_exceptions=True,
+            )
+            for index, result in zip(stage, gathered):
+                if isinstance(result, asyncio.CancelledError):
+                    raise result
+                if isinstance(result, BaseException):
+                    out[index] = _tool_error(
+                        "execution_error",
+                        f"{type(result).__name__}: {result}",
+                        retryable=False,
+                    )
+                else:
+                    out[index] = _normalise_tool_result(result)
+        return [result for result in out if result is not None]
 
     async def _execute_one(
         self,
@@ -1587,6 +1949,16 @@ class ReasoningHarness:
 
         if semantics.read_only and fingerprint in read_cache:
             return _with_harness_meta(read_cache[fingerprint], cached=True, attempts=0)
+        # Read-only calls pass straight through dry-run interceptors, so the
+        # shared cache serves them in every mode.
+        shared = self.shared_cache
+        shared_generation = 0
+        if shared is not None and semantics.read_only and semantics.shared_cache:
+            hit = shared.get(fingerprint)
+            if hit is not None:
+                read_cache[fingerprint] = copy.deepcopy(hit)
+                return _with_harness_meta(hit, cached=True, shared_cache=True, attempts=0)
+            shared_generation = shared.generation
         if fingerprint in successful_results:
             previous = successful_results[fingerprint]
             if semantics.idempotent:
@@ -1653,9 +2025,14 @@ class ReasoningHarness:
             successful_results[fingerprint] = copy.deepcopy(result)
             if semantics.read_only:
                 read_cache[fingerprint] = copy.deepcopy(result)
+                if shared is not None and semantics.shared_cache:
+                    shared.put(fingerprint, result, call.arguments, generation=shared_generation)
             else:
                 # A mutation may invalidate every state observation made so far.
                 read_cache.clear()
+                if shared is not None and interceptor is None:
+                    # Simulated (dry-run) mutations change nothing.
+                    shared.clear("mutation")
         return result
 
     @staticmethod
@@ -1708,12 +2085,14 @@ class ReasoningHarness:
             logger.debug("on_event callback failed: %s", exc)
 
 
-def _serialise_result(result: Any, max_chars: int = 12000) -> str:
+def _serialise_result(result: Any, max_chars: int = 12000, *, tabular: bool = True) -> str:
     """Serialize a result as valid JSON, compacting rather than slicing it.
 
     Raw string slicing can produce invalid JSON and hide that data was lost.
     The compact envelope preserves success/error fields, reports the original
-    size, and includes a recursively-trimmed high-signal prefix.
+    size, and includes a recursively-trimmed high-signal prefix. With
+    ``tabular``, lists of like records are encoded by :func:`_tabulate`
+    after any trimming.
     """
     normalised = _normalise_tool_result(result)
     try:
@@ -1721,23 +2100,29 @@ def _serialise_result(result: Any, max_chars: int = 12000) -> str:
     except (TypeError, ValueError):
         normalised = {"ok": True, "result": str(result)}
         raw = json.dumps(normalised, ensure_ascii=False, separators=(",", ":"))
-    if len(raw) <= max_chars:
-        return raw
 
-    compacted = _compact_json_value(normalised, max_items=20, max_string=1200, depth=0)
+    def encode(value: Any) -> str:
+        if tabular:
+            value = _tabulate(value)
+        return json.dumps(value, default=str, ensure_ascii=False, separators=(",", ":"))
+
+    encoded = encode(normalised) if tabular else raw
+    if len(encoded) <= max_chars:
+        return encoded
+
     envelope = {
         "ok": _result_ok(normalised),
         "truncated": True,
         "original_chars": len(raw),
         "note": "Tool result compacted by the harness; narrow the query or paginate for full data.",
-        "data": compacted,
+        "data": _compact_json_value(normalised, max_items=20, max_string=1200, depth=0),
     }
-    encoded = json.dumps(envelope, default=str, ensure_ascii=False, separators=(",", ":"))
+    encoded = encode(envelope)
     while len(encoded) > max_chars and envelope["data"]:
         envelope["data"] = _compact_json_value(
             envelope["data"], max_items=8, max_string=400, depth=0
         )
-        encoded = json.dumps(envelope, default=str, ensure_ascii=False, separators=(",", ":"))
+        encoded = encode(envelope)
         if len(encoded) > max_chars:
             envelope["data"] = {"summary": str(envelope["data"])[: max(100, max_chars // 3)]}
             encoded = json.dumps(envelope, ensure_ascii=False, separators=(",", ":"))
@@ -1745,6 +2130,152 @@ def _serialise_result(result: Any, max_chars: int = 12000) -> str:
     return encoded
 
 
+def _digest_tool_content(content: str, max_chars: int) -> str:
+    """Replace a serialised tool result with a small JSON digest.
+
+    Keeps the success/error fields and the shape of the data (leading
+    keys and items, omitted counts) so the model can still cite what it
+    saw, and re-run the tool if it needs the detail.
+    """
+    try:
+        parsed = json.loads(content)
+    except (json.JSONDecodeError, TypeError):
+        parsed = {"result": content}
+    normalised = _normalise_tool_result(parsed)
+    digest: Dict[str, Any] = {
+        "ok": _result_ok(normalised),
+        "compacted": True,
+        "original_chars": (
+            normalised.get("original_chars", len(content))
+            if normalised.get("compacted") else len(content)
+        ),
+    }
+    for key in ("error", "error_code"):
+        if key in normalised:
+            digest[key] = str(normalised[key])[:200]
+    wrapped = normalised.get("truncated") or normalised.get("compacted")
+    data = normalised.get("data") if wrapped else normalised
+    # Tables are trimmed by rows, like the lists they stand for.
+    tabular = '"_table"' in content
+    if tabular:
+        data = expand_tables(data)
+    for max_items, max_string in ((6, 120), (3, 40), (0, 0)):
+        if max_items:
+            digest["data"] = _compact_json_value(
+                data, max_items=max_items, max_string=max_string, depth=0
+            )
+            if tabular:
+                digest["data"] = _tabulate(digest["data"])
+        else:
+            digest.pop("data", None)
+        encoded = json.dumps(digest, default=str, ensure_ascii=False, separators=(",", ":"))
+        if len(encoded) <= max_chars:
+            break
+    return encoded
+
+
+def _compact_history(
+    messages: List[Dict[str, Any]],
+    levels: Dict[int, int],
+    *,
+    keep_turns: int,
+    max_chars: int,
+    level: int = 1,
+) -> int:
+    """Digest tool results older than the last ``keep_turns`` assistant turns.
+
+    Only tool message ``content`` changes; roles, ``tool_call_id`` values,
+    assistant calls and provider payloads stay as they were, so provider
+    call/result pairing is preserved. ``levels`` maps message indices to
+    the compaction level already applied. Returns the number of messages
+    changed.
+    """
+    turns = [i for i, message in enumerate(messages) if message.get("role") == "assistant"]
+    if len(turns) <= keep_turns:
+        return 0
+    cutoff = turns[-keep_turns]
+    changed = 0
+    for index in range(cutoff):
+        message = messages[index]
+        if levels.get(index, 0) >= level or message.get("role") != "tool":
+            continue
+        levels[index] = level
+        content = str(message.get("content") or "")
+        digest = _digest_tool_content(content, max_chars)
+        if len(digest) < len(content):
+            messages[index] = {**message, "content": digest}
+            changed += 1
+    return changed
+
+
+_EPHEMERAL_CACHE = {"type": "ephemeral"}
+
+
+def _stable_tool_prefix(previous: Optional[List[str]], names: List[str]) -> int:
+    """How many leading tools to cache: all of them while the selection is
+    unchanged, otherwise only the part shared with the previous request.
+
+    A goal-aware selector puts its always-on core first, so across runs
+    with different selections the shared part is the core tools.
+    """
+    if previous is None or previous == names:
+        return len(names)
+    shared = 0
+    for before, now in zip(previous, names):
+        if before != now:
+            break
+        shared += 1
+    return shared
+
+
+def _add_anthropic_cache_breakpoints(
+    kwargs: Dict[str, Any],
+    system_msgs: List[str],
+    *,
+    stable_tools: Optional[int] = None,
+) -> None:
+    """Mark the stable request prefix for Claude prompt caching.
+
+    Three breakpoints (of the four allowed): the last of the
+    ``stable_tools`` leading tools (default: every tool), the first system
+    block (the agent's fixed prompt; later system messages such as
+    recalled episodes vary per run), and the last block of the newest
+    message so each turn reads the previous turn's prefix from cache.
+    Prefixes below the model's minimum cacheable length are simply not
+    cached.
+    """
+    tools = kwargs.get("tools")
+    if tools:
+        stable = len(tools) if stable_tools is None else min(stable_tools, len(tools))
+        if stable:
+            tools[stable - 1] = {**tools[stable - 1], "cache_control": dict(_EPHEMERAL_CACHE)}
+    if system_msgs:
+        blocks: List[Dict[str, Any]] = [
+            {"type": "text", "text": str(text)} for text in system_msgs if text
+        ]
+        if blocks:
+            blocks[0]["cache_control"] = dict(_EPHEMERAL_CACHE)
+            kwargs["system"] = blocks
+    convo = kwargs.get("messages") or []
+    if not convo:
+        return
+    last = dict(convo[-1])
+    content = last.get("content")
+    if isinstance(content, str):
+        if not content:
+            return
+        content = [{"type": "text", "text": content}]
+    elif isinstance(content, list) and content:
+        content = [dict(block) for block in content]
+    else:
+        return
+    if content[-1].get("type") in ("thinking", "redacted_thinking"):
+        return
+    content[-1]["cache_control"] = dict(_EPHEMERAL_CACHE)
+    last["content"] = content
+    convo[-1] = last
+
+
 def _to_anthropic_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
     """Convert the harness's OpenAI-style history to Claude content blocks."""
     out: List[Dict[str, Any]] = []
@@ -1875,6 +2406,16 @@ def _get_value(value: Any, key: str, default: Any = None) -> Any:
     return getattr(value, key, default)
 
 
+def _parse_tool_arguments(args_raw: Any) -> Dict[str, Any]:
+    try:
+        args = json.loads(args_raw) if isinstance(args_raw, str) else dict(args_raw)
+    except (json.JSONDecodeError, TypeError, ValueError):
+        return {"_raw": args_raw}
+    if not args:
+        return {}
+    return args if isinstance(args, dict) else {"_raw": args_raw}
+
+
 def _normalise_usage(usage: Mapping[str, Any]) -> Dict[str, int]:
     out: Dict[str, int] = {}
     for key, value in usage.items():
@@ -1958,6 +2499,79 @@ def _serialised_result_is_error(content: str) -> bool:
     return not _result_ok(parsed)
 
 
+# Target keys that address an unbounded set of entities.
+_UNBOUNDED_TARGET_KEYS = ("area_id", "device_id", "floor_id", "label_id")
+
+
+def _mutation_targets(arguments: Dict[str, Any]) -> Optional[FrozenSet[str]]:
+    """Entity ids a mutation touches, or ``None`` when they cannot be bounded.
+
+    Looks at ``entity_id`` at the top level and under ``target``, ``data``
+    and ``service_data``. Area/device/label targets, ``all`` and calls
+    with no entity at all are unbounded.
+    """
+    entity_ids: Set[str] = set()
+    for scope in (arguments, *(arguments.get(k) for k in ("target", "data", "service_data"))):
+        if not isinstance(scope, dict):
+            continue
+        if any(scope.get(key) for key in _UNBOUNDED_TARGET_KEYS):
+            return None
+        value = scope.get("entity_id")
+        values = [value] if isinstance(value, str) else value
+        if values is None:
+            continue
+        if not isinstance(values, (list, tuple)):
+            return None
+        for item in values:
+            if not isinstance(item, str) or not item or item == "all":
+                return None
+            entity_ids.update(part.strip() for part in item.split(",") if part.strip())
+    return frozenset(entity_ids) or None
+
+
+def _plan_batch_stages(
+    calls: List[ToolCall],
+    semantics: List[ToolSemantics],
+    *,
+    group_mutations: bool = True,
+) -> List[List[int]]:
+    """Split one assistant turn's tool calls into ordered stages.
+
+    Consecutive read-only, parallel-safe calls share a stage. Mutations are
+    barriers between read stages; consecutive parallel-safe mutations share
+    a stage only while their target entities are known and disjoint.
+    Everything else runs alone. Stages run in order and call indices are
+    kept, so results reach the model in the order it asked for them.
+    """
+    stages: List[List[int]] = []
+    kind = ""
+    touched: Set[str] = set()
+    for index, (call, sem) in enumerate(zip(calls, semantics)):
+        if sem.read_only and sem.parallel_safe:
+            if kind == "read":
+                stages[-1].append(index)
+            else:
+                stages.append([index])
+                kind = "read"
+            continue
+        targets = (
+            _mutation_targets(call.arguments)
+            if group_mutations and not sem.read_only and sem.parallel_safe
+            else None
+        )
+        if targets is None:
+            stages.append([index])
+            kind = ""
+        elif kind == "write" and touched.isdisjoint(targets):
+            stages[-1].append(index)
+            touched |= targets
+        else:
+            stages.append([index])
+            kind = "write"
+            touched = set(targets)
+    return stages
+
+
 def _tool_call_fingerprint(name: str, arguments: Dict[str, Any]) -> str:
     canonical = json.dumps(
         {"name": name, "arguments": arguments},
@@ -1968,13 +2582,6 @@ def _tool_call_fingerprint(name: str, arguments: Dict[str, Any]) -> str:
     return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
 
 
-def _estimate_messages_chars(messages: List[Dict[str, Any]]) -> int:
-    try:
-        return len(json.dumps(messages, default=str, ensure_ascii=False))
-    except (TypeError, ValueError):
-        return sum(len(str(message)) for message in messages)
-
-
 def _compact_json_value(
     value: Any,
     *,
@@ -2016,50 +2623,322 @@ def _compact_json_value(
     return value
 
 
-def _accepts_keyword(callable_obj: Callable[..., Any], keyword: str) -> bool:
+# ``_tabulate`` only rewrites lists of at least this many records whose keys
+# are mostly shared, and only when the table is shorter than the JSON.
+_TABLE_MIN_ROWS = 2
+_TABLE_MAX_COLUMNS = 32
+_TABLE_MIN_FILL = 0.75
+_CELL_ESCAPES = str.maketrans({"\\": "\\\\", "|": "\\|", "\n": "\\n", "\r": "\\r"})
+_CELL_SPLIT = re.compile(r"(?<!\\)((?:\\\\)*)\|")
+
+
+def _table_cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if not isinstance(value, str):
+        value = json.dumps(value, default=str, ensure_ascii=False, separators=(",", ":"))
+    return value.translate(_CELL_ESCAPES)
+
+
+def _table_columns(records: List[Any]) -> Optional[List[str]]:
+    if len(records) < _TABLE_MIN_ROWS or not all(isinstance(r, dict) and r for r in records):
+        return None
+    columns: Dict[str, None] = {}
+    filled = 0
+    for record in records:
+        for key in record:
+            if not isinstance(key, str):
+                return None
+            columns.setdefault(key)
+        filled += len(record)
+    if len(columns) > _TABLE_MAX_COLUMNS or filled < _TABLE_MIN_FILL * len(columns) * len(records):
+        return None
+    return list(columns)
+
+
+def _tabulate(value: Any) -> Any:
+    """``value`` with every list of like records rewritten as a table.
+
+    A table is ``{"_table": "col|col\\nval|val\\n…"}``: the first line
+    names the columns and each further line is one record. Inside a cell
+    ``\\|``, ``\\n`` and ``\\\\`` stand for a pipe, a newline and a backslash;
+    an empty cell is a missing or null value; numbers, booleans and nested
+    values appear as compact JSON. A list whose records hold an empty
+    string stays JSON, since that cell would read back as null. The
+    ``{"_omitted_items": n}`` marker left by :func:`_compact_json_value`
+    becomes a key of the table.
+    """
+    if isinstance(value, dict):
+        return {key: _tabulate(item) for key, item in value.items()}
+    if not isinstance(value, (list, tuple)):
+        return value
+    records = list(value)
+    omitted = None
+    if records and isinstance(records[-1], dict) and list(records[-1]) == ["_omitted_items"]:
+        omitted = records.pop()["_omitted_items"]
+    columns = _table_columns(records)
+    if columns is None or any("" in record.values() for record in records):
+        return [_tabulate(item) for item in value]
+    lines = ["|".join(_table_cell(c) for c in columns)]
+    lines.extend(
+        "|".join(_table_cell(record.get(c)) for c in columns) for record in records
+    )
+    table: Dict[str, Any] = {"_table": "\n".join(lines)}
+    if omitted is not None:
+        table["_omitted_items"] = omitted
+    plain = [_tabulate(item) for item in value]
+    dumps = functools.partial(json.dumps, default=str, ensure_ascii=False, separators=(",", ":"))
+    return table if len(dumps(table)) < len(dumps(plain)) else plain
+
+
+def expand_tables(value: Any) -> Any:
+    """Inverse of :func:`_tabulate`, for readers of serialised results.
+
+    Cells come back as strings (empty cells as ``None``).
+    """
+    if isinstance(value, list):
+        return [expand_tables(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if isinstance(value.get("_table"), str) and set(value) <= {"_table", "_omitted_items"}:
+        header, *rows = value["_table"].split("\n")
+        columns = _split_cells(header)
+        records: List[Any] = [
+            {c: (cell if cell != "" else None) for c, cell in zip(columns, _split_cells(row))}
+            for row in rows
+        ]
+        if "_omitted_items" in value:
+            records.append({"_omitted_items": value["_omitted_items"]})
+        return records
+    return {key: expand_tables(item) for key, item in value.items()}
+
+
+def _split_cells(line: str) -> List[str]:
+    cells: List[str] = []
+    start = 0
+    for match in _CELL_SPLIT.finditer(line):
+        cells.append(line[start:match.end() - 1])
+        start = match.end()
+    cells.append(line[start:])
+    return [_unescape_cell(cell) for cell in cells]
+
+
+def _unescape_cell(cell: str) -> str:
+    if "\\" not in cell:
+        return cell
+    return re.sub(r"\\(.)", lambda m: {"n": "\n", "r": "\r"}.get(m.group(1), m.group(1)), cell)
+
+
+_SIGNATURE_CACHE: "weakref.WeakKeyDictionary[Any, Optional[Tuple[inspect.Parameter, ...]]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _read_signature(callable_obj: Callable[..., Any]) -> Optional[Tuple[inspect.Parameter, ...]]:
     try:
-        parameters = inspect.signature(callable_obj).parameters
+        return tuple(inspect.signature(callable_obj).parameters.values())
     except (TypeError, ValueError):
+        return None
+
+
+def _signature_parameters(callable_obj: Callable[..., Any]) -> Optional[Tuple[inspect.Parameter, ...]]:
+    """Parameters of ``callable_obj``, or ``None`` without a signature.
+
+    Bound methods such as ``llm.chat`` or ``interceptor.call`` are probed
+    on every call; their signatures are cached by the underlying function.
+    """
+    func = getattr(callable_obj, "__func__", None)
+    if func is None or getattr(callable_obj, "__self__", None) is None:
+        return _read_signature(callable_obj)
+    try:
+        return _SIGNATURE_CACHE[func]
+    except KeyError:
+        pass
+    except TypeError:  # not weak-referenceable
+        return _read_signature(callable_obj)
+    parameters = _read_signature(callable_obj)
+    _SIGNATURE_CACHE[func] = parameters
+    return parameters
+
+
+def _accepts_keyword(callable_obj: Callable[..., Any], keyword: str) -> bool:
+    parameters = _signature_parameters(callable_obj)
+    if parameters is None:
         return False
-    return keyword in parameters or any(
-        parameter.kind == inspect.Parameter.VAR_KEYWORD
-        for parameter in parameters.values()
+    return any(
+        parameter.name == keyword or parameter.kind == inspect.Parameter.VAR_KEYWORD
+        for parameter in parameters
     )
 
 
-def _invoke_with_optional_context(
+def _context_convention(callable_obj: Callable[..., Any]) -> str:
+    """How ``callable_obj`` takes a :class:`ToolExecutionContext`.
+
+    ``"keyword"`` (``context=``), ``"positional"`` (third argument) or
+    ``"none"``.
+    """
+    if _accepts_keyword(callable_obj, "context"):
+        return "keyword"
+    parameters = _signature_parameters(callable_obj)
+    if parameters is None:
+        return "none"
+    positional = [
+        parameter
+        for parameter in parameters
+        if parameter.kind in (
+            inspect.Parameter.POSITIONAL_ONLY,
+            inspect.Parameter.POSITIONAL_OR_KEYWORD,
+        )
+    ]
+    return "positional" if len(positional) >= 3 else "none"
+
+
+def _invoke_with_convention(
     callable_obj: Callable[..., Any],
+    convention: str,
     name: str,
     arguments: Dict[str, Any],
     context: Optional[ToolExecutionContext],
 ) -> Any:
-    if _accepts_keyword(callable_obj, "context"):
+    if convention == "keyword":
         return callable_obj(name, arguments, context=context)
-    try:
-        parameters = list(inspect.signature(callable_obj).parameters.values())
-        positional = [
-            parameter
-            for parameter in parameters
-            if parameter.kind in (
-                inspect.Parameter.POSITIONAL_ONLY,
-                inspect.Parameter.POSITIONAL_OR_KEYWORD,
-            )
-        ]
-        if len(positional) >= 3:
-            return callable_obj(name, arguments, context)
-    except (TypeError, ValueError):
-        pass
+    if convention == "positional":
+        return callable_obj(name, arguments, context)
     return callable_obj(name, arguments)
 
 
-async def _invoke_executor(
-    executor: ToolExecutor,
+def _invoke_with_optional_context(
+    callable_obj: Callable[..., Any],
     name: str,
     arguments: Dict[str, Any],
     context: Optional[ToolExecutionContext],
 ) -> Any:
-    result = _invoke_with_optional_context(executor, name, arguments, context)
-    return await result if inspect.isawaitable(result) else result
+    return _invoke_with_convention(
+        callable_obj, _context_convention(callable_obj), name, arguments, context,
+    )
+
+
+# JSON-schema keywords the flat fast path understands completely. Schemas
+# using anything else go straight to the full jsonschema validator.
+_FLAT_OBJECT_KEYS = frozenset({
+    "type", "properties", "required", "additionalProperties", "title", "description",
+})
+_FLAT_PROPERTY_KEYS = frozenset({
+    "type", "enum", "title", "description", "default", "examples",
+})
+_FLAT_TYPES: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda v: isinstance(v, str),
+    "boolean": lambda v: isinstance(v, bool),
+    "integer": lambda v: (isinstance(v, int) and not isinstance(v, bool))
+    or (isinstance(v, float) and v.is_integer()),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "array": lambda v: isinstance(v, list),
+    "object": lambda v: isinstance(v, dict),
+    "null": lambda v: v is None,
+}
+
+
+def _flat_property_check(schema: Any) -> Optional[Callable[[Any], bool]]:
+    if not isinstance(schema, dict) or not set(schema) <= _FLAT_PROPERTY_KEYS:
+        return None
+    checks: List[Callable[[Any], bool]] = []
+    if "type" in schema:
+        names = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+        if not names or any(n not in _FLAT_TYPES for n in names):
+            return None
+        type_checks = [_FLAT_TYPES[n] for n in names]
+        checks.append(lambda v: any(check(v) for check in type_checks))
+    if "enum" in schema:
+        if not isinstance(schema["enum"], list):
+            return None
+        # Stricter than JSON equality (1 vs 1.0); a miss only means the
+        # full validator gets the final say.
+        allowed = list(schema["enum"])
+        checks.append(lambda v: any(type(v) is type(a) and v == a for a in allowed))
+    return lambda v: all(check(v) for check in checks)
+
+
+def _flat_object_check(parameters: Dict[str, Any]) -> Optional[Callable[[Dict[str, Any]], bool]]:
+    """Fast acceptance test for flat ``{"type": "object"}`` schemas.
+
+    Returns ``None`` when the schema uses keywords outside the flat subset.
+    The returned check never accepts arguments the full validator would
+    reject; it may reject valid ones, which then fall through to it.
+    """
+    if not set(parameters) <= _FLAT_OBJECT_KEYS or parameters.get("type") != "object":
+        return None
+    properties = parameters.get("properties") or {}
+    required = parameters.get("required") or []
+    additional = parameters.get("additionalProperties", True)
+    if not isinstance(properties, dict) or not isinstance(required, list):
+        return None
+    if not isinstance(additional, bool):
+        return None
+    checks: Dict[str, Callable[[Any], bool]] = {}
+    for key, schema in properties.items():
+        check = _flat_property_check(schema)
+        if check is None:
+            return None
+        checks[key] = check
+    required_keys = tuple(required)
+
+    def accept(arguments: Dict[str, Any]) -> bool:
+        for key in required_keys:
+            if key not in arguments:
+                return False
+        for key, value in arguments.items():
+            check = checks.get(key)
+            if check is None:
+                if not additional:
+                    return False
+            elif not check(value):
+                return False
+        return True
+
+    return accept
+
+
+def _compile_argument_check(
+    name: str,
+    parameters: Dict[str, Any],
+) -> Optional[Callable[[Dict[str, Any]], List[Dict[str, str]]]]:
+    """Build the schema check for one tool's arguments.
+
+    The jsonschema validator is constructed once here rather than per
+    call. Flat object schemas get a fast acceptance test in front of it,
+    so the full validator only runs to explain a rejection.
+    """
+    if Draft202012Validator is None or not parameters:
+        return None
+    try:
+        validator = Draft202012Validator(parameters)
+    except Exception as exc:
+        logger.warning("Invalid JSON schema for tool %s: %s", name, exc)
+        return None
+
+    def full_check(arguments: Dict[str, Any]) -> List[Dict[str, str]]:
+        try:
+            errors = sorted(
+                validator.iter_errors(arguments),
+                key=lambda e: list(e.absolute_path),
+            )
+        except Exception as exc:
+            logger.warning("Invalid JSON schema for tool %s: %s", name, exc)
+            return []
+        details = []
+        for err in errors[:5]:
+            path = ".".join(str(part) for part in err.absolute_path) or "$"
+            details.append({"path": path, "message": err.message})
+        return details
+
+    accept = _flat_object_check(parameters)
+    if accept is None:
+        return full_check
+
+    def flat_check(arguments: Dict[str, Any]) -> List[Dict[str, str]]:
+        return [] if accept(arguments) else full_check(arguments)
+
+    return flat_check
 
 
 async def _as_awaitable(value: Any) -> Any:
@@ -0,0 +1,255 @@
+"""Priority scheduling for deep reasoning runs.
+
+Runs used to queue on one ``asyncio.Semaphore(max_concurrent_runs)``, so a
+chat message could wait minutes behind a ``deep`` trigger run and a burst
+of cron triggers queued without bound. :class:`RunScheduler` replaces it
+with four priority classes, highest first:
+
+``interactive``
+    Chat and the reasoning API. ``interactive_reserve`` of the
+    ``max_concurrent`` slots are kept for it, so it does not wait behind
+    automation. The reserve comes out of the limit rather than on top of it
+    and always leaves one slot for the other classes; with
+    ``max_concurrent=1`` there is no reserve and interactive runs are only
+    first in line.
+``prompt``
+    Prompt-library runs.
+``trigger``
+    State-triggered automation.
+``background``
+    Scheduled (cron) work.
+
+``trigger`` and ``background`` runs are preemptible: at iteration
+boundaries they yield their slot to higher-priority runs that are waiting.
+At the default ``max_concurrent=1`` there is no reserve, so this is what
+keeps a chat message from waiting out a multi-minute ``deep`` trigger run.
+
+Every class has a concurrency limit and a queue-depth limit. A run that
+would overflow its queue fails fast with :class:`RunRejected` instead of
+waiting. Within a class, runs start in FIFO order. Queue wait is measured
+per run and aggregated per class.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Callable, Deque, Dict, Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+PRIORITIES = ("interactive", "prompt", "trigger", "background")
+PREEMPTIBLE = ("trigger", "background")
+DEFAULT_QUEUE_LIMITS: Mapping[str, int] = {
+    "interactive": 8,
+    "prompt": 8,
+    "trigger": 16,
+    "background": 16,
+}
+
+
+class RunRejected(RuntimeError):
+    """Raised when a priority class's queue is full."""
+
+    def __init__(self, priority: str, reason: str) -> None:
+        super().__init__(f"{priority} run rejected: {reason}")
+        self.priority = priority
+        self.reason = reason
+
+
+@dataclass
+class _Waiter:
+    priority: str
+    future: "asyncio.Future[None]"
+
+
+@dataclass
+class _ClassStats:
+    started: int = 0
+    rejected: int = 0
+    preemptions: int = 0
+    wait_ms_total: float = 0.0
+    wait_ms_max: float = 0.0
+
+
+@dataclass
+class RunLease:
+    """A granted run slot; ``checkpoint`` is called between iterations."""
+
+    priority: str
+    wait_ms: int = 0
+    preemptions: int = 0
+    paused_ms: int = 0
+    _scheduler: Optional["RunScheduler"] = field(default=None, repr=False)
+
+    async def checkpoint(self) -> float:
+        """Yield the slot to higher-priority waiters if this run is preemptible.
+
+        Returns the seconds spent paused (0.0 when the run kept its slot).
+        """
+        if self._scheduler is None:
+            return 0.0
+        paused = await self._scheduler._preempt(self)
+        if paused:
+            self.preemptions += 1
+            self.paused_ms += int(paused * 1000)
+        return paused
+
+
+class RunScheduler:
+    """Admission control and priority ordering for reasoning runs."""
+
+    def __init__(
+        self,
+        *,
+        max_concurrent: int = 1,
+        class_limits: Optional[Mapping[str, int]] = None,
+        queue_limits: Optional[Mapping[str, int]] = None,
+        interactive_reserve: int = 1,
+        preempt_background: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.interactive_reserve = min(max(0, int(interactive_reserve)), self.max_concurrent - 1)
+        shared = self.max_concurrent - self.interactive_reserve
+        self.class_limits: Dict[str, int] = {p: shared for p in PRIORITIES}
+        self.class_limits["interactive"] = self.max_concurrent
+        self.class_limits.update({
+            p: max(1, int(v)) for p, v in (class_limits or {}).items() if p in PRIORITIES
+        })
+        self.queue_limits: Dict[str, int] = dict(DEFAULT_QUEUE_LIMITS)
+        self.queue_limits.update({
+            p: max(0, int(v)) for p, v in (queue_limits or {}).items() if p in PRIORITIES
+        })
+        self.preempt_background = preempt_background
+        self._clock = clock
+        self._running: Dict[str, int] = {p: 0 for p in PRIORITIES}
+        self._queues: Dict[str, Deque[_Waiter]] = {p: deque() for p in PRIORITIES}
+        self._stats: Dict[str, _ClassStats] = {p: _ClassStats() for p in PRIORITIES}
+
+    # ---- admission -------------------------------------------------------
+    @property
+    def running(self) -> int:
+        return sum(self._running.values())
+
+    def _can_start(self, priority: str) -> bool:
+        if self._running[priority] >= self.class_limits[priority]:
+            return False
+        capacity = self.max_concurrent
+        if priority != "interactive":
+            capacity -= self.interactive_reserve
+        return self.running < capacity
+
+    def _dispatch(self) -> None:
+        for priority in PRIORITIES:
+            queue = self._queues[priority]
+            while queue and self._can_start(priority):
+                waiter = queue.popleft()
+                if waiter.future.done():
+                    continue
+                self._running[priority] += 1
+                waiter.future.set_result(None)
+
+    async def _wait(self, waiter: _Waiter) -> None:
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Granted just as the caller gave up: hand the slot on.
+                self._running[waiter.priority] -= 1
+                self._dispatch()
+            else:
+                try:
+                    self._queues[waiter.priority].remove(waiter)
+                except ValueError:
+                    pass
+            raise
+
+    async def acquire(self, priority: str) -> RunLease:
+        if priority not in PRIORITIES:
+            raise ValueError(f"unknown run priority {priority!r}")
+        started = self._clock()
+        stats = self._stats[priority]
+        queue = self._queues[priority]
+        waiter = _Waiter(priority, asyncio.get_running_loop().create_future())
+        queue.append(waiter)
+        self._dispatch()
+        if not waiter.future.done():
+            if len(queue) > self.queue_limits[priority]:
+                queue.remove(waiter)
+                stats.rejected += 1
+                logger.warning("Rejecting %s run: %d already queued", priority, len(queue))
+                raise RunRejected(priority, f"{len(queue)} runs already queued")
+            await self._wait(waiter)
+        wait_ms = (self._clock() - started) * 1000
+        stats.started += 1
+        stats.wait_ms_total += wait_ms
+        stats.wait_ms_max = max(stats.wait_ms_max, wait_ms)
+        return RunLease(priority=priority, wait_ms=int(wait_ms), _scheduler=self)
+
+    def release(self, lease: RunLease) -> None:
+        if lease._scheduler is None:
+            return  # already released (cancelled while preempted)
+        lease._scheduler = None
+        self._running[lease.priority] -= 1
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, priority: str) -> AsyncIterator[RunLease]:
+        lease = await self.acquire(priority)
+        try:
+            yield lease
+        finally:
+            self.release(lease)
+
+    # ---- preemption ------------------------------------------------------
+    async def _preempt(self, lease: RunLease) -> float:
+        if not self.preempt_background or lease.priority not in PREEMPTIBLE:
+            return 0.0
+        rank = PRIORITIES.index(lease.priority)
+        if not any(self._queues[p] for p in PRIORITIES[:rank]):
+            return 0.0
+        started = self._clock()
+        # Give the slot up and rejoin the front of the class queue; the run
+        # resumes as soon as the higher-priority work leaves room for it.
+        self._running[lease.priority] -= 1
+        waiter = _Waiter(lease.priority, asyncio.get_running_loop().create_future())
+        self._queues[lease.priority].appendleft(waiter)
+        self._stats[lease.priority].preemptions += 1
+        self._dispatch()
+        try:
+            await self._wait(waiter)
+        except asyncio.CancelledError:
+            # The slot is gone; ``release`` must not return it twice.
+            lease._scheduler = None
+            raise
+        return self._clock() - started
+
+    # ---- metrics ---------------------------------------------------------
+    def info(self) -> Dict[str, object]:
+        classes: Dict[str, Dict[str, object]] = {}
+        for priority in PRIORITIES:
+            stats = self._stats[priority]
+            classes[priority] = {
+                "running": self._running[priority],
+                "waiting": len(self._queues[priority]),
+                "limit": self.class_limits[priority],
+                "queue_limit": self.queue_limits[priority],
+                "started": stats.started,
+                "rejected": stats.rejected,
+                "preemptions": stats.preemptions,
+                "queue_wait_ms_avg": (
+                    round(stats.wait_ms_total / stats.started, 1) if stats.started else 0.0
+                ),
+                "queue_wait_ms_max": round(stats.wait_ms_max, 1),
+            }
+        return {
+            "max_concurrent": self.max_concurrent,
+            "interactive_reserve": self.interactive_reserve,
+            "preempt_background": self.preempt_background,
+            "running": self.running,
+            "classes": classes,
+        }
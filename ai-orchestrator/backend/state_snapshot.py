@@ -0,0 +1,144 @@
+"""On-disk checkpoint of the Home Assistant state mirror.
+
+A cold add-on start used to block every reader until HA connected and a
+full ``get_states`` finished, which takes tens of seconds on a Raspberry
+Pi. :class:`StateSnapshotStore` keeps the last mirror contents in SQLite
+under ``/data``. At startup they are loaded into
+:class:`HAWebSocketClient` as stale state, so read-only tools and the
+dashboard can answer at once. The live subscription then reconciles the
+mirror against HA with a diff.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class StateSnapshotStore:
+    """SQLite-backed snapshot of entity states (one row per entity)."""
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS states (
+        entity_id TEXT PRIMARY KEY,
+        state_json TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT NOT NULL
+    );
+    """
+
+    def __init__(self, db_path: Optional[str] = None) -> None:
+        if db_path is None:
+            base = Path("/data") if Path("/data").exists() else Path(__file__).parent.parent / "data"
+            base.mkdir(parents=True, exist_ok=True)
+            db_path = str(base / "state_snapshot.db")
+        self.db_path = db_path
+        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        with self._conn() as c:
+            c.executescript(self.SCHEMA)
+        logger.info("StateSnapshotStore initialised at %s", self.db_path)
+
+    def _conn(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.db_path)
+
+    def save(self, states: Dict[str, Dict[str, Any]]) -> str:
+        """Replace the snapshot atomically; returns the saved_at stamp."""
+        saved_at = datetime.now(timezone.utc).isoformat()
+        rows = [
+            (entity_id, json.dumps(state, separators=(",", ":")))
+            for entity_id, state in states.items()
+        ]
+        conn = self._conn()
+        try:
+            with conn:
+                conn.execute("DELETE FROM states")
+                conn.executemany("INSERT INTO states VALUES (?, ?)", rows)
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('saved_at', ?)", (saved_at,)
+                )
+        finally:
+            conn.close()
+        return saved_at
+
+    def save_changes(
+        self,
+        changed: Dict[str, Dict[str, Any]],
+        removed: List[str],
+    ) -> str:
+        """Upsert changed entities and delete removed ones; returns saved_at.
+
+        Checkpoints go through here so a house where a few sensors move each
+        minute does not rewrite every row (SD-card wear on HA hardware).
+        """
+        saved_at = datetime.now(timezone.utc).isoformat()
+        rows = [
+            (entity_id, json.dumps(state, separators=(",", ":")))
+            for entity_id, state in changed.items()
+        ]
+        conn = self._conn()
+        try:
+            with conn:
+                conn.executemany("INSERT OR REPLACE INTO states VALUES (?, ?)", rows)
+                conn.executemany(
+                    "DELETE FROM states WHERE entity_id = ?", [(e,) for e in removed]
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta VALUES ('saved_at', ?)", (saved_at,)
+                )
+        finally:
+            conn.close()
+        return saved_at
+
+    def load(self) -> Tuple[Dict[str, Dict[str, Any]], Optional[str]]:
+        conn = self._conn()
+        try:
+            states = {
+                entity_id: json.loads(state_json)
+                for entity_id, state_json in conn.execute("SELECT entity_id, state_json FROM states")
+            }
+            row = conn.execute("SELECT value FROM meta WHERE key = 'saved_at'").fetchone()
+        finally:
+            conn.close()
+        return states, (row[0] if row else None)
+
+
+async def run_checkpoint_loop(
+    ha_client: Any,
+    store: StateSnapshotStore,
+    *,
+    interval_seconds: float = 60.0,
+) -> None:
+    """Checkpoint the live mirror whenever it changed since the last save."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        await checkpoint(ha_client, store)
+
+
+async def checkpoint(ha_client: Any, store: StateSnapshotStore) -> bool:
+    pending = ha_client.mirror_checkpoint()
+    if pending is None:
+        return False
+    marker, states, removed = pending
+    try:
+        if removed is None:
+            saved_at = await asyncio.to_thread(store.save, states)
+        else:
+            saved_at = await asyncio.to_thread(store.save_changes, states, removed)
+    except Exception as exc:
+        # The marker stays unspent, so the next checkpoint retries.
+        logger.warning("State snapshot checkpoint failed: %s", exc)
+        return False
+    ha_client.mark_checkpointed(marker)
+    logger.debug(
+        "State snapshot saved (%d written, %d removed) at %s",
+        len(states), len(removed or ()), saved_at,
+    )
+    return True
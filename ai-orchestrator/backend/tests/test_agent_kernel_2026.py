@@ -27,6 +27,7 @@ from reasoning_harness import (
     ToolSemantics,
     _serialise_result,
     _to_anthropic_messages,
+    expand_tables,
 )
 
 
@@ -261,6 +262,47 @@ def test_large_result_compaction_is_valid_json_and_explicit():
     assert parsed["original_chars"] > len(encoded)
 
 
+def test_record_lists_serialise_as_escaped_tables():
+    matches = [
+        {"entity_id": "light.a", "state": "on", "friendly_name": "Desk | left\\top\nlamp"},
+        {"entity_id": "sensor.t", "state": 21.5, "friendly_name": None},
+        {"entity_id": "switch.s", "state": "off"},
+    ]
+    result = {"ok": True, "matches": matches, "tags": [{"a": 1}, {"b": 2}]}
+    encoded = _serialise_result(result)
+    parsed = json.loads(encoded)
+
+    assert parsed["matches"]["_table"].splitlines()[0] == "entity_id|state|friendly_name"
+    assert parsed["tags"] == [{"a": 1}, {"b": 2}]  # unlike records stay JSON
+    assert len(encoded) < len(_serialise_result(result, tabular=False))
+    rows = expand_tables(parsed)["matches"]
+    assert rows[0]["friendly_name"] == "Desk | left\\top\nlamp"
+    assert rows[1] == {"entity_id": "sensor.t", "state": "21.5", "friendly_name": None}
+
+    compacted = json.loads(_serialise_result(
+        {"ok": True, "entities": [{"entity_id": f"sensor.{i}", "state": "x" * 200} for i in range(200)]},
+        max_chars=6000,
+    ))
+    assert compacted["truncated"] is True
+    assert compacted["data"]["entities"]["_omitted_items"] == 180
+
+
+def test_tables_keep_empty_strings_apart_from_nulls():
+    records = [
+        {"entity_id": f"sensor.{i}", "state": "on", "icon": None, "unit": ""} for i in range(3)
+    ]
+    records[1]["unit"] = "°C"
+    parsed = json.loads(_serialise_result({"ok": True, "matches": records}))
+
+    assert expand_tables(parsed)["matches"] == records
+    assert expand_tables(parsed)["matches"][0]["unit"] == ""
+    assert expand_tables(parsed)["matches"][0]["icon"] is None
+    # Without empty strings the same records still become a table.
+    for record in records:
+        record["unit"] = "°C"
+    assert "_table" in json.loads(_serialise_result({"ok": True, "matches": records}))["matches"]
+
+
 @pytest.mark.asyncio
 async def test_llm_timeout_is_a_terminal_bounded_result():
     class SlowLLM:
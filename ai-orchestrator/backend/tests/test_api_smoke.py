@@ -35,6 +35,8 @@ class TestAPISmoke:
             })
             mock_ha_instance.connect = AsyncMock()
             mock_ha_instance.disconnect = AsyncMock()
+            mock_ha_instance.restore_snapshot = MagicMock()
+            mock_ha_instance.mirror_checkpoint = MagicMock(return_value=None)
             mock_ha_instance.get_states = AsyncMock(return_value=[
                 {"entity_id": "light.test", "state": "on", "attributes": {}},
                 {"entity_id": "sensor.test", "state": "21", "attributes": {}},
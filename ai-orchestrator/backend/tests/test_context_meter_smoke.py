@@ -0,0 +1,179 @@
+"""Smoke tests for context-size accounting and compaction in the harness."""
+from __future__ import annotations
+
+import json
+from typing import Any, Dict, List
+
+import pytest
+
+from benchmarks.suite import bench_harness
+from reasoning_harness import (
+    ContextMeter,
+    _digest_tool_content,
+    _serialised_result_is_error,
+    _to_anthropic_messages,
+    LLMResponse,
+    ReasoningHarness,
+    ToolCall,
+    ToolRegistry,
+    approx_token_count,
+)
+
+
+def test_meter_matches_full_serialisation():
+    messages = [
+        {"role": "system", "content": "système"},
+        {"role": "user", "content": "check"},
+        {"role": "tool", "tool_call_id": "1", "name": "read", "content": json.dumps({"x": [1, 2]})},
+    ]
+    meter = ContextMeter()
+    assert meter.chars == len(json.dumps([]))
+    meter.extend(messages)
+    assert meter.chars == len(json.dumps(messages, ensure_ascii=False))
+    assert meter.tokens == sum(
+        approx_token_count(json.dumps(m, ensure_ascii=False)) for m in messages
+    )
+
+
+class _PagingLLM:
+    name = "paging"
+
+    def __init__(self, pages: int = 10 ** 6, continuation: Any = None) -> None:
+        self.pages = pages
+        self.continuation = continuation
+        self.estimated: List[str] = []
+        self.seen: List[List[Dict[str, Any]]] = []
+
+    def estimate_tokens(self, text: str) -> int:
+        self.estimated.append(text)
+        return len(text)  # one token per character
+
+    async def chat(self, messages, tools):
+        self.seen.append([dict(m) for m in messages])
+        done = sum(1 for m in messages if m.get("role") == "tool")
+        if done >= self.pages:
+            return LLMResponse(content="Read every page.")
+        return LLMResponse(content="", continuation=self.continuation, tool_calls=[
+            ToolCall(id=f"c{done}", name="read", arguments={"page": done}),
+        ])
+
+
+def _registry() -> ToolRegistry:
+    registry = ToolRegistry()
+
+    async def executor(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        return {"ok": True, "data": "x" * 4000}
+
+    registry.register(
+        provider="local",
+        schemas=[{"type": "function", "function": {"name": "read", "parameters": {}}}],
+        executor=executor,
+    )
+    return registry
+
+
+@pytest.mark.asyncio
+async def test_token_budget_uses_the_backend_tokenizer():
+    llm = _PagingLLM()
+    events: List[Dict[str, Any]] = []
+
+    async def on_event(event):
+        events.append(event)
+
+    harness = ReasoningHarness(
+        llm, _registry(), "system",
+        max_iterations=20,
+        max_context_chars=10 ** 9,
+        max_context_tokens=10000,
+        compact_context=False,
+    )
+    result = await harness.run("page", on_event=on_event)
+
+    assert result.stopped_reason == "context_budget"
+    assert result.iterations < 5
+    assert llm.estimated  # the backend estimator was consulted
+    thoughts = [e for e in events if e["type"] == "thought"]
+    assert thoughts[-1]["context"]["tokens"] <= 10000
+
+
+@pytest.mark.asyncio
+async def test_explicit_estimator_overrides_backend():
+    harness = ReasoningHarness(
+        _PagingLLM(), _registry(), "system",
+        max_iterations=3,
+        max_context_tokens=10 ** 9,
+        token_estimator=lambda text: 0,
+    )
+    result = await harness.run("page")
+    assert result.stopped_reason != "context_budget"
+
+
+@pytest.mark.asyncio
+async def test_long_runs_compact_old_results_instead_of_stopping():
+    llm = _PagingLLM(pages=30)
+    events: List[Dict[str, Any]] = []
+
+    async def on_event(event):
+        events.append(event)
+
+    harness = ReasoningHarness(
+        llm, _registry(), "system",
+        max_iterations=40,
+        max_total_tool_calls=40,
+        max_context_chars=20000,
+        compact_keep_turns=2,
+    )
+    result = await harness.run("page", on_event=on_event)
+
+    assert result.stopped_reason == "final"
+    assert result.answer == "Read every page."
+    assert [e for e in events if e["type"] == "compaction"]
+    thoughts = [e for e in events if e["type"] == "thought"]
+    assert max(t["context"]["chars"] for t in thoughts) <= 20000
+
+    final_history = llm.seen[-1]
+    tools = [m for m in final_history if m["role"] == "tool"]
+    assert [m["tool_call_id"] for m in tools] == [f"c{i}" for i in range(30)]
+    assert json.loads(tools[0]["content"])["compacted"] is True
+    # The most recent turns are still verbatim.
+    assert "x" * 4000 in tools[-1]["content"]
+    assert "x" * 4000 in tools[-2]["content"]
+    # Every tool_use still has its tool_result in the provider format.
+    converted = _to_anthropic_messages(final_history)
+    uses = [b["id"] for m in converted if m["role"] == "assistant"
+            for b in m["content"] if b["type"] == "tool_use"]
+    results = [b["tool_use_id"] for m in converted if m["role"] == "user"
+               and isinstance(m["content"], list) for b in m["content"]]
+    assert uses == results
+
+
+@pytest.mark.asyncio
+async def test_stateful_backends_are_not_compacted():
+    llm = _PagingLLM(continuation={"previous_response_id": "resp"})
+    harness = ReasoningHarness(
+        llm, _registry(), "system", max_iterations=20, max_context_chars=20000,
+    )
+    result = await harness.run("page")
+    assert result.stopped_reason == "context_budget"
+    assert "compacted" not in json.dumps(llm.seen[-1])
+
+
+def test_digest_keeps_error_status_and_shape():
+    failed = json.dumps({"ok": False, "error": "boom", "error_code": "timeout", "trace": "y" * 5000})
+    digest = json.loads(_digest_tool_content(failed, 600))
+    assert digest["ok"] is False and digest["error_code"] == "timeout"
+    assert _serialised_result_is_error(json.dumps(digest))
+
+    listing = json.dumps({"ok": True, "entities": [{"entity_id": f"light.{i}"} for i in range(200)]})
+    encoded = _digest_tool_content(listing, 600)
+    assert len(encoded) <= 600
+    assert json.loads(encoded)["data"]["entities"][-1] == {"_omitted_items": 194}
+
+
+@pytest.mark.asyncio
+async def test_harness_benchmark_reports_per_iteration_cost():
+    result, dispatch = await bench_harness(iterations=60, turns=5)
+    assert result.name == "harness.run.long"
+    assert dispatch.name == "harness.tool_dispatch" and dispatch.ops == 600
+    assert result.extra["turns"] == 5
+    assert result.extra["per_iteration_ms"] > 0
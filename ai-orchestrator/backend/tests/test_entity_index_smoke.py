@@ -0,0 +1,95 @@
+"""Smoke tests for the incremental entity index behind the discovery tools."""
+from __future__ import annotations
+
+import pytest
+
+from entity_index import EntityIndex
+from ha_client import HAWebSocketClient
+from native_ha_tools import NativeHATools
+
+
+STATES = [
+    {"entity_id": "sensor.kitchen_temperature", "state": "21.5", "attributes": {
+        "friendly_name": "Kitchen Temperature", "device_class": "temperature",
+        "unit_of_measurement": "°C"}},
+    {"entity_id": "light.kitchen", "state": "on", "attributes": {"friendly_name": "Kitchen"}},
+    {"entity_id": "light.kitchenette_strip", "state": "off", "attributes": {
+        "friendly_name": "Kitchenette Strip"}},
+    {"entity_id": "binary_sensor.back_door", "state": "off", "attributes": {
+        "friendly_name": "Back Door", "device_class": "door"}},
+    {"entity_id": "sensor.office_temperature", "state": "19.0", "attributes": {
+        "friendly_name": "Study", "device_class": "temperature",
+        "unit_of_measurement": "°C"}},
+]
+
+
+def _ids(entries):
+    return [e.entity_id for e in entries]
+
+
+def test_search_ranks_exact_and_token_matches_first():
+    index = EntityIndex.from_states(STATES)
+    hits = _ids(index.search("kitchen"))
+    assert hits[0] == "light.kitchen"
+    # Whole-token matches beat the substring-only "kitchenette".
+    assert hits.index("sensor.kitchen_temperature") < hits.index("light.kitchenette_strip")
+    assert _ids(index.search("kitchen temperature")) == ["sensor.kitchen_temperature"]
+    assert _ids(index.search("study")) == ["sensor.office_temperature"]
+    assert index.search("garage") == []
+
+
+def test_filters_use_domain_and_device_class_buckets():
+    index = EntityIndex.from_states(STATES)
+    assert _ids(index.search("", device_class="temperature")) == [
+        "sensor.kitchen_temperature", "sensor.office_temperature",
+    ]
+    assert _ids(index.search("kitchen", domains=["light"], limit=1)) == ["light.kitchen"]
+    assert index.by_unit["°C"] == {"sensor.kitchen_temperature", "sensor.office_temperature"}
+    assert index.domains()[0] == {"domain": "light", "count": 2}
+
+
+def test_incremental_updates_reindex_only_when_names_change():
+    index = EntityIndex.from_states(STATES)
+    index.upsert({"entity_id": "light.kitchen", "state": "off",
+                  "attributes": {"friendly_name": "Kitchen"}})
+    assert index.entities["light.kitchen"].state == "off"
+
+    index.upsert({"entity_id": "light.kitchen", "state": "off",
+                  "attributes": {"friendly_name": "Pantry"}})
+    assert _ids(index.search("pantry")) == ["light.kitchen"]
+
+    index.remove("binary_sensor.back_door")
+    assert index.search("back") == []
+    assert "door" not in index.by_device_class
+
+
+def test_area_membership_overrides_name_matching():
+    index = EntityIndex.from_states(STATES)
+    index.set_areas(
+        {"sensor.office_temperature": "study", "light.kitchen": "kitchen"},
+        {"study": "Home Office", "garage": "Garage"},
+    )
+    assert index.area_members("home office") == {"sensor.office_temperature"}
+    assert index.area_members("Garage") == set()
+    assert index.area_members("Study") == {"sensor.office_temperature"}
+    assert index.area_members("attic") is None
+
+
+@pytest.mark.asyncio
+async def test_tools_use_the_clients_live_index():
+    client = HAWebSocketClient("http://localhost:8123", "t", mirror_states=True)
+    client._mirror_replace({s["entity_id"]: s for s in STATES})
+    client._mirror_ready = True
+    client.entity_index.set_areas({"light.kitchenette_strip": "kitchen"})
+    tools = NativeHATools(client)
+
+    out = await tools.call("ha_summarise_area", {"area": "kitchen"})
+    assert out["match"] == "area_registry"
+    assert out["count"] == 1
+
+    client._mirror_pop("light.kitchenette_strip")
+    out = await tools.call("ha_search_entities", {"query": "kitchenette"})
+    assert out["count"] == 0
+
+    out = await tools.call("ha_list_entities", {"device_class": "temperature"})
+    assert out["count"] == 2
@@ -0,0 +1,99 @@
+"""Smoke tests for the concurrent scenario runner and its scorecards."""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pytest
+
+from evals.runner import EvalRunner, compare, format_markdown, scorecard
+from evals.scenario_contract import load_scenarios
+from reasoning_harness import LLMResponse, ToolCall
+
+SCENARIOS = {s["id"]: s for s in load_scenarios()}
+
+
+class FixtureLLM:
+    """Looks the goal up, then answers from the first match."""
+
+    name = "fixture-llm"
+    model = "fixture:1b"
+    calls = 0
+
+    def __init__(self, **_kwargs: Any) -> None:
+        pass
+
+    async def chat(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]]) -> LLMResponse:
+        type(self).calls += 1
+        if not [m for m in messages if m.get("role") == "tool"]:
+            return LLMResponse(content="", tool_calls=[ToolCall(
+                id="search", name="ha_search_entities", arguments={"query": "kitchen"},
+            )], usage={"input_tokens": 300, "output_tokens": 12})
+        return LLMResponse(content="The kitchen ceiling light is on.",
+                           usage={"input_tokens": 420, "output_tokens": 9})
+
+
+@pytest.fixture
+def scripted_provider(monkeypatch):
+    import agents.deep_reasoning_agent as dra
+
+    FixtureLLM.calls = 0
+    monkeypatch.setattr(dra, "OllamaToolBackend", FixtureLLM)
+    return FixtureLLM
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay_across_profiles(scripted_provider, tmp_path):
+    cassette = tmp_path / "evals.jsonl"
+    scenario = [SCENARIOS["simple_state_lookup"]]
+
+    live = await EvalRunner(
+        scenario, profiles=["balanced"], backend="live", cassette=cassette,
+        agent_options={"provider": "ollama"},
+    ).run()
+    assert [r.passed for r in live] == [True]
+    recorded_calls = scripted_provider.calls
+
+    runner = EvalRunner(scenario, profiles=["rapid", "balanced", "deep"], cassette=cassette,
+                        repeat=2, concurrency=6)
+    records = await runner.run()
+
+    assert scripted_provider.calls == recorded_calls  # replay never touched the model
+    assert len(records) == 6 and all(r.passed for r in records), [r.failures for r in records]
+    card = scorecard(records, wall_seconds=runner.wall_seconds)
+    balanced = card["profiles"]["balanced"]
+    assert balanced["runs"] == 2 and balanced["pass_rate"] == 1.0
+    assert balanced["llm_calls_mean"] == 2 and balanced["input_tokens_mean"] == 720
+    assert balanced["tool_calls_mean"] == 1 and balanced["wall_ms_p50"] > 0
+    assert card["scenarios"]["simple_state_lookup"]["deep"]["failures"] == []
+    assert "| balanced | 2 | 100% |" in format_markdown(card)
+
+
+@pytest.mark.asyncio
+async def test_unrecorded_scenarios_fail_and_regress_against_a_baseline(scripted_provider, tmp_path):
+    scenario = [SCENARIOS["simple_state_lookup"]]
+    cassette = tmp_path / "evals.jsonl"
+    await EvalRunner(scenario, profiles=["rapid"], backend="live", cassette=cassette).run()
+    baseline = scorecard(await EvalRunner(scenario, profiles=["rapid"], cassette=cassette).run())
+
+    unrecorded = [SCENARIOS["no_duplicate_toggle"]]
+    records = await EvalRunner(unrecorded, profiles=["rapid"], cassette=cassette).run()
+
+    assert records[0].passed is False and "no recorded response" in records[0].error
+    regressions = compare(scorecard(records), baseline)
+    assert any("pass rate 100% -> 0%" in line for line in regressions)
+    assert compare(baseline, baseline) == []
+    with pytest.raises(ValueError):
+        EvalRunner(scenario, backend="replay")
+
+
+@pytest.mark.asyncio
+async def test_tabular_tool_results_cost_fewer_tokens(scripted_provider):
+    scenario = [SCENARIOS["simple_state_lookup"]]
+    tabular, plain = [
+        scorecard(await EvalRunner(scenario, profiles=["balanced"], backend="live",
+                                   tabular_results=tabular).run())["profiles"]["balanced"]
+        for tabular in (True, False)
+    ]
+
+    assert tabular["pass_rate"] == plain["pass_rate"] == 1.0
+    assert 0 < tabular["tool_result_tokens_mean"] < plain["tool_result_tokens_mean"]
@@ -0,0 +1,131 @@
+"""Smoke tests for the deterministic fast path ahead of the harness."""
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+
+import pytest
+
+from benchmarks.ha_simulator import DEFAULT_TOKEN
+from evals.fixtures import build_simulator
+from entity_index import EntityIndex
+from fast_path import FastPathResolver, parse_intent
+from ha_client import HAWebSocketClient
+from reasoning_harness import LLMResponse
+
+
+class CountingLLM:
+    name = "counting"
+    model = "counting:1b"
+    calls = 0
+
+    def __init__(self, **_kwargs):
+        pass
+
+    async def chat(self, messages, tools):
+        type(self).calls += 1
+        return LLMResponse(content="Handled by the harness.")
+
+
+@asynccontextmanager
+async def _agent(monkeypatch, tmp_path):
+    import agents.deep_reasoning_agent as dra
+    from mcp_server import MCPServer
+
+    CountingLLM.calls = 0
+    monkeypatch.setattr(dra, "OllamaToolBackend", CountingLLM)
+    sim = build_simulator("occupied_evening")
+    await sim.start()
+    client = HAWebSocketClient(sim.url, DEFAULT_TOKEN, mirror_states=True)
+    await client.connect()
+    reasoner = dra.DeepReasoningAgent(
+        local_mcp=MCPServer(client, dry_run=True), ha_client=client, provider="ollama",
+    )
+    reasoner.log_dir = tmp_path
+    try:
+        yield reasoner
+    finally:
+        if reasoner.read_cache is not None:
+            reasoner.read_cache.detach()
+        await client.disconnect()
+        await sim.stop()
+
+
+def test_parse_intent_recognises_only_plain_phrasings():
+    assert parse_intent("Is the front door locked?").predicate == "locked"
+    command = parse_intent("Please turn the kitchen lights off.")
+    assert (command.kind, command.verb, command.target) == ("command", "turn_off", "kitchen lights")
+    assert parse_intent("What's the temperature in the living room?").device_class == "temperature"
+    assert parse_intent("Why is the hallway so cold?") is None
+    assert parse_intent("what's the time") is None
+    assert parse_intent("what is the plan") is None
+
+
+def _state(entity_id, name, state, device_class=None):
+    attrs = {"friendly_name": name}
+    if device_class:
+        attrs["device_class"] = device_class
+    return {"entity_id": entity_id, "state": state, "attributes": attrs}
+
+
+@pytest.mark.asyncio
+async def test_partial_words_and_inferred_doors_do_not_resolve():
+    index = EntityIndex.from_states([
+        _state("sensor.uptime", "Uptime", "42"),
+        _state("sensor.plant_moisture", "Plant Moisture", "31", "moisture"),
+        _state("cover.garage_door", "Garage Door", "closed", "garage"),
+        _state("lock.front_door", "Front Door", "locked"),
+    ])
+
+    async def provider():
+        return index
+
+    resolver = FastPathResolver(provider, lambda: {"ha_get_state", "call_ha_service", "unlock_door"})
+    for phrase in ("what's the time", "what is the plan", "is the door open",
+                   "open the door", "what's the plan moisture"):
+        assert await resolver.match(phrase) is None, phrase
+
+    garage = await resolver.match("open the garage door")
+    assert [e.entity_id for e in garage.entities] == ["cover.garage_door"]
+    moisture = await resolver.match("what's the plant moisture")
+    assert [e.entity_id for e in moisture.entities] == ["sensor.plant_moisture"]
+    assert resolver.fallbacks["no_intent"] == 2 and resolver.fallbacks["ambiguous"] == 2
+
+
+@pytest.mark.asyncio
+async def test_simple_queries_and_commands_skip_the_model(monkeypatch, tmp_path):
+    async with _agent(monkeypatch, tmp_path) as agent:
+        locked = await agent.run("Is the front door locked?", mode="auto", fast_path=True)
+        assert locked.stopped_reason == "fast_path"
+        assert locked.answer == "Yes, Front Door is locked."
+        assert locked.plan["intents"] == []
+
+        temperature = await agent.run("what's the temperature in the living room", fast_path=True)
+        assert temperature.answer == "Living Room Temperature is 21.5 °C."
+
+        lights = await agent.run("Turn off the kitchen lights", mode="auto", fast_path=True)
+        assert lights.executed_inline is True
+        assert [r["arguments"]["entity_id"] for r in lights.execution_results] == [
+            "light.kitchen_ceiling", "light.kitchen_pendant",
+        ]
+        assert lights.answer == "Turned off Kitchen Ceiling and Kitchen Pendant."
+        assert CountingLLM.calls == 0
+
+
+@pytest.mark.asyncio
+async def test_high_impact_and_ambiguous_requests_keep_the_policy(monkeypatch, tmp_path):
+    async with _agent(monkeypatch, tmp_path) as agent:
+        unlock = await agent.run("Unlock the front door", mode="auto", fast_path=True)
+        assert unlock.stopped_reason == "fast_path" and unlock.executed_inline is False
+        assert unlock.plan["requires_approval"] is True
+        assert [i["tool_name"] for i in unlock.plan["intents"]] == ["unlock_door"]
+        assert "needs approval" in unlock.answer
+
+        # Two kitchen lights and a singular noun: the harness decides.
+        ambiguous = await agent.run("Turn on the kitchen light", mode="auto", fast_path=True)
+        assert ambiguous.stopped_reason != "fast_path" and CountingLLM.calls == 1
+        await agent.run("Is the front door locked?", mode="auto")  # fast path not requested
+        assert CountingLLM.calls == 2
+
+        stats = agent.info()["fast_path"]
+        assert stats["attempts"] == 2 and stats["hits"] == 1 and stats["hit_ratio"] == 0.5
+        assert stats["fallbacks"] == {"ambiguous": 1} and stats["latency_ms_p50"] is not None
@@ -0,0 +1,151 @@
+"""Smoke tests for the cached HA area/device/entity registries."""
+from __future__ import annotations
+
+import asyncio
+import json
+
+import pytest
+
+from agents.architect_agent import ArchitectAgent
+from ha_client import HAWebSocketClient
+from ha_registry import RegistryCache
+from native_ha_tools import NativeHATools
+from tests.test_hass_client_integration import FakeHASocket, _attach
+
+
+AREAS = [
+    {"area_id": "kitchen", "name": "Kitchen", "aliases": []},
+    {"area_id": "study", "name": "Home Office", "aliases": ["Den"]},
+]
+DEVICES = [{"id": "dev1", "area_id": "study", "name": "Multisensor"}]
+ENTITIES = [
+    {"entity_id": "light.ceiling", "area_id": "kitchen"},
+    {"entity_id": "sensor.multi_temperature", "device_id": "dev1"},
+    {"entity_id": "sensor.orphan"},
+]
+STATES = [
+    {"entity_id": "light.ceiling", "state": "on", "attributes": {}},
+    {"entity_id": "sensor.multi_temperature", "state": "20", "attributes": {}},
+    {"entity_id": "sensor.orphan", "state": "1", "attributes": {}},
+]
+
+
+class RegistrySocket(FakeHASocket):
+    """FakeHASocket that also answers the registry commands."""
+
+    def __init__(self, states):
+        super().__init__(states)
+        self.areas = list(AREAS)
+        self.devices = list(DEVICES)
+        self.entities = {e["entity_id"]: dict(e) for e in ENTITIES}
+
+    async def send(self, message):
+        sent = json.loads(message)
+        results = {
+            "config/area_registry/list": lambda: self.areas,
+            "config/device_registry/list": lambda: self.devices,
+            "config/entity_registry/list": lambda: list(self.entities.values()),
+            "config/entity_registry/get": lambda: self.entities[sent["entity_id"]],
+        }
+        if sent["type"] in results:
+            self.sent_messages.append(sent)
+            self.push({"id": sent["id"], "type": "result", "success": True,
+                       "result": results[sent["type"]]()})
+            return
+        await super().send(message)
+
+    def sub_id(self, event_type):
+        return next(m["id"] for m in self.sent_messages
+                    if m.get("event_type") == event_type)
+
+
+def _cache():
+    cache = RegistryCache()
+    cache.set_areas(AREAS)
+    cache.set_devices(DEVICES)
+    cache.set_entities(ENTITIES)
+    return cache
+
+
+def test_entities_inherit_their_device_area():
+    cache = _cache()
+    assert cache.entity_areas() == {
+        "light.ceiling": "kitchen",
+        "sensor.multi_temperature": "study",
+    }
+    assert cache.find_area("home office") == "study"
+    assert cache.find_area("den") == "study"
+    assert cache.areas_mentioned("Dim the kitchen lights when the den is empty") == [
+        "kitchen", "study",
+    ]
+
+
+def test_persisted_cache_round_trips(tmp_path):
+    path = str(tmp_path / "registry.json")
+    cache = _cache()
+    cache.path = path
+    cache.mark_live()
+    cache.persist()
+
+    loaded = RegistryCache(path)
+    assert loaded.source == "disk"
+    assert loaded.entity_areas() == cache.entity_areas()
+    assert RegistryCache(str(tmp_path / "missing.json")).info()["areas"] == 0
+
+
+@pytest.mark.asyncio
+async def test_client_loads_registries_and_follows_updates():
+    client = HAWebSocketClient("http://localhost:8123", "t", mirror_states=True)
+    sock = RegistrySocket(STATES)
+    _attach(client, sock)
+
+    await client.get_states()
+    await client.ensure_registries()
+    assert client.entity_index.area_members("home office") == {"sensor.multi_temperature"}
+    # Second call is served from the cache.
+    await client.ensure_registries()
+    lists = [m for m in sock.sent_messages if m["type"].endswith("/list")]
+    assert len(lists) == 3
+
+    sock.entities["sensor.orphan"]["area_id"] = "kitchen"
+    sock.push({"id": sock.sub_id("entity_registry_updated"), "type": "event", "event": {
+        "event_type": "entity_registry_updated",
+        "data": {"action": "update", "entity_id": "sensor.orphan"},
+    }})
+    for _ in range(20):
+        if client.entity_index.area_members("kitchen") == {"light.ceiling", "sensor.orphan"}:
+            break
+        await asyncio.sleep(0)
+    assert client.entity_index.area_members("kitchen") == {"light.ceiling", "sensor.orphan"}
+    assert client.info()["registry"]["events_applied"] == 1
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_tools_and_architect_use_registry_areas():
+    client = HAWebSocketClient("http://localhost:8123", "t", mirror_states=True)
+    sock = RegistrySocket(STATES)
+    sock.areas.append({"area_id": "garage", "name": "Garage", "aliases": []})
+    _attach(client, sock)
+    tools = NativeHATools(client)
+
+    out = await tools.call("ha_summarise_area", {"area": "Home Office"})
+    assert out["match"] == "area_registry"
+    assert out["count"] == 1
+
+    out = await tools.call("ha_list_entities", {"area": "kitchen"})
+    assert [e["entity_id"] for e in out["entities"]] == ["light.ceiling"]
+    out = await tools.call("ha_list_entities", {"area": "attic"})
+    assert out == {"ok": False, "error": "unknown_area:attic"}
+    out = await tools.call("ha_summarise_area", {"area": "attic"})
+    assert out == {"ok": False, "error": "unknown_area:attic"}
+    # A registry area without entities is empty in both tools, not unknown.
+    out = await tools.call("ha_list_entities", {"area": "Garage"})
+    assert (out["ok"], out["count"]) == (True, 0)
+    out = await tools.call("ha_summarise_area", {"area": "Garage"})
+    assert (out["ok"], out["count"], out["match"]) == (True, 0, "area_registry")
+
+    architect = ArchitectAgent(client)
+    found = await architect.discover_entities_from_instruction("Keep the den warm")
+    assert "sensor.multi_temperature" in found
+    await client.disconnect()
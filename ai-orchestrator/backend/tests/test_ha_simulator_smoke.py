@@ -0,0 +1,74 @@
+"""Smoke tests for the local HA simulator and the benchmark suite."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from benchmarks.ha_simulator import DEFAULT_TOKEN, HASimulator
+from benchmarks.suite import BenchResult, compare, run_suite
+from ha_client import HAWebSocketClient
+
+
+async def _wait_for(predicate, timeout=5.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            raise AssertionError("condition not reached")
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_real_client_round_trips_against_simulator():
+    async with HASimulator(40, attribute_bytes=16) as sim:
+        client = HAWebSocketClient(sim.url, DEFAULT_TOKEN, mirror_states=True)
+        await client.connect()
+        try:
+            states = await client.get_states()
+            assert len(states) == 40
+            light = next(s["entity_id"] for s in states if s["entity_id"].startswith("light."))
+
+            await client.call_service("light", "turn_on", light, brightness=128)
+            await _wait_for(lambda: client._states[light]["state"] == "on")
+            assert client._states[light]["attributes"]["brightness"] == 128
+            assert (await client.get_states(light, fresh=True))["state"] == "on"
+
+            services = await client.get_services()
+            assert "toggle" in services["light"]
+
+            await client.ensure_registries()
+            assert light in client.entity_index.area_members("Kitchen")
+        finally:
+            await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_simulator_rejects_bad_token():
+    async with HASimulator(5) as sim:
+        client = HAWebSocketClient(sim.url, "wrong")
+        with pytest.raises(ValueError, match="Authentication failed"):
+            await client.connect()
+
+
+@pytest.mark.asyncio
+async def test_suite_reports_every_benchmark():
+    results = await run_suite([30], iterations=5)
+    names = {r.name for r in results}
+    assert {"client.get_states", "client.state_event_fanout", "tools.ha_search_entities",
+            "triggers.state_fire", "agent.run.scripted", "harness.run.long",
+            "harness.tool_dispatch"} <= names
+    assert all(r.ops > 0 and r.ops_per_s > 0 and r.p99_ms >= r.p50_ms for r in results)
+    agent = next(r for r in results if r.name == "agent.run.scripted")
+    assert agent.extra["tool_calls"] == 2  # search, then read the top match
+
+
+def test_compare_flags_only_real_regressions():
+    baseline = {"results": [
+        {"name": "a", "entities": 10, "ops_per_s": 100.0},
+        {"name": "b", "entities": 10, "ops_per_s": 100.0},
+    ]}
+    results = [
+        BenchResult("a", 10, ops=90, seconds=1.0, p50_ms=1, p99_ms=2, rss_mb=1),
+        BenchResult("b", 10, ops=50, seconds=1.0, p50_ms=1, p99_ms=2, rss_mb=1),
+    ]
+    assert compare(results, baseline, 0.25) == ["b@10: 100.0 -> 50.0 ops/s (-50%)"]
@@ -204,3 +204,507 @@ async def test_call_service(ha_client):
     assert call_args["service"] == "turn_on"
     assert call_args["service_data"]["entity_id"] == "light.test"
 
+
+
+
+class FakeHASocket:
+    """Queue-backed socket that answers commands like a small HA core."""
+
+    def __init__(self, states, *, compressed=True):
+        self.states = {s["entity_id"]: s for s in states}
+        self.compressed = compressed
+        self.sent_messages = []
+        self.queue = asyncio.Queue()
+
+    async def send(self, message):
+        sent = json.loads(message)
+        self.sent_messages.append(sent)
+        if sent["type"] == "subscribe_entities" and not self.compressed:
+            self.push({"id": sent["id"], "type": "result", "success": False,
+                       "error": {"code": "unknown_command"}})
+            return
+        result = list(self.states.values()) if sent["type"] == "get_states" else None
+        self.push({"id": sent["id"], "type": "result", "success": True, "result": result})
+        if sent["type"] == "subscribe_entities":
+            self.push({"id": sent["id"], "type": "event", "event": {"a": {
+                eid: {"s": s["state"], "a": s.get("attributes", {}), "c": "ctx", "lc": 1700000000.0}
+                for eid, s in self.states.items()
+            }}})
+
+    def push(self, *frames):
+        payload = frames[0] if len(frames) == 1 else list(frames)
+        self.queue.put_nowait(json.dumps(payload))
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        return await self.queue.get()
+
+    async def close(self):
+        pass
+
+
+def _attach(client, sock):
+    client.ws = sock
+    client.connected = True
+    client._receive_task = asyncio.create_task(client._receive_messages())
+
+
+async def _drain(sock):
+    while not sock.queue.empty():
+        await asyncio.sleep(0)
+    await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_state_mirror_serves_reads_without_round_trips():
+    client = HAWebSocketClient("http://localhost:8123", "t", mirror_states=True)
+    sock = FakeHASocket([
+        {"entity_id": "light.a", "state": "on", "attributes": {"brightness": 10}},
+        {"entity_id": "light.b", "state": "off", "attributes": {}},
+    ])
+    _attach(client, sock)
+
+    assert len(await client.get_states()) == 2
+    assert [m["type"] for m in sock.sent_messages] == ["subscribe_entities"]
+    light_a = await client.get_states("light.a")
+    assert light_a["attributes"] == {"brightness": 10}
+    assert light_a["context"] == {"id": "ctx"}
+    assert light_a["last_changed"].startswith("2023-11-14")
+    with pytest.raises(ValueError):
+        await client.get_states(entity_id="light.missing")
+    assert len(sock.sent_messages) == 1
+
+    # Compressed diffs: changes (+/-), additions and removals, coalesced.
+    sub_id = client._mirror_sub_id
+    sock.push(
+        {"id": sub_id, "type": "event", "event": {"c": {"light.a": {
+            "+": {"s": "off", "lu": 1700000100.0}, "-": {"a": ["brightness"]}}}}},
+        {"id": sub_id, "type": "event", "event": {
+            "a": {"sensor.new": {"s": "3", "a": {}, "lc": 1700000200.0}},
+            "r": ["light.b"]}},
+    )
+    await _drain(sock)
+    light_a = await client.get_states("light.a")
+    assert light_a["state"] == "off" and light_a["attributes"] == {}
+    assert light_a["last_changed"] != light_a["last_updated"]
+    assert sorted(s["entity_id"] for s in await client.get_states()) == ["light.a", "sensor.new"]
+    info = client.info()
+    assert info["state_mirror"]["protocol"] == "subscribe_entities"
+    assert info["rx_frames"] == 3
+
+    # fresh=True is the explicit escape hatch to a live round-trip.
+    await client.get_states("light.a", fresh=True)
+    assert sock.sent_messages[-1]["type"] == "get_states"
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_state_mirror_falls_back_to_state_changed_on_old_cores():
+    client = HAWebSocketClient("http://localhost:8123", "t", mirror_states=True)
+    sock = FakeHASocket([{"entity_id": "light.b", "state": "off"}], compressed=False)
+    _attach(client, sock)
+
+    assert (await client.get_states("light.b"))["state"] == "off"
+    assert [m["type"] for m in sock.sent_messages] == [
+        "subscribe_entities", "subscribe_events", "get_states",
+    ]
+    sock.push({"id": client._mirror_sub_id, "type": "event", "event": {"data": {
+        "entity_id": "light.b", "new_state": {"entity_id": "light.b", "state": "on"}}}})
+    await _drain(sock)
+    assert (await client.get_states("light.b"))["state"] == "on"
+    assert client.info()["state_mirror"]["protocol"] == "state_changed"
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_state_mirror_reconciles_snapshot_after_reconnect():
+    client = HAWebSocketClient("http://localhost:8123", "t", mirror_states=True)
+    sock = FakeHASocket([
+        {"entity_id": "lock.door", "state": "locked"},
+        {"entity_id": "light.hall", "state": "off"},
+    ])
+    _attach(client, sock)
+    await client.get_states("lock.door")
+
+    await client.disconnect()
+    assert client.info()["state_mirror"]["ready"] is False
+    assert client.subscriptions == {}
+
+    sock.states["lock.door"] = {"entity_id": "lock.door", "state": "unlocked"}
+    client._closing = False
+    _attach(client, sock)
+    assert (await client.get_states("lock.door"))["state"] == "unlocked"
+    assert client.info()["state_mirror"]["resync_changed"] == 1
+    await client.disconnect()
+
+
+def _state_event(sub_id, entity_id, old, new):
+    return {"id": sub_id, "type": "event", "event": {"event_type": "state_changed", "data": {
+        "entity_id": entity_id,
+        "old_state": {"entity_id": entity_id, "state": old},
+        "new_state": {"entity_id": entity_id, "state": new},
+    }}}
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_does_not_block_command_responses():
+    client = HAWebSocketClient("http://localhost:8123", "t")
+    sock = FakeHASocket([{"entity_id": "light.a", "state": "on"}])
+    _attach(client, sock)
+    release = asyncio.Event()
+    seen = []
+
+    async def slow(event):
+        await release.wait()
+        seen.append(event["data"]["new_state"]["state"])
+
+    sub_id = await client.subscribe_entities(["light.a"], slow)
+    upstream = client._router_sub_id
+    sock.push(
+        _state_event(upstream, "light.a", "on", "off"),
+        _state_event(upstream, "light.other", "on", "off"),
+    )
+    # The handler is parked, yet the command round-trip still completes.
+    states = await asyncio.wait_for(client.get_states(), timeout=1)
+    assert states[0]["entity_id"] == "light.a"
+
+    release.set()
+    await _drain(sock)
+    await asyncio.sleep(0)
+    assert seen == ["off"]
+    assert client.info()["subscribers"][str(sub_id)]["delivered"] == 1
+    await client.disconnect()
+    assert client.subscriptions == {}
+    assert client.info()["subscribers"] == {}
+
+
+@pytest.mark.asyncio
+async def test_subscriber_overflow_policies():
+    from ha_client import _Subscriber
+
+    async def noop(event):
+        pass
+
+    dropper = _Subscriber(noop, maxsize=2, overflow="drop_oldest", name="t")
+    for new in ("1", "2", "3"):
+        dropper.offer(_state_event(1, "sensor.x", "0", new)["event"])
+    assert dropper.stats()["dropped"] == 1
+    assert dropper.stats()["depth"] == 2
+
+    coalescer = _Subscriber(noop, maxsize=2, overflow="coalesce", name="t")
+    for new in ("1", "2", "3", "4"):
+        coalescer.offer(_state_event(1, "sensor.x", f"was{new}", new)["event"])
+    stats = coalescer.stats()
+    assert (stats["depth"], stats["coalesced"], stats["dropped"]) == (2, 2, 0)
+    queued = [e["data"] for e in coalescer._pending.values()]
+    assert [q["new_state"]["state"] for q in queued] == ["1", "4"]
+    assert queued[1]["old_state"]["state"] == "was2"
+    coalescer.offer(_state_event(1, "sensor.y", "a", "b")["event"])
+    assert coalescer.stats()["dropped"] == 1
+    assert [e["data"]["entity_id"] for e in coalescer._pending.values()] == ["sensor.x", "sensor.y"]
+
+    with pytest.raises(ValueError):
+        _Subscriber(noop, maxsize=1, overflow="block", name="t")
+
+
+@pytest.mark.asyncio
+async def test_coalescing_subscriber_delivers_every_transition_under_capacity():
+    from ha_client import _Subscriber
+
+    seen = []
+
+    async def record(event):
+        seen.append(event["data"]["new_state"]["state"])
+
+    sub = _Subscriber(record, maxsize=10, overflow="coalesce", name="t")
+    sub.start()
+    for old, new in (("off", "on"), ("on", "off"), ("off", "on")):
+        sub.offer(_state_event(1, "binary_sensor.door", old, new)["event"])
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert seen == ["on", "off", "on"]
+    assert (sub.stats()["coalesced"], sub.stats()["dropped"]) == (0, 0)
+    assert sub._latest == {}
+    sub.stop()
+
+
+@pytest.mark.asyncio
+async def test_subscribers_share_one_upstream_and_route_by_entity_domain_wildcard():
+    client = HAWebSocketClient("http://localhost:8123", "t")
+    sock = FakeHASocket([])
+    _attach(client, sock)
+    got = {"entity": [], "domain": [], "all": []}
+
+    def recorder(key):
+        async def callback(event):
+            got[key].append(event["data"]["entity_id"])
+        return callback
+
+    by_entity = await client.subscribe_entities(["light.a"], recorder("entity"))
+    await client.subscribe_state_changes(recorder("domain"), domains=["lock"])
+    await client.subscribe_state_changes(recorder("all"))
+    assert [m["type"] for m in sock.sent_messages] == ["subscribe_events"]
+
+    upstream = client._router_sub_id
+    sock.push(
+        _state_event(upstream, "light.a", "off", "on"),
+        _state_event(upstream, "lock.door", "locked", "unlocked"),
+        _state_event(upstream, "sensor.x", "1", "2"),
+    )
+    await _drain(sock)
+    await asyncio.sleep(0)
+    assert got == {
+        "entity": ["light.a"],
+        "domain": ["lock.door"],
+        "all": ["light.a", "lock.door", "sensor.x"],
+    }
+
+    # Re-targeting and unsubscribing are local; HA sees no new commands.
+    client.set_watched_entities(by_entity, ["sensor.x"])
+    client.unsubscribe(by_entity + 2)
+    sock.push(
+        _state_event(upstream, "light.a", "on", "off"),
+        _state_event(upstream, "sensor.x", "2", "3"),
+    )
+    await _drain(sock)
+    await asyncio.sleep(0)
+    assert got["entity"] == ["light.a", "sensor.x"]
+    assert got["all"] == ["light.a", "lock.door", "sensor.x"]
+    assert len(sock.sent_messages) == 1
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_routing_skips_a_subscriber_removed_mid_route():
+    client = HAWebSocketClient("http://localhost:8123", "t")
+    _attach(client, FakeHASocket([]))
+    got = []
+
+    async def record(event):
+        got.append(event["data"]["entity_id"])
+
+    gone = await client.subscribe_entities(["light.a"], record)
+    await client.subscribe_entities(["light.a"], record)
+    # The subscriber is gone but its id is still in the routing table.
+    client._subscribers.pop(gone).stop()
+
+    await client._route_state_event(_state_event(1, "light.a", "off", "on")["event"])
+    await asyncio.sleep(0)
+    assert got == ["light.a"]
+    client.unsubscribe(gone)
+    client._set_routes(gone, set(), set())
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_mirror_feeds_subscribers_and_routes_survive_reconnect():
+    client = HAWebSocketClient("http://localhost:8123", "t", mirror_states=True)
+    sock = FakeHASocket([{"entity_id": "lock.door", "state": "locked"}])
+    _attach(client, sock)
+    seen = []
+
+    async def callback(event):
+        data = event["data"]
+        seen.append((data["old_state"]["state"], data["new_state"]["state"]))
+
+    sub_id = await client.subscribe_entities(["lock.door"], callback)
+    assert [m["type"] for m in sock.sent_messages] == ["subscribe_entities"]
+    sock.push({"id": client._mirror_sub_id, "type": "event", "event": {
+        "c": {"lock.door": {"+": {"s": "unlocked"}}}}})
+    await _drain(sock)
+    await asyncio.sleep(0)
+    assert seen == [("locked", "unlocked")]
+
+    # Connection drops: HA-side subscriptions die, local routes do not.
+    sock.queue.put_nowait(None)
+    await asyncio.sleep(0)
+    client._receive_task.cancel()
+    client._invalidate_upstream()
+    sock.states["lock.door"] = {"entity_id": "lock.door", "state": "jammed"}
+    _attach(client, sock)
+    client._restore_in_background()
+    await client._restore_task
+    await asyncio.sleep(0)
+    assert seen[-1] == ("unlocked", "jammed")
+    assert str(sub_id) in client.info()["subscribers"]
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_reads_share_one_command():
+    client = HAWebSocketClient("http://localhost:8123", "t")
+    sock = FakeHASocket([{"entity_id": "light.a", "state": "on"}])
+    _attach(client, sock)
+
+    results = await asyncio.gather(
+        client.get_states(),
+        client.get_states("light.a"),
+        client.get_states(),
+        client.get_services(),
+        client.get_services(),
+    )
+    assert results[0] is results[2]
+    assert results[1]["state"] == "on"
+    assert sorted(m["type"] for m in sock.sent_messages) == ["get_services", "get_states"]
+    assert client.info()["reads"]["coalesced"] == 3
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_coalesced_read_survives_leader_cancellation():
+    client = HAWebSocketClient("http://localhost:8123", "t")
+    sock = FakeHASocket([{"entity_id": "light.a", "state": "on"}])
+    _attach(client, sock)
+    gate = asyncio.Event()
+    real_send = sock.send
+
+    async def slow_send(message):
+        await gate.wait()
+        await real_send(message)
+
+    sock.send = slow_send
+    leader = asyncio.create_task(client.get_states())
+    await asyncio.sleep(0)
+    joiner = asyncio.create_task(client.get_states())
+    await asyncio.sleep(0)
+    leader.cancel()
+    await asyncio.sleep(0)
+    gate.set()
+    assert (await asyncio.wait_for(joiner, 1))[0]["entity_id"] == "light.a"
+    assert leader.cancelled()
+    assert client.pending_responses == {}
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_read_micro_cache_honours_ttl_fresh_and_service_calls():
+    client = HAWebSocketClient("http://localhost:8123", "t", read_cache_ttl=30)
+    sock = FakeHASocket([{"entity_id": "light.a", "state": "on"}])
+    _attach(client, sock)
+
+    await client.get_states()
+    await client.get_states("light.a")
+    assert len(sock.sent_messages) == 1
+    assert client.info()["reads"]["cache_hits"] == 1
+
+    await client.get_states(fresh=True)
+    assert len(sock.sent_messages) == 2
+
+    await client.call_service("light", "turn_off", "light.a")
+    await client.get_states()
+    assert [m["type"] for m in sock.sent_messages][-2:] == ["call_service", "get_states"]
+    await client.disconnect()
+
+
+class HeldReplySocket(FakeHASocket):
+    """Records frames immediately but only answers when released."""
+
+    def __init__(self, failing=()):
+        super().__init__([])
+        self.held = []
+        self.failing = set(failing)
+
+    async def send(self, message):
+        sent = json.loads(message)
+        self.sent_messages.append(sent)
+        ok = sent.get("service_data", {}).get("entity_id") not in self.failing
+        self.held.append({"id": sent["id"], "type": "result", "success": ok,
+                          "result": {"context": {"id": str(sent["id"])}}})
+
+    def release(self):
+        held, self.held = self.held, []
+        for frame in held:
+            self.push(frame)
+
+
+async def _settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_call_services_batch_pipelines_and_keeps_entity_order():
+    client = HAWebSocketClient("http://localhost:8123", "t")
+    sock = HeldReplySocket()
+    _attach(client, sock)
+    batch = asyncio.create_task(client.call_services_batch([
+        {"domain": "light", "service": "turn_on", "entity_id": "light.a"},
+        {"domain": "light", "service": "turn_on", "entity_id": "light.b"},
+        {"domain": "light", "service": "turn_off", "entity_id": "light.a"},
+        {"domain": "lock", "service": "lock", "entity_id": "lock.door"},
+    ]))
+    await _settle()
+    # Three independent frames go out back-to-back; light.a's second call waits.
+    assert [(m["service"], m["service_data"]["entity_id"]) for m in sock.sent_messages] == [
+        ("turn_on", "light.a"), ("turn_on", "light.b"), ("lock", "lock.door"),
+    ]
+    sock.release()
+    await _settle()
+    assert sock.sent_messages[-1]["service"] == "turn_off"
+    sock.release()
+    results = await asyncio.wait_for(batch, 1)
+    assert [r["ok"] for r in results] == [True] * 4
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_call_services_batch_merges_only_when_order_is_safe():
+    client = HAWebSocketClient("http://localhost:8123", "t")
+    sock = FakeHASocket([])
+    _attach(client, sock)
+    results = await client.call_services_batch([
+        {"domain": "light", "service": "turn_on", "entity_id": "light.a", "data": {"brightness": 50}},
+        {"domain": "light", "service": "turn_off", "entity_id": "light.c"},
+        {"domain": "light", "service": "turn_on", "entity_id": "light.b", "data": {"brightness": 50}},
+        {"domain": "light", "service": "turn_on", "entity_id": "light.c", "data": {"brightness": 50}},
+        {"domain": "light", "service": "turn_on", "entity_id": "light.d", "data": {"brightness": 80}},
+    ], merge=True)
+    sent = [m["service_data"] for m in sock.sent_messages]
+    assert {"entity_id": ["light.a", "light.b"], "brightness": 50} in sent
+    # light.c was switched off in between, so its turn_on stays separate.
+    assert {"entity_id": "light.c", "brightness": 50} in sent
+    assert len(sent) == 4
+    assert [r["merged"] for r in results] == [2, 1, 2, 1, 1]
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_call_services_batch_skips_dependents_of_a_failed_call():
+    client = HAWebSocketClient("http://localhost:8123", "t")
+    sock = HeldReplySocket(failing={"light.a"})
+    _attach(client, sock)
+    batch = asyncio.create_task(client.call_services_batch([
+        {"domain": "light", "service": "turn_on", "entity_id": "light.a"},
+        {"domain": "light", "service": "turn_off", "entity_id": "light.a"},
+        {"domain": "scene", "service": "turn_on", "data": {"area_id": "kitchen"}},
+        {"domain": "light", "service": "turn_on", "entity_id": "light.b"},
+    ]))
+    for _ in range(3):
+        await _settle()
+        sock.release()
+    results = await asyncio.wait_for(batch, 1)
+    assert results[0]["ok"] is False and results[0]["skipped"] is False
+    # The area-targeted call is a barrier, so everything after it is skipped too.
+    assert [r.get("skipped") for r in results[1:]] == [True, True, True]
+    assert len(sock.sent_messages) == 1
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_call_services_batch_keeps_entity_id_of_unbounded_calls():
+    client = HAWebSocketClient("http://localhost:8123", "t")
+    sock = FakeHASocket([])
+    _attach(client, sock)
+    await client.call_services_batch([
+        {"domain": "light", "service": "turn_off", "entity_id": "all"},
+        {"domain": "light", "service": "turn_on", "entity_id": "light.a",
+         "data": {"area_id": "kitchen"}},
+    ])
+    assert [m["service_data"] for m in sock.sent_messages] == [
+        {"entity_id": "all"},
+        {"entity_id": "light.a", "area_id": "kitchen"},
+    ]
+    await client.disconnect()
@@ -0,0 +1,125 @@
+"""Smoke tests for record/replay LLM cassettes."""
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, Dict, List
+
+import pytest
+
+from llm_cassette import Cassette, CassetteMiss, RecordingBackend, ReplayBackend, request_key
+from reasoning_harness import LLMResponse, ReasoningHarness, ToolCall, ToolRegistry
+from tests.test_streaming_and_prompts_smoke import agent_factory  # noqa: F401
+
+
+class LivelyLLM:
+    """Stands in for a real model: fresh tool-call ids on every run."""
+
+    name = "lively"
+    model = "lively:1b"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def chat(self, messages, tools):
+        self.calls += 1
+        if not [m for m in messages if m.get("role") == "tool"]:
+            return LLMResponse(content="", tool_calls=[ToolCall(
+                id=f"call-{time.perf_counter_ns()}", name="read_state",
+                arguments={"entity_id": "lock.front_door"},
+            )], usage={"input_tokens": 40, "output_tokens": 5})
+        return LLMResponse(content="The front door is locked.", usage={"input_tokens": 60})
+
+
+def _registry() -> ToolRegistry:
+    async def executor(name, args):
+        # ``last_changed`` differs on every call, as it would against live HA.
+        return {"entity_id": args["entity_id"], "state": "locked",
+                "last_changed": str(time.perf_counter_ns())}
+
+    registry = ToolRegistry()
+    registry.register("local", [{"type": "function", "function": {
+        "name": "read_state", "parameters": {"type": "object"},
+    }}], executor)
+    return registry
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("suffix", ["jsonl", "jsonl.gz"])
+async def test_recorded_runs_replay_without_the_model(tmp_path, suffix):
+    path = tmp_path / f"run.{suffix}"
+    live = LivelyLLM()
+    recorder = RecordingBackend(live, Cassette.load(path))
+    recorded = await ReasoningHarness(recorder, _registry(), "system").run("Is the front door locked?")
+
+    assert recorder.recorded == 2 and recorder.model == "lively:1b"
+    replay = ReplayBackend(Cassette.load(path))
+    replayed = [
+        await ReasoningHarness(replay, _registry(), "system").run("Is the front door locked?")
+        for _ in range(3)
+    ]
+
+    assert live.calls == 2
+    assert {r.answer for r in replayed} == {recorded.answer}
+    assert [r.tool_calls for r in replayed] == [1, 1, 1]
+    assert replayed[0].usage["input_tokens"] == recorded.usage["input_tokens"]
+    assert replay.info() == {"entries": 2, "hits": 6, "misses": 0}
+
+
+@pytest.mark.asyncio
+async def test_unrecorded_requests_miss_and_latency_is_synthetic():
+    cassette = Cassette()
+    messages = [{"role": "user", "content": "hi"}]
+    cassette.add(messages, [], LLMResponse(content="first"), latency_ms=40)
+    cassette.add(messages, [], LLMResponse(content="second"), latency_ms=40)
+
+    replay = ReplayBackend(cassette, latency_ms=None, latency_scale=0.5)
+    started = time.perf_counter()
+    answers = [(await replay.chat(messages, [])).content for _ in range(3)]
+
+    assert answers == ["first", "second", "first"]
+    assert time.perf_counter() - started >= 0.06
+    # A differently pruned tool block still finds the recording.
+    assert (await replay.chat(messages, [{"type": "function"}])).content == "first"
+    with pytest.raises(CassetteMiss):
+        await replay.chat([{"role": "user", "content": "bye"}], [])
+    assert replay.misses == 1
+
+
+def test_request_key_ignores_call_ids_and_volatile_fields():
+    def conversation(call_id: str, changed: str) -> List[Dict[str, Any]]:
+        return [
+            {"role": "user", "content": "door?"},
+            {"role": "assistant", "content": "", "tool_calls": [
+                {"id": call_id, "function": {"name": "read_state", "arguments": '{"entity_id": "lock.a"}'}},
+            ]},
+            {"role": "tool", "tool_call_id": call_id,
+             "content": json.dumps({"state": "locked", "last_changed": changed})},
+        ]
+
+    assert request_key(conversation("a", "t1"), []) == request_key(conversation("b", "t2"), [])
+    unlocked = conversation("a", "t1")
+    unlocked[2]["content"] = json.dumps({"state": "unlocked"})
+    assert request_key(unlocked, [])[0] != request_key(conversation("a", "t1"), [])[0]
+
+
+@pytest.mark.asyncio
+async def test_agent_plan_mode_replays_from_a_cassette(agent_factory, tmp_path):  # noqa: F811
+    path = tmp_path / "agent.jsonl"
+    script = [
+        LLMResponse(content="", tool_calls=[ToolCall(id="c1", name="turn_on_light",
+                                                      arguments={"entity_id": "light.hall"})]),
+        LLMResponse(content="Plan ready."),
+    ]
+    agent, _ = agent_factory(script, default_mode="plan")
+    agent.llm = agent.harness.llm = RecordingBackend(agent.llm, Cassette.load(path))
+    recorded = await agent.run("Turn on the hall light", mode="plan")
+
+    replayer, fired = agent_factory([], default_mode="plan")
+    replayer.llm = replayer.harness.llm = ReplayBackend(Cassette.load(path))
+    replayed = await replayer.run("Turn on the hall light", mode="plan")
+
+    assert replayed.answer == recorded.answer == "Plan ready."
+    assert replayed.mode == "plan" and fired == []
+    assert [i["tool_name"] for i in replayed.plan["intents"]] == ["turn_on_light"]
+    assert replayed.plan["intents"][0]["arguments"] == recorded.plan["intents"][0]["arguments"]
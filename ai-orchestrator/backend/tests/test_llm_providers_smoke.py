@@ -7,6 +7,7 @@ inside the provider classes so we exercise the routing/credential logic.
 """
 from __future__ import annotations
 
+import asyncio
 import os
 import sys
 import types
@@ -248,3 +249,119 @@ def test_make_tool_backend_foundry_without_endpoint_falls_back(monkeypatch):
     monkeypatch.delenv("FOUNDRY_BEARER_TOKEN", raising=False)
     backend = llm_providers.make_tool_backend(model="gpt-4o-mini")
     assert backend.name == "ollama"
+
+
+# ---------------------------------------------------------------------------
+# achat — native async calls over shared connection pools
+# ---------------------------------------------------------------------------
+@pytest.fixture
+def no_worker_threads(monkeypatch):
+    async def _forbidden(*_args, **_kwargs):
+        raise AssertionError("achat must not fall back to a worker thread")
+
+    monkeypatch.setattr(llm_providers.asyncio, "to_thread", _forbidden)
+
+
+@pytest.mark.asyncio
+async def test_shared_http_client_is_pooled_per_origin():
+    import httpx
+
+    first = llm_providers.shared_async_http_client("https://example.test/v1")
+    again = llm_providers.shared_async_http_client("https://EXAMPLE.test/openai/deployments")
+    other = llm_providers.shared_async_http_client("https://other.test")
+
+    assert first is again and first is not other
+    assert isinstance(first, httpx.AsyncClient)
+    await llm_providers.aclose_shared_clients()
+    assert first.is_closed and other.is_closed
+    assert llm_providers.shared_async_http_client("https://example.test") is not first
+    await llm_providers.aclose_shared_clients()
+
+
+@pytest.mark.asyncio
+async def test_client_replaced_for_a_new_loop_is_closed_on_its_own_loop():
+    other_loop = asyncio.new_event_loop()
+
+    async def _make():
+        return llm_providers.shared_async_http_client("https://replaced.test")
+
+    try:
+        # Another thread's loop, idle once the client exists.
+        stale = await asyncio.to_thread(other_loop.run_until_complete, _make())
+        fresh = llm_providers.shared_async_http_client("https://replaced.test")
+        assert fresh is not stale and not stale.is_closed
+
+        await asyncio.to_thread(other_loop.run_until_complete, llm_providers.aclose_shared_clients())
+        assert stale.is_closed and not fresh.is_closed
+    finally:
+        other_loop.close()
+        await llm_providers.aclose_shared_clients()
+
+
+@pytest.mark.asyncio
+async def test_foundry_achat_shares_one_pool_across_providers(monkeypatch, no_worker_threads):
+    import httpx
+
+    urls: list = []
+
+    def handler(request):
+        urls.append(str(request.url))
+        return httpx.Response(200, json={"choices": [{"message": {"content": " hi "}}]})
+
+    real_client = httpx.AsyncClient
+    created: list = []
+
+    def _mock_client(**kwargs):
+        created.append(kwargs)
+        return real_client(transport=httpx.MockTransport(handler), **kwargs)
+
+    monkeypatch.setattr(httpx, "AsyncClient", _mock_client)
+    providers = [
+        llm_providers._FoundryChatProvider(endpoint="https://foundry.test", api_key="k")
+        for _ in range(2)
+    ]
+
+    outputs = [await p.achat("gpt-4o", [{"role": "user", "content": "hi"}]) for p in providers]
+
+    assert outputs == ["hi", "hi"]
+    assert len(created) == 1 and len(urls) == 2
+    assert isinstance(created[0]["limits"], httpx.Limits)
+    await llm_providers.aclose_shared_clients()
+
+
+@pytest.mark.asyncio
+async def test_ollama_achat_reuses_shared_async_client(monkeypatch, no_worker_threads):
+    clients: list = []
+
+    class _FakeAsyncClient:
+        def __init__(self, host, **kwargs):
+            self.host, self.kwargs, self.calls = host, kwargs, []
+            clients.append(self)
+
+        async def chat(self, **kwargs):
+            self.calls.append(kwargs)
+            return {"message": {"content": "async gemma"}}
+
+    monkeypatch.setattr("ollama.AsyncClient", _FakeAsyncClient)
+    first = llm_providers._OllamaChatProvider(host="http://ollama.test:11434")
+    second = llm_providers._OllamaChatProvider(host="http://ollama.test:11434")
+
+    assert await first.achat("gemma4:e4b", [{"role": "user", "content": "a"}]) == "async gemma"
+    await second.achat("qwen3:8b", [{"role": "user", "content": "b"}], max_tokens=64)
+
+    assert len(clients) == 1 and clients[0].kwargs["timeout"] == 180.0
+    assert clients[0].calls[0]["think"] is False
+    assert clients[0].calls[0]["options"]["top_k"] == 64
+    assert clients[0].calls[1]["options"] == {"temperature": 0.7, "num_predict": 64}
+    llm_providers._SHARED_CLIENTS.clear()
+
+
+@pytest.mark.asyncio
+async def test_sync_only_providers_fall_back_to_a_thread():
+    class _SyncOnly(llm_providers.ChatProvider):
+        name = "sync-only"
+
+        def chat(self, model, messages, *, temperature=0.7, max_tokens=1000, extra_options=None):
+            return f"{model}:{max_tokens}"
+
+    assert await _SyncOnly().achat("m", [], max_tokens=7) == "m:7"
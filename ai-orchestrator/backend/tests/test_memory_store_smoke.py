@@ -379,7 +379,9 @@ async def test_deep_reasoner_injects_recall_into_system_prompt(monkeypatch):
     await agent.run("Investigate kitchen lights coming on overnight")
 
     assert seen_system_prompts, "no system prompt was sent"
-    full_prompt = seen_system_prompts[0]
+    # The recall block follows the fixed prompt as its own system message.
+    full_prompt = "\n\n".join(seen_system_prompts)
+    assert "Relevant past experience" not in seen_system_prompts[0]
     assert "Relevant past experience" in full_prompt
     assert "kitchen lights" in full_prompt.lower()
     assert "stuck motion sensor" in full_prompt.lower()
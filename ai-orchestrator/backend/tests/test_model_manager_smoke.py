@@ -0,0 +1,176 @@
+"""Smoke tests for model warm-up, keep-alive pinning and cold-start metrics."""
+from __future__ import annotations
+
+import json
+import time
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+import model_manager
+from model_manager import ModelLifecycleManager, keep_alive_for, observe_model_timing, response_timings
+
+
+class FakeOllama:
+    """``/api/ps``, ``/api/generate`` and ``/api/embed`` for a few models."""
+
+    def __init__(self) -> None:
+        self.loaded = {}
+        self.requests = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if path == "/api/ps":
+            return httpx.Response(200, json={"models": [
+                {"name": name, "expires_at": expires, "size_vram": 1024}
+                for name, expires in self.loaded.items()
+            ]})
+        body = json.loads(request.content)
+        self.requests.append((path, body))
+        name = body["model"] if ":" in body["model"] else f"{body['model']}:latest"
+        load_ns = 0 if name in self.loaded else 2_400_000_000
+        expires = datetime.fromtimestamp(time.time() + 3600, timezone.utc)
+        self.loaded[name] = expires.strftime("%Y-%m-%dT%H:%M:%S.%f") + "123Z"  # ns precision
+        return httpx.Response(200, json={
+            "load_duration": load_ns, "prompt_eval_duration": 80_000_000,
+            "total_duration": load_ns + 90_000_000,
+        })
+
+
+@pytest.fixture
+def ollama():
+    fake = FakeOllama()
+    client = httpx.AsyncClient(transport=httpx.MockTransport(fake.handler))
+    yield fake, client
+    model_manager.install(None)
+
+
+def _manager(client, monkeypatch) -> ModelLifecycleManager:
+    monkeypatch.setenv("MODEL_KEEP_ALIVE_REASONING", "-1")
+    monkeypatch.setenv("OLLAMA_KEEP_ALIVE", "45m")
+    return ModelLifecycleManager.from_env(
+        "http://ollama.test:11434", reasoning="gemma4:e4b", dashboard="gemma4:e4b",
+        embedding="nomic-embed-text", client=client,
+    )
+
+
+@pytest.mark.asyncio
+async def test_startup_warms_each_model_once_with_its_pin(ollama, monkeypatch):
+    fake, client = ollama
+    manager = _manager(client, monkeypatch)
+
+    first = await manager.refresh()
+    assert first["resident"] == ["gemma4:e4b", "nomic-embed-text"]
+    assert [(path, body["model"], body["keep_alive"]) for path, body in fake.requests] == [
+        ("/api/generate", "gemma4:e4b", "-1"),
+        ("/api/embed", "nomic-embed-text", "45m"),
+    ]
+    assert all(w["cold"] and w["load_ms"] == 2400.0 for w in first["warmed"])
+
+    second = await manager.refresh()
+    assert second["warmed"] == [] and len(fake.requests) == 2
+
+    models = manager.info()["models"]
+    assert models["gemma4:e4b"]["roles"] == ["reasoning", "dashboard"]
+    assert models["gemma4:e4b"]["resident"] and models["gemma4:e4b"]["expires_at"] > time.time()
+    assert models["gemma4:e4b"]["ttft_ms_cold_p50"] == 2480.0
+
+
+@pytest.mark.asyncio
+async def test_evicted_models_are_rewarmed_and_requests_are_measured(ollama, monkeypatch):
+    fake, client = ollama
+    manager = _manager(client, monkeypatch)
+    await manager.refresh()
+    fake.loaded.pop("nomic-embed-text:latest")
+
+    again = await manager.refresh()
+    assert [w["model"] for w in again["warmed"]] == ["nomic-embed-text"]
+
+    model_manager.install(manager)
+    assert keep_alive_for("gemma4:e4b", "5m") == "-1"
+    assert keep_alive_for("llama3:8b", "5m") == "5m"
+    observe_model_timing("gemma4:e4b", **response_timings({
+        "load_duration": 1_000_000, "prompt_eval_duration": 120_000_000,
+    }))
+    observe_model_timing("gemma4:e4b", **response_timings({"load_duration": 3_000_000_000}))
+
+    stats = manager.info()["models"]["gemma4:e4b"]
+    assert (stats["requests"], stats["cold_requests"]) == (2, 1)
+    assert stats["ttft_ms_warm_p50"] == 121.0 and stats["last_load_ms"] == 3000.0
+
+
+@pytest.mark.asyncio
+async def test_warmup_failure_is_reported_not_raised(monkeypatch):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(
+        lambda request: httpx.Response(404, json={"error": "model not found"}),
+    ))
+    manager = ModelLifecycleManager("http://ollama.test:11434", [
+        model_manager.ModelSpec("missing:1b", ["reasoning"]),
+    ], client=client)
+
+    result = await manager.refresh()
+    assert result["resident"] == [] and result["warmed"][0]["ok"] is False
+    assert manager.info()["models"]["missing:1b"]["warmup_failures"] == 1
+    assert keep_alive_for("missing:1b") is None  # nothing installed
+
+
+def test_rag_embeddings_report_cold_loads(ollama, monkeypatch, tmp_path):
+    import rag_manager
+
+    _, client = ollama
+    manager = _manager(client, monkeypatch)
+    model_manager.install(manager)
+    calls = []
+
+    def fake_embed(model, input, **kwargs):
+        calls.append(kwargs)
+        load = 1_800_000_000 if len(calls) == 1 else 2_000_000
+        return {"embeddings": [[0.1, 0.2]], "load_duration": load}
+
+    monkeypatch.setattr(rag_manager.ollama, "embed", fake_embed)
+    rm = rag_manager.RagManager(persist_dir=str(tmp_path / "chroma"), embedding_model="nomic-embed-text")
+    assert rm._generate_embedding("a") == [0.1, 0.2]
+    rm._generate_embedding("b")
+
+    stats = manager.info()["models"]["nomic-embed-text"]
+    assert calls[0] == {"keep_alive": "45m"}
+    assert (stats["requests"], stats["cold_requests"]) == (2, 1)
+    assert stats["last_load_ms"] == 1800.0
+
+
+def test_rag_keeps_legacy_vectors_comparable_until_reembedded(monkeypatch, tmp_path):
+    import chromadb
+    import rag_manager
+    from chromadb.config import Settings
+
+    persist = str(tmp_path / "chroma")
+    old = chromadb.PersistentClient(path=persist, settings=Settings(anonymized_telemetry=False))
+    old.get_or_create_collection(name="memory").add(
+        ids=["ep1"], documents=["heating decision"], embeddings=[[3.0, 4.0]],
+    )
+    calls = []
+
+    def fake_embeddings(model, prompt, **kwargs):
+        calls.append(("embeddings", prompt))
+        return {"embedding": [3.0, 4.0]}
+
+    def fake_embed(model, input, **kwargs):
+        calls.append(("embed", list(input)))
+        return {"embeddings": [[0.6, 0.8] for _ in input]}
+
+    monkeypatch.setattr(rag_manager.ollama, "embeddings", fake_embeddings)
+    monkeypatch.setattr(rag_manager.ollama, "embed", fake_embed)
+    rm = rag_manager.RagManager(persist_dir=persist, embedding_model="nomic-embed-text")
+
+    assert rm.legacy_embeddings
+    assert rm.query("heating", ["memory"])[0]["distance"] == pytest.approx(0.0)
+    assert calls == [("embeddings", "heating")]
+
+    assert rm.reembed() == {"memory": 1}
+    assert not rm.legacy_embeddings
+    assert rm.query("heating", ["memory"])[0]["distance"] == pytest.approx(0.0)
+    assert calls[1:] == [("embed", ["heating decision"]), ("embed", ["heating"])]
+
+    reopened = rag_manager.RagManager(persist_dir=persist, embedding_model="nomic-embed-text")
+    assert not reopened.legacy_embeddings
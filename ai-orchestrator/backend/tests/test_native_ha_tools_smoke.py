@@ -244,3 +244,17 @@ async def test_summarise_area_with_domain_restriction(tools):
 async def test_summarise_area_requires_area(tools):
     out = await tools.call("ha_summarise_area", {})
     assert out["ok"] is False
+
+
+@pytest.mark.asyncio
+async def test_area_falls_back_to_names_the_same_way_in_both_tools(tools):
+    # No area registry behind these states: both tools match names.
+    listed = await tools.call("ha_list_entities", {"area": "kitchen"})
+    summary = await tools.call("ha_summarise_area", {"area": "kitchen"})
+
+    assert summary["match"] == "name"
+    assert sorted(e["entity_id"] for e in listed["entities"]) == sorted(
+        e["entity_id"] for e in summary["by_domain"]["light"]
+    )
+    assert (await tools.call("ha_list_entities", {"area": "attic"}))["count"] == 0
+    assert (await tools.call("ha_summarise_area", {"area": "attic"}))["count"] == 0
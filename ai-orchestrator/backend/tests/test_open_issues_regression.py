@@ -43,16 +43,16 @@ def test_issue_2_auto_pulls_missing_embedding_model(tmp_path, monkeypatch):
 
     call_count = {"n": 0}
 
-    def fake_embeddings(model, prompt):
+    def fake_embed(model, input):
         call_count["n"] += 1
         if call_count["n"] == 1:
             raise RuntimeError(
                 'model "nomic-embed-text" not found, try pulling it first'
             )
-        return {"embedding": [0.1, 0.2, 0.3]}
+        return {"embeddings": [[0.1, 0.2, 0.3]]}
 
     fake_pull = MagicMock()
-    monkeypatch.setattr(rag_manager.ollama, "embeddings", fake_embeddings)
+    monkeypatch.setattr(rag_manager.ollama, "embed", fake_embed)
     monkeypatch.setattr(rag_manager.ollama, "pull", fake_pull)
 
     out = rm._generate_embedding("hello")
@@ -69,11 +69,11 @@ def test_issue_2_pull_only_attempted_once(tmp_path, monkeypatch):
         embedding_model="nomic-embed-text",
     )
 
-    def always_missing(model, prompt):
+    def always_missing(model, input):
         raise RuntimeError('model "nomic-embed-text" not found, try pulling it first')
 
     fake_pull = MagicMock(side_effect=RuntimeError("ollama unreachable"))
-    monkeypatch.setattr(rag_manager.ollama, "embeddings", always_missing)
+    monkeypatch.setattr(rag_manager.ollama, "embed", always_missing)
     monkeypatch.setattr(rag_manager.ollama, "pull", fake_pull)
 
     with pytest.raises(RuntimeError):
@@ -224,9 +224,7 @@ async def test_issue_17_dashboard_error_path_uses_recorded_host(monkeypatch, tmp
         {"entity_id": "light.x", "state": "on", "attributes": {}},
     ]))
     inst.ollama_host_used = "http://test-host:11434"
-    inst.ollama_client = SimpleNamespace()  # no ._client attr; old code blew up here
-    inst.llm_client = MagicMock()
-    inst.llm_client.chat.side_effect = RuntimeError("LLM exploded")
+    inst.llm_client = SimpleNamespace(chat=AsyncMock(side_effect=RuntimeError("LLM exploded")))
     inst._genai_client = None
     inst.use_gemini_for_dashboard = False
     inst.gemini_model_name = "gemini-1.5-pro"
@@ -265,8 +263,8 @@ async def test_legacy_dashboard_generation_does_not_block_event_loop(tmp_path):
     inst.dashboard_generation_timeout = 0.02
     inst.dashboard_dir = tmp_path
 
-    def slow_chat(**_kwargs):
-        time.sleep(0.1)
+    async def slow_chat(**_kwargs):
+        await asyncio.sleep(0.1)
         return {"message": {"content": "<html><body>late</body></html>"}}
 
     inst.llm_client = SimpleNamespace(chat=slow_chat)
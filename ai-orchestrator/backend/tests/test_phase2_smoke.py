@@ -66,11 +66,12 @@ class TestOrchestratorSmoke:
         )
         
         # Execute one workflow cycle
-        with patch.object(orchestrator.llm_client, 'chat') as mock_chat:
-            mock_chat.return_value = {
-                "message": {"content": '{"tasks": []}'}
-            }
-            await orchestrator.execute_workflow()
+        orchestrator.llm_client = MagicMock()
+        orchestrator.llm_client.chat = AsyncMock(return_value={
+            "message": {"content": '{"tasks": []}'}
+        })
+        await orchestrator.execute_workflow()
+        orchestrator.llm_client.chat.assert_awaited()
         
         # Verify workflow completed
         assert True  # No exceptions = success
@@ -129,6 +130,46 @@ class TestOrchestratorSmoke:
         assert len(result["conflicts"]) > 0
         assert result["conflicts"][0]["conflict_type"] == "mutual_exclusion"
 
+    @pytest.mark.asyncio
+    async def test_approved_actions_run_concurrently_in_entity_order(self, mock_ha_client, mock_agents):
+        """Independent actions overlap; actions on one entity keep their order"""
+        import asyncio
+        from orchestrator import Orchestrator
+        from approval_queue import ApprovalQueue
+
+        gate = asyncio.Event()
+        started = []
+
+        async def execute_tool(tool_name, parameters, agent_id):
+            started.append((tool_name, parameters["entity_id"]))
+            await gate.wait()
+            return {"ok": True, "tool": tool_name}
+
+        mcp = MagicMock()
+        mcp.execute_tool = execute_tool
+        orchestrator = Orchestrator(
+            ha_client=mock_ha_client,
+            mcp_server=mcp,
+            approval_queue=ApprovalQueue(db_path=":memory:"),
+            agents=mock_agents
+        )
+        state = {"approved_actions": [
+            {"tool": "turn_on_light", "parameters": {"entity_id": "light.a"}},
+            {"tool": "turn_on_light", "parameters": {"entity_id": "light.b"}},
+            {"tool": "turn_off_light", "parameters": {"entity_id": "light.a"}},
+        ]}
+        run = asyncio.create_task(orchestrator.execute_approved_actions(state))
+        for _ in range(5):
+            await asyncio.sleep(0)
+        assert started == [("turn_on_light", "light.a"), ("turn_on_light", "light.b")]
+
+        gate.set()
+        result = await asyncio.wait_for(run, 1)
+        assert started[-1] == ("turn_off_light", "light.a")
+        assert [r["tool"] for r in result["execution_results"]] == [
+            "turn_on_light", "turn_on_light", "turn_off_light",
+        ]
+
 
 @pytest.mark.smoke
 class TestApprovalQueueSmoke:
@@ -29,6 +29,7 @@ def mock_chroma_client():
     """Mock ChromaDB client"""
     mock_client = MagicMock()
     mock_collection = MagicMock()
+    mock_collection.count.return_value = 0
     mock_client.get_or_create_collection.return_value = mock_collection
 
     mock_collection.query.return_value = {
@@ -42,7 +43,7 @@ def mock_chroma_client():
 def mock_ollama():
     """Mock Ollama module"""
     with patch('rag_manager.ollama') as mock:
-        mock.embeddings.return_value = {"embedding": [0.1, 0.2, 0.3]}
+        mock.embed.return_value = {"embeddings": [[0.1, 0.2, 0.3]]}
         yield mock
 
 @pytest.fixture
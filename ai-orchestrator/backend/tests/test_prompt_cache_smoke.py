@@ -0,0 +1,199 @@
+"""Smoke tests for prompt-prefix caching across the LLM backends."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pytest
+
+from reasoning_harness import (
+    AnthropicBackend,
+    LLMResponse,
+    OllamaToolBackend,
+    OpenAIToolBackend,
+    ReasoningHarness,
+    ToolCall,
+    ToolRegistry,
+)
+
+
+def _schema(name: str) -> Dict[str, Any]:
+    return {"type": "function", "function": {"name": name, "parameters": {}}}
+
+
+def _anthropic(captured: List[Dict[str, Any]]) -> AnthropicBackend:
+    class Messages:
+        async def create(self, **kwargs):
+            captured.append(kwargs)
+            return SimpleNamespace(
+                content=[SimpleNamespace(type="text", text="ok")],
+                usage=SimpleNamespace(
+                    input_tokens=20, output_tokens=5,
+                    cache_read_input_tokens=1500, cache_creation_input_tokens=300,
+                ),
+                stop_reason="end_turn",
+            )
+
+    backend = AnthropicBackend.__new__(AnthropicBackend)
+    backend.model = "claude-test"
+    backend.max_tokens = 100
+    backend.effort = "medium"
+    backend.adaptive_thinking = False
+    backend.strict_tools = False
+    backend.prompt_cache = True
+    backend._last_tool_names = None
+    backend._client = SimpleNamespace(messages=Messages())
+    return backend
+
+
+@pytest.mark.asyncio
+async def test_anthropic_marks_stable_prefix_and_latest_turn():
+    captured: List[Dict[str, Any]] = []
+    backend = _anthropic(captured)
+    messages = [
+        {"role": "system", "content": "fixed prompt"},
+        {"role": "system", "content": "recalled episodes"},
+        {"role": "user", "content": "check the hall"},
+        {"role": "assistant", "content": "", "tool_calls": [{
+            "id": "c1", "type": "function",
+            "function": {"name": "read", "arguments": "{}"},
+        }]},
+        {"role": "tool", "tool_call_id": "c1", "name": "read", "content": '{"ok":true}'},
+    ]
+
+    resp = await backend.chat(messages, [_schema("a"), _schema("b")])
+
+    kwargs = captured[0]
+    assert "cache_control" not in kwargs["tools"][0]
+    assert kwargs["tools"][-1]["cache_control"] == {"type": "ephemeral"}
+    assert kwargs["system"][0] == {
+        "type": "text", "text": "fixed prompt", "cache_control": {"type": "ephemeral"},
+    }
+    assert kwargs["system"][1] == {"type": "text", "text": "recalled episodes"}
+    last = kwargs["messages"][-1]["content"][-1]
+    assert last["type"] == "tool_result" and last["cache_control"] == {"type": "ephemeral"}
+    # Earlier turns are left untouched.
+    assert kwargs["messages"][0]["content"] == "check the hall"
+    assert resp.usage["cached_input_tokens"] == 1500
+    assert resp.usage["cache_write_tokens"] == 300
+
+
+@pytest.mark.asyncio
+async def test_anthropic_caches_only_the_shared_core_when_the_selection_changes():
+    captured: List[Dict[str, Any]] = []
+    backend = _anthropic(captured)
+    messages = [{"role": "system", "content": "fixed prompt"}, {"role": "user", "content": "hi"}]
+    core = [_schema("ha_get_state"), _schema("ha_search_entities")]
+
+    await backend.chat(messages, core + [_schema("turn_on_light")])
+    await backend.chat(messages, core + [_schema("turn_on_light")])
+    await backend.chat(messages, core + [_schema("lock_door"), _schema("unlock_door")])
+
+    marked = [
+        [t["name"] for t in kwargs["tools"] if "cache_control" in t] for kwargs in captured
+    ]
+    assert marked == [["turn_on_light"], ["turn_on_light"], ["ha_search_entities"]]
+    assert all("cache_control" in kwargs["system"][0] for kwargs in captured)
+
+
+@pytest.mark.asyncio
+async def test_anthropic_cache_can_be_disabled():
+    captured: List[Dict[str, Any]] = []
+    backend = _anthropic(captured)
+    backend.prompt_cache = False
+    await backend.chat([{"role": "system", "content": "p"}, {"role": "user", "content": "u"}], [])
+    assert captured[0]["system"] == "p"
+    assert captured[0]["messages"] == [{"role": "user", "content": "u"}]
+
+
+@pytest.mark.asyncio
+async def test_ollama_keeps_model_resident_with_pinned_context(monkeypatch):
+    calls: List[Dict[str, Any]] = []
+
+    class FakeClient:
+        async def chat(self, **kwargs):
+            calls.append(kwargs)
+            return {"message": {"content": "ok"}}
+
+    monkeypatch.setattr("ollama.AsyncClient", lambda host: FakeClient())
+    monkeypatch.delenv("OLLAMA_KEEP_ALIVE", raising=False)
+    monkeypatch.setenv("OLLAMA_NUM_CTX", "16384")
+    backend = OllamaToolBackend(model="gemma4:e4b")
+
+    await backend.chat([{"role": "user", "content": "x"}], [], profile="rapid")
+    await backend.chat([{"role": "user", "content": "x"}], [], profile="deep")
+
+    assert [c["keep_alive"] for c in calls] == ["30m", "30m"]
+    assert [c["options"]["num_ctx"] for c in calls] == [16384, 16384]
+    explicit = OllamaToolBackend(model="gemma4:e4b", keep_alive="-1", num_ctx=8192)
+    assert (explicit.keep_alive, explicit.num_ctx) == ("-1", 8192)
+
+
+@pytest.mark.asyncio
+async def test_openai_chat_reports_cached_prompt_tokens():
+    class Completions:
+        async def create(self, **kwargs):
+            return SimpleNamespace(
+                choices=[SimpleNamespace(
+                    message=SimpleNamespace(content="ok", tool_calls=None),
+                    finish_reason="stop",
+                )],
+                usage=SimpleNamespace(
+                    prompt_tokens=2000, completion_tokens=10,
+                    prompt_tokens_details=SimpleNamespace(cached_tokens=1792),
+                ),
+            )
+
+    backend = OpenAIToolBackend.__new__(OpenAIToolBackend)
+    backend.model = "gpt-test"
+    backend.temperature = 0.2
+    backend.max_tokens = 100
+    backend._client = SimpleNamespace(chat=SimpleNamespace(completions=Completions()))
+
+    resp = await backend.chat([{"role": "user", "content": "x"}], [])
+    assert resp.usage == {"input_tokens": 2000, "output_tokens": 10, "cached_input_tokens": 1792}
+
+
+def test_tool_schemas_are_ordered_by_name():
+    async def executor(name, args):
+        return {"ok": True}
+
+    first, second = ToolRegistry(), ToolRegistry()
+    first.register("local", [_schema("b"), _schema("a")], executor)
+    first.register("mcp", [_schema("c")], executor)
+    second.register("mcp", [_schema("c")], executor)
+    second.register("local", [_schema("a"), _schema("b")], executor)
+    assert first.schemas() == second.schemas()
+    assert [s["function"]["name"] for s in first.schemas()] == ["a", "b", "c"]
+
+
+@pytest.mark.asyncio
+async def test_prefix_is_stable_across_runs_and_cached_usage_is_totalled():
+    seen: List[List[Dict[str, Any]]] = []
+
+    class CachingLLM:
+        name = "caching"
+
+        async def chat(self, messages, tools):
+            seen.append(messages)
+            done = sum(1 for m in messages if m["role"] == "tool")
+            usage = {"input_tokens": 100, "cached_input_tokens": 80}
+            if done:
+                return LLMResponse(content="done", usage=usage)
+            return LLMResponse(content="", usage=usage,
+                               tool_calls=[ToolCall(id="c1", name="read", arguments={})])
+
+    async def executor(name, args):
+        return {"ok": True}
+
+    registry = ToolRegistry()
+    registry.register("local", [_schema("read")], executor)
+    harness = ReasoningHarness(CachingLLM(), registry, "fixed prompt")
+
+    result = await harness.run("goal one", {"b": 1, "a": 2}, system_context="recall one")
+    await harness.run("goal two", system_context="recall two")
+
+    assert result.usage["cached_input_tokens"] == 160
+    assert seen[0][0] == seen[-1][0] == {"role": "system", "content": "fixed prompt"}
+    assert seen[0][1] == {"role": "system", "content": "recall one"}
+    assert '"a": 2,\n  "b": 1' in seen[0][2]["content"]
@@ -17,6 +17,8 @@ from reasoning_harness import (
     ToolCall,
     ToolRegistry,
     ToolSemantics,
+    _mutation_targets,
+    _plan_batch_stages,
 )
 
 
@@ -147,6 +149,77 @@ async def test_harness_runs_parallel_tool_calls():
     assert call_order.index(starts[-1]) < call_order.index(ends[0])
 
 
+READ = ToolSemantics(read_only=True, destructive=False, idempotent=True,
+                     parallel_safe=True, impact_level="read")
+WRITE = ToolSemantics(read_only=False, destructive=False, idempotent=True,
+                      parallel_safe=True, impact_level="low")
+
+
+def test_mutation_targets_are_bounded_entity_sets():
+    assert _mutation_targets({"entity_id": "light.a"}) == {"light.a"}
+    assert _mutation_targets({"target": {"entity_id": ["light.a", "light.b"]}}) == {"light.a", "light.b"}
+    assert _mutation_targets({"data": {"entity_id": "light.a, light.b"}}) == {"light.a", "light.b"}
+    assert _mutation_targets({"entity_id": "all"}) is None
+    assert _mutation_targets({"target": {"area_id": "kitchen"}}) is None
+    assert _mutation_targets({"service": "script.turn_on"}) is None
+
+
+def test_batch_stages_keep_reads_together_and_mutations_as_barriers():
+    calls = [
+        ToolCall(id="1", name="r", arguments={}),
+        ToolCall(id="2", name="r", arguments={"n": 2}),
+        ToolCall(id="3", name="w", arguments={"entity_id": "light.a"}),
+        ToolCall(id="4", name="w", arguments={"entity_id": "light.b"}),
+        ToolCall(id="5", name="w", arguments={"entity_id": "light.a"}),
+        ToolCall(id="6", name="r", arguments={"n": 6}),
+        ToolCall(id="7", name="w", arguments={"target": {"area_id": "hall"}}),
+        ToolCall(id="8", name="w", arguments={"entity_id": "light.c"}),
+    ]
+    semantics = [READ, READ, WRITE, WRITE, WRITE, READ, WRITE, WRITE]
+    assert _plan_batch_stages(calls, semantics) == [[0, 1], [2, 3], [4], [5], [6], [7]]
+    # Serial tools, and every mutation under a dry-run, stand alone.
+    serial = ToolSemantics()
+    assert _plan_batch_stages(calls[:4], [READ, serial, WRITE, WRITE]) == [[0], [1], [2, 3]]
+    assert _plan_batch_stages(calls[2:4], [WRITE, WRITE], group_mutations=False) == [[0], [1]]
+
+
+@pytest.mark.asyncio
+async def test_mixed_batch_runs_in_ordered_parallel_stages():
+    log: List[str] = []
+
+    async def executor(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
+        log.append(f"start:{args['n']}")
+        await asyncio.sleep(0.02)
+        log.append(f"end:{args['n']}")
+        return {"ok": True, "n": args["n"]}
+
+    registry = ToolRegistry()
+    registry.register("local", [{"type": "function", "function": {"name": "read", "parameters": {}}}],
+                      executor, semantics=READ)
+    registry.register("local", [{"type": "function", "function": {"name": "write", "parameters": {}}}],
+                      executor, semantics=WRITE)
+    llm = ScriptedLLM([
+        LLMResponse(content="", tool_calls=[
+            ToolCall(id="a", name="read", arguments={"n": 1}),
+            ToolCall(id="b", name="read", arguments={"n": 2}),
+            ToolCall(id="c", name="write", arguments={"n": 3, "entity_id": "light.a"}),
+            ToolCall(id="d", name="write", arguments={"n": 4, "entity_id": "light.b"}),
+            ToolCall(id="e", name="read", arguments={"n": 5}),
+        ]),
+        LLMResponse(content="Done."),
+    ])
+    harness = ReasoningHarness(llm=llm, tools=registry, system_prompt="sys")
+
+    result = await harness.run("mixed")
+
+    assert log == [
+        "start:1", "start:2", "end:1", "end:2",
+        "start:3", "start:4", "end:3", "end:4",
+        "start:5", "end:5",
+    ]
+    assert [r["result"]["n"] for r in result.trace[0].tool_results] == [1, 2, 3, 4, 5]
+
+
 @pytest.mark.asyncio
 async def test_harness_respects_max_iterations():
     async def fake_executor(name: str, args: Dict[str, Any]) -> Dict[str, Any]:
@@ -0,0 +1,184 @@
+"""Smoke tests for priority scheduling of reasoning runs."""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, List
+
+import pytest
+
+from reasoning_harness import LLMResponse, ReasoningHarness, ToolCall, ToolRegistry
+from run_scheduler import RunRejected, RunScheduler
+from tests.test_streaming_and_prompts_smoke import agent_factory  # noqa: F401
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+@pytest.mark.asyncio
+async def test_interactive_runs_use_the_reserve_instead_of_waiting():
+    scheduler = RunScheduler(max_concurrent=2)
+    trigger = await scheduler.acquire("trigger")
+    queued = asyncio.create_task(scheduler.acquire("trigger"))
+    await _settle()
+    assert scheduler.info()["classes"]["trigger"]["waiting"] == 1
+
+    chat = await asyncio.wait_for(scheduler.acquire("interactive"), timeout=1)
+
+    assert chat.wait_ms < 1000
+    assert scheduler.info()["running"] == 2
+    scheduler.release(chat)
+    scheduler.release(trigger)
+    scheduler.release(await queued)
+    assert scheduler.info()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_reserve_never_exceeds_the_configured_limit():
+    scheduler = RunScheduler(max_concurrent=1)
+    assert scheduler.info()["interactive_reserve"] == 0
+    trigger = await scheduler.acquire("trigger")
+    chat = asyncio.create_task(scheduler.acquire("interactive"))
+    await _settle()
+
+    assert not chat.done() and scheduler.info()["running"] == 1
+    scheduler.release(trigger)
+    scheduler.release(await chat)
+
+    scheduler = RunScheduler(max_concurrent=3, interactive_reserve=5)
+    assert scheduler.info()["interactive_reserve"] == 2
+    assert scheduler.info()["classes"]["prompt"]["limit"] == 1
+
+
+@pytest.mark.asyncio
+async def test_waiters_start_by_priority_then_fifo():
+    scheduler = RunScheduler(max_concurrent=1, interactive_reserve=0)
+    holder = await scheduler.acquire("trigger")
+    order: List[str] = []
+
+    async def run(priority: str, tag: str) -> None:
+        async with scheduler.slot(priority):
+            order.append(tag)
+
+    tasks = [
+        asyncio.create_task(run("background", "bg")),
+        asyncio.create_task(run("trigger", "t1")),
+        asyncio.create_task(run("trigger", "t2")),
+        asyncio.create_task(run("interactive", "chat")),
+    ]
+    await _settle()
+    assert scheduler.info()["classes"]["trigger"]["waiting"] == 2
+    scheduler.release(holder)
+    await asyncio.gather(*tasks)
+
+    assert order == ["chat", "t1", "t2", "bg"]
+    assert scheduler.info()["classes"]["trigger"]["started"] == 3
+
+
+@pytest.mark.asyncio
+async def test_full_queues_reject_fast():
+    scheduler = RunScheduler(max_concurrent=1, queue_limits={"background": 1})
+    holder = await scheduler.acquire("background")
+    queued = asyncio.create_task(scheduler.acquire("background"))
+    await _settle()
+
+    with pytest.raises(RunRejected) as exc:
+        await scheduler.acquire("background")
+
+    assert exc.value.priority == "background"
+    assert scheduler.info()["classes"]["background"]["rejected"] == 1
+    scheduler.release(holder)
+    scheduler.release(await queued)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiters_leave_the_queue():
+    scheduler = RunScheduler(max_concurrent=1)
+    holder = await scheduler.acquire("trigger")
+    waiting = asyncio.create_task(scheduler.acquire("trigger"))
+    await _settle()
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert scheduler.info()["classes"]["trigger"]["waiting"] == 0
+    scheduler.release(holder)
+    lease = await asyncio.wait_for(scheduler.acquire("trigger"), timeout=1)
+    scheduler.release(lease)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("priority", ["trigger", "background"])
+async def test_automation_runs_yield_to_chat_at_iteration_boundaries(priority):
+    # The shipped default: one slot and therefore no interactive reserve.
+    scheduler = RunScheduler(max_concurrent=1)
+    order: List[str] = []
+    release_chat = asyncio.Event()
+
+    class LoopingLLM:
+        name = "looping"
+
+        def __init__(self, tag: str, turns: int) -> None:
+            self.tag, self.turns, self.calls = tag, turns, 0
+
+        async def chat(self, messages, tools):
+            self.calls += 1
+            order.append(f"{self.tag}{self.calls}")
+            if self.calls >= self.turns:
+                return LLMResponse(content="done")
+            return LLMResponse(content="", tool_calls=[
+                ToolCall(id=str(self.calls), name="read", arguments={"n": self.calls}),
+            ])
+
+    async def executor(name, args):
+        if args["n"] == 1:
+            await release_chat.wait()
+        return {"ok": True}
+
+    registry = ToolRegistry()
+    registry.register("local", [{"type": "function", "function": {"name": "read", "parameters": {}}}],
+                      executor)
+    events: List[Dict[str, Any]] = []
+
+    async def on_event(event):
+        events.append(event)
+
+    async def background() -> Any:
+        async with scheduler.slot(priority) as lease:
+            harness = ReasoningHarness(LoopingLLM("bg", 3), registry, "system")
+            result = await harness.run("sweep", on_event=on_event, checkpoint=lease.checkpoint)
+            return result, lease
+
+    async def chat() -> None:
+        async with scheduler.slot("interactive"):
+            order.append("chat")
+
+    bg_task = asyncio.create_task(background())
+    await _settle()
+    chat_task = asyncio.create_task(chat())
+    await _settle()
+    release_chat.set()
+    await chat_task
+    result, lease = await bg_task
+
+    assert order == ["bg1", "chat", "bg2", "bg3"]
+    assert result.answer == "done"
+    assert lease.preemptions == 1
+    assert [e for e in events if e["type"] == "paused"]
+    assert scheduler.info()["classes"][priority]["preemptions"] == 1
+    assert scheduler.info()["running"] == 0
+
+
+@pytest.mark.asyncio
+async def test_agent_reports_priority_and_queue_wait(agent_factory):  # noqa: F811
+    agent, _ = agent_factory([LLMResponse(content="All clear.")])
+
+    events = [e async for e in agent.run_streaming("status?", mode="execute", priority="prompt")]
+
+    scheduled = [e for e in events if e["type"] == "scheduled"]
+    assert scheduled and scheduled[0]["priority"] == "prompt"
+    final = [e for e in events if e["type"] == "final"][0]["data"]
+    assert final["queue_wait_ms"] >= 0
+    assert agent.info()["scheduler"]["classes"]["prompt"]["started"] == 1
+    with pytest.raises(ValueError):
+        await agent.run("status?", mode="execute", priority="urgent")
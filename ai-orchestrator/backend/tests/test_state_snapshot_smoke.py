@@ -0,0 +1,146 @@
+"""Smoke tests for the persisted state snapshot (warm start)."""
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from ha_client import HAWebSocketClient
+from state_snapshot import StateSnapshotStore, checkpoint
+from tests.test_hass_client_integration import FakeHASocket, _attach
+
+
+def test_store_round_trip_replaces_previous_snapshot(tmp_path):
+    store = StateSnapshotStore(str(tmp_path / "snap.db"))
+    assert store.load() == ({}, None)
+
+    store.save({"light.a": {"entity_id": "light.a", "state": "on"}})
+    saved_at = store.save({"lock.door": {"entity_id": "lock.door", "state": "locked"}})
+    states, loaded_at = store.load()
+    assert states == {"lock.door": {"entity_id": "lock.door", "state": "locked"}}
+    assert loaded_at == saved_at
+
+
+@pytest.mark.asyncio
+async def test_restored_snapshot_serves_reads_before_ha_connects():
+    client = HAWebSocketClient("http://localhost:8123", "t", mirror_states=True)
+    client.restore_snapshot(
+        {"lock.door": {"entity_id": "lock.door", "state": "locked"}},
+        "2026-01-01T00:00:00+00:00",
+    )
+    # Not connected at all, yet the read answers from the snapshot.
+    assert (await client.get_states("lock.door"))["state"] == "locked"
+    info = client.info()
+    assert info["state_mirror"]["stale"] is True
+    assert info["first_answer"]["source"] == "snapshot"
+    # Nothing live to checkpoint yet.
+    assert client.mirror_checkpoint() is None
+
+
+@pytest.mark.asyncio
+async def test_snapshot_is_reconciled_then_checkpointed(tmp_path):
+    client = HAWebSocketClient("http://localhost:8123", "t", mirror_states=True)
+    client.restore_snapshot({
+        "lock.door": {"entity_id": "lock.door", "state": "locked"},
+        "light.gone": {"entity_id": "light.gone", "state": "on"},
+    }, "2026-01-01T00:00:00+00:00")
+    sock = FakeHASocket([{"entity_id": "lock.door", "state": "unlocked"}])
+    _attach(client, sock)
+
+    assert (await client.get_states("lock.door"))["state"] == "locked"
+    await client._restore_task
+    assert (await client.get_states("lock.door"))["state"] == "unlocked"
+    info = client.info()["state_mirror"]
+    assert info["stale"] is False and info["restored_from"] is None
+    assert info["resync_changed"] == 2
+
+    store = StateSnapshotStore(str(tmp_path / "snap.db"))
+    real_save = store.save_changes
+
+    def failing_save(changed, removed):
+        raise OSError("disk full")
+
+    store.save_changes = failing_save
+    assert await checkpoint(client, store) is False
+    store.save_changes = real_save  # the failed save is retried, not skipped
+    assert await checkpoint(client, store) is True
+    assert await checkpoint(client, store) is False  # unchanged since last save
+    states, _ = await asyncio.to_thread(store.load)
+    assert list(states) == ["lock.door"]
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_reconciling_a_restored_snapshot_fires_no_state_changes():
+    client = HAWebSocketClient("http://localhost:8123", "t", mirror_states=True)
+    client.restore_snapshot({
+        "lock.door": {"entity_id": "lock.door", "state": "locked"},
+    }, "2026-01-01T00:00:00+00:00")
+    sock = FakeHASocket([{"entity_id": "lock.door", "state": "unlocked"}])
+    _attach(client, sock)
+    events = []
+
+    async def on_change(event):
+        events.append(event)
+
+    await client.subscribe_state_changes(on_change)
+    await asyncio.sleep(0.05)
+
+    assert (await client.get_states("lock.door"))["state"] == "unlocked"
+    assert client.info()["state_mirror"]["resync_changed"] == 1
+    assert events == []  # the unlock happened while we were down
+    await client.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_checkpoints_write_only_changed_entities(tmp_path):
+    store = StateSnapshotStore(str(tmp_path / "snap.db"))
+    first = HAWebSocketClient("http://localhost:8123", "t", mirror_states=True)
+    _attach(first, FakeHASocket([{"entity_id": f"sensor.s{i}", "state": "1"} for i in range(5)]))
+    await first.get_states()
+    # Nothing restored, so the first checkpoint rewrites the whole snapshot.
+    assert first.mirror_checkpoint()[2] is None
+    assert await checkpoint(first, store) is True
+    await first.disconnect()
+
+    client = HAWebSocketClient("http://localhost:8123", "t", mirror_states=True)
+    client.restore_snapshot(*store.load())
+    # sensor.s4 was removed while the add-on was down.
+    sock = FakeHASocket([{"entity_id": f"sensor.s{i}", "state": "1"} for i in range(4)])
+    _attach(client, sock)
+    await client.get_states("sensor.s0")
+    await client._restore_task
+
+    statements = []
+    connect = store._conn
+
+    def traced():
+        conn = connect()
+        conn.set_trace_callback(statements.append)
+        return conn
+
+    store._conn = traced
+    real_save = store.save_changes
+
+    def save_while_changing(changed, removed):
+        # An event lands while the save is in flight: it stays pending.
+        client._mirror_put({"entity_id": "sensor.s2", "state": "8"})
+        return real_save(changed, removed)
+
+    store.save_changes = save_while_changing
+    client._mirror_put({"entity_id": "sensor.s1", "state": "7"})
+    assert await checkpoint(client, store) is True
+
+    writes = [s for s in statements if s.startswith(("INSERT", "DELETE"))]
+    assert "DELETE FROM states" not in writes
+    assert sum("INTO states" in s for s in writes) == 1
+    states, _ = store.load()
+    assert sorted(states) == [f"sensor.s{i}" for i in range(4)]
+    assert states["sensor.s1"]["state"] == "7"
+
+    _, changed, removed = client.mirror_checkpoint()
+    assert list(changed) == ["sensor.s2"] and removed == []
+    store.save_changes = real_save
+    assert await checkpoint(client, store) is True
+    assert client.mirror_checkpoint() is None
+    await client.disconnect()
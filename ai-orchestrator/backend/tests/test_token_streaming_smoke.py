@@ -0,0 +1,284 @@
+"""Smoke tests for token streaming from the LLM backends to the SSE stream."""
+from __future__ import annotations
+
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+import pytest
+
+from reasoning_harness import (
+    AnthropicBackend,
+    LLMResponse,
+    OllamaToolBackend,
+    OpenAIResponsesBackend,
+    OpenAIToolBackend,
+    ReasoningHarness,
+    ToolCall,
+    ToolRegistry,
+)
+from tests.test_streaming_and_prompts_smoke import agent_factory  # noqa: F401
+
+
+class _Stream:
+    def __init__(self, items):
+        self._items = list(items)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if not self._items:
+            raise StopAsyncIteration
+        return self._items.pop(0)
+
+
+def _collector():
+    tokens: List[str] = []
+
+    async def on_token(delta: str) -> None:
+        tokens.append(delta)
+
+    return tokens, on_token
+
+
+@pytest.mark.asyncio
+async def test_ollama_streams_deltas_and_returns_whole_tool_calls(monkeypatch):
+    captured: Dict[str, Any] = {}
+    chunks = [
+        {"message": {"content": "Checking "}},
+        {"message": {"content": "the lights."}},
+        {"message": {"content": "", "tool_calls": [
+            {"function": {"name": "ha_get_state", "arguments": {"entity_id": "light.hall"}}},
+        ]}},
+        {"message": {"content": ""}, "done": True, "done_reason": "stop",
+         "prompt_eval_count": 10, "eval_count": 4},
+    ]
+
+    class FakeClient:
+        async def chat(self, **kwargs):
+            captured.update(kwargs)
+            return _Stream(chunks)
+
+    monkeypatch.setattr("ollama.AsyncClient", lambda host: FakeClient())
+    backend = OllamaToolBackend(model="gemma4:e4b")
+    tokens, on_token = _collector()
+
+    resp = await backend.chat([{"role": "user", "content": "hall"}], [], on_token=on_token)
+
+    assert captured["stream"] is True
+    assert tokens == ["Checking ", "the lights."]
+    assert resp.content == "Checking the lights."
+    assert resp.tool_calls[0].name == "ha_get_state"
+    assert resp.tool_calls[0].arguments == {"entity_id": "light.hall"}
+    assert resp.usage == {"input_tokens": 10, "output_tokens": 4}
+    assert resp.stop_reason == "stop"
+
+
+@pytest.mark.asyncio
+async def test_openai_chat_assembles_split_tool_call_arguments():
+    captured: Dict[str, Any] = {}
+
+    def chunk(content=None, tool_calls=None, finish_reason=None, usage=None):
+        choices = [] if usage else [SimpleNamespace(
+            delta=SimpleNamespace(content=content, tool_calls=tool_calls),
+            finish_reason=finish_reason,
+        )]
+        return SimpleNamespace(choices=choices, usage=usage)
+
+    def fragment(index, id=None, name=None, arguments=None):
+        return SimpleNamespace(index=index, id=id,
+                               function=SimpleNamespace(name=name, arguments=arguments))
+
+    chunks = [
+        chunk(content="Dimming"),
+        chunk(content=" now"),
+        chunk(tool_calls=[fragment(0, id="c1", name="light_dim", arguments='{"lev')]),
+        chunk(tool_calls=[fragment(0, arguments='el": 30}')]),
+        chunk(tool_calls=[fragment(1, id="c2", name="ha_get_state", arguments="")]),
+        chunk(finish_reason="tool_calls"),
+        chunk(usage=SimpleNamespace(prompt_tokens=7, completion_tokens=5)),
+    ]
+
+    class Completions:
+        async def create(self, **kwargs):
+            captured.update(kwargs)
+            return _Stream(chunks)
+
+    backend = OpenAIToolBackend.__new__(OpenAIToolBackend)
+    backend.model = "gpt-test"
+    backend.temperature = 0.2
+    backend.max_tokens = 100
+    backend._client = SimpleNamespace(chat=SimpleNamespace(completions=Completions()))
+    tokens, on_token = _collector()
+
+    resp = await backend.chat([{"role": "user", "content": "dim"}], [], on_token=on_token)
+
+    assert captured["stream"] is True
+    assert captured["stream_options"] == {"include_usage": True}
+    assert tokens == ["Dimming", " now"]
+    assert resp.content == "Dimming now"
+    assert [(c.id, c.name, c.arguments) for c in resp.tool_calls] == [
+        ("c1", "light_dim", {"level": 30}),
+        ("c2", "ha_get_state", {}),
+    ]
+    assert resp.stop_reason == "tool_calls"
+    assert resp.usage == {"input_tokens": 7, "output_tokens": 5}
+
+
+@pytest.mark.asyncio
+async def test_openai_responses_streams_text_deltas():
+    final = SimpleNamespace(
+        id="resp1",
+        status="completed",
+        output=[],
+        output_text="All quiet.",
+        usage=SimpleNamespace(input_tokens=3, output_tokens=2,
+                              input_tokens_details=None, output_tokens_details=None),
+    )
+    events = [
+        SimpleNamespace(type="response.created"),
+        SimpleNamespace(type="response.output_text.delta", delta="All "),
+        SimpleNamespace(type="response.output_text.delta", delta="quiet."),
+        SimpleNamespace(type="response.completed", response=final),
+    ]
+
+    class Responses:
+        async def create(self, **kwargs):
+            assert kwargs["stream"] is True
+            return _Stream(events)
+
+    backend = OpenAIResponsesBackend.__new__(OpenAIResponsesBackend)
+    backend.model = "gpt-test"
+    backend.effort = "low"
+    backend.max_output_tokens = 100
+    backend.store = False
+    backend._client = SimpleNamespace(responses=Responses())
+    tokens, on_token = _collector()
+
+    resp = await backend.chat([{"role": "user", "content": "status"}], [], on_token=on_token)
+
+    assert tokens == ["All ", "quiet."]
+    assert resp.content == "All quiet."
+
+
+@pytest.mark.asyncio
+async def test_anthropic_streams_through_message_stream():
+    final = SimpleNamespace(
+        content=[SimpleNamespace(type="text", text="Hi there")],
+        usage=SimpleNamespace(input_tokens=2, output_tokens=2),
+        stop_reason="end_turn",
+    )
+
+    class Stream:
+        async def __aenter__(self):
+            self.text_stream = _Stream(["Hi", " there"])
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def get_final_message(self):
+            return final
+
+    backend = AnthropicBackend.__new__(AnthropicBackend)
+    backend.model = "claude-test"
+    backend.max_tokens = 100
+    backend.effort = None
+    backend.adaptive_thinking = False
+    backend.strict_tools = False
+    backend.prompt_cache = False
+    backend._client = SimpleNamespace(messages=SimpleNamespace(stream=lambda **kw: Stream()))
+    tokens, on_token = _collector()
+
+    resp = await backend.chat([{"role": "user", "content": "hi"}], [], on_token=on_token)
+
+    assert tokens == ["Hi", " there"]
+    assert resp.content == "Hi there"
+
+
+@pytest.mark.asyncio
+async def test_harness_emits_tokens_before_each_thought():
+    class StreamingLLM:
+        name = "streaming"
+
+        def __init__(self):
+            self.turn = 0
+
+        async def chat(self, messages, tools, *, on_token=None):
+            self.turn += 1
+            if self.turn == 1:
+                await on_token("Look")
+                await on_token("ing")
+                return LLMResponse(content="Looking",
+                                   tool_calls=[ToolCall(id="1", name="read", arguments={})])
+            await on_token("Done")
+            return LLMResponse(content="Done")
+
+    registry = ToolRegistry()
+
+    async def executor(name, args):
+        return {"ok": True}
+
+    registry.register(
+        provider="local",
+        schemas=[{"type": "function", "function": {"name": "read", "parameters": {}}}],
+        executor=executor,
+    )
+    events: List[Dict[str, Any]] = []
+
+    async def on_event(event):
+        events.append(event)
+
+    harness = ReasoningHarness(StreamingLLM(), registry, "system")
+    result = await harness.run("check", on_event=on_event, stream_tokens=True)
+
+    assert result.answer == "Done"
+    kinds = [(e["type"], e.get("iteration")) for e in events if e["type"] in ("token", "thought")]
+    assert kinds == [
+        ("token", 1), ("token", 1), ("thought", 1),
+        ("token", 2), ("thought", 2),
+    ]
+    assert "".join(e["delta"] for e in events if e["type"] == "token") == "LookingDone"
+
+    # Backends written against the two-argument protocol still work.
+    events.clear()
+    result = await ReasoningHarness(_PlainLLM(), registry, "system").run(
+        "check", on_event=on_event, stream_tokens=True,
+    )
+    assert result.answer == "plain"
+    assert not [e for e in events if e["type"] == "token"]
+
+
+class _PlainLLM:
+    name = "plain"
+
+    async def chat(self, messages, tools):
+        return LLMResponse(content="plain")
+
+
+@pytest.mark.asyncio
+async def test_run_streaming_yields_tokens_without_broadcasting_them(agent_factory):  # noqa: F811
+    agent, _ = agent_factory([])
+    broadcast: List[Dict[str, Any]] = []
+
+    async def on_event(event):
+        broadcast.append(event)
+
+    class StreamingLLM:
+        name = "streaming"
+
+        async def chat(self, messages, tools, *, on_token=None):
+            if on_token is not None:
+                await on_token("All ")
+                await on_token("clear.")
+            return LLMResponse(content="All clear.")
+
+    agent.harness.llm = StreamingLLM()
+    agent._on_event = on_event
+
+    events = [e async for e in agent.run_streaming("status?", mode="execute")]
+
+    types = [e["type"] for e in events]
+    assert types.index("token") < types.index("thought") < types.index("final")
+    assert [e["delta"] for e in events if e["type"] == "token"] == ["All ", "clear."]
+    assert broadcast and not [e for e in broadcast if e["type"] == "token"]
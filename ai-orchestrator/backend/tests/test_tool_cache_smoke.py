@@ -0,0 +1,259 @@
+"""Smoke tests for the cross-run read cache and its state-driven eviction."""
+from __future__ import annotations
+
+import inspect
+from typing import Any, Dict, List
+from unittest.mock import AsyncMock
+
+import pytest
+
+from reasoning_harness import (
+    LLMResponse,
+    ReasoningHarness,
+    ToolCall,
+    ToolRegistry,
+    ToolSemantics,
+)
+from tool_cache import SharedReadCache, result_dependencies
+
+
+class _FakeHA:
+    def __init__(self, *, inline: bool = True) -> None:
+        self.callbacks: Dict[int, Any] = {}
+        self.inline = inline
+        self.dropped = 0
+
+    async def subscribe_state_changes(self, callback, *, overflow=None, **kwargs) -> int:
+        if overflow == "inline" and not self.inline:
+            raise ValueError("Unknown overflow policy: inline")
+        sub_id = len(self.callbacks) + 1
+        self.callbacks[sub_id] = callback
+        return sub_id
+
+    def subscriber_stats(self, sub_id: int) -> Dict[str, Any]:
+        return {"dropped": self.dropped}
+
+    def unsubscribe(self, sub_id: int) -> None:
+        del self.callbacks[sub_id]
+
+    async def fire(self, entity_id: str, *, old: Any = "on", new: Any = "off") -> None:
+        event = {
+            "event_type": "state_changed",
+            "data": {
+                "entity_id": entity_id,
+                "old_state": None if old is None else {"state": old},
+                "new_state": None if new is None else {"state": new},
+            },
+        }
+        for callback in list(self.callbacks.values()):
+            outcome = callback(event)
+            if inspect.isawaitable(outcome):
+                await outcome
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def _live_cache(ha: Any = None, **kwargs) -> tuple:
+    ha = ha or _FakeHA()
+    cache = SharedReadCache(**kwargs)
+    assert await cache.attach(ha)
+    return cache, ha
+
+
+def _put(cache: SharedReadCache, key: str, result: Dict[str, Any], **arguments: Any) -> bool:
+    return cache.put(key, result, arguments, generation=cache.generation)
+
+
+def test_dependencies_come_from_arguments_and_results():
+    listing = {"ok": True, "entities": [{"entity_id": "light.a"}, {"entity_id": "light.b"}]}
+    assert result_dependencies({"domain": "light"}, listing) == (
+        frozenset({"light.a", "light.b"}), frozenset({"light"}), True,
+    )
+    assert result_dependencies({"entity_id": "sensor.t"}, {"ok": True, "state": "21"}) == (
+        frozenset({"sensor.t"}), frozenset(), False,
+    )
+
+
+@pytest.mark.asyncio
+async def test_state_changes_evict_only_dependent_entries():
+    cache, ha = await _live_cache()
+    _put(cache, "state:a", {"ok": True, "state": "on"}, entity_id="light.a")
+    _put(cache, "state:b", {"ok": True, "state": "on"}, entity_id="light.b")
+    _put(cache, "lights", {"ok": True, "entities": [{"entity_id": "light.a"}]}, domain="light")
+    _put(cache, "switches", {"ok": True, "entities": [{"entity_id": "switch.x"}]}, domain="switch")
+
+    await ha.fire("light.a")
+
+    assert cache.get("state:a") is None and cache.get("lights") is None
+    assert cache.get("state:b") is not None and cache.get("switches") is not None
+    assert cache.info()["evictions"]["state"] == 2
+
+
+@pytest.mark.asyncio
+async def test_added_entities_evict_listings_of_their_domain():
+    cache, ha = await _live_cache()
+    _put(cache, "lights", {"ok": True, "entities": []}, domain="light")
+    _put(cache, "switches", {"ok": True, "entities": []}, domain="switch")
+    _put(cache, "everything", {"ok": True, "entities": []})
+    _put(cache, "state:b", {"ok": True, "state": "on"}, entity_id="light.b")
+
+    await ha.fire("light.new", old=None, new="on")
+
+    assert cache.get("lights") is None and cache.get("everything") is None
+    assert cache.get("switches") is not None and cache.get("state:b") is not None
+    assert cache.info()["evictions"]["structure"] == 2
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_lru_bound_entries():
+    clock = _Clock()
+    cache, _ = await _live_cache(max_entries=2, ttl_seconds=10.0, clock=clock)
+    _put(cache, "a", {"ok": True}, entity_id="light.a")
+    _put(cache, "b", {"ok": True}, entity_id="light.b")
+    assert cache.get("a") is not None  # "b" is now least recently used
+    _put(cache, "c", {"ok": True}, entity_id="light.c")
+    assert cache.get("b") is None and len(cache) == 2
+
+    clock.now = 11.0
+    assert cache.get("a") is None
+    info = cache.info()
+    assert info["evictions"]["lru"] == 1 and info["evictions"]["ttl"] == 1
+    assert info["hits"] == 1 and info["misses"] == 2
+    assert info["hit_ratio"] == pytest.approx(1 / 3, abs=1e-4)
+
+
+@pytest.mark.asyncio
+async def test_reads_racing_an_invalidation_are_not_stored():
+    cache, ha = await _live_cache()
+    started = cache.generation
+    await ha.fire("sensor.other")
+    assert not cache.put("k", {"ok": True}, {"entity_id": "light.a"}, generation=started)
+    assert cache.get("k") is None and cache.info()["stale_stores"] == 1
+
+
+@pytest.mark.asyncio
+async def test_dropped_events_clear_the_cache_and_truncated_listings_are_not_stored(monkeypatch):
+    ha = _FakeHA(inline=False)  # queued delivery only
+    cache, _ = await _live_cache(ha)
+    _put(cache, "state:a", {"ok": True, "state": "on"}, entity_id="light.a")
+
+    ha.dropped = 3  # the subscriber queue overflowed
+    assert cache.get("state:a") is None
+    info = cache.info()
+    assert info["dropped_invalidations"] == 3 and info["evictions"]["dropped"] == 1
+
+    monkeypatch.setattr("tool_cache._MAX_TRACKED_ENTITIES", 2)
+    listing = {"ok": True, "entities": [{"entity_id": f"light.{n}"} for n in "abc"]}
+    assert not _put(cache, "lights", listing, domain="light")
+    assert cache.info()["untracked_stores"] == 1
+
+
+@pytest.mark.asyncio
+async def test_inline_feed_invalidates_before_the_next_read():
+    from ha_client import HAWebSocketClient
+
+    client = HAWebSocketClient("http://localhost:8123", "t")
+    client._ensure_router_upstream = AsyncMock()  # no HA connection in this test
+    cache = SharedReadCache()
+    assert await cache.attach(client)
+    _put(cache, "state:a", {"ok": True, "state": "on"}, entity_id="light.a")
+
+    for n in range(5):
+        client._emit_state_changed(f"sensor.noise_{n}", {"state": "1"}, {"state": "2"})
+    client._emit_state_changed("light.a", {"state": "on"}, {"state": "off"})
+
+    assert cache.get("state:a") is None  # no await needed: evicted inline
+    assert client.subscriber_stats(cache._sub_id)["dropped"] == 0
+    cache.detach()
+
+
+def test_cache_is_inert_until_attached():
+    cache = SharedReadCache()
+    assert not cache.put("k", {"ok": True}, {}, generation=cache.generation)
+    assert cache.get("k") is None and cache.info()["misses"] == 0
+
+
+def _harness(cache: SharedReadCache, calls: List[str], script: List[List[ToolCall]]):
+    turns = {"i": 0}
+
+    class ScriptedLLM:
+        name = "scripted"
+
+        async def chat(self, messages, tools):
+            if messages[-1]["role"] == "tool" or turns["i"] >= len(script):
+                return LLMResponse(content="done")
+            batch = script[turns["i"]]
+            turns["i"] += 1
+            return LLMResponse(content="", tool_calls=batch)
+
+        def reset(self):
+            turns["i"] = 0
+
+    async def executor(name, args):
+        calls.append(name)
+        return {"ok": True, "state": "on", "entity_id": args.get("entity_id")}
+
+    registry = ToolRegistry()
+    registry.register(
+        provider="native_ha",
+        schemas=[{"type": "function", "function": {"name": "ha_get_state", "parameters": {}}}],
+        executor=executor,
+        semantics=ToolSemantics(read_only=True, destructive=False, idempotent=True,
+                                impact_level="read", shared_cache=True),
+    )
+    registry.register(
+        provider="local",
+        schemas=[{"type": "function", "function": {"name": "call_ha_service", "parameters": {}}}],
+        executor=executor,
+    )
+    llm = ScriptedLLM()
+    return llm, ReasoningHarness(llm, registry, "system", shared_cache=cache)
+
+
+@pytest.mark.asyncio
+async def test_harness_serves_reads_across_runs_until_state_changes():
+    cache, ha = await _live_cache()
+    calls: List[str] = []
+    read = [ToolCall(id="r", name="ha_get_state", arguments={"entity_id": "light.a"})]
+    llm, harness = _harness(cache, calls, [read])
+
+    await harness.run("check")
+    llm.reset()
+    await harness.run("check again")
+    assert calls == ["ha_get_state"]
+    assert cache.info()["hits"] == 1
+
+    await ha.fire("light.a")
+    llm.reset()
+    await harness.run("check once more")
+    assert calls == ["ha_get_state"] * 2
+    assert cache.info()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_mutations_clear_the_cache_unless_simulated():
+    cache, _ = await _live_cache()
+    calls: List[str] = []
+    read = [ToolCall(id="r", name="ha_get_state", arguments={"entity_id": "light.a"})]
+    write = [ToolCall(id="w", name="call_ha_service", arguments={"service": "light.turn_on"})]
+    llm, harness = _harness(cache, calls, [read])
+    await harness.run("check")
+    assert len(cache) == 1
+
+    class DryRun:
+        async def call(self, name, arguments):
+            return {"ok": True, "simulated": True}
+
+    llm, harness = _harness(cache, calls, [write])
+    await harness.run("plan it", tool_call_interceptor=DryRun())
+    assert len(cache) == 1
+
+    llm.reset()
+    await harness.run("do it")
+    assert len(cache) == 0 and cache.info()["evictions"]["mutation"] == 1
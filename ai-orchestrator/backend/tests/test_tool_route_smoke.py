@@ -0,0 +1,123 @@
+"""Smoke tests for compiled tool routes: cached validators and call conventions."""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pytest
+
+import reasoning_harness
+from reasoning_harness import (
+    ToolExecutionContext,
+    ToolRegistry,
+    _compile_argument_check,
+    _context_convention,
+    _flat_object_check,
+)
+
+jsonschema = pytest.importorskip("jsonschema")
+
+FLAT = {
+    "type": "object",
+    "properties": {
+        "entity_id": {"type": "string", "description": "Target"},
+        "brightness": {"type": "integer"},
+        "level": {"type": ["number", "null"]},
+        "mode": {"type": "string", "enum": ["auto", "heat"]},
+        "flag": {"enum": [1, True]},
+    },
+    "required": ["entity_id"],
+    "additionalProperties": False,
+}
+
+CASES: List[Dict[str, Any]] = [
+    {"entity_id": "light.a"},
+    {"entity_id": "light.a", "brightness": 3},
+    {"entity_id": "light.a", "brightness": 3.0},
+    {"entity_id": "light.a", "brightness": 3.5},
+    {"entity_id": "light.a", "brightness": True},
+    {"entity_id": "light.a", "level": None},
+    {"entity_id": "light.a", "level": False},
+    {"entity_id": "light.a", "mode": "heat"},
+    {"entity_id": "light.a", "mode": "cool"},
+    {"entity_id": "light.a", "flag": True},
+    {"entity_id": "light.a", "flag": 1.0},
+    {"entity_id": "light.a", "flag": False},
+    {"entity_id": 5},
+    {"brightness": 3},
+    {"entity_id": "light.a", "extra": 1},
+]
+
+
+@pytest.mark.parametrize("arguments", CASES)
+def test_flat_fast_path_agrees_with_jsonschema(arguments):
+    validator = jsonschema.Draft202012Validator(FLAT)
+    expected = [
+        {"path": ".".join(str(p) for p in e.absolute_path) or "$", "message": e.message}
+        for e in sorted(validator.iter_errors(arguments), key=lambda e: list(e.absolute_path))
+    ]
+    if _flat_object_check(FLAT)(arguments):
+        assert expected == []  # the fast path never accepts invalid arguments
+    assert _compile_argument_check("t", FLAT)(arguments) == expected[:5]
+
+
+def test_nested_schemas_skip_the_fast_path():
+    nested = {
+        "type": "object",
+        "properties": {"ids": {"type": "array", "items": {"type": "string"}}},
+    }
+    assert _flat_object_check(nested) is None
+    check = _compile_argument_check("t", nested)
+    assert check({"ids": ["a"]}) == []
+    assert check({"ids": [1]})[0]["path"] == "ids.0"
+
+
+@pytest.mark.asyncio
+async def test_validator_is_compiled_once_at_register(monkeypatch):
+    built: List[Dict[str, Any]] = []
+    real = reasoning_harness.Draft202012Validator
+
+    def counting(schema):
+        built.append(schema)
+        return real(schema)
+
+    monkeypatch.setattr(reasoning_harness, "Draft202012Validator", counting)
+    seen: List[Any] = []
+
+    async def executor(name, args, context):
+        seen.append(context)
+        return {"ok": True}
+
+    registry = ToolRegistry()
+    registry.register(
+        provider="local",
+        schemas=[{"type": "function", "function": {"name": "read", "parameters": FLAT}}],
+        executor=executor,
+    )
+    context = ToolExecutionContext(run_id="r1")
+    for _ in range(3):
+        assert (await registry.call("read", {"entity_id": "light.a"}, context))["ok"]
+    bad = await registry.call("read", {"brightness": 1}, context)
+
+    assert len(built) == 1
+    assert bad["error_code"] == "invalid_arguments"
+    assert seen == [context] * 3
+
+
+def test_context_conventions_are_resolved_from_signatures():
+    class Interceptor:
+        async def call(self, name, arguments, context=None):
+            return None
+
+        def plain(self, name, arguments):
+            return None
+
+    def positional(name, arguments, ctx):
+        return None
+
+    interceptor = Interceptor()
+    assert _context_convention(interceptor.call) == "keyword"
+    assert _context_convention(interceptor.plain) == "none"
+    assert _context_convention(positional) == "positional"
+    assert _context_convention(lambda *a, **kw: None) == "keyword"
+    # Bound methods are served from the per-function signature cache.
+    assert Interceptor.call in reasoning_harness._SIGNATURE_CACHE
@@ -0,0 +1,104 @@
+"""Smoke tests for goal-aware tool schema pruning."""
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+import pytest
+
+from reasoning_harness import LLMResponse, ReasoningHarness, ToolCall, ToolRegistry
+from tool_selector import ToolSelector
+
+TOOLS = {
+    "turn_on_light": "Turn on a light, optionally with brightness",
+    "turn_off_light": "Turn off a light",
+    "set_brightness": "Set the brightness of a light",
+    "set_temperature": "Set the target temperature of a climate device",
+    "set_hvac_mode": "Set the HVAC mode of a thermostat",
+    "set_alarm_state": "Arm or disarm the alarm panel",
+    "lock_door": "Lock a door lock",
+    "unlock_door": "Unlock a door lock",
+    "enable_camera": "Enable or disable a camera",
+    "search_knowledge_base": "Search the knowledge base documents",
+    "call_ha_service": "Call any Home Assistant service",
+    "ha_get_state": "Get the state of one entity",
+    "ha_search_entities": "Search entities by name",
+    "ha_list_domains": "List entity domains with counts",
+    "ha_list_services": "List services available in a domain",
+    "ha_summarise_area": "Summarise the entities of an area",
+    "ext_get_weather": "Weather forecast for a location",
+    "ext_play_media": "Play media on a speaker",
+}
+CORE = ("ha_search_entities", "ha_get_state", "call_ha_service")
+
+
+def _schemas() -> List[Dict[str, Any]]:
+    return [
+        {"type": "function", "function": {
+            "name": name, "description": description,
+            "parameters": {"type": "object", "properties": {"entity_id": {"type": "string"}}},
+        }}
+        for name, description in sorted(TOOLS.items())
+    ]
+
+
+def _names(schemas: List[Dict[str, Any]]) -> List[str]:
+    return [s["function"]["name"] for s in schemas]
+
+
+def test_goal_keeps_relevant_tools_and_the_core():
+    selector = ToolSelector(top_k=4, core=CORE)
+    schemas = _schemas()
+
+    chosen = _names(selector.select("Turn off the kitchen lights", schemas))
+
+    assert {"turn_off_light", "turn_on_light", *CORE} <= set(chosen)
+    assert "set_alarm_state" not in chosen and "ext_play_media" not in chosen
+    assert len(chosen) <= 4 + len(CORE)
+    # The core leads in a fixed order so it stays a cacheable prompt prefix.
+    assert chosen[:len(CORE)] == sorted(CORE)
+    assert chosen[len(CORE):] == sorted(chosen[len(CORE):])
+    assert "lock_door" in _names(selector.select("Is the front door locked?", schemas))
+
+
+def test_small_registries_and_unmatched_goals_get_everything():
+    schemas = _schemas()
+    assert len(ToolSelector(top_k=4, core=CORE).select("zzz qqq", schemas)) == len(schemas)
+    assert len(ToolSelector(top_k=40).select("lights", schemas)) == len(schemas)
+
+
+@pytest.mark.asyncio
+async def test_harness_prunes_reports_savings_and_widens_on_unoffered_calls():
+    offered: List[List[str]] = []
+
+    class LLM:
+        name = "scripted"
+
+        async def chat(self, messages, tools):
+            offered.append(_names(tools))
+            if len(offered) == 1:
+                return LLMResponse(content="", tool_calls=[
+                    ToolCall(id="1", name="ext_get_weather", arguments={}),
+                ])
+            return LLMResponse(content="done")
+
+    async def executor(name, args):
+        return {"ok": True}
+
+    registry = ToolRegistry()
+    registry.register("local", _schemas(), executor)
+    events: List[Dict[str, Any]] = []
+
+    async def on_event(event):
+        events.append(event)
+
+    harness = ReasoningHarness(
+        LLM(), registry, "system", tool_selector=ToolSelector(top_k=3, core=CORE),
+    )
+    result = await harness.run("Turn off the kitchen lights", on_event=on_event)
+
+    assert len(offered[0]) <= 6 and len(offered[1]) == len(TOOLS)
+    selection = [e for e in events if e["type"] == "tool_selection"]
+    assert selection[0]["total"] == len(TOOLS)
+    assert selection[1]["widened"] is True and selection[1]["requested"] == ["ext_get_weather"]
+    saved = selection[0]["tokens_saved_per_call"]
+    assert saved > 0 and result.usage["tool_schema_tokens_saved"] == saved
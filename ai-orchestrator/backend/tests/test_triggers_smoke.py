@@ -275,6 +275,8 @@ async def test_cooldown_zero_means_no_throttle(store):
     store.save(spec)
     await reg._fire(spec, reason="a")
     assert reg._cooldown_ok(spec) is True
+    # An explicit 0 survives the store round-trip (it is not "unset").
+    assert store.get("s4").cooldown_seconds == 0
 
 
 # ---------------------------------------------------------------------------
@@ -435,3 +437,32 @@ async def test_evaluate_cron_fires_matching_trigger(store):
     await asyncio.sleep(0)
 
     assert fired == ["do every"]
+
+
+@pytest.mark.asyncio
+async def test_state_subscription_is_retargeted_without_resubscribing(store):
+    async def reasoner(goal, ctx):
+        return _StubReasonerResult()
+
+    class _Client:
+        connected = True
+
+        def __init__(self):
+            self.subscribed: List[List[str]] = []
+            self.watched: Dict[int, List[str]] = {}
+
+        async def subscribe_entities(self, entity_ids, callback):
+            self.subscribed.append(list(entity_ids))
+            return 7
+
+        def set_watched_entities(self, sub_id, entity_ids):
+            self.watched[sub_id] = list(entity_ids)
+
+    client = _Client()
+    reg = TriggerRegistry(store=store, reasoner_callback=reasoner, ha_client=client)
+    store.save(_state_spec("a", entity_id="binary_sensor.a", pattern="on"))
+    await reg._refresh_state_subscription()
+    store.save(_state_spec("b", entity_id="binary_sensor.b", pattern="on"))
+    await reg._refresh_state_subscription()
+    assert client.subscribed == [["binary_sensor.a"]]
+    assert client.watched[7] == ["binary_sensor.a", "binary_sensor.b"]
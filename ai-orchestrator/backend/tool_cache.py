@@ -0,0 +1,309 @@
+"""Process-wide cache for read-only Home Assistant tool results.
+
+The harness's own ``read_cache`` lives for one run. Back-to-back chat
+turns and trigger-fired runs repeat the same ``ha_list_entities`` /
+``ha_get_state`` calls, so :class:`SharedReadCache` keeps successful
+results across runs, keyed by the tool-call fingerprint.
+
+Each entry records what it depends on:
+
+* the entity ids named in the arguments or returned in the result — any
+  ``state_changed`` for one of them evicts the entry;
+* for listings, the domains they enumerate — an entity appearing in or
+  disappearing from one of those domains evicts the entry (a listing
+  without a domain filter is evicted by any such change).
+
+Invalidation runs inline on the client's receive path (the ``inline``
+subscriber policy), so no event is queued or dropped on the way. A client
+that only offers queued delivery is still followed; if its queue ever
+drops an event the whole cache is cleared, since the lost change cannot
+be attributed. A result naming more entities than can be tracked is not
+cached at all. A TTL backstops whatever events cannot express (registry
+edits) and an LRU bound caps memory. The cache only serves hits while it
+is attached to a live ``state_changed`` feed.
+"""
+from __future__ import annotations
+
+import copy
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, FrozenSet, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bounds the dependency scan of very large listings.
+_MAX_TRACKED_ENTITIES = 5000
+
+
+@dataclass
+class _Entry:
+    result: Dict[str, Any]
+    expires_at: float
+    entity_ids: FrozenSet[str]
+    domains: FrozenSet[str]
+    listing: bool
+
+
+@dataclass
+class _Stats:
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    stale_stores: int = 0
+    untracked_stores: int = 0
+    dropped_invalidations: int = 0
+    evictions: Dict[str, int] = field(default_factory=lambda: {
+        "state": 0, "structure": 0, "ttl": 0, "lru": 0, "mutation": 0, "reset": 0,
+        "dropped": 0,
+    })
+
+
+def result_dependencies(
+    arguments: Dict[str, Any],
+    result: Any,
+) -> Tuple[FrozenSet[str], FrozenSet[str], bool]:
+    """``(entity_ids, domains, listing)`` a tool result depends on."""
+    entity_ids: Set[str] = set()
+    for key in ("entity_id", "entity_ids"):
+        value = arguments.get(key)
+        if isinstance(value, str):
+            entity_ids.add(value)
+        elif isinstance(value, (list, tuple)):
+            entity_ids.update(v for v in value if isinstance(v, str))
+    domains: Set[str] = set()
+    for key in ("domain", "domains"):
+        value = arguments.get(key)
+        if isinstance(value, str) and value:
+            domains.add(value)
+        elif isinstance(value, (list, tuple)):
+            domains.update(v for v in value if isinstance(v, str) and v)
+    listing = False
+    stack = [result]
+    while stack and len(entity_ids) < _MAX_TRACKED_ENTITIES:
+        value = stack.pop()
+        if isinstance(value, dict):
+            entity_id = value.get("entity_id")
+            if isinstance(entity_id, str):
+                entity_ids.add(entity_id)
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            listing = True
+            stack.extend(value)
+    return frozenset(entity_ids), frozenset(domains), listing
+
+
+class SharedReadCache:
+    """LRU + TTL cache of tool results with event-driven invalidation."""
+
+    def __init__(
+        self,
+        *,
+        max_entries: int = 512,
+        ttl_seconds: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl_seconds = max(0.1, float(ttl_seconds))
+        self._clock = clock
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._by_entity: Dict[str, Set[str]] = {}
+        self._by_domain: Dict[str, Set[str]] = {}
+        self._any_structure: Set[str] = set()
+        self._stats = _Stats()
+        # Bumped on every invalidation; a store whose read started before
+        # the latest invalidation may hold stale data and is refused.
+        self.generation = 0
+        self._ha_client: Any = None
+        self._sub_id: Optional[int] = None
+        self._feed_dropped = 0
+
+    # ---- lifecycle -------------------------------------------------------
+    @property
+    def live(self) -> bool:
+        return self._sub_id is not None
+
+    async def attach(self, ha_client: Any) -> bool:
+        """Follow ``state_changed`` from ``ha_client``; idempotent."""
+        if self._sub_id is not None:
+            return True
+        try:
+            try:
+                self._sub_id = await ha_client.subscribe_state_changes(
+                    self._on_state_changed, overflow="inline",
+                )
+            except ValueError:
+                # No inline delivery: a queued feed, checked for drops.
+                self._sub_id = await ha_client.subscribe_state_changes(
+                    self._on_state_changed_async, overflow="coalesce",
+                )
+        except Exception as exc:
+            logger.warning("Shared read cache disabled; no state feed: %s", exc)
+            return False
+        self._ha_client = ha_client
+        self._feed_dropped = self._dropped_upstream()
+        # Anything cached before the feed existed cannot be trusted.
+        self.clear("reset")
+        return True
+
+    def detach(self) -> None:
+        if self._sub_id is not None and self._ha_client is not None:
+            try:
+                self._ha_client.unsubscribe(self._sub_id)
+            except KeyError:
+                pass
+        self._sub_id = None
+        self._ha_client = None
+        self.clear("reset")
+
+    # ---- reads and writes ------------------------------------------------
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not self.live:
+            return None
+        self._check_feed()
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats.misses += 1
+            return None
+        if entry.expires_at <= self._clock():
+            self._evict(key, "ttl")
+            self._stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self._stats.hits += 1
+        return copy.deepcopy(entry.result)
+
+    def put(
+        self,
+        key: str,
+        result: Dict[str, Any],
+        arguments: Dict[str, Any],
+        *,
+        generation: int,
+    ) -> bool:
+        """Store ``result``; ``generation`` is :attr:`generation` read before the call."""
+        if not self.live:
+            return False
+        if generation != self.generation:
+            self._stats.stale_stores += 1
+            return False
+        entity_ids, domains, listing = result_dependencies(arguments, result)
+        if len(entity_ids) >= _MAX_TRACKED_ENTITIES:
+            # The scan stopped early: a change to an untracked entity
+            # would not evict this entry.
+            self._stats.untracked_stores += 1
+            return False
+        if key in self._entries:
+            self._evict(key, None)
+        entry = _Entry(
+            result=copy.deepcopy(result),
+            expires_at=self._clock() + self.ttl_seconds,
+            entity_ids=entity_ids,
+            domains=domains,
+            listing=listing,
+        )
+        self._entries[key] = entry
+        for entity_id in entity_ids:
+            self._by_entity.setdefault(entity_id, set()).add(key)
+        if listing:
+            if domains:
+                for domain in domains:
+                    self._by_domain.setdefault(domain, set()).add(key)
+            else:
+                self._any_structure.add(key)
+        self._stats.stores += 1
+        while len(self._entries) > self.max_entries:
+            self._evict(next(iter(self._entries)), "lru")
+        return True
+
+    # ---- invalidation ----------------------------------------------------
+    def invalidate_entity(self, entity_id: str, *, structural: bool = False) -> int:
+        """Evict entries depending on ``entity_id``.
+
+        ``structural`` marks an entity being added or removed, which also
+        evicts listings of its domain.
+        """
+        self.generation += 1
+        keys = set(self._by_entity.get(entity_id, ()))
+        evicted = self._evict_all(keys, "state")
+        if structural:
+            domain = entity_id.split(".", 1)[0]
+            keys = set(self._by_domain.get(domain, ())) | self._any_structure
+            evicted += self._evict_all(keys, "structure")
+        return evicted
+
+    def clear(self, reason: str = "mutation") -> int:
+        self.generation += 1
+        return self._evict_all(list(self._entries), reason)
+
+    def _dropped_upstream(self) -> int:
+        stats_for = getattr(self._ha_client, "subscriber_stats", None)
+        if stats_for is None or self._sub_id is None:
+            return 0
+        return int((stats_for(self._sub_id) or {}).get("dropped", 0))
+
+    def _check_feed(self) -> None:
+        dropped = self._dropped_upstream()
+        if dropped > self._feed_dropped:
+            self._stats.dropped_invalidations += dropped - self._feed_dropped
+            self._feed_dropped = dropped
+            self.clear("dropped")
+
+    async def _on_state_changed_async(self, event: Dict[str, Any]) -> None:
+        self._on_state_changed(event)
+
+    def _on_state_changed(self, event: Dict[str, Any]) -> None:
+        data = event.get("data") or {}
+        entity_id = data.get("entity_id")
+        if not entity_id:
+            return
+        structural = data.get("old_state") is None or data.get("new_state") is None
+        self.invalidate_entity(entity_id, structural=structural)
+
+    def _evict_all(self, keys: Iterable[str], reason: str) -> int:
+        count = 0
+        for key in keys:
+            if key in self._entries:
+                self._evict(key, reason)
+                count += 1
+        return count
+
+    def _evict(self, key: str, reason: Optional[str]) -> None:
+        entry = self._entries.pop(key)
+        for entity_id in entry.entity_ids:
+            keys = self._by_entity.get(entity_id)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_entity[entity_id]
+        for domain in entry.domains:
+            keys = self._by_domain.get(domain)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_domain[domain]
+        self._any_structure.discard(key)
+        if reason is not None:
+            self._stats.evictions[reason] = self._stats.evictions.get(reason, 0) + 1
+
+    # ---- metrics ---------------------------------------------------------
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def info(self) -> Dict[str, Any]:
+        lookups = self._stats.hits + self._stats.misses
+        return {
+            "live": self.live,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self._stats.hits,
+            "misses": self._stats.misses,
+            "hit_ratio": round(self._stats.hits / lookups, 4) if lookups else 0.0,
+            "stores": self._stats.stores,
+            "stale_stores": self._stats.stale_stores,
+            "untracked_stores": self._stats.untracked_stores,
+            "dropped_invalidations": self._stats.dropped_invalidations,
+            "evictions": dict(self._stats.evictions),
+        }
@@ -0,0 +1,144 @@
+"""Goal-aware pruning of the tool schemas sent to the model.
+
+Every LLM call carries the full tool block: local MCP tools, the native
+``ha_*`` tools and whatever an external MCP server exposes. On a small
+local model that is thousands of prompt tokens per turn, most of them
+irrelevant to "turn off the kitchen lights".
+
+:class:`ToolSelector` keeps a keyword index over each tool's name,
+description, parameter names and enum values, and scores the goal against
+it with BM25. A run is offered the top-K tools plus a small always-on
+core. The harness widens back to the full set if the model asks for a tool
+it was not offered.
+
+The core tools always come first, so the start of the tool block is the
+same for every goal and stays a cacheable prompt prefix even though the
+rest of the selection changes from run to run.
+"""
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from typing import Any, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+_TOKEN_SPLIT = re.compile(r"[^a-z0-9]+")
+# Words that say nothing about which tool is wanted.
+_STOPWORDS = frozenset({
+    "a", "an", "and", "are", "as", "at", "be", "by", "can", "do", "for", "from",
+    "get", "i", "if", "in", "is", "it", "me", "my", "of", "on", "or", "please",
+    "set", "the", "this", "to", "what", "when", "with", "you",
+})
+# The tool name says more than its prose description.
+_NAME_WEIGHT = 3
+
+
+def _stem(token: str) -> str:
+    # Plural folding is enough for tool vocabularies ("lights" -> "light").
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def _terms(text: str) -> List[str]:
+    return [
+        _stem(t) for t in _TOKEN_SPLIT.split(text.lower())
+        if t and t not in _STOPWORDS
+    ]
+
+
+def _schema_name(schema: Dict[str, Any]) -> str:
+    return str((schema.get("function") or {}).get("name") or "")
+
+
+def _schema_terms(schema: Dict[str, Any]) -> Counter:
+    fn = schema.get("function") or {}
+    terms: Counter = Counter()
+    for term in _terms(str(fn.get("name") or "")):
+        terms[term] += _NAME_WEIGHT
+    terms.update(_terms(str(fn.get("description") or "")))
+    properties = ((fn.get("parameters") or {}).get("properties") or {})
+    for prop, spec in properties.items():
+        terms.update(_terms(str(prop)))
+        if isinstance(spec, dict):
+            terms.update(_terms(str(spec.get("description") or "")))
+            for value in spec.get("enum") or ():
+                terms.update(_terms(str(value)))
+    return terms
+
+
+class ToolSelector:
+    """BM25 ranking of tool schemas against a run's goal."""
+
+    def __init__(
+        self,
+        *,
+        top_k: int = 12,
+        core: Iterable[str] = (),
+        k1: float = 1.2,
+        b: float = 0.75,
+    ) -> None:
+        self.top_k = max(1, int(top_k))
+        self.core: FrozenSet[str] = frozenset(core)
+        self.k1 = k1
+        self.b = b
+        self._key: Optional[Tuple[int, ...]] = None
+        self._indexed: List[Dict[str, Any]] = []
+        self._docs: Dict[str, Counter] = {}
+        self._idf: Dict[str, float] = {}
+        self._avg_len = 1.0
+
+    def _index(self, schemas: List[Dict[str, Any]]) -> None:
+        # Schemas are rebuilt only when the registry changes (external MCP
+        # reconnects); their identities are a cheap change detector. The
+        # indexed list is kept alive so those ids cannot be reused.
+        key = tuple(id(s) for s in schemas)
+        if key == self._key:
+            return
+        self._docs = {_schema_name(s): _schema_terms(s) for s in schemas}
+        df: Counter = Counter()
+        for terms in self._docs.values():
+            df.update(terms.keys())
+        n = max(1, len(self._docs))
+        self._idf = {
+            term: math.log(1 + (n - count + 0.5) / (count + 0.5))
+            for term, count in df.items()
+        }
+        self._avg_len = max(1.0, sum(sum(t.values()) for t in self._docs.values()) / n)
+        self._key = key
+        self._indexed = list(schemas)
+
+    def rank(self, goal: str, schemas: List[Dict[str, Any]]) -> List[Tuple[str, float]]:
+        """``(name, score)`` for every tool that shares a term with ``goal``."""
+        self._index(schemas)
+        query: Set[str] = set(_terms(goal))
+        scored: List[Tuple[str, float]] = []
+        for name, terms in self._docs.items():
+            length = sum(terms.values())
+            score = 0.0
+            for term in query & terms.keys():
+                tf = terms[term]
+                norm = tf + self.k1 * (1 - self.b + self.b * length / self._avg_len)
+                score += self._idf[term] * tf * (self.k1 + 1) / norm
+            if score > 0:
+                scored.append((name, score))
+        scored.sort(key=lambda item: (-item[1], item[0]))
+        return scored
+
+    def order(self, schemas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The core tools first, then the rest, each in registry order."""
+        core = [s for s in schemas if _schema_name(s) in self.core]
+        return core + [s for s in schemas if _schema_name(s) not in self.core]
+
+    def select(self, goal: str, schemas: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """The core tools plus the ``top_k`` best matches, in :meth:`order`.
+
+        Small registries, and goals that match nothing, get every schema.
+        """
+        if len(schemas) <= self.top_k + len(self.core):
+            return self.order(schemas)
+        ranked = self.rank(goal, schemas)
+        if not ranked:
+            return self.order(schemas)
+        keep = {name for name, _ in ranked[:self.top_k]} | self.core
+        return self.order([s for s in schemas if _schema_name(s) in keep])
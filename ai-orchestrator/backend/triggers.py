@@ -333,7 +333,7 @@ def _row_to_trigger(row: sqlite3.Row) -> TriggerSpec:
         cron=row["cron"], entity_id=row["entity_id"],
         state_pattern=row["state_pattern"],
         sustained_seconds=int(row["sustained_seconds"] or 0),
-        cooldown_seconds=int(row["cooldown_seconds"] or 600),
+        cooldown_seconds=int(row["cooldown_seconds"]),
         mode=row["mode"] or "auto",
         extra_context=json.loads(extras_raw) if extras_raw else {},
         created_at=row["created_at"],
@@ -542,16 +542,22 @@ class TriggerRegistry:
             return
         watched = sorted({s.entity_id for s in self.store.list(enabled_only=True)
                           if s.type == "state" and s.entity_id})
+        if self._state_sub_id is not None:
+            # Already routed; the client re-targets the subscription
+            # locally (and keeps it alive across reconnects).
+            set_watched = getattr(self.ha_client, "set_watched_entities", None)
+            if callable(set_watched):
+                try:
+                    set_watched(self._state_sub_id, watched)
+                except KeyError:
+                    self._state_sub_id = None
+            if self._state_sub_id is not None:
+                return
         if not watched:
             return
         if not getattr(self.ha_client, "connected", False):
             logger.debug("HA client not connected; deferring state-subscription refresh")
             return
-        if self._state_sub_id is not None:
-            # Already subscribed to state_changed (HA fires it for every
-            # entity); we just update the in-memory watched-set via the
-            # store. No need to resubscribe.
-            return
         try:
             self._state_sub_id = await self.ha_client.subscribe_entities(
                 entity_ids=watched,
@@ -137,6 +137,27 @@ export function ReasoningPanel({ initialGoal = '', onRunComplete, onOpenPlans })
         ...event,
     }]);
 
+    const isStreamingModel = (event, iteration) => (
+        event.type === 'model' && event.streaming && event.iteration === iteration
+    );
+
+    const appendToken = payload => setEvents(previous => {
+        const index = previous.findIndex(event => isStreamingModel(event, payload.iteration));
+        if (index === -1) {
+            return [...previous, {
+                id: `${Date.now()}-${previous.length}`,
+                type: 'model',
+                iteration: payload.iteration,
+                content: payload.delta || '',
+                streaming: true,
+                status: 'running',
+            }];
+        }
+        const next = [...previous];
+        next[index] = { ...next[index], content: next[index].content + (payload.delta || '') };
+        return next;
+    });
+
     const handleStreamEvent = (eventType, payload) => {
         if (eventType === 'start') {
             setPhase(payload.profile === 'rapid' ? 'Checking current state' : 'Observing the home');
@@ -150,8 +171,13 @@ export function ReasoningPanel({ initialGoal = '', onRunComplete, onOpenPlans })
                     : 'No previous run was needed for this goal.',
                 status: 'complete',
             });
+        } else if (eventType === 'token') {
+            setPhase('Reasoning over observations');
+            appendToken(payload);
         } else if (eventType === 'thought') {
             setPhase('Reasoning over observations');
+            // The complete thought replaces whatever was streamed for this iteration.
+            setEvents(previous => previous.filter(event => !isStreamingModel(event, payload.iteration)));
             appendEvent({
                 type: 'model',
                 iteration: payload.iteration,